@@ -0,0 +1,75 @@
+"""Store each file's parent directory for SQL directory rollups.
+
+Revision ID: 20261019_file_directory
+Revises: 20261019_scan_summaries
+Create Date: 2026-10-19
+"""
+
+from pathlib import PurePosixPath
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261019_file_directory"
+down_revision = "20261019_scan_summaries"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "files" not in inspector.get_table_names():
+        return
+
+    columns = {column["name"] for column in inspector.get_columns("files")}
+    if "directory" not in columns:
+        op.add_column("files", sa.Column("directory", sa.Text(), nullable=True))
+
+    if bind.dialect.name == "postgresql":
+        op.execute(
+            "UPDATE files SET directory = CASE WHEN strpos(file_path, '/') > 0 "
+            "THEN regexp_replace(file_path, '/[^/]*$', '') ELSE '' END "
+            "WHERE directory IS NULL"
+        )
+    else:
+        _backfill_directories(bind)
+
+    indexes = {index["name"] for index in inspector.get_indexes("files")}
+    if "idx_files_scan_directory" not in indexes:
+        op.create_index("idx_files_scan_directory", "files", ["scan_id", "directory"])
+
+
+def _backfill_directories(bind) -> None:
+    select_batch = sa.text("SELECT id, file_path FROM files WHERE directory IS NULL LIMIT :limit")
+    update_row = sa.text("UPDATE files SET directory = :directory WHERE id = :id")
+    while rows := bind.execute(select_batch, {"limit": BACKFILL_BATCH_SIZE}).all():
+        bind.execute(
+            update_row,
+            [
+                {"id": file_id, "directory": _parent_directory(file_path)}
+                for file_id, file_path in rows
+            ],
+        )
+
+
+def _parent_directory(file_path: str) -> str:
+    parent = PurePosixPath(file_path).parent.as_posix()
+    return "" if parent == "." else parent
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "files" not in inspector.get_table_names():
+        return
+
+    indexes = {index["name"] for index in inspector.get_indexes("files")}
+    if "idx_files_scan_directory" in indexes:
+        op.drop_index("idx_files_scan_directory", table_name="files")
+    columns = {column["name"] for column in inspector.get_columns("files")}
+    if "directory" in columns:
+        op.drop_column("files", "directory")
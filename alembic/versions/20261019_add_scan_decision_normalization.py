@@ -0,0 +1,41 @@
+"""Store percentile normalization tables of decision scoring with each scan.
+
+Revision ID: 20261019_decision_norm
+Revises: 20260717_scan_cascade
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "20261019_decision_norm"
+down_revision = "20260717_scan_cascade"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "scans" not in inspector.get_table_names():
+        return
+
+    columns = {column["name"] for column in inspector.get_columns("scans")}
+    if "decision_normalization" not in columns:
+        op.add_column(
+            "scans",
+            sa.Column("decision_normalization", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "scans" not in inspector.get_table_names():
+        return
+
+    columns = {column["name"] for column in inspector.get_columns("scans")}
+    if "decision_normalization" in columns:
+        op.drop_column("scans", "decision_normalization")
@@ -0,0 +1,61 @@
+"""Denormalize project ownership onto scans.
+
+Revision ID: 20261019_scan_owner
+Revises: 20261019_file_directory
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261019_scan_owner"
+down_revision = "20261019_file_directory"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "scans" not in inspector.get_table_names():
+        return
+
+    columns = {column["name"] for column in inspector.get_columns("scans")}
+    if "owner_id" not in columns:
+        op.add_column("scans", sa.Column("owner_id", sa.UUID(), nullable=True))
+        op.execute(
+            "UPDATE scans SET owner_id = "
+            "(SELECT projects.user_id FROM projects WHERE projects.id = scans.project_id) "
+            "WHERE owner_id IS NULL"
+        )
+        op.alter_column("scans", "owner_id", existing_type=sa.UUID(), nullable=False)
+        op.create_foreign_key(
+            "fk_scans_owner_id_users",
+            "scans",
+            "users",
+            ["owner_id"],
+            ["id"],
+            ondelete="CASCADE",
+        )
+
+    indexes = {index["name"] for index in inspector.get_indexes("scans")}
+    if "ix_scans_owner_created_at" not in indexes:
+        op.create_index("ix_scans_owner_created_at", "scans", ["owner_id", "created_at"])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "scans" not in inspector.get_table_names():
+        return
+
+    indexes = {index["name"] for index in inspector.get_indexes("scans")}
+    if "ix_scans_owner_created_at" in indexes:
+        op.drop_index("ix_scans_owner_created_at", table_name="scans")
+    columns = {column["name"] for column in inspector.get_columns("scans")}
+    if "owner_id" in columns:
+        foreign_keys = {key["name"] for key in inspector.get_foreign_keys("scans")}
+        if "fk_scans_owner_id_users" in foreign_keys:
+            op.drop_constraint("fk_scans_owner_id_users", "scans", type_="foreignkey")
+        op.drop_column("scans", "owner_id")
@@ -0,0 +1,56 @@
+"""Add per-scan summaries of file scores for the overview endpoints.
+
+Revision ID: 20261019_scan_summaries
+Revises: 20261019_decision_norm
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "20261019_scan_summaries"
+down_revision = "20261019_decision_norm"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "scan_summaries" in inspector.get_table_names():
+        return
+
+    op.create_table(
+        "scan_summaries",
+        sa.Column("scan_id", sa.UUID(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("file_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("scored_file_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column(
+            "priority_band_counts",
+            postgresql.JSONB(astext_type=sa.Text()),
+            server_default=sa.text("'{}'::jsonb"),
+            nullable=False,
+        ),
+        sa.Column("average_refactor_score", sa.Float(), nullable=True),
+        sa.Column("max_refactor_score", sa.Numeric(6, 5), nullable=True),
+        sa.Column("duration_seconds", sa.Float(), nullable=True),
+        sa.Column(
+            "top_files",
+            postgresql.JSONB(astext_type=sa.Text()),
+            server_default=sa.text("'[]'::jsonb"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["scan_id"], ["scans.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("scan_id"),
+    )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if "scan_summaries" not in sa.inspect(bind).get_table_names():
+        return
+    op.drop_table("scan_summaries")
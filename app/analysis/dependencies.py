@@ -6,11 +6,23 @@ from contextlib import contextmanager
 from fastapi import Depends
 from sqlalchemy.orm import Session
 
+from app.analysis.scan_rescoring_service import ScanRescoringService
 from app.analysis.scan_result_repository import ScanResultRepository
 from app.analysis.services.scan_engine.pipeline.scan_workspace import (
     ScanWorkspaceService,
 )
-from app.analysis.services.scan_engine.pipeline.code_embedding_service import CodeEmbeddingService
+from app.analysis.services.scan_engine.pipeline.code_embedding_service import (
+    CodeEmbeddingProvider,
+    CodeEmbeddingService,
+)
+from app.analysis.services.scan_engine.pipeline.embedding_inference_server import EmbeddingInferenceClient
+from app.analysis.services.scan_engine.pipeline.quantized_code_embedding_service import (
+    QuantizedCodeEmbeddingService,
+)
+from app.analysis.services.scan_engine.pipeline.clone_index import CrossProjectCloneIndex
+from app.analysis.services.scan_engine.pipeline.cpu_budget import CpuBudget, default_cpu_budget
+from app.analysis.services.scan_engine.pipeline.embedding_model_registry import EmbeddingModelRegistry
+from app.analysis.services.scan_engine.pipeline.import_index import ImportCache
 from app.analysis.services.scan_engine.scan_engine_service import ScanEngineService
 from app.config import settings
 from app.core.database import SessionLocal, get_db
@@ -51,28 +63,125 @@ def get_static_analysis_layer() -> StaticAnalysisLayer:
 def get_history_analysis_layer() -> HistoryAnalysisLayer:
     return HistoryAnalysisLayer()
 
+def get_cpu_budget() -> CpuBudget:
+    # ScanPipeline.run finishes the stage-1 pool before embedding starts, and
+    # each worker process runs one scan at a time, so the stages never overlap.
+    budget = default_cpu_budget(
+        worker_processes=settings.SCAN_WORKER_PROCESSES_PER_HOST,
+        overlapping_stages=False,
+    )
+    return CpuBudget(
+        cpu_count=budget.cpu_count,
+        pipeline_workers=settings.SCAN_PIPELINE_MAX_WORKERS or budget.pipeline_workers,
+        torch_intra_op_threads=settings.CODE_EMBEDDING_TORCH_THREADS or budget.torch_intra_op_threads,
+        torch_inter_op_threads=settings.CODE_EMBEDDING_TORCH_INTEROP_THREADS or budget.torch_inter_op_threads,
+    )
+
+# One registry per process: Celery tasks build fresh services, but the loaded
+# model stays resident in the worker between scans.
+_embedding_model_registry = EmbeddingModelRegistry(
+    idle_unload_seconds=settings.CODE_EMBEDDING_IDLE_UNLOAD_SECONDS,
+    max_resident_bytes=(
+        settings.CODE_EMBEDDING_MAX_RESIDENT_MB * 1024 * 1024
+        if settings.CODE_EMBEDDING_MAX_RESIDENT_MB is not None
+        else None
+    ),
+)
+
+def get_embedding_model_registry() -> EmbeddingModelRegistry:
+    return _embedding_model_registry
+
+# Shared by the API (queries) and the scan workers (staging and publishing);
+# each process keeps its own cache of memory-mapped segments.
+_clone_index = (
+    CrossProjectCloneIndex(
+        settings.CLONE_INDEX_DIR,
+        nlist=settings.CLONE_INDEX_NLIST,
+        nprobe=settings.CLONE_INDEX_NPROBE,
+    )
+    if settings.CLONE_INDEX_DIR is not None
+    else None
+)
+
+def get_clone_index() -> CrossProjectCloneIndex | None:
+    return _clone_index
+
+# Extracted imports survive between scans in a worker, so a rescan only parses
+# files whose content changed.
+_import_cache = ImportCache(max_entries=settings.ARCHITECTURE_IMPORT_CACHE_SIZE)
+
+def get_import_cache() -> ImportCache:
+    return _import_cache
+
+def preload_code_embedding_model() -> None:
+    if settings.CODE_EMBEDDING_SERVER_SOCKET is not None:
+        # The dedicated inference server owns the model on this host.
+        return
+    build_code_embedding_service().preload()
+
 def build_code_embedding_service() -> CodeEmbeddingService:
-    return CodeEmbeddingService(
+    cpu_budget = get_cpu_budget()
+    service_class = (
+        QuantizedCodeEmbeddingService
+        if settings.CODE_EMBEDDING_BACKEND == "int8"
+        else CodeEmbeddingService
+    )
+    return service_class(
         model_id=settings.CODE_EMBEDDING_MODEL_ID,
         model_path=settings.CODE_EMBEDDING_MODEL_PATH,
         batch_size=settings.CODE_EMBEDDING_BATCH_SIZE,
+        token_budget=settings.CODE_EMBEDDING_TOKEN_BUDGET,
         device=settings.CODE_EMBEDDING_DEVICE,
         max_length=settings.CODE_EMBEDDING_MAX_LENGTH,
+        chunk_length=settings.CODE_EMBEDDING_CHUNK_LENGTH,
+        chunk_overlap=settings.CODE_EMBEDDING_CHUNK_OVERLAP,
+        max_chunks=settings.CODE_EMBEDDING_MAX_CHUNKS,
         trust_remote_code=settings.CODE_EMBEDDING_TRUST_REMOTE_CODE,
         local_files_only=settings.CODE_EMBEDDING_LOCAL_FILES_ONLY,
+        model_registry=get_embedding_model_registry(),
+        torch_threads=cpu_budget.torch_intra_op_threads,
+        torch_interop_threads=cpu_budget.torch_inter_op_threads,
     )
 
+def build_code_embedding_provider() -> CodeEmbeddingProvider:
+    if settings.CODE_EMBEDDING_SERVER_SOCKET is not None:
+        return EmbeddingInferenceClient(
+            socket_path=settings.CODE_EMBEDDING_SERVER_SOCKET,
+            timeout_seconds=settings.CODE_EMBEDDING_SERVER_TIMEOUT_SECONDS,
+        )
+    return build_code_embedding_service()
+
 def get_duplication_analysis_layer() -> DuplicationAnalysisLayer:
     return DuplicationAnalysisLayer(
-        embedding_service=build_code_embedding_service(),
+        embedding_service=build_code_embedding_provider(),
         semantic_similarity_threshold=settings.SEMANTIC_DUPLICATION_SIMILARITY_THRESHOLD,
+        clone_class_similarity_threshold=settings.DUPLICATION_CLONE_CLASS_SIMILARITY_THRESHOLD,
+        semantic_skip_syntax_similarity=settings.SEMANTIC_DUPLICATION_SKIP_SYNTAX_SIMILARITY,
+        max_blocks_per_file=settings.DUPLICATION_MAX_BLOCKS_PER_FILE,
+        block_scale_file_lines=settings.DUPLICATION_BLOCK_SCALE_FILE_LINES,
+        generated_code_markers=(
+            DuplicationAnalysisLayer.DEFAULT_GENERATED_CODE_MARKERS
+            if settings.DUPLICATION_EXCLUDE_GENERATED_FILES
+            else None
+        ),
     )
 
 def get_architecture_analysis_layer() -> ArchitectureAnalysisLayer:
-    return ArchitectureAnalysisLayer()
+    return ArchitectureAnalysisLayer(
+        betweenness_strategy=settings.ARCHITECTURE_BETWEENNESS_STRATEGY,
+        betweenness_sample_size=settings.ARCHITECTURE_BETWEENNESS_SAMPLE_SIZE,
+        betweenness_exact_max_nodes=settings.ARCHITECTURE_BETWEENNESS_EXACT_MAX_NODES,
+        betweenness_seed=settings.ARCHITECTURE_BETWEENNESS_SEED,
+        betweenness_processes=settings.ARCHITECTURE_BETWEENNESS_PROCESSES,
+        betweenness_refresh_delta=settings.ARCHITECTURE_BETWEENNESS_REFRESH_DELTA,
+        import_cache=get_import_cache(),
+    )
 
-def get_decision_analysis_layer() -> DecisionAnalysisLayer: 
-    return DecisionAnalysisLayer()
+def get_decision_analysis_layer() -> DecisionAnalysisLayer:
+    return DecisionAnalysisLayer(
+        normalization_mode=settings.DECISION_NORMALIZATION_MODE,
+        quantile_points=settings.DECISION_QUANTILE_POINTS,
+    )
 
 def get_scan_result_repository(
     db: Session = Depends(get_db),
@@ -96,6 +205,8 @@ def get_scan_pipeline(
         decision_layer=decision_layer,
         visualization_storage=visualization_repository,
         analysis_storage=analysis_repository,
+        max_workers=get_cpu_budget().pipeline_workers,
+        clone_index=get_clone_index(),
     )
 
 def get_scan_engine_service(
@@ -119,11 +230,20 @@ def build_scan_pipeline(
     static_layer = StaticAnalysisLayer()
     history_layer = HistoryAnalysisLayer()
     duplication_layer = DuplicationAnalysisLayer(
-        embedding_service=build_code_embedding_service(),
+        embedding_service=build_code_embedding_provider(),
         semantic_similarity_threshold=settings.SEMANTIC_DUPLICATION_SIMILARITY_THRESHOLD,
+        clone_class_similarity_threshold=settings.DUPLICATION_CLONE_CLASS_SIMILARITY_THRESHOLD,
+        semantic_skip_syntax_similarity=settings.SEMANTIC_DUPLICATION_SKIP_SYNTAX_SIMILARITY,
+        max_blocks_per_file=settings.DUPLICATION_MAX_BLOCKS_PER_FILE,
+        block_scale_file_lines=settings.DUPLICATION_BLOCK_SCALE_FILE_LINES,
+        generated_code_markers=(
+            DuplicationAnalysisLayer.DEFAULT_GENERATED_CODE_MARKERS
+            if settings.DUPLICATION_EXCLUDE_GENERATED_FILES
+            else None
+        ),
     )
-    architectural_layer = ArchitectureAnalysisLayer()
-    decision_layer = DecisionAnalysisLayer()
+    architectural_layer = get_architecture_analysis_layer()
+    decision_layer = get_decision_analysis_layer()
 
     return ScanPipeline(
         static_layer=static_layer,
@@ -133,6 +253,8 @@ def build_scan_pipeline(
         decision_layer=decision_layer,
         visualization_storage=visualization_repository,
         analysis_storage=analysis_repository,
+        max_workers=get_cpu_budget().pipeline_workers,
+        clone_index=get_clone_index(),
     )
 
 def build_scan_engine_service(db: Session) -> ScanEngineService:
@@ -164,3 +286,20 @@ def provide_scan_engine_service() -> Iterator[ScanEngineService]:
         yield build_scan_engine_service(db)
     finally:
         db.close()
+
+
+def build_scan_rescoring_service(db: Session) -> ScanRescoringService:
+    return ScanRescoringService(
+        repository=ScanResultRepository(db),
+        decision_layer=get_decision_analysis_layer(),
+        batch_size=settings.SCAN_RESCORING_BATCH_SIZE,
+    )
+
+
+@contextmanager
+def provide_scan_rescoring_service() -> Iterator[ScanRescoringService]:
+    db = SessionLocal()
+    try:
+        yield build_scan_rescoring_service(db)
+    finally:
+        db.close()
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import logging
+import uuid
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from time import perf_counter
+
+from sqlalchemy import Row
+
+from app.analysis.scan_result_repository import ScanResultRepository
+from app.analysis.services.scan_engine.pipeline.decision_scoring import NormalizationTables
+from app.analysis.services.scan_engine.pipeline.layers.decision_analysis_layer import (
+    DecisionAnalysisLayer,
+    DecisionScores,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class RescoringSummary:
+    scoring_model_version: int
+    scan_count: int = 0
+    file_count: int = 0
+    failed_scan_ids: list[uuid.UUID] = field(default_factory=list)
+
+
+class ScanRescoringService:
+    """Re-runs the decision layer on stored scan metrics without re-analysing code."""
+
+    def __init__(
+        self,
+        repository: ScanResultRepository,
+        decision_layer: DecisionAnalysisLayer,
+        batch_size: int = 2000,
+    ) -> None:
+        if batch_size < 1:
+            raise ValueError("Rescoring batch size must be positive")
+
+        self._repository = repository
+        self._decision_layer = decision_layer
+        self._batch_size = batch_size
+
+    def rescore_scan(self, scan_id: uuid.UUID) -> int:
+        """Rescore one scan's files, returning how many were updated.
+
+        Percentile mode ranks files against the quantile tables stored with
+        the scan; a scan without tables keeps the saturation scoring, since
+        streamed batches cannot rebuild the distribution of the whole scan.
+        """
+        started = perf_counter()
+        normalization = (
+            self._repository.load_decision_normalization(scan_id)
+            if self._decision_layer.normalization_mode == "percentile"
+            else None
+        )
+        file_count = self._repository.rescore_scan_files(
+            scan_id,
+            lambda rows: self._rescore_rows(rows, normalization),
+            batch_size=self._batch_size,
+        )
+        logger.info(
+            "[RESCORING] scan_id=%s files=%d scoring_model_version=%d duration=%.2fs",
+            scan_id,
+            file_count,
+            self._decision_layer.SCORING_MODEL_VERSION,
+            perf_counter() - started,
+        )
+        return file_count
+
+    def rescore_scans(self, project_id: uuid.UUID | None = None) -> RescoringSummary:
+        """Rescore every succeeded scan, or those of one project.
+
+        Each scan commits on its own, so a failing scan is logged and skipped
+        without undoing the others.
+        """
+        summary = RescoringSummary(scoring_model_version=self._decision_layer.SCORING_MODEL_VERSION)
+        for scan_id in self._repository.list_rescorable_scan_ids(project_id):
+            try:
+                summary.file_count += self.rescore_scan(scan_id)
+            except Exception:
+                logger.exception("[RESCORING FAILED] scan_id=%s", scan_id)
+                summary.failed_scan_ids.append(scan_id)
+                continue
+            summary.scan_count += 1
+        return summary
+
+    def _rescore_rows(
+        self,
+        rows: Sequence[Row],
+        normalization: NormalizationTables | None,
+    ) -> list[DecisionScores]:
+        return self._decision_layer.rescore_stored(
+            [(row.file_path, row.metrics or {}, row.errors or {}) for row in rows],
+            normalization,
+        )
@@ -3,28 +3,40 @@ from __future__ import annotations
 import os
 import uuid
 from dataclasses import asdict, is_dataclass
+from datetime import datetime, timezone
 from decimal import Decimal
 from math import isfinite
 from pathlib import Path
+from collections.abc import Callable, Sequence
 from typing import Any
 
-from sqlalchemy import delete, select
+from sqlalchemy import Row, case, delete, func, select, update
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
+from app.analysis.services.scan_engine.pipeline.decision_scoring import NormalizationTables
+from app.analysis.services.scan_engine.pipeline.incremental_dependency_graph import DependencyGraphSnapshot
+from app.analysis.services.scan_engine.pipeline.layers.decision_analysis_layer import DecisionScores
 from app.analysis.services.scan_engine.pipeline.metrics_vector import (
     LayerResult,
     validate_relative_path,
 )
+from app.core.constants import SCAN_SUMMARY_TOP_FILE_COUNT
+from app.core.enums import ScanStatus
 from app.core.exceptions.repository_exceptions import DatabaseOperationException
 from app.models import (
     CircularDependencyGroup,
     CircularDependencyMember,
     CoChangeEdge,
     DependencyEdge,
+    Scan,
     ScanFile,
+    ScanSummary,
 )
 
+ARCHITECTURE_LAYER = "architecture_analysis"
+DECISION_LAYER = "decision_analysis"
+
 
 class ScanResultRepository:
     def __init__(self, db: Session) -> None:
@@ -88,6 +100,8 @@ class ScanResultRepository:
             self._store_dependency_edges(scan_id, architecture_metadata, file_by_path)
             self._store_circular_dependency_groups(scan_id, architecture_metadata, file_by_path)
             self._store_co_change_edges(scan_id, result, file_by_path)
+            self._store_decision_normalization(scan_id, result)
+            self._store_scan_summary(scan_id)
 
             self._db.commit()
             return records
@@ -98,6 +112,178 @@ class ScanResultRepository:
                 details={"scan_id": str(scan_id), "file_count": len(records)},
             ) from exc
 
+    def load_dependency_snapshot(
+        self,
+        project_id: uuid.UUID,
+        *,
+        exclude_scan_id: uuid.UUID | None = None,
+    ) -> DependencyGraphSnapshot | None:
+        """Dependency graph of the project's latest successful scan.
+
+        Returns ``None`` when there is no such scan or its architecture
+        results are incomplete, e.g. stored before content hashes existed.
+        """
+        try:
+            query = select(Scan.id).where(
+                Scan.project_id == project_id,
+                Scan.status == ScanStatus.SUCCEEDED,
+            )
+            if exclude_scan_id is not None:
+                query = query.where(Scan.id != exclude_scan_id)
+            previous_scan_id = self._db.execute(
+                query.order_by(Scan.created_at.desc()).limit(1)
+            ).scalar_one_or_none()
+            if previous_scan_id is None:
+                return None
+
+            files = self._db.execute(
+                select(ScanFile.id, ScanFile.file_path, ScanFile.metrics, ScanFile.metadata_json)
+                .where(ScanFile.scan_id == previous_scan_id)
+            ).all()
+            edges = self._db.execute(
+                select(DependencyEdge.source_file_id, DependencyEdge.target_file_id)
+                .where(DependencyEdge.scan_id == previous_scan_id)
+            ).all()
+        except SQLAlchemyError as exc:
+            raise DatabaseOperationException(
+                "Failed to load previous dependency graph",
+                details={"project_id": str(project_id)},
+            ) from exc
+
+        return self._dependency_snapshot(files, edges)
+
+    def load_decision_normalization(self, scan_id: uuid.UUID) -> NormalizationTables | None:
+        """Quantile tables a percentile-mode scan was scored with, if any."""
+        try:
+            payload = self._db.execute(
+                select(Scan.decision_normalization).where(Scan.id == scan_id)
+            ).scalar_one_or_none()
+        except SQLAlchemyError as exc:
+            raise DatabaseOperationException(
+                "Failed to load decision normalization tables",
+                details={"scan_id": str(scan_id)},
+            ) from exc
+
+        if not isinstance(payload, dict) or not isinstance(payload.get("tables"), dict):
+            return None
+        return NormalizationTables.from_json(payload["tables"])
+
+    def list_rescorable_scan_ids(self, project_id: uuid.UUID | None = None) -> list[uuid.UUID]:
+        """Succeeded scans, oldest first, optionally of one project."""
+        query = select(Scan.id).where(Scan.status == ScanStatus.SUCCEEDED)
+        if project_id is not None:
+            query = query.where(Scan.project_id == project_id)
+        try:
+            return list(self._db.execute(query.order_by(Scan.created_at, Scan.id)).scalars().all())
+        except SQLAlchemyError as exc:
+            raise DatabaseOperationException(
+                "Failed to list scans for rescoring",
+                details={"project_id": str(project_id) if project_id else None},
+            ) from exc
+
+    def rescore_scan_files(
+        self,
+        scan_id: uuid.UUID,
+        rescore: Callable[[Sequence[Row]], Sequence[DecisionScores]],
+        *,
+        batch_size: int = 2000,
+    ) -> int:
+        """Stream a scan's files through ``rescore`` and bulk-update the results.
+
+        Rows carry ``id``, ``file_path``, ``metrics``, ``metadata_json`` and
+        ``errors`` and are fetched ``batch_size`` at a time through a
+        server-side cursor.  ``rescore`` returns one decision result per row,
+        which replaces the row's score columns and decision layer entries.
+        The scan is committed once, after the cursor is drained, together
+        with its refreshed summary.
+        """
+        updated = 0
+        try:
+            rows = self._db.execute(
+                select(ScanFile.id, ScanFile.file_path, ScanFile.metrics, ScanFile.metadata_json, ScanFile.errors)
+                .where(ScanFile.scan_id == scan_id)
+                .order_by(ScanFile.id)
+                .execution_options(yield_per=batch_size)
+            )
+            for batch in rows.partitions():
+                updates = [
+                    self._rescored_payload(row, scores)
+                    for row, scores in zip(batch, rescore(batch), strict=True)
+                ]
+                if updates:
+                    self._db.execute(update(ScanFile), updates)
+                    updated += len(updates)
+            self._store_scan_summary(scan_id)
+            self._db.commit()
+        except SQLAlchemyError as exc:
+            self._db.rollback()
+            raise DatabaseOperationException(
+                "Failed to rescore scan files",
+                details={"scan_id": str(scan_id), "updated_count": updated},
+            ) from exc
+        return updated
+
+    def _dependency_snapshot(self, files: list[Any], edges: list[Any]) -> DependencyGraphSnapshot | None:
+        path_by_id: dict[uuid.UUID, str] = {}
+        content_hashes: dict[str, str | None] = {}
+        transitive_dependents: dict[str, int] = {}
+        betweenness: dict[str, float] = {}
+        type_only_edges: set[tuple[str, str]] = set()
+        graph_metadata: dict[str, Any] | None = None
+
+        for file_id, file_path, metrics, metadata in files:
+            layer_metrics = (metrics or {}).get(ARCHITECTURE_LAYER)
+            layer_metadata = (metadata or {}).get(ARCHITECTURE_LAYER)
+            if not isinstance(layer_metrics, dict) or not isinstance(layer_metadata, dict):
+                return None
+            transitive_count = layer_metrics.get("transitive_dependents_count")
+            centrality = layer_metrics.get("betweenness_centrality")
+            if "content_hash" not in layer_metadata or transitive_count is None or centrality is None:
+                return None
+
+            path_by_id[file_id] = file_path
+            content_hashes[file_path] = layer_metadata["content_hash"]
+            transitive_dependents[file_path] = int(transitive_count)
+            betweenness[file_path] = float(centrality)
+            type_only_edges.update(
+                (file_path, str(target))
+                for target in layer_metadata.get("type_only_dependencies", [])
+            )
+            graph_metadata = graph_metadata or layer_metadata
+
+        if graph_metadata is None:
+            return None
+
+        named_edges = frozenset(
+            (path_by_id[source_id], path_by_id[target_id])
+            for source_id, target_id in edges
+            if source_id in path_by_id and target_id in path_by_id
+        )
+        return DependencyGraphSnapshot(
+            content_hashes=content_hashes,
+            edges=named_edges,
+            type_only_edges=frozenset(type_only_edges & named_edges),
+            sccs=self._snapshot_components(graph_metadata.get("sccs"), content_hashes),
+            runtime_sccs=self._snapshot_components(graph_metadata.get("runtime_sccs"), content_hashes),
+            transitive_dependents=transitive_dependents,
+            betweenness=betweenness,
+            betweenness_drift=float(graph_metadata.get("betweenness_drift") or 0.0),
+        )
+
+    def _snapshot_components(
+        self,
+        groups: Any,
+        known_paths: dict[str, str | None],
+    ) -> tuple[tuple[str, ...], ...]:
+        components = []
+        for group in groups or []:
+            if not isinstance(group, dict):
+                continue
+            nodes = tuple(node for node in group.get("nodes", []) if node in known_paths)
+            if len(nodes) > 1:
+                components.append(nodes)
+        return tuple(components)
+
     def _file_payloads(
         self,
         *,
@@ -120,16 +306,42 @@ class ScanResultRepository:
             if vector.errors:
                 payload["errors"][vector.layer] = self._json_safe(vector.errors)
 
-            if vector.layer == "decision_analysis":
-                score = vector.metrics.get("refactor_score")
-                if score is not None:
-                    payload["refactor_score"] = Decimal(str(round(float(score), 5)))
-                priority_band = vector.metadata.get("priority_band")
-                if priority_band is not None:
-                    payload["priority_band"] = str(priority_band)
+            if vector.layer == DECISION_LAYER:
+                payload["refactor_score"], payload["priority_band"] = self._score_columns(
+                    vector.metrics,
+                    vector.metadata,
+                )
 
         return payloads
 
+    def _rescored_payload(self, row: Row, scores: DecisionScores) -> dict[str, Any]:
+        metrics = {**(row.metrics or {}), DECISION_LAYER: self._json_safe(scores.metrics)}
+        metadata = {**(row.metadata_json or {}), DECISION_LAYER: self._json_safe(scores.metadata)}
+        errors = {layer: layer_errors for layer, layer_errors in (row.errors or {}).items() if layer != DECISION_LAYER}
+        if scores.errors:
+            errors[DECISION_LAYER] = self._json_safe(scores.errors)
+        refactor_score, priority_band = self._score_columns(scores.metrics, scores.metadata)
+        return {
+            "id": row.id,
+            "refactor_score": refactor_score,
+            "priority_band": priority_band,
+            "metrics": metrics,
+            "metadata_json": metadata,
+            "errors": errors,
+        }
+
+    def _score_columns(
+        self,
+        metrics: dict[str, Any],
+        metadata: dict[str, Any],
+    ) -> tuple[Decimal | None, str | None]:
+        score = metrics.get("refactor_score")
+        priority_band = metadata.get("priority_band")
+        return (
+            Decimal(str(round(float(score), 5))) if score is not None else None,
+            str(priority_band) if priority_band is not None else None,
+        )
+
     def _empty_payload(self) -> dict[str, Any]:
         return {
             "metrics": {},
@@ -231,6 +443,80 @@ class ScanResultRepository:
                 )
         self._db.add_all(records)
 
+    def _store_decision_normalization(self, scan_id: uuid.UUID, result: LayerResult) -> None:
+        normalization = result.metadata.get("decision_normalization")
+        if normalization is None:
+            return
+        self._db.execute(
+            update(Scan)
+            .where(Scan.id == scan_id)
+            .values(decision_normalization=self._json_safe(normalization))
+        )
+
+    def _store_scan_summary(self, scan_id: uuid.UUID) -> None:
+        """Aggregate the scan's flushed files into its ``ScanSummary`` row.
+
+        The duration runs from ``started_at`` to ``finished_at``, or to now
+        while the scan is still being stored.
+        """
+        file_count, scored_file_count, average_score, max_score = self._db.execute(
+            select(
+                func.count(ScanFile.id),
+                func.count(ScanFile.refactor_score),
+                func.avg(ScanFile.refactor_score),
+                func.max(ScanFile.refactor_score),
+            ).where(ScanFile.scan_id == scan_id)
+        ).one()
+
+        band_counts: dict[str, int] = {}
+        for band, count in self._db.execute(
+            select(ScanFile.priority_band, func.count(ScanFile.id))
+            .where(ScanFile.scan_id == scan_id)
+            .group_by(ScanFile.priority_band)
+        ):
+            key = str(band).lower() if band is not None else "unknown"
+            band_counts[key] = band_counts.get(key, 0) + int(count)
+
+        null_order = case((ScanFile.refactor_score.is_(None), 1), else_=0)
+        top_files = [
+            {
+                "id": str(file_id),
+                "file_path": file_path,
+                "refactor_score": float(score) if score is not None else None,
+                "priority_band": band,
+            }
+            for file_id, file_path, score, band in self._db.execute(
+                select(ScanFile.id, ScanFile.file_path, ScanFile.refactor_score, ScanFile.priority_band)
+                .where(ScanFile.scan_id == scan_id)
+                .order_by(null_order.asc(), ScanFile.refactor_score.desc(), ScanFile.file_path.asc())
+                .limit(SCAN_SUMMARY_TOP_FILE_COUNT)
+            )
+        ]
+
+        timing = self._db.execute(select(Scan.started_at, Scan.finished_at).where(Scan.id == scan_id)).first()
+        started_at, finished_at = timing if timing is not None else (None, None)
+
+        summary = self._db.get(ScanSummary, scan_id) or ScanSummary(scan_id=scan_id)
+        summary.file_count = int(file_count)
+        summary.scored_file_count = int(scored_file_count)
+        summary.priority_band_counts = band_counts
+        summary.average_refactor_score = float(average_score) if average_score is not None else None
+        summary.max_refactor_score = max_score
+        summary.duration_seconds = self._duration_seconds(started_at, finished_at)
+        summary.top_files = top_files
+        self._db.add(summary)
+
+    def _duration_seconds(self, started_at: datetime | None, finished_at: datetime | None) -> float | None:
+        if started_at is None:
+            return None
+        finished_at = finished_at or datetime.now(timezone.utc)
+        # SQLite returns naive datetimes for timezone-aware columns.
+        if started_at.tzinfo is None:
+            started_at = started_at.replace(tzinfo=timezone.utc)
+        if finished_at.tzinfo is None:
+            finished_at = finished_at.replace(tzinfo=timezone.utc)
+        return max((finished_at - started_at).total_seconds(), 0.0)
+
     def _architecture_metadata(self, result: LayerResult) -> dict[str, Any]:
         if "dependency_edges" in result.metadata or "circular_dependency_groups" in result.metadata:
             return result.metadata
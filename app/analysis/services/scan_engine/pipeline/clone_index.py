@@ -0,0 +1,433 @@
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from collections.abc import Iterable, Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from time import perf_counter, time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True, frozen=True)
+class IndexedBlock:
+    """Location of one embedded code block inside a project snapshot."""
+
+    file_path: str
+    kind: str
+    start_line: int
+    end_line: int
+
+
+@dataclass(slots=True, frozen=True)
+class CloneIndexMatch:
+    source_start_line: int
+    source_end_line: int
+    project_id: uuid.UUID
+    file_path: str
+    kind: str
+    start_line: int
+    end_line: int
+    similarity: float
+
+
+@dataclass(slots=True)
+class _Segment:
+    manifest: dict[str, object]
+    blocks: list[IndexedBlock]
+    vectors: np.ndarray
+    list_offsets: np.ndarray | None
+
+
+class CrossProjectCloneIndex:
+    """On-disk block embedding index shared by every project on a deployment.
+
+    Each project owns one segment holding the L2-normalized block vectors of
+    its latest succeeded scan.  A scan first stages its segment under
+    ``staging/<scan_id>``; ``publish`` swaps it in for the project's previous
+    segment, so a project is added or replaced as a unit and readers never
+    see a half-written scan.
+
+    Vectors are stored as ``.npy`` files and memory-mapped for queries.  Once
+    enough vectors exist, a set of coarse k-means centroids is trained and
+    every later segment is written grouped by nearest centroid (an IVF
+    layout), so a query only reads the ``nprobe`` closest lists of each
+    segment.  Segments written before the centroids existed, or with other
+    centroids, are scanned flat.
+    """
+
+    CENTROIDS_FILE = "centroids.npy"
+    MANIFEST_FILE = "manifest.json"
+    BLOCKS_FILE = "blocks.json"
+    VECTORS_FILE = "vectors.npy"
+    LIST_OFFSETS_FILE = "list_offsets.npy"
+    TRAIN_POINTS_PER_LIST = 16
+    KMEANS_ITERATIONS = 10
+    STAGING_MAX_AGE_SECONDS = 24 * 60 * 60
+
+    def __init__(
+        self,
+        root: str | Path,
+        nlist: int = 64,
+        nprobe: int = 8,
+    ) -> None:
+        if nlist < 1:
+            raise ValueError("Clone index list count must be at least 1")
+        if nprobe < 1:
+            raise ValueError("Clone index probe count must be at least 1")
+
+        self.root = Path(root)
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self._cache: dict[Path, tuple[int, _Segment]] = {}
+        self._cache_lock = threading.Lock()
+
+    # -- Writing -----------------------------------------------------------
+
+    def stage(
+        self,
+        scan_id: uuid.UUID,
+        project_id: uuid.UUID,
+        model_id: str,
+        blocks: Sequence[IndexedBlock],
+        vectors: np.ndarray,
+    ) -> Path:
+        """Write a scan's block vectors to staging until the scan succeeds."""
+        if vectors.ndim != 2 or vectors.shape[0] != len(blocks):
+            raise ValueError(
+                f"Clone index needs one vector per block; got {vectors.shape} for {len(blocks)} blocks"
+            )
+
+        target = self._staging_dir(scan_id)
+        manifest = {
+            "project_id": str(project_id),
+            "scan_id": str(scan_id),
+            "model_id": model_id,
+            "dimension": int(vectors.shape[1]) if vectors.size else 0,
+            "block_count": len(blocks),
+            "centroids": None,
+        }
+        self._write_segment(target, manifest, list(blocks), _normalize_rows(vectors), None)
+        logger.info(
+            "[CLONE INDEX STAGED] scan_id=%s project_id=%s block_count=%d",
+            scan_id,
+            project_id,
+            len(blocks),
+        )
+        return target
+
+    def publish(self, scan_id: uuid.UUID) -> bool:
+        """Replace the project's segment with the staged segment of ``scan_id``."""
+        staged = self._staging_dir(scan_id)
+        if not (staged / self.MANIFEST_FILE).exists():
+            return False
+
+        started = perf_counter()
+        with self._write_lock():
+            segment = self._read_segment(staged, mmap=False)
+            project_id = uuid.UUID(str(segment.manifest["project_id"]))
+            centroids = self._centroids_for(segment.vectors)
+
+            manifest = dict(segment.manifest)
+            vectors = segment.vectors
+            blocks = segment.blocks
+            list_offsets = None
+            if centroids is not None and vectors.shape[1] == centroids.shape[1]:
+                assignments = np.argmax(vectors @ centroids.T, axis=1)
+                order = np.argsort(assignments, kind="stable")
+                vectors = vectors[order]
+                blocks = [blocks[index] for index in order]
+                list_offsets = np.searchsorted(assignments[order], np.arange(len(centroids) + 1))
+                manifest["centroids"] = _fingerprint(centroids)
+
+            self._write_segment(self._project_dir(project_id), manifest, blocks, vectors, list_offsets)
+            shutil.rmtree(staged, ignore_errors=True)
+            self._prune_staging()
+
+        logger.info(
+            "[CLONE INDEX PUBLISHED] scan_id=%s project_id=%s block_count=%d ivf=%s elapsed_seconds=%.3f",
+            scan_id,
+            project_id,
+            len(blocks),
+            list_offsets is not None,
+            perf_counter() - started,
+        )
+        return True
+
+    def discard(self, scan_id: uuid.UUID) -> None:
+        shutil.rmtree(self._staging_dir(scan_id), ignore_errors=True)
+
+    def remove_project(self, project_id: uuid.UUID) -> bool:
+        target = self._project_dir(project_id)
+        if not target.exists():
+            return False
+        with self._write_lock():
+            shutil.rmtree(target, ignore_errors=True)
+        logger.info("[CLONE INDEX PROJECT REMOVED] project_id=%s", project_id)
+        return True
+
+    # -- Querying ----------------------------------------------------------
+
+    def similar_blocks(
+        self,
+        project_id: uuid.UUID,
+        file_path: str,
+        *,
+        project_ids: Iterable[uuid.UUID] | None = None,
+        threshold: float = 0.9,
+        limit: int = 10,
+    ) -> list[CloneIndexMatch]:
+        """Blocks in other projects whose vectors are close to ``file_path``'s blocks.
+
+        ``project_ids`` restricts the search to those projects (callers pass
+        the projects the requesting user may see); ``None`` searches all.
+        """
+        started = perf_counter()
+        own = self._load_segment(self._project_dir(project_id))
+        if own is None:
+            return []
+
+        rows = [index for index, block in enumerate(own.blocks) if block.file_path == file_path]
+        if not rows:
+            return []
+        queries = np.asarray(own.vectors[rows], dtype=np.float32)
+        source_blocks = [own.blocks[index] for index in rows]
+        centroids = self._load_centroids()
+        probe_lists = self._probe_lists(queries, centroids)
+        centroids_id = _fingerprint(centroids) if probe_lists is not None else None
+
+        allowed = None if project_ids is None else {str(value) for value in project_ids}
+        matches: list[CloneIndexMatch] = []
+        searched = 0
+        for directory in self._project_dirs():
+            if directory.name == str(project_id) or (allowed is not None and directory.name not in allowed):
+                continue
+            segment = self._load_segment(directory)
+            if segment is None or not self._compatible(own, segment):
+                continue
+
+            candidate_rows = self._candidate_rows(segment, centroids_id, probe_lists)
+            if candidate_rows.size == 0:
+                continue
+            searched += int(candidate_rows.size)
+            similarities = queries @ np.asarray(segment.vectors[candidate_rows], dtype=np.float32).T
+            other_project = uuid.UUID(directory.name)
+            for query_index, column in zip(*np.nonzero(similarities >= threshold)):
+                source = source_blocks[query_index]
+                target = segment.blocks[int(candidate_rows[column])]
+                matches.append(
+                    CloneIndexMatch(
+                        source_start_line=source.start_line,
+                        source_end_line=source.end_line,
+                        project_id=other_project,
+                        file_path=target.file_path,
+                        kind=target.kind,
+                        start_line=target.start_line,
+                        end_line=target.end_line,
+                        similarity=round(float(similarities[query_index, column]), 6),
+                    )
+                )
+
+        matches.sort(key=lambda match: (-match.similarity, str(match.project_id), match.file_path, match.start_line))
+        logger.debug(
+            "[CLONE INDEX QUERY] project_id=%s file=%s query_blocks=%d searched_vectors=%d match_count=%d elapsed_seconds=%.3f",
+            project_id,
+            file_path,
+            len(rows),
+            searched,
+            len(matches),
+            perf_counter() - started,
+        )
+        return matches[:limit]
+
+    def _probe_lists(self, queries: np.ndarray, centroids: np.ndarray | None) -> np.ndarray | None:
+        if centroids is None or centroids.shape[1] != queries.shape[1] or self.nprobe >= len(centroids):
+            return None
+        scores = queries @ centroids.T
+        nearest = np.argpartition(-scores, self.nprobe - 1, axis=1)[:, : self.nprobe]
+        return np.unique(nearest)
+
+    def _candidate_rows(
+        self,
+        segment: _Segment,
+        centroids_id: str | None,
+        probe_lists: np.ndarray | None,
+    ) -> np.ndarray:
+        row_count = segment.vectors.shape[0]
+        if (
+            probe_lists is None
+            or segment.list_offsets is None
+            or segment.manifest.get("centroids") != centroids_id
+        ):
+            return np.arange(row_count)
+
+        offsets = segment.list_offsets
+        ranges = [np.arange(offsets[index], offsets[index + 1]) for index in probe_lists]
+        return np.concatenate(ranges) if ranges else np.arange(0)
+
+    def _compatible(self, own: _Segment, other: _Segment) -> bool:
+        return (
+            other.manifest.get("model_id") == own.manifest.get("model_id")
+            and other.manifest.get("dimension") == own.manifest.get("dimension")
+        )
+
+    # -- IVF centroids -----------------------------------------------------
+
+    def _centroids_for(self, vectors: np.ndarray) -> np.ndarray | None:
+        centroids = self._load_centroids()
+        if centroids is not None:
+            return centroids
+        if vectors.shape[0] < self.nlist * self.TRAIN_POINTS_PER_LIST:
+            return None
+
+        centroids = _spherical_kmeans(vectors, self.nlist, self.KMEANS_ITERATIONS)
+        path = self.root / self.CENTROIDS_FILE
+        temporary = path.with_suffix(f".{uuid.uuid4().hex}.tmp.npy")
+        np.save(temporary, centroids)
+        os.replace(temporary, path)
+        logger.info(
+            "[CLONE INDEX CENTROIDS TRAINED] nlist=%d training_vectors=%d",
+            self.nlist,
+            vectors.shape[0],
+        )
+        return centroids
+
+    def _load_centroids(self) -> np.ndarray | None:
+        path = self.root / self.CENTROIDS_FILE
+        if not path.exists():
+            return None
+        return np.load(path)
+
+    # -- Storage helpers ---------------------------------------------------
+
+    def _write_segment(
+        self,
+        target: Path,
+        manifest: dict[str, object],
+        blocks: list[IndexedBlock],
+        vectors: np.ndarray,
+        list_offsets: np.ndarray | None,
+    ) -> None:
+        pending = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+        pending.mkdir(parents=True, exist_ok=True)
+        np.save(pending / self.VECTORS_FILE, np.ascontiguousarray(vectors, dtype=np.float32))
+        if list_offsets is not None:
+            np.save(pending / self.LIST_OFFSETS_FILE, np.asarray(list_offsets, dtype=np.int64))
+        (pending / self.BLOCKS_FILE).write_text(
+            json.dumps([asdict(block) for block in blocks], separators=(",", ":")),
+            encoding="utf-8",
+        )
+        # The manifest is written last; a directory without one is incomplete.
+        (pending / self.MANIFEST_FILE).write_text(json.dumps(manifest), encoding="utf-8")
+        self._swap_into_place(pending, target)
+
+    def _swap_into_place(self, pending: Path, target: Path) -> None:
+        retired = None
+        if target.exists():
+            retired = target.with_name(f".{target.name}.{uuid.uuid4().hex}.old")
+            os.replace(target, retired)
+        os.replace(pending, target)
+        if retired is not None:
+            shutil.rmtree(retired, ignore_errors=True)
+
+    def _read_segment(self, directory: Path, *, mmap: bool) -> _Segment:
+        manifest = json.loads((directory / self.MANIFEST_FILE).read_text(encoding="utf-8"))
+        blocks = [
+            IndexedBlock(**item)
+            for item in json.loads((directory / self.BLOCKS_FILE).read_text(encoding="utf-8"))
+        ]
+        vectors = np.load(directory / self.VECTORS_FILE, mmap_mode="r" if mmap else None)
+        offsets_path = directory / self.LIST_OFFSETS_FILE
+        list_offsets = np.load(offsets_path) if offsets_path.exists() else None
+        return _Segment(manifest=manifest, blocks=blocks, vectors=vectors, list_offsets=list_offsets)
+
+    def _load_segment(self, directory: Path) -> _Segment | None:
+        manifest_path = directory / self.MANIFEST_FILE
+        try:
+            version = manifest_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+        with self._cache_lock:
+            cached = self._cache.get(directory)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        try:
+            segment = self._read_segment(directory, mmap=True)
+        except (OSError, ValueError, TypeError) as exc:
+            # A publish may be swapping this directory right now.
+            logger.debug("[CLONE INDEX SEGMENT UNAVAILABLE] path=%s error=%s", directory, str(exc))
+            return None
+        with self._cache_lock:
+            self._cache[directory] = (version, segment)
+        return segment
+
+    def _project_dirs(self) -> Iterator[Path]:
+        projects = self.root / "projects"
+        if not projects.is_dir():
+            return iter(())
+        return (path for path in sorted(projects.iterdir()) if path.is_dir() and not path.name.startswith("."))
+
+    def _project_dir(self, project_id: uuid.UUID) -> Path:
+        return self.root / "projects" / str(project_id)
+
+    def _staging_dir(self, scan_id: uuid.UUID) -> Path:
+        return self.root / "staging" / str(scan_id)
+
+    def _prune_staging(self) -> None:
+        staging = self.root / "staging"
+        if not staging.is_dir():
+            return
+        cutoff = time() - self.STAGING_MAX_AGE_SECONDS
+        for path in staging.iterdir():
+            try:
+                if path.stat().st_mtime < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+            except FileNotFoundError:
+                continue
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        self.root.mkdir(parents=True, exist_ok=True)
+        with (self.root / "index.lock").open("a") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        normalized = np.where(norms > 0, vectors / np.where(norms > 0, norms, 1.0), 0.0)
+    return np.nan_to_num(normalized, nan=0.0, posinf=0.0, neginf=0.0).astype(np.float32, copy=False)
+
+
+def _spherical_kmeans(vectors: np.ndarray, k: int, iterations: int) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    centroids = vectors[rng.choice(vectors.shape[0], size=k, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        for index in range(k):
+            members = vectors[assignments == index]
+            if len(members):
+                centroids[index] = members.sum(axis=0)
+        centroids = _normalize_rows(centroids)
+    return centroids
+
+
+def _fingerprint(centroids: np.ndarray) -> str:
+    return hashlib.sha1(np.ascontiguousarray(centroids).tobytes()).hexdigest()[:16]
@@ -2,11 +2,19 @@ from __future__ import annotations
 
 import json
 import logging
-from collections.abc import Sequence
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
 from pathlib import Path
 from time import perf_counter
 from typing import Protocol
 
+import numpy as np
+
+from app.analysis.services.scan_engine.pipeline.embedding_model_registry import (
+    EmbeddingModelRegistry,
+    LoadedEmbeddingModel,
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -17,6 +25,24 @@ class CodeEmbeddingProvider(Protocol):
         """Encode code snippets into dense vectors."""
 
 
+def encode_as_matrix(provider: CodeEmbeddingProvider, texts: Sequence[str]) -> np.ndarray:
+    """Return ``provider`` embeddings as a float32 ``(len(texts), dim)`` matrix.
+
+    Providers that implement ``encode_matrix`` hand back their array directly;
+    list-returning providers are converted once here.
+    """
+    encode_matrix = getattr(provider, "encode_matrix", None)
+    if callable(encode_matrix):
+        matrix = encode_matrix(texts)
+    else:
+        vectors = provider.encode(texts)
+        matrix = np.asarray(vectors, dtype=np.float32) if vectors else np.empty((0, 0), dtype=np.float32)
+
+    if matrix.ndim != 2:
+        raise ValueError(f"Embedding provider returned a {matrix.ndim}-dimensional result")
+    return matrix.astype(np.float32, copy=False)
+
+
 class CodeEmbeddingService:
     """Lazy Transformers adapter for code embedding models."""
 
@@ -36,6 +62,13 @@ class CodeEmbeddingService:
         trust_remote_code: bool = True,
         local_files_only: bool = False,
         pooling_mode: str | None = None,
+        model_registry: EmbeddingModelRegistry | None = None,
+        token_budget: int | None = None,
+        torch_threads: int | None = None,
+        torch_interop_threads: int | None = None,
+        chunk_length: int | None = None,
+        chunk_overlap: int = 0,
+        max_chunks: int | None = None,
     ) -> None:
         self.model_id = model_id
         self.model_path = Path(model_path).expanduser().resolve() if model_path else None
@@ -43,8 +76,26 @@ class CodeEmbeddingService:
             raise ValueError("Embedding batch size must be at least 1")
         if max_length < 1:
             raise ValueError("Embedding max length must be at least 1")
+        if token_budget is not None and token_budget < 1:
+            raise ValueError("Embedding token budget must be at least 1")
+        if torch_threads is not None and torch_threads < 1:
+            raise ValueError("Embedding torch threads must be at least 1")
+        if torch_interop_threads is not None and torch_interop_threads < 1:
+            raise ValueError("Embedding torch inter-op threads must be at least 1")
+        if chunk_length is not None and chunk_length < 2:
+            raise ValueError("Embedding chunk length must be at least 2")
+        if chunk_overlap < 0 or (chunk_length is not None and chunk_overlap >= chunk_length):
+            raise ValueError("Embedding chunk overlap must be non-negative and shorter than a chunk")
+        if max_chunks is not None and max_chunks < 1:
+            raise ValueError("Embedding max chunks must be at least 1")
 
         self.batch_size = batch_size
+        self.token_budget = token_budget
+        self.torch_threads = torch_threads
+        self.torch_interop_threads = torch_interop_threads
+        self.chunk_length = chunk_length
+        self.chunk_overlap = chunk_overlap
+        self.max_chunks = max_chunks
         self.device = device
         self.max_length = max_length
         self.trust_remote_code = trust_remote_code
@@ -52,6 +103,9 @@ class CodeEmbeddingService:
         self.pooling_mode = pooling_mode or self._default_pooling_mode()
         if self.pooling_mode not in self.SUPPORTED_POOLING_MODES:
             raise ValueError(f"Unsupported embedding pooling mode: {self.pooling_mode}")
+        self.model_registry = model_registry
+        self._requested_device = device
+        self._requested_pooling_mode = self.pooling_mode
         self._metadata_max_length: int | None = None
         self._tokenizer = None
         self._model = None
@@ -59,51 +113,84 @@ class CodeEmbeddingService:
         self._functional = None
 
     def encode(self, texts: Sequence[str]) -> list[list[float]]:
+        """List-of-floats view of ``encode_matrix`` kept for existing callers."""
+        return self.encode_matrix(texts).tolist()
+
+    def encode_matrix(self, texts: Sequence[str]) -> np.ndarray:
+        """Encode ``texts`` into a float32 matrix with rows in caller order."""
         started = perf_counter()
         prepared = [text if text.strip() else " " for text in texts]
         if not prepared:
             logger.debug("[EMBEDDINGS SKIPPED] text_count=0")
-            return []
+            return np.empty((0, 0), dtype=np.float32)
 
         logger.info(
-            "[EMBEDDINGS ENCODE STARTED] model=%s text_count=%d batch_size=%d",
+            "[EMBEDDINGS ENCODE STARTED] model=%s text_count=%d batch_size=%d token_budget=%s chunk_length=%s",
             self.model_id,
             len(prepared),
             self.batch_size,
+            self.token_budget,
+            self.chunk_length,
         )
-        try:
-            self._ensure_loaded()
-        except Exception:
-            logger.exception("[EMBEDDINGS LOAD FAILED] model=%s", self.model_id)
-            raise
+        with self._loaded_model():
+            result = self._encode_loaded(prepared)
+
+        logger.info(
+            "[EMBEDDINGS ENCODE COMPLETED] model=%s text_count=%d vector_count=%d dimension=%d elapsed_seconds=%.3f",
+            self.model_id,
+            len(prepared),
+            result.shape[0],
+            result.shape[1],
+            perf_counter() - started,
+        )
+        return result
 
-        # Group similarly sized snippets to avoid padding every item to an
-        # unrelated long function. Restore the caller's order before returning.
-        indexed_texts = sorted(enumerate(prepared), key=lambda item: len(item[1]))
-        vectors_by_index: list[list[float] | None] = [None] * len(prepared)
-        batch_count = (len(indexed_texts) + self.batch_size - 1) // self.batch_size
+    def preload(self) -> None:
+        """Load the model now instead of on the first ``encode`` call."""
+        with self._loaded_model():
+            pass
+
+    def _encode_loaded(self, prepared: list[str]) -> np.ndarray:
+        if self.chunk_length is None:
+            return self._encode_features(self._tokenize_unpadded(prepared))
+
+        features, owners, weights = self._tokenize_windows(prepared)
+        window_vectors = self._encode_features(features)
+        return self._pool_windows(window_vectors, owners, weights, len(prepared))
+
+    def _encode_features(self, features: list[dict[str, list[int]]]) -> np.ndarray:
+        # Group pre-tokenized inputs by token length so every batch pads only
+        # to its own longest item and stays within the token budget. Restore
+        # the input order before returning.
+        order = sorted(range(len(features)), key=lambda index: len(features[index]["input_ids"]))
+        batches = self._token_budget_batches(
+            [len(features[index]["input_ids"]) for index in order],
+            self._token_budget(),
+        )
+        matrix: np.ndarray | None = None
+        filled = np.zeros(len(features), dtype=bool)
+        batch_count = len(batches)
 
-        for start in range(0, len(indexed_texts), self.batch_size):
-            indexed_batch = indexed_texts[start : start + self.batch_size]
-            batch = [text for _, text in indexed_batch]
-            batch_number = start // self.batch_size + 1
+        for batch_number, (start, end) in enumerate(batches, start=1):
+            batch_indices = order[start:end]
             batch_started = perf_counter()
             logger.info(
                 "[EMBEDDINGS BATCH STARTED] model=%s batch=%d/%d item_count=%d",
                 self.model_id,
                 batch_number,
                 batch_count,
-                len(batch),
+                len(batch_indices),
             )
             try:
-                encoded = self._tokenizer(
-                    batch,
-                    max_length=self._effective_max_length(),
+                encoded = self._tokenizer.pad(
+                    [features[index] for index in batch_indices],
                     padding=True,
-                    truncation=True,
                     return_tensors="pt",
                 )
+                encoded = dict(encoded)
                 sequence_length = int(encoded["input_ids"].shape[1])
+                real_token_count = sum(len(features[index]["input_ids"]) for index in batch_indices)
+                padding_efficiency = real_token_count / max(1, len(batch_indices) * sequence_length)
                 encoded = {key: value.to(self.device) for key, value in encoded.items()}
                 if self._is_jina_v2_model():
                     # This is a single-segment encoder. Supplying the segment
@@ -130,46 +217,166 @@ class CodeEmbeddingService:
                     pooled = self._functional.normalize(pooled, p=2, dim=1)
                     pooled = self._torch.nan_to_num(pooled, nan=0.0, posinf=0.0, neginf=0.0)
 
-                batch_vectors = pooled.detach().cpu().float().tolist()
-                for (original_index, _), vector in zip(
-                    indexed_batch,
-                    batch_vectors,
-                    strict=True,
-                ):
-                    vectors_by_index[original_index] = [float(value) for value in vector]
+                batch_vectors = pooled.detach().cpu().float().numpy()
+                if batch_vectors.shape[0] != len(batch_indices):
+                    raise RuntimeError(
+                        f"Model {self.model_id} returned {batch_vectors.shape[0]} vectors for {len(batch_indices)} inputs"
+                    )
+                if matrix is None:
+                    matrix = np.empty((len(features), batch_vectors.shape[1]), dtype=np.float32)
+                matrix[batch_indices] = batch_vectors
+                filled[batch_indices] = True
             except Exception:
                 logger.exception(
                     "[EMBEDDINGS BATCH FAILED] model=%s batch=%d/%d item_count=%d",
                     self.model_id,
                     batch_number,
                     batch_count,
-                    len(batch),
+                    len(batch_indices),
                 )
                 raise
 
             logger.info(
-                "[EMBEDDINGS BATCH COMPLETED] model=%s batch=%d/%d item_count=%d sequence_length=%d elapsed_seconds=%.3f",
+                "[EMBEDDINGS BATCH COMPLETED] model=%s batch=%d/%d item_count=%d sequence_length=%d padding_efficiency=%.3f elapsed_seconds=%.3f",
                 self.model_id,
                 batch_number,
                 batch_count,
-                len(batch),
+                len(batch_indices),
                 sequence_length,
+                padding_efficiency,
                 perf_counter() - batch_started,
             )
 
-        if any(vector is None for vector in vectors_by_index):
+        if matrix is None or not bool(filled.all()):
             raise RuntimeError(f"Model {self.model_id} did not return every requested embedding")
 
-        result = [vector for vector in vectors_by_index if vector is not None]
+        return matrix
+
+    def _tokenize_unpadded(self, texts: list[str]) -> list[dict[str, list[int]]]:
+        tokenized = self._tokenizer(
+            texts,
+            max_length=self._effective_max_length(),
+            padding=False,
+            truncation=True,
+        )
+        keys = list(tokenized.keys())
+        return [
+            {key: list(tokenized[key][index]) for key in keys}
+            for index in range(len(texts))
+        ]
+
+    def _tokenize_windows(
+        self,
+        texts: list[str],
+    ) -> tuple[list[dict[str, list[int]]], np.ndarray, np.ndarray]:
+        """Split every text into overlapping windows of at most ``chunk_length`` tokens.
+
+        Returns the window features, the index of the text each window belongs
+        to and the number of content tokens per window (the pooling weight).
+        """
+        assert self.chunk_length is not None
+        window_length = min(self.chunk_length, self._effective_max_length())
+        special_count = self._special_token_count()
+        content_length = max(1, window_length - special_count)
+        stride = max(1, content_length - min(self.chunk_overlap, content_length - 1))
+
+        tokenized = self._tokenizer(
+            texts,
+            add_special_tokens=False,
+            padding=False,
+            truncation=False,
+        )
+        features: list[dict[str, list[int]]] = []
+        owners: list[int] = []
+        weights: list[int] = []
+        truncated_count = 0
+        for text_index, token_ids in enumerate(tokenized["input_ids"]):
+            spans = self._window_spans(len(token_ids), content_length, stride)
+            if self.max_chunks is not None and len(spans) > self.max_chunks:
+                spans = spans[: self.max_chunks]
+                truncated_count += 1
+            for start, end in spans:
+                input_ids = self._with_special_tokens(list(token_ids[start:end]))
+                features.append({"input_ids": input_ids, "attention_mask": [1] * len(input_ids)})
+                owners.append(text_index)
+                weights.append(max(1, end - start))
+
         logger.info(
-            "[EMBEDDINGS ENCODE COMPLETED] model=%s text_count=%d vector_count=%d dimension=%d elapsed_seconds=%.3f",
+            "[EMBEDDINGS CHUNKED] model=%s text_count=%d window_count=%d window_length=%d stride=%d truncated_count=%d",
             self.model_id,
-            len(prepared),
-            len(result),
-            len(result[0]) if result else 0,
-            perf_counter() - started,
+            len(texts),
+            len(features),
+            window_length,
+            stride,
+            truncated_count,
+        )
+        return (
+            features,
+            np.asarray(owners, dtype=np.intp),
+            np.asarray(weights, dtype=np.float32),
         )
-        return result
+
+    @staticmethod
+    def _window_spans(token_count: int, window: int, stride: int) -> list[tuple[int, int]]:
+        """``[start, end)`` token spans covering ``token_count`` tokens.
+
+        Consecutive windows start ``stride`` tokens apart; the last one may be
+        shorter and gets a correspondingly smaller weight when pooling.
+        """
+        spans: list[tuple[int, int]] = []
+        start = 0
+        while True:
+            end = min(start + window, token_count)
+            spans.append((start, end))
+            if end >= token_count:
+                return spans
+            start += stride
+
+    def _special_token_count(self) -> int:
+        counter = getattr(self._tokenizer, "num_special_tokens_to_add", None)
+        return int(counter(pair=False)) if callable(counter) else 0
+
+    def _with_special_tokens(self, token_ids: list[int]) -> list[int]:
+        builder = getattr(self._tokenizer, "build_inputs_with_special_tokens", None)
+        return list(builder(token_ids)) if callable(builder) else token_ids
+
+    @staticmethod
+    def _pool_windows(
+        window_vectors: np.ndarray,
+        owners: np.ndarray,
+        weights: np.ndarray,
+        text_count: int,
+    ) -> np.ndarray:
+        """Token-weighted mean of each text's window vectors, L2-normalized."""
+        pooled = np.zeros((text_count, window_vectors.shape[1]), dtype=np.float32)
+        np.add.at(pooled, owners, window_vectors * weights[:, None])
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        np.divide(pooled, norms, out=pooled, where=norms > 0)
+        return pooled
+
+    def _token_budget(self) -> int:
+        if self.token_budget is not None:
+            return self.token_budget
+        # Without an explicit budget, cap each batch at the padded size the
+        # fixed batch size could reach: batch_size full-length sequences.
+        return self.batch_size * self._effective_max_length()
+
+    @staticmethod
+    def _token_budget_batches(sorted_lengths: list[int], token_budget: int) -> list[tuple[int, int]]:
+        """Split ascending token lengths into ``[start, end)`` batches.
+
+        A batch grows while ``item_count * longest_item`` stays within the
+        budget; a single item longer than the budget still forms its own batch.
+        """
+        batches: list[tuple[int, int]] = []
+        start = 0
+        for index, length in enumerate(sorted_lengths):
+            if index > start and (index - start + 1) * max(1, length) > token_budget:
+                batches.append((start, index))
+                start = index
+        if start < len(sorted_lengths):
+            batches.append((start, len(sorted_lengths)))
+        return batches
 
     def _position_ids_like(self, input_ids: object) -> object:
         seq_length = input_ids.shape[1]
@@ -179,10 +386,61 @@ class CodeEmbeddingService:
             dtype=input_ids.dtype,
         ).unsqueeze(0).expand(input_ids.shape[0], -1)
 
+    @contextmanager
+    def _loaded_model(self) -> Iterator[None]:
+        if self.model_registry is None:
+            self._ensure_loaded()
+            yield
+            return
+
+        with self.model_registry.checkout(self._registry_key(), self._load_model_logged) as loaded:
+            # Only hold the shared model while encoding so that an idle
+            # unload in the registry actually releases the weights.
+            self._bind_loaded_model(loaded)
+            try:
+                yield
+            finally:
+                self._unbind_loaded_model()
+
+    def _registry_key(self) -> tuple[object, ...]:
+        return (
+            self.model_id,
+            str(self.model_path) if self.model_path else None,
+            self._requested_device,
+            self._requested_pooling_mode,
+            self.trust_remote_code,
+            self.local_files_only,
+        )
+
     def _ensure_loaded(self) -> None:
         if self._model is not None and self._tokenizer is not None:
             return
 
+        self._bind_loaded_model(self._load_model_logged())
+
+    def _load_model_logged(self) -> LoadedEmbeddingModel:
+        try:
+            return self._load_model()
+        except Exception:
+            logger.exception("[EMBEDDINGS LOAD FAILED] model=%s", self.model_id)
+            raise
+
+    def _bind_loaded_model(self, loaded: LoadedEmbeddingModel) -> None:
+        self._tokenizer = loaded.tokenizer
+        self._model = loaded.model
+        self._torch = loaded.torch
+        self._functional = loaded.functional
+        self.device = loaded.device
+        self.pooling_mode = loaded.pooling_mode
+        self._metadata_max_length = loaded.metadata_max_length
+
+    def _unbind_loaded_model(self) -> None:
+        self._tokenizer = None
+        self._model = None
+        self._torch = None
+        self._functional = None
+
+    def _load_model(self) -> LoadedEmbeddingModel:
         logger.debug("[EMBEDDINGS LOAD STARTED] model=%s", self.model_id)
         self._apply_transformers_compatibility_patches()
 
@@ -195,6 +453,7 @@ class CodeEmbeddingService:
                 "Semantic duplication analysis requires torch and transformers"
             ) from exc
 
+        self._configure_torch_threads(torch)
         self.device = self._select_device(self.device)
         model_source = self._model_source()
         self._load_sentence_transformer_metadata()
@@ -219,6 +478,13 @@ class CodeEmbeddingService:
         )
         if getattr(tokenizer, "pad_token", None) is None and getattr(tokenizer, "eos_token", None) is not None:
             tokenizer.pad_token = tokenizer.eos_token
+        deprecation_warnings = getattr(tokenizer, "deprecation_warnings", None)
+        if isinstance(deprecation_warnings, dict):
+            # encode() tokenizes once and pads per batch on purpose.
+            deprecation_warnings["Asking-to-pad-a-fast-tokenizer"] = True
+            if self.chunk_length is not None:
+                # Chunked encoding tokenizes whole blocks and windows them itself.
+                deprecation_warnings["sequence-length-is-longer-than-the-specified-maximum"] = True
 
         model_config = AutoConfig.from_pretrained(
             model_source,
@@ -235,16 +501,42 @@ class CodeEmbeddingService:
         model.to(self.device)
         model.eval()
 
-        self._tokenizer = tokenizer
-        self._model = model
-        self._torch = torch
-        self._functional = functional
         logger.info(
-            "[EMBEDDINGS LOADED] model=%s device=%s pooling=%s max_length=%d",
+            "[EMBEDDINGS LOADED] model=%s device=%s pooling=%s",
             self.model_id,
             self.device,
             self.pooling_mode,
-            self._effective_max_length(),
+        )
+        return LoadedEmbeddingModel(
+            tokenizer=tokenizer,
+            model=model,
+            torch=torch,
+            functional=functional,
+            device=self.device,
+            pooling_mode=self.pooling_mode,
+            metadata_max_length=self._metadata_max_length,
+        )
+
+    def _configure_torch_threads(self, torch: object) -> None:
+        # Thread pools are process-wide; this runs once per loaded model so the
+        # embedding stage stays inside its CPU budget instead of claiming every
+        # core next to the pipeline's own executor.
+        if self.torch_threads is not None and torch.get_num_threads() != self.torch_threads:
+            torch.set_num_threads(self.torch_threads)
+        if self.torch_interop_threads is not None and torch.get_num_interop_threads() != self.torch_interop_threads:
+            try:
+                torch.set_num_interop_threads(self.torch_interop_threads)
+            except RuntimeError:
+                # Inter-op threads can only be set before the pool starts.
+                logger.warning(
+                    "[EMBEDDINGS THREADS] inter-op thread count already fixed at %d",
+                    torch.get_num_interop_threads(),
+                )
+        logger.info(
+            "[EMBEDDINGS THREADS] model=%s intra_op=%d inter_op=%d",
+            self.model_id,
+            torch.get_num_threads(),
+            torch.get_num_interop_threads(),
         )
 
     def _model_source(self) -> str:
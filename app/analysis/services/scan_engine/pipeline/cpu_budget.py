@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import logging
+import math
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+CGROUP_CPU_MAX_PATH = Path("/sys/fs/cgroup/cpu.max")
+
+
+@dataclass(slots=True, frozen=True)
+class CpuBudget:
+    """Thread counts for one scan worker process.
+
+    ``pipeline_workers`` sizes the stage-1 ``ThreadPoolExecutor``; the torch
+    values are applied once when the embedding model is loaded.
+    """
+
+    cpu_count: int
+    pipeline_workers: int
+    torch_intra_op_threads: int
+    torch_inter_op_threads: int
+
+
+def available_cpu_count(cgroup_cpu_max_path: Path = CGROUP_CPU_MAX_PATH) -> int:
+    """CPUs this process may actually use: affinity mask capped by cgroup quota."""
+    try:
+        count = len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        count = os.cpu_count() or 1
+
+    quota = _cgroup_cpu_quota(cgroup_cpu_max_path)
+    if quota is not None:
+        count = min(count, max(1, math.ceil(quota)))
+    return max(1, count)
+
+
+def default_cpu_budget(
+    cpu_count: int | None = None,
+    worker_processes: int = 1,
+    overlapping_stages: bool = False,
+) -> CpuBudget:
+    """Split the host's CPUs between worker processes and pipeline stages.
+
+    Each of ``worker_processes`` gets an equal share.  Within a process the
+    per-file stage and embedding inference normally run one after the other,
+    so both may use the whole share; with ``overlapping_stages`` (both
+    running at once in the same process) the share is halved between them.
+    Stage 1 spends much of its time waiting on git subprocesses, so it keeps
+    a few extra threads above its CPU share.
+    """
+    if worker_processes < 1:
+        raise ValueError("worker_processes must be at least 1")
+
+    cpus = cpu_count if cpu_count is not None else available_cpu_count()
+    share = max(1, cpus // worker_processes)
+    if overlapping_stages and share > 1:
+        torch_threads = max(1, share // 2)
+        stage_share = max(1, share - torch_threads)
+    else:
+        torch_threads = share
+        stage_share = share
+
+    return CpuBudget(
+        cpu_count=cpus,
+        pipeline_workers=min(32, stage_share + 4),
+        torch_intra_op_threads=torch_threads,
+        torch_inter_op_threads=1,
+    )
+
+
+def _cgroup_cpu_quota(path: Path) -> float | None:
+    try:
+        quota, period = path.read_text(encoding="utf-8").split()[:2]
+    except (OSError, ValueError):
+        return None
+    if quota == "max":
+        return None
+    try:
+        return int(quota) / int(period)
+    except (ValueError, ZeroDivisionError):
+        return None
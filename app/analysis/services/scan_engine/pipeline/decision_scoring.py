@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import bisect
+import math
+from collections.abc import Callable, Mapping, Sequence
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(slots=True)
+class MetricColumns:
+    """Input metrics of many files packed column-wise, NaN where missing."""
+
+    values: np.ndarray
+    index: dict[str, int]
+
+    @classmethod
+    def pack(
+        cls,
+        names: Sequence[str],
+        rows: Sequence[Mapping[str, object]],
+        convert: Callable[[object], float | None],
+    ) -> "MetricColumns":
+        """Pack the ``names`` metrics of every row; ``convert`` returns None to skip."""
+        index = {name: position for position, name in enumerate(names)}
+        values = np.full((len(rows), len(names)), np.nan)
+        for row_index, row in enumerate(rows):
+            for name, value in row.items():
+                position = index.get(name)
+                if position is None:
+                    continue
+                number = convert(value)
+                if number is not None:
+                    values[row_index, position] = number
+        return cls(values=values, index=index)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.values[:, self.index[name]]
+
+    def __len__(self) -> int:
+        return int(self.values.shape[0])
+
+
+@dataclass(slots=True, frozen=True)
+class MetricSignalSpec:
+    """How one component metric becomes a signal and where its score saturates.
+
+    ``kind`` is ``"raw"`` (the input as is), ``"offset"`` (input minus
+    ``offset``, floored at zero), ``"positive"`` (floored at zero),
+    ``"density"`` (count per reference LOC) or ``"derived"`` (combined from
+    several inputs by the component).
+    """
+
+    saturation: float
+    kind: str = "raw"
+    offset: float = 0.0
+
+
+@dataclass(slots=True, frozen=True)
+class NormalizationTables:
+    """Empirical quantiles of every component metric signal of one scan.
+
+    ``quantiles[component][metric]`` holds ascending quantile points; a
+    signal scores the share of points strictly below it, so the lowest
+    value of a scan scores 0 and its unique maximum scores 1.
+    """
+
+    quantiles: dict[str, dict[str, tuple[float, ...]]]
+
+    @classmethod
+    def from_signals(
+        cls,
+        signals: Mapping[str, Mapping[str, np.ndarray]],
+        points: int,
+    ) -> "NormalizationTables":
+        """Tables for ``signals`` columns, NaN ignored, in O(n log n) per metric."""
+        return cls(
+            quantiles={
+                component: {
+                    metric: quantile_table(values, points)
+                    for metric, values in metrics.items()
+                    if not np.isnan(values).all()
+                }
+                for component, metrics in signals.items()
+            }
+        )
+
+    @classmethod
+    def from_json(cls, payload: Mapping[str, Mapping[str, Sequence[float]]]) -> "NormalizationTables":
+        return cls(
+            quantiles={
+                component: {metric: tuple(float(point) for point in table) for metric, table in metrics.items()}
+                for component, metrics in payload.items()
+            }
+        )
+
+    def to_json(self) -> dict[str, dict[str, list[float]]]:
+        return {
+            component: {metric: list(table) for metric, table in metrics.items()}
+            for component, metrics in self.quantiles.items()
+        }
+
+    def table_for(self, component: str, metric: str) -> tuple[float, ...] | None:
+        return self.quantiles.get(component, {}).get(metric)
+
+
+def quantile_table(values: np.ndarray, points: int) -> tuple[float, ...]:
+    """``points`` evenly spaced empirical quantiles of the non-NaN ``values``."""
+    if points < 2:
+        raise ValueError("Quantile tables need at least two points")
+    return tuple(np.quantile(values[~np.isnan(values)], np.linspace(0.0, 1.0, points)).tolist())
+
+
+def percentile_rank(values: np.ndarray, table: Sequence[float]) -> np.ndarray:
+    """Share of ``table`` points strictly below each value, capped at 1, NaN kept."""
+    ranks = np.minimum(np.searchsorted(np.asarray(table), values, side="left") / (len(table) - 1), 1.0)
+    return np.where(np.isnan(values), np.nan, ranks)
+
+
+def percentile_rank_scalar(value: float, table: Sequence[float]) -> float:
+    """``percentile_rank`` for one value."""
+    return min(bisect.bisect_left(table, value) / (len(table) - 1), 1.0)
+
+
+# Each kernel mirrors the matching scalar helper on
+# ``DecisionAnalysisLayer`` and keeps NaN wherever the scalar returns None.
+
+
+def clamp(values: np.ndarray) -> np.ndarray:
+    return np.clip(values, 0.0, 1.0)
+
+
+def saturate(values: np.ndarray, saturation: float) -> np.ndarray:
+    if saturation <= 0:
+        return np.where(np.isnan(values), np.nan, 0.0)
+    return clamp(values / saturation)
+
+
+def first_available(*columns: np.ndarray) -> np.ndarray:
+    values = columns[-1]
+    for column in reversed(columns[:-1]):
+        values = np.where(np.isnan(column), values, column)
+    return values
+
+
+def round_scores(values: np.ndarray, digits: int = 6) -> np.ndarray:
+    """Clamp and round with Python's ``round`` so ties break exactly as per file."""
+    return np.fromiter(
+        (round(value, digits) for value in clamp(values).tolist()),
+        dtype=np.float64,
+        count=values.shape[0],
+    )
+
+
+def _two_sum(left: np.ndarray, right: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Rounded sum and its exact rounding error."""
+    total = left + right
+    virtual = total - left
+    return total, (left - (total - virtual)) + (right - virtual)
+
+
+def fsum_rows(terms: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Row sums rounded exactly like ``math.fsum``, and rows where that is unsure.
+
+    Two levels of TwoSum keep the rounding errors of the additions and of
+    their corrections.  When the corrections add up exactly, the final
+    addition rounds the true sum (half-even, as ``math.fsum``).  Otherwise
+    a row is flagged only if the leftover error could move the true sum
+    across the midpoint the final addition rounded against.
+    """
+    row_count, term_count = terms.shape
+    total = np.zeros(row_count)
+    compensation = np.zeros(row_count)
+    second_order = np.zeros(row_count)
+    for column in terms.T:
+        total, error = _two_sum(total, column)
+        compensation, compensation_error = _two_sum(compensation, error)
+        second_order += compensation_error
+
+    correction, correction_error = _two_sum(compensation, second_order)
+    result, remainder = _two_sum(total, correction)
+
+    epsilon = np.finfo(np.float64).eps
+    leftover = np.abs(correction_error) + term_count * epsilon * np.abs(second_order)
+    with np.errstate(invalid="ignore"):
+        neighbour = np.where(remainder < 0.0, np.nextafter(result, -np.inf), np.nextafter(result, np.inf))
+        midpoint = np.abs(neighbour - result) / 2.0
+        uncertain = (leftover > 0.0) & (np.abs(np.abs(remainder) - midpoint) <= leftover)
+    return result, uncertain
+
+
+def available_weight(available: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """``math.fsum`` of the weights of every row's available columns.
+
+    Rows share few availability patterns, so each distinct pattern is summed
+    once and coverage thresholds see exactly the per-file values.
+    """
+    if available.shape[0] == 0:
+        return np.zeros(0)
+    patterns, inverse = np.unique(available, axis=0, return_inverse=True)
+    sums = np.array([math.fsum(weights[pattern].tolist()) for pattern in patterns])
+    return sums[inverse.reshape(-1)]
+
+
+def weighted_available(
+    scores: np.ndarray,
+    weights: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Row-wise weighted score over available columns, its weight coverage and
+    the rows whose sum is uncertain (see ``fsum_rows``).
+
+    Weights are renormalized over the available columns unless they already
+    cover 1.0; rows without any available column get NaN and coverage 0.
+    """
+    available = ~np.isnan(scores)
+    coverage = available_weight(available, weights)
+    complete = np.abs(coverage - 1.0) <= 1e-9
+    scored = available.any(axis=1) & (coverage > 0.0)
+    divisor = np.where(complete | ~scored, 1.0, coverage)
+    effective_weights = np.where(available, weights, 0.0) / divisor[:, None]
+    totals, uncertain = fsum_rows(np.where(available, scores, 0.0) * effective_weights)
+    return (
+        np.where(scored, clamp(totals), np.nan),
+        np.where(scored, np.where(complete, 1.0, coverage), 0.0),
+        uncertain & scored,
+    )
+
+
+def dominant_component(
+    scores: np.ndarray,
+    base: np.ndarray,
+    multipliers: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Index and multiplied excess over ``base`` of every row's dominant column.
+
+    Ties go to the first column, like ``max`` over the component dict.
+    """
+    with np.errstate(invalid="ignore"):
+        excess = multipliers * np.maximum(0.0, scores - base[:, None])
+    excess = np.where(np.isnan(scores) | np.isnan(excess), -np.inf, excess)
+    dominant = np.argmax(excess, axis=1)
+    return dominant, excess[np.arange(dominant.shape[0]), dominant]
+
+
+def aggregate(
+    scores: np.ndarray,
+    weights: np.ndarray,
+    multipliers: np.ndarray,
+    dominant_weight: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    base, _, uncertain = weighted_available(scores, weights)
+    _, excess = dominant_component(scores, base, multipliers)
+    return np.where(np.isnan(base), np.nan, clamp(base + dominant_weight * excess)), uncertain
+
+
+def component_contributions(
+    scores: np.ndarray,
+    weights: np.ndarray,
+    multipliers: np.ndarray,
+    dominant_weight: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Per-component share of the aggregate, NaN for unavailable components,
+    and the rows whose sums are uncertain."""
+    available = ~np.isnan(scores)
+    scored = available.any(axis=1)
+    totals = np.where(scored, available_weight(available, weights), 1.0)
+    contributions = np.where(available, weights / totals[:, None] * np.where(available, scores, 0.0), 0.0)
+
+    rows = np.arange(scores.shape[0])
+    base, base_uncertain = fsum_rows(contributions)
+    dominant, _ = dominant_component(scores, base, multipliers)
+    dominant_scores = np.where(scored, scores[rows, dominant], 0.0)
+    contributions[rows, dominant] += np.where(
+        scored,
+        dominant_weight * multipliers[dominant] * np.maximum(0.0, dominant_scores - base),
+        0.0,
+    )
+
+    contribution_totals, total_uncertain = fsum_rows(contributions)
+    clamped_totals = clamp(contribution_totals)
+    rescale = (contribution_totals > 0.0) & (contribution_totals != clamped_totals)
+    scale = np.where(rescale, clamped_totals / np.where(rescale, contribution_totals, 1.0), 1.0)
+    contributions = np.where(rescale[:, None], contributions * scale[:, None], contributions)
+    return np.where(available, contributions, np.nan), (base_uncertain | total_uncertain) & scored
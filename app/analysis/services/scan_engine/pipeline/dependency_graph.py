@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import logging
+import math
+from collections import deque
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import repeat
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class DependencyGraph:
+    """Directed file graph on integer node ids with CSR adjacency.
+
+    Nodes are addressed by their position in ``nodes``; duplicate edges and
+    self-loops are dropped.  Successors of node ``i`` are
+    ``out_targets[out_offsets[i]:out_offsets[i + 1]]`` and predecessors are
+    stored the same way in ``in_offsets``/``in_sources``.
+    """
+
+    def __init__(self, nodes: Sequence[str], edges: Iterable[tuple[int, int]]) -> None:
+        self.nodes = list(nodes)
+        self.index = {node: position for position, node in enumerate(self.nodes)}
+        node_count = len(self.nodes)
+
+        unique_edges = sorted({(source, target) for source, target in edges if source != target})
+        sources = np.fromiter((source for source, _ in unique_edges), dtype=np.int32, count=len(unique_edges))
+        targets = np.fromiter((target for _, target in unique_edges), dtype=np.int32, count=len(unique_edges))
+
+        self.out_offsets, self.out_targets = self._csr(node_count, sources, targets)
+        self.in_offsets, self.in_sources = self._csr(node_count, targets, sources)
+        self.out_degrees = np.diff(self.out_offsets)
+        self.in_degrees = np.diff(self.in_offsets)
+        self._components: list[list[int]] | None = None
+
+    @classmethod
+    def from_named_edges(cls, nodes: Sequence[str], edges: Iterable[tuple[str, str]]) -> "DependencyGraph":
+        index = {node: position for position, node in enumerate(nodes)}
+        return cls(nodes, ((index[source], index[target]) for source, target in edges))
+
+    @staticmethod
+    def _csr(node_count: int, sources: np.ndarray, targets: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        order = np.lexsort((targets, sources))
+        offsets = np.zeros(node_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=node_count), out=offsets[1:])
+        return offsets, targets[order]
+
+    def number_of_nodes(self) -> int:
+        return len(self.nodes)
+
+    def number_of_edges(self) -> int:
+        return int(self.out_targets.shape[0])
+
+    def successors(self, node: int) -> np.ndarray:
+        return self.out_targets[self.out_offsets[node] : self.out_offsets[node + 1]]
+
+    def predecessors(self, node: int) -> np.ndarray:
+        return self.in_sources[self.in_offsets[node] : self.in_offsets[node + 1]]
+
+    def edges(self) -> Iterator[tuple[str, str]]:
+        offsets = self.out_offsets.tolist()
+        targets = self.out_targets.tolist()
+        for source, node in enumerate(self.nodes):
+            for target in targets[offsets[source] : offsets[source + 1]]:
+                yield node, self.nodes[target]
+
+    def strongly_connected_components(self) -> list[list[int]]:
+        """Tarjan's SCCs, emitted sinks first (reverse topological order)."""
+        if self._components is None:
+            self._components = self._tarjan()
+        return self._components
+
+    def strongly_connected_components_within(self, nodes: set[int]) -> list[list[int]]:
+        """SCCs of the subgraph induced by ``nodes``, sinks first."""
+        return self._tarjan(nodes)
+
+    def reachable(self, starts: Iterable[int], reverse: bool = False) -> set[int]:
+        """``starts`` plus every node reachable from them (or reaching them)."""
+        offsets = (self.in_offsets if reverse else self.out_offsets).tolist()
+        neighbours = (self.in_sources if reverse else self.out_targets).tolist()
+        seen = set(starts)
+        pending = list(seen)
+        while pending:
+            node = pending.pop()
+            for neighbour in neighbours[offsets[node] : offsets[node + 1]]:
+                if neighbour not in seen:
+                    seen.add(neighbour)
+                    pending.append(neighbour)
+        return seen
+
+    def _tarjan(self, allowed: set[int] | None = None) -> list[list[int]]:
+        node_count = len(self.nodes)
+        offsets = self.out_offsets.tolist()
+        targets = self.out_targets.tolist()
+        order = [-1] * node_count
+        low = [0] * node_count
+        on_stack = [False] * node_count
+        stack: list[int] = []
+        components: list[list[int]] = []
+        counter = 0
+
+        roots = range(node_count) if allowed is None else sorted(allowed)
+        for root in roots:
+            if order[root] != -1:
+                continue
+
+            order[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            work = [(root, offsets[root])]
+            while work:
+                node, edge = work[-1]
+                if edge < offsets[node + 1]:
+                    work[-1] = (node, edge + 1)
+                    target = targets[edge]
+                    if allowed is not None and target not in allowed:
+                        continue
+                    if order[target] == -1:
+                        order[target] = low[target] = counter
+                        counter += 1
+                        stack.append(target)
+                        on_stack[target] = True
+                        work.append((target, offsets[target]))
+                    elif on_stack[target]:
+                        low[node] = min(low[node], order[target])
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == order[node]:
+                    component: list[int] = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+
+        return components
+
+    def ancestor_counts(self) -> list[int]:
+        """Number of other nodes with a path to each node.
+
+        Every condensation component carries a bitset of the nodes that reach
+        it, built from its predecessors' bitsets in topological order, so the
+        whole graph is covered in one pass over the edges.
+        """
+        reach_by_node = self._propagate_reach(self.strongly_connected_components())
+        return [reach_by_node[node].bit_count() - 1 for node in range(len(self.nodes))]
+
+    def ancestor_counts_for(self, targets: Iterable[int]) -> dict[int, int]:
+        """``ancestor_counts`` for ``targets`` only, visiting just their ancestors."""
+        targets = set(targets)
+        closure = self.reachable(targets, reverse=True)
+        # The closure holds every ancestor of its members, so SCCs inside it
+        # are the same as in the whole graph.
+        reach_by_node = self._propagate_reach(self._tarjan(closure))
+        return {node: reach_by_node[node].bit_count() - 1 for node in targets}
+
+    def _propagate_reach(self, components: list[list[int]]) -> dict[int, int]:
+        component_ids = {node: component_id for component_id, component in enumerate(components) for node in component}
+        in_offsets = self.in_offsets.tolist()
+        in_sources = self.in_sources.tolist()
+        reach: list[int] = [0] * len(components)
+
+        # Tarjan emits sinks first, so walking the list backwards visits every
+        # component after all components that have an edge into it.
+        for component_id in range(len(components) - 1, -1, -1):
+            mask = 0
+            for node in components[component_id]:
+                mask |= 1 << node
+            for node in components[component_id]:
+                for source in in_sources[in_offsets[node] : in_offsets[node + 1]]:
+                    source_component = component_ids[source]
+                    if source_component != component_id:
+                        mask |= reach[source_component]
+            reach[component_id] = mask
+
+        return {node: reach[component_id] for node, component_id in component_ids.items()}
+
+    def component_edges(self, component: Sequence[int]) -> list[tuple[int, int]]:
+        members = set(component)
+        return [
+            (source, int(target))
+            for source in component
+            for target in self.successors(source)
+            if int(target) in members
+        ]
+
+    def betweenness_centrality(
+        self,
+        normalized: bool = True,
+        sources: Sequence[int] | None = None,
+        processes: int = 1,
+    ) -> list[float]:
+        """Brandes' betweenness for an unweighted directed graph.
+
+        Scaled like ``networkx.betweenness_centrality`` on a ``DiGraph``.  With
+        ``sources`` only those pivots are accumulated and the sums are scaled
+        by ``n / len(sources)``, an unbiased estimate of the exact values.
+        ``processes > 1`` splits the pivots across a process pool.
+        """
+        node_count = len(self.nodes)
+        pivots = list(range(node_count)) if sources is None else list(sources)
+        offsets = self.out_offsets.tolist()
+        targets = self.out_targets.tolist()
+
+        if processes > 1 and len(pivots) > 1:
+            betweenness = self._parallel_dependencies(offsets, targets, pivots, processes)
+        else:
+            betweenness = _brandes_dependencies(offsets, targets, pivots)
+
+        scale = 1.0
+        if normalized and node_count > 2:
+            scale = 1.0 / ((node_count - 1) * (node_count - 2))
+        if sources is not None and pivots:
+            scale *= node_count / len(pivots)
+        return [value * scale for value in betweenness]
+
+    @staticmethod
+    def _parallel_dependencies(
+        offsets: list[int],
+        targets: list[int],
+        pivots: list[int],
+        processes: int,
+    ) -> list[float]:
+        chunk_count = min(processes, len(pivots))
+        chunks = [pivots[index::chunk_count] for index in range(chunk_count)]
+        try:
+            with ProcessPoolExecutor(max_workers=chunk_count) as executor:
+                partials = list(
+                    executor.map(_brandes_dependencies, repeat(offsets), repeat(targets), chunks)
+                )
+        except (AssertionError, OSError, BrokenProcessPool) as exc:
+            # Daemonic workers (e.g. Celery prefork children) may not fork.
+            logger.warning("[ARCHITECTURE] parallel betweenness unavailable, running serially: %s", exc)
+            return _brandes_dependencies(offsets, targets, pivots)
+        return [sum(values) for values in zip(*partials, strict=True)]
+
+
+def sampled_betweenness_error_bound(node_count: int, sample_size: int, confidence: float = 0.95) -> float:
+    """Hoeffding bound on the absolute error of a normalized pivot estimate.
+
+    Each pivot contributes at most ``n / (n - 1)`` to a normalized score, so
+    with probability ``confidence`` every single estimate lies within the
+    returned distance of its exact value.
+    """
+    if sample_size < 1 or node_count < 3:
+        return 0.0
+    value_range = node_count / (node_count - 1)
+    return value_range * math.sqrt(math.log(2.0 / (1.0 - confidence)) / (2.0 * sample_size))
+
+
+def _brandes_dependencies(offsets: list[int], targets: list[int], sources: Sequence[int]) -> list[float]:
+    node_count = len(offsets) - 1
+    betweenness = [0.0] * node_count
+
+    for source in sources:
+        order: list[int] = []
+        predecessors: list[list[int]] = [[] for _ in range(node_count)]
+        paths = [0] * node_count
+        distance = [-1] * node_count
+        paths[source] = 1
+        distance[source] = 0
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for target in targets[offsets[node] : offsets[node + 1]]:
+                if distance[target] < 0:
+                    distance[target] = distance[node] + 1
+                    queue.append(target)
+                if distance[target] == distance[node] + 1:
+                    paths[target] += paths[node]
+                    predecessors[target].append(node)
+
+        dependency = [0.0] * node_count
+        for node in reversed(order):
+            for predecessor in predecessors[node]:
+                dependency[predecessor] += paths[predecessor] / paths[node] * (1.0 + dependency[node])
+            if node != source:
+                betweenness[node] += dependency[node]
+
+    return betweenness
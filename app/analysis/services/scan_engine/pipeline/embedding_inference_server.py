@@ -0,0 +1,349 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+import threading
+from collections.abc import Sequence
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from pathlib import Path
+from queue import Empty, Queue
+from time import monotonic, perf_counter
+
+from app.analysis.services.scan_engine.pipeline.code_embedding_service import (
+    CodeEmbeddingProvider,
+)
+
+logger = logging.getLogger(__name__)
+
+_FRAME_HEADER = struct.Struct("!I")
+MAX_FRAME_BYTES = 256 * 1024 * 1024
+
+
+def send_frame(connection: socket.socket, payload: dict[str, object]) -> None:
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    if len(body) > MAX_FRAME_BYTES:
+        raise ValueError(f"Embedding frame exceeds {MAX_FRAME_BYTES} bytes")
+    connection.sendall(_FRAME_HEADER.pack(len(body)) + body)
+
+
+def receive_frame(connection: socket.socket) -> dict[str, object] | None:
+    header = _receive_exactly(connection, _FRAME_HEADER.size)
+    if header is None:
+        return None
+
+    (length,) = _FRAME_HEADER.unpack(header)
+    if length > MAX_FRAME_BYTES:
+        raise ValueError(f"Embedding frame exceeds {MAX_FRAME_BYTES} bytes")
+
+    body = _receive_exactly(connection, length)
+    if body is None:
+        raise ConnectionError("Embedding connection closed mid-frame")
+
+    value = json.loads(body.decode("utf-8"))
+    if not isinstance(value, dict):
+        raise ValueError("Embedding frame must be a JSON object")
+    return value
+
+
+def _receive_exactly(connection: socket.socket, size: int) -> bytes | None:
+    chunks: list[bytes] = []
+    remaining = size
+    while remaining:
+        chunk = connection.recv(remaining)
+        if not chunk:
+            if not chunks:
+                return None
+            raise ConnectionError("Embedding connection closed mid-frame")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+@dataclass(slots=True)
+class _PendingText:
+    text: str
+    bucket: int
+    future: Future = field(default_factory=Future)
+
+
+class DynamicEmbeddingBatcher:
+    """Merge texts from concurrent requests into length-bucketed model calls.
+
+    The first queued text opens a batching window of ``max_wait_seconds``;
+    the window closes early once ``max_batch_texts`` are pending.  Texts are
+    then grouped by a power-of-two length bucket so that each model call pads
+    similarly sized snippets together.
+    """
+
+    def __init__(
+        self,
+        provider: CodeEmbeddingProvider,
+        max_wait_seconds: float = 0.01,
+        max_batch_texts: int = 256,
+        min_bucket_chars: int = 64,
+    ) -> None:
+        if max_wait_seconds < 0:
+            raise ValueError("Embedding batching window must not be negative")
+        if max_batch_texts < 1:
+            raise ValueError("Embedding batch limit must be at least 1")
+
+        self.provider = provider
+        self.max_wait_seconds = max_wait_seconds
+        self.max_batch_texts = max_batch_texts
+        self.min_bucket_chars = min_bucket_chars
+        self._queue: Queue[_PendingText | None] = Queue()
+        self._worker: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._worker = threading.Thread(
+            target=self._run,
+            name="embedding-batcher",
+            daemon=True,
+        )
+        self._worker.start()
+
+    def stop(self) -> None:
+        if self._worker is None:
+            return
+        self._queue.put(None)
+        self._worker.join()
+        self._worker = None
+
+    def encode(self, texts: Sequence[str]) -> list[list[float]]:
+        pending = [_PendingText(text=text, bucket=self._bucket(text)) for text in texts]
+        for item in pending:
+            self._queue.put(item)
+        return [item.future.result() for item in pending]
+
+    def _bucket(self, text: str) -> int:
+        bucket = self.min_bucket_chars
+        while bucket < len(text):
+            bucket *= 2
+        return bucket
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+
+            batch = [first]
+            deadline = monotonic() + self.max_wait_seconds
+            stopping = False
+            while len(batch) < self.max_batch_texts:
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._encode_batch(batch)
+            if stopping:
+                return
+
+    def _encode_batch(self, batch: list[_PendingText]) -> None:
+        buckets: dict[int, list[_PendingText]] = {}
+        for item in batch:
+            buckets.setdefault(item.bucket, []).append(item)
+
+        for bucket, items in sorted(buckets.items()):
+            started = perf_counter()
+            try:
+                vectors = self.provider.encode([item.text for item in items])
+                if len(vectors) != len(items):
+                    raise RuntimeError(
+                        f"embedding provider returned {len(vectors)} vectors for {len(items)} texts"
+                    )
+            except Exception as exc:
+                for item in items:
+                    item.future.set_exception(exc)
+                continue
+
+            for item, vector in zip(items, vectors, strict=True):
+                item.future.set_result(vector)
+            logger.info(
+                "[EMBEDDING SERVER BATCH COMPLETED] bucket_chars=%d text_count=%d window_text_count=%d elapsed_seconds=%.3f",
+                bucket,
+                len(items),
+                len(batch),
+                perf_counter() - started,
+            )
+
+
+class _EmbeddingRequestHandler(socketserver.BaseRequestHandler):
+    server: "_ThreadingUnixServer"
+
+    def handle(self) -> None:
+        while True:
+            try:
+                request = receive_frame(self.request)
+            except (ConnectionError, ValueError) as exc:
+                logger.warning("[EMBEDDING SERVER BAD REQUEST] error=%s", str(exc))
+                return
+            if request is None:
+                return
+            send_frame(self.request, self.server.inference_server.handle_request(request))
+
+
+class _ThreadingUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, inference_server: "EmbeddingInferenceServer") -> None:
+        self.inference_server = inference_server
+        super().__init__(socket_path, _EmbeddingRequestHandler)
+
+
+class EmbeddingInferenceServer:
+    """Serve one resident embedding model to every scan worker on a host."""
+
+    def __init__(
+        self,
+        provider: CodeEmbeddingProvider,
+        socket_path: str | Path,
+        max_wait_seconds: float = 0.01,
+        max_batch_texts: int = 256,
+    ) -> None:
+        self.provider = provider
+        self.socket_path = Path(socket_path)
+        self.batcher = DynamicEmbeddingBatcher(
+            provider,
+            max_wait_seconds=max_wait_seconds,
+            max_batch_texts=max_batch_texts,
+        )
+        self._server: _ThreadingUnixServer | None = None
+
+    @property
+    def model_id(self) -> str:
+        return getattr(self.provider, "model_id", self.provider.__class__.__name__)
+
+    def start(self) -> None:
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        self.batcher.start()
+        self._server = _ThreadingUnixServer(str(self.socket_path), self)
+        logger.info(
+            "[EMBEDDING SERVER STARTED] model=%s socket=%s max_wait_seconds=%.3f max_batch_texts=%d",
+            self.model_id,
+            self.socket_path,
+            self.batcher.max_wait_seconds,
+            self.batcher.max_batch_texts,
+        )
+
+    def serve_forever(self) -> None:
+        if self._server is None:
+            self.start()
+        assert self._server is not None
+        try:
+            self._server.serve_forever()
+        finally:
+            self.stop()
+
+    def serve_in_background(self) -> threading.Thread:
+        if self._server is None:
+            self.start()
+        assert self._server is not None
+        thread = threading.Thread(
+            target=self._server.serve_forever,
+            name="embedding-server",
+            daemon=True,
+        )
+        thread.start()
+        return thread
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        self.batcher.stop()
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+        logger.info("[EMBEDDING SERVER STOPPED] socket=%s", self.socket_path)
+
+    def handle_request(self, request: dict[str, object]) -> dict[str, object]:
+        operation = request.get("op")
+        if operation == "info":
+            return {"model_id": self.model_id}
+        if operation != "encode":
+            return {"error": f"Unsupported embedding server operation: {operation}"}
+
+        texts = request.get("texts")
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            return {"error": "Embedding request texts must be a list of strings"}
+
+        try:
+            vectors = self.batcher.encode(texts)
+        except Exception as exc:
+            logger.warning("[EMBEDDING SERVER ENCODE FAILED] text_count=%d error=%s", len(texts), str(exc))
+            return {"error": str(exc) or exc.__class__.__name__}
+        return {"model_id": self.model_id, "vectors": vectors}
+
+
+class EmbeddingInferenceClient:
+    """``CodeEmbeddingProvider`` adapter for a local ``EmbeddingInferenceServer``."""
+
+    FALLBACK_MODEL_ID = "embedding-server"
+
+    def __init__(
+        self,
+        socket_path: str | Path,
+        timeout_seconds: float = 600.0,
+        model_id: str | None = None,
+    ) -> None:
+        self.socket_path = Path(socket_path)
+        self.timeout_seconds = timeout_seconds
+        self._model_id = model_id
+
+    @property
+    def model_id(self) -> str:
+        if self._model_id is None:
+            try:
+                response = self._request({"op": "info"})
+            except RuntimeError:
+                # Only used for logging and metadata; encode() reports the
+                # actual connection failure.
+                return self.FALLBACK_MODEL_ID
+            self._model_id = str(response.get("model_id") or self.FALLBACK_MODEL_ID)
+        return self._model_id
+
+    def encode(self, texts: Sequence[str]) -> list[list[float]]:
+        if not texts:
+            return []
+
+        response = self._request({"op": "encode", "texts": list(texts)})
+        vectors = response.get("vectors")
+        if not isinstance(vectors, list):
+            raise RuntimeError("Embedding server returned no vectors")
+        if response.get("model_id"):
+            self._model_id = str(response["model_id"])
+        return vectors
+
+    def _request(self, payload: dict[str, object]) -> dict[str, object]:
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+                connection.settimeout(self.timeout_seconds)
+                connection.connect(os.fspath(self.socket_path))
+                send_frame(connection, payload)
+                response = receive_frame(connection)
+        except OSError as exc:
+            raise RuntimeError(f"Embedding server at {self.socket_path} is unavailable: {exc}") from exc
+
+        if response is None:
+            raise RuntimeError("Embedding server closed the connection without a response")
+        if "error" in response:
+            raise RuntimeError(f"Embedding server failed: {response['error']}")
+        return response
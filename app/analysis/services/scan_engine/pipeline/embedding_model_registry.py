@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from collections.abc import Callable, Hashable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from time import monotonic
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class LoadedEmbeddingModel:
+    """Everything ``CodeEmbeddingService`` needs after loading a model once."""
+
+    tokenizer: object
+    model: object
+    torch: object
+    functional: object
+    device: str
+    pooling_mode: str
+    metadata_max_length: int | None = None
+    memory_bytes: int = 0
+    loaded_at: float = field(default_factory=monotonic)
+    last_used_at: float = field(default_factory=monotonic)
+    active_users: int = 0
+
+
+ModelLoader = Callable[[], LoadedEmbeddingModel]
+
+
+class EmbeddingModelRegistry:
+    """Process-level cache that keeps embedding models resident between scans.
+
+    Celery builds a new ``CodeEmbeddingService`` for every task; the registry
+    lets those short-lived services share one loaded tokenizer/model per
+    worker process.  Entries that have not been used for
+    ``idle_unload_seconds`` are dropped by a background reaper, and
+    ``max_resident_bytes`` evicts the least recently used idle entries when a
+    new model would exceed the budget.
+
+    A model loaded in the Celery parent before the prefork pool starts is
+    inherited by every child through copy-on-write pages; the registry
+    detects the fork and resets its lock and reaper thread in the child.
+    """
+
+    def __init__(
+        self,
+        idle_unload_seconds: float | None = None,
+        max_resident_bytes: int | None = None,
+    ) -> None:
+        if idle_unload_seconds is not None and idle_unload_seconds <= 0:
+            raise ValueError("Embedding model idle unload timeout must be positive")
+        if max_resident_bytes is not None and max_resident_bytes <= 0:
+            raise ValueError("Embedding model memory budget must be positive")
+
+        self.idle_unload_seconds = idle_unload_seconds
+        self.max_resident_bytes = max_resident_bytes
+        self._entries: dict[Hashable, LoadedEmbeddingModel] = {}
+        self._lock = threading.RLock()
+        self._owner_pid = os.getpid()
+        self._reaper: threading.Thread | None = None
+        self._reaper_stop = threading.Event()
+
+    @contextmanager
+    def checkout(self, key: Hashable, loader: ModelLoader) -> Iterator[LoadedEmbeddingModel]:
+        """Yield the resident model for ``key``, loading it on first use."""
+        entry = self.get_or_load(key, loader, acquire=True)
+        try:
+            yield entry
+        finally:
+            with self._lock:
+                entry.active_users = max(0, entry.active_users - 1)
+                entry.last_used_at = monotonic()
+
+    def get_or_load(
+        self,
+        key: Hashable,
+        loader: ModelLoader,
+        *,
+        acquire: bool = False,
+    ) -> LoadedEmbeddingModel:
+        self._reset_after_fork()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = loader()
+                entry.memory_bytes = entry.memory_bytes or model_memory_bytes(entry.model)
+                self._evict_for(entry.memory_bytes)
+                self._entries[key] = entry
+                logger.info(
+                    "[EMBEDDINGS REGISTRY LOADED] key=%s memory_mb=%.1f resident_models=%d resident_mb=%.1f",
+                    key,
+                    entry.memory_bytes / 1024 / 1024,
+                    len(self._entries),
+                    self.resident_bytes() / 1024 / 1024,
+                )
+            entry.last_used_at = monotonic()
+            if acquire:
+                entry.active_users += 1
+            self._ensure_reaper()
+            return entry
+
+    def unload(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        logger.info(
+            "[EMBEDDINGS REGISTRY UNLOADED] key=%s memory_mb=%.1f",
+            key,
+            entry.memory_bytes / 1024 / 1024,
+        )
+        return True
+
+    def unload_idle(self, now: float | None = None) -> int:
+        if self.idle_unload_seconds is None:
+            return 0
+
+        current = monotonic() if now is None else now
+        with self._lock:
+            idle_keys = [
+                key
+                for key, entry in self._entries.items()
+                if entry.active_users == 0
+                and current - entry.last_used_at >= self.idle_unload_seconds
+            ]
+        return sum(1 for key in idle_keys if self.unload(key))
+
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return sum(entry.memory_bytes for entry in self._entries.values())
+
+    def stats(self) -> dict[str, object]:
+        with self._lock:
+            return {
+                "resident_models": len(self._entries),
+                "resident_bytes": sum(entry.memory_bytes for entry in self._entries.values()),
+                "models": {
+                    str(key): {
+                        "memory_bytes": entry.memory_bytes,
+                        "active_users": entry.active_users,
+                        "idle_seconds": round(monotonic() - entry.last_used_at, 3),
+                    }
+                    for key, entry in self._entries.items()
+                },
+            }
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def _evict_for(self, incoming_bytes: int) -> None:
+        if self.max_resident_bytes is None:
+            return
+
+        idle_entries = sorted(
+            (
+                (entry.last_used_at, key)
+                for key, entry in self._entries.items()
+                if entry.active_users == 0
+            ),
+        )
+        for _, key in idle_entries:
+            if self.resident_bytes() + incoming_bytes <= self.max_resident_bytes:
+                break
+            self.unload(key)
+
+        if self.resident_bytes() + incoming_bytes > self.max_resident_bytes:
+            logger.warning(
+                "[EMBEDDINGS REGISTRY OVER BUDGET] resident_mb=%.1f incoming_mb=%.1f budget_mb=%.1f",
+                self.resident_bytes() / 1024 / 1024,
+                incoming_bytes / 1024 / 1024,
+                self.max_resident_bytes / 1024 / 1024,
+            )
+
+    def _ensure_reaper(self) -> None:
+        if self.idle_unload_seconds is None:
+            return
+        if self._reaper is not None and self._reaper.is_alive():
+            return
+
+        self._reaper_stop = threading.Event()
+        self._reaper = threading.Thread(
+            target=self._reap_idle_models,
+            name="embedding-model-reaper",
+            daemon=True,
+        )
+        self._reaper.start()
+
+    def _reap_idle_models(self) -> None:
+        assert self.idle_unload_seconds is not None
+        interval = min(max(self.idle_unload_seconds / 2, 1.0), 60.0)
+        while not self._reaper_stop.wait(interval):
+            try:
+                self.unload_idle()
+            except Exception:
+                logger.exception("[EMBEDDINGS REGISTRY REAPER FAILED]")
+            with self._lock:
+                if not self._entries:
+                    self._reaper = None
+                    return
+
+    def _reset_after_fork(self) -> None:
+        pid = os.getpid()
+        if pid == self._owner_pid:
+            return
+
+        # Threads do not survive fork(). The inherited models stay shared
+        # copy-on-write; only the synchronisation state is rebuilt.
+        self._owner_pid = pid
+        self._lock = threading.RLock()
+        self._reaper = None
+        self._reaper_stop = threading.Event()
+        for entry in self._entries.values():
+            entry.active_users = 0
+
+
+def model_memory_bytes(model: object) -> int:
+    total = 0
+    for collection in ("parameters", "buffers"):
+        tensors = getattr(model, collection, None)
+        if not callable(tensors):
+            continue
+        try:
+            total += sum(int(tensor.numel()) * int(tensor.element_size()) for tensor in tensors())
+        except Exception:
+            logger.debug("[EMBEDDINGS REGISTRY] could not size model %s", collection, exc_info=True)
+    return total
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import ast
+import hashlib
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+# Statement lists that can hold further statements; imports never occur inside
+# expressions, so nothing else has to be visited.
+_STATEMENT_LIST_FIELDS = ("body", "orelse", "finalbody", "handlers", "cases")
+
+
+@dataclass(slots=True, frozen=True)
+class ImportStatement:
+    """One ``import``/``from ... import`` statement, before resolution.
+
+    ``names`` are the imported module names for ``import`` statements and the
+    imported member names for ``from`` imports.
+    """
+
+    from_import: bool
+    module: str | None
+    names: tuple[str, ...]
+    level: int
+    type_only: bool
+
+
+def extract_imports(tree: ast.Module) -> tuple[ImportStatement, ...]:
+    imports: list[ImportStatement] = []
+    pending: list[tuple[list[ast.AST], bool]] = [(tree.body, False)]
+    while pending:
+        statements, type_only = pending.pop()
+        for statement in statements:
+            if isinstance(statement, ast.Import):
+                imports.append(
+                    ImportStatement(
+                        from_import=False,
+                        module=None,
+                        names=tuple(alias.name for alias in statement.names),
+                        level=0,
+                        type_only=type_only,
+                    )
+                )
+                continue
+            if isinstance(statement, ast.ImportFrom):
+                imports.append(
+                    ImportStatement(
+                        from_import=True,
+                        module=statement.module,
+                        names=tuple(alias.name for alias in statement.names),
+                        level=statement.level,
+                        type_only=type_only,
+                    )
+                )
+                continue
+
+            for field_name in _STATEMENT_LIST_FIELDS:
+                children = getattr(statement, field_name, None)
+                if not children:
+                    continue
+                guarded = type_only or (
+                    field_name == "body"
+                    and isinstance(statement, ast.If)
+                    and is_type_checking_guard(statement.test)
+                )
+                pending.append((children, guarded))
+
+    return tuple(imports)
+
+
+def content_digest(content: bytes) -> str:
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def is_type_checking_guard(test: ast.AST) -> bool:
+    return any(
+        (
+            isinstance(node, ast.Name)
+            and node.id == "TYPE_CHECKING"
+        )
+        or (
+            isinstance(node, ast.Attribute)
+            and node.attr == "TYPE_CHECKING"
+            and isinstance(node.value, ast.Name)
+            and node.value.id == "typing"
+        )
+        for node in ast.walk(test)
+    )
+
+
+class ModulePrefixTrie:
+    """Dotted module names mapped to files, resolved by longest known prefix."""
+
+    _VALUE = ""
+
+    def __init__(self, modules: Iterable[tuple[str, str]] = ()) -> None:
+        self._root: dict[str, dict] = {}
+        for module_name, value in modules:
+            self.add(module_name, value)
+
+    def add(self, module_name: str, value: str) -> None:
+        node = self._root
+        for part in module_name.split("."):
+            if part:
+                node = node.setdefault(part, {})
+        node[self._VALUE] = value
+
+    def longest_prefix(self, module_name: str) -> str | None:
+        node = self._root
+        match = None
+        for part in module_name.split("."):
+            if not part:
+                continue
+            node = node.get(part)
+            if node is None:
+                break
+            match = node.get(self._VALUE, match)
+        return match
+
+
+class ImportCache:
+    """Process-wide LRU of extracted imports keyed by file content hash.
+
+    Only the unresolved statements are cached, so entries stay valid when a
+    later scan adds, moves or deletes other modules.
+    """
+
+    def __init__(self, max_entries: int = 20_000) -> None:
+        if max_entries < 0:
+            raise ValueError("Import cache size must not be negative")
+
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[ImportStatement, ...]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def imports_for(self, content: bytes, digest: str | None = None) -> tuple[ImportStatement, ...]:
+        key = digest or content_digest(content)
+        with self._lock:
+            imports = self._entries.get(key)
+            if imports is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return imports
+
+        imports = extract_imports(ast.parse(content.decode("utf-8")))
+        with self._lock:
+            self.misses += 1
+            if self.max_entries:
+                self._entries[key] = imports
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return imports
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+
+from app.analysis.services.scan_engine.pipeline.dependency_graph import DependencyGraph
+
+
+@dataclass(slots=True, frozen=True)
+class DependencyGraphSnapshot:
+    """Architecture state of a finished scan, the base for patching the next one.
+
+    ``sccs`` and ``runtime_sccs`` list only components with more than one file;
+    ``betweenness_drift`` is the share of edges changed since ``betweenness``
+    was last computed rather than reused.
+    """
+
+    content_hashes: dict[str, str | None]
+    edges: frozenset[tuple[str, str]]
+    type_only_edges: frozenset[tuple[str, str]]
+    sccs: tuple[tuple[str, ...], ...]
+    runtime_sccs: tuple[tuple[str, ...], ...]
+    transitive_dependents: dict[str, int]
+    betweenness: dict[str, float]
+    betweenness_drift: float = 0.0
+
+    @property
+    def runtime_edges(self) -> frozenset[tuple[str, str]]:
+        return self.edges - self.type_only_edges
+
+    def dependencies_by_source(self) -> dict[str, tuple[set[str], set[str]]]:
+        """Previous ``(all, runtime)`` dependencies of every file with edges."""
+        grouped: dict[str, tuple[set[str], set[str]]] = {}
+        for source, target in self.edges:
+            dependencies, runtime_dependencies = grouped.setdefault(source, (set(), set()))
+            dependencies.add(target)
+            if (source, target) not in self.type_only_edges:
+                runtime_dependencies.add(target)
+        return grouped
+
+
+@dataclass(slots=True, frozen=True)
+class GraphDelta:
+    """Edge and node changes between a snapshot graph and the current graph.
+
+    ``added_edges`` use current node ids; ``removed_edges`` use paths because
+    their endpoints may no longer exist.
+    """
+
+    added_edges: frozenset[tuple[int, int]]
+    removed_edges: frozenset[tuple[str, str]]
+    added_nodes: frozenset[str]
+    deleted_nodes: frozenset[str]
+
+    @classmethod
+    def between(
+        cls,
+        previous_nodes: Iterable[str],
+        previous_edges: Iterable[tuple[str, str]],
+        graph: DependencyGraph,
+    ) -> "GraphDelta":
+        previous_nodes = set(previous_nodes)
+        previous_edges = set(previous_edges)
+        current_edges = set(graph.edges())
+        return cls(
+            added_edges=frozenset(
+                (graph.index[source], graph.index[target])
+                for source, target in current_edges - previous_edges
+            ),
+            removed_edges=frozenset(previous_edges - current_edges),
+            added_nodes=frozenset(set(graph.nodes) - previous_nodes),
+            deleted_nodes=frozenset(previous_nodes - set(graph.nodes)),
+        )
+
+    @property
+    def edge_change_count(self) -> int:
+        return len(self.added_edges) + len(self.removed_edges)
+
+    @property
+    def nodes_changed(self) -> bool:
+        return bool(self.added_nodes or self.deleted_nodes)
+
+
+def update_components(
+    graph: DependencyGraph,
+    delta: GraphDelta,
+    previous_components: Sequence[Sequence[str]],
+) -> tuple[list[list[int]], int]:
+    """Multi-file SCCs of ``graph``, re-running Tarjan only where ``delta`` can matter.
+
+    A component can only change if it lost an internal edge or member, or if
+    an added edge ``u -> v`` closes a cycle, which puts the cycle inside
+    ``reach(v) & ancestors(u)``.  Those nodes plus their whole previous
+    components form the region that is recomputed; every other previous
+    component is kept as is.  Returns the components and the region size.
+    """
+    previous_component_ids = {
+        node: component_id
+        for component_id, component in enumerate(previous_components)
+        for node in component
+    }
+    region: set[str] = set()
+
+    def add_previous_component(node: str) -> None:
+        component_id = previous_component_ids.get(node)
+        if component_id is not None:
+            region.update(previous_components[component_id])
+
+    for source, target in delta.removed_edges:
+        component_id = previous_component_ids.get(source)
+        if component_id is not None and previous_component_ids.get(target) == component_id:
+            add_previous_component(source)
+    for node in delta.deleted_nodes:
+        add_previous_component(node)
+    if delta.added_edges:
+        forward = graph.reachable(target for _, target in delta.added_edges)
+        backward = graph.reachable((source for source, _ in delta.added_edges), reverse=True)
+        for node_id in forward & backward:
+            region.add(graph.nodes[node_id])
+            add_previous_component(graph.nodes[node_id])
+
+    region_ids = {graph.index[node] for node in region if node in graph.index}
+    components = [
+        [graph.index[node] for node in component]
+        for component in previous_components
+        if not region.intersection(component)
+    ]
+    components.extend(
+        component
+        for component in graph.strongly_connected_components_within(region_ids)
+        if len(component) > 1
+    )
+    return components, len(region_ids)
+
+
+def update_ancestor_counts(
+    graph: DependencyGraph,
+    previous_graph: DependencyGraph,
+    delta: GraphDelta,
+    previous_counts: dict[str, int],
+) -> tuple[list[int], int]:
+    """Transitive dependent counts, recounted only below changed edges.
+
+    A node's ancestors can only change through an added edge into one of its
+    current ancestors or a removed edge into one of its previous ancestors,
+    so only nodes reachable from the heads of changed edges are recounted.
+    Returns the counts and how many nodes were recounted.
+    """
+    affected = graph.reachable(target for _, target in delta.added_edges)
+    previous_heads = {
+        previous_graph.index[target]
+        for _, target in delta.removed_edges
+        if target in previous_graph.index
+    }
+    affected.update(
+        graph.index[previous_graph.nodes[node]]
+        for node in previous_graph.reachable(previous_heads)
+        if previous_graph.nodes[node] in graph.index
+    )
+    affected.update(graph.index[node] for node in delta.added_nodes)
+
+    counts = [previous_counts.get(node, 0) for node in graph.nodes]
+    for node, count in graph.ancestor_counts_for(affected).items():
+        counts[node] = count
+    return counts, len(affected)
@@ -1,17 +1,28 @@
-import ast
 import logging
+import random
 from collections.abc import Callable
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
-
+from time import perf_counter
+
+from app.analysis.services.scan_engine.pipeline.dependency_graph import (
+    DependencyGraph,
+    sampled_betweenness_error_bound,
+)
+from app.analysis.services.scan_engine.pipeline.import_index import (
+    ImportCache,
+    ImportStatement,
+    ModulePrefixTrie,
+    content_digest,
+)
+from app.analysis.services.scan_engine.pipeline.incremental_dependency_graph import (
+    DependencyGraphSnapshot,
+    GraphDelta,
+    update_ancestor_counts,
+    update_components,
+)
 from app.analysis.services.scan_engine.pipeline.metrics_vector import LayerResult, MetricsVector
 
-try:
-    import networkx as nx
-except ImportError:
-    nx = None
-
 logger = logging.getLogger(__name__)
 
 
@@ -19,13 +30,19 @@ logger = logging.getLogger(__name__)
 class ArchitectureGraphContext:
     vectors: list[MetricsVector]
     module_to_relative_path: dict[str, str]
-    graph: Any
-    runtime_graph: Any
+    graph: DependencyGraph
+    runtime_graph: DependencyGraph
     betweenness: dict[str, float]
+    betweenness_estimate: dict[str, object]
+    transitive_dependents: dict[str, int]
     sccs: list[dict[str, list[str] | list[list[str]]]]
     scc_size_by_path: dict[str, int]
     runtime_sccs: list[dict[str, list[str] | list[list[str]]]]
     runtime_scc_size_by_path: dict[str, int]
+    content_hashes: dict[str, str | None]
+    type_only_dependencies: dict[str, list[str]]
+    betweenness_drift: float
+    incremental: dict[str, object]
 
 
 MetricHandler = Callable[[ArchitectureGraphContext, str], int | float | None]
@@ -35,8 +52,38 @@ class ArchitectureAnalysisLayer:
     """Layer 4 - architectural influence analysis, cross-file."""
 
     LAYER_NAME = "architecture_analysis"
+    BETWEENNESS_STRATEGIES = ("auto", "exact", "sampled")
+    DEFAULT_BETWEENNESS_SAMPLE_SIZE = 256
+    DEFAULT_BETWEENNESS_EXACT_MAX_NODES = 2000
+    BETWEENNESS_ERROR_CONFIDENCE = 0.95
+    DEFAULT_BETWEENNESS_REFRESH_DELTA = 0.0
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        betweenness_strategy: str = "auto",
+        betweenness_sample_size: int = DEFAULT_BETWEENNESS_SAMPLE_SIZE,
+        betweenness_exact_max_nodes: int = DEFAULT_BETWEENNESS_EXACT_MAX_NODES,
+        betweenness_seed: int = 0,
+        betweenness_processes: int = 1,
+        betweenness_refresh_delta: float = DEFAULT_BETWEENNESS_REFRESH_DELTA,
+        import_cache: ImportCache | None = None,
+    ) -> None:
+        if betweenness_strategy not in self.BETWEENNESS_STRATEGIES:
+            raise ValueError(f"Unknown betweenness strategy: {betweenness_strategy}")
+        if betweenness_sample_size < 1:
+            raise ValueError("Betweenness sample size must be at least 1")
+        if betweenness_processes < 1:
+            raise ValueError("Betweenness processes must be at least 1")
+        if betweenness_refresh_delta < 0:
+            raise ValueError("Betweenness refresh delta must not be negative")
+
+        self.betweenness_strategy = betweenness_strategy
+        self.betweenness_sample_size = betweenness_sample_size
+        self.betweenness_exact_max_nodes = betweenness_exact_max_nodes
+        self.betweenness_seed = betweenness_seed
+        self.betweenness_processes = betweenness_processes
+        self.betweenness_refresh_delta = betweenness_refresh_delta
+        self.import_cache = import_cache or ImportCache()
         self.metric_handlers: dict[str, MetricHandler] = {
             "fan_in": self.fan_in,
             "fan_out": self.fan_out,
@@ -47,7 +94,11 @@ class ArchitectureAnalysisLayer:
             "instability_index": self.instability_index,
         }
 
-    def run(self, vectors: list[MetricsVector]) -> LayerResult:
+    def run(
+        self,
+        vectors: list[MetricsVector],
+        previous: DependencyGraphSnapshot | None = None,
+    ) -> LayerResult:
         logger.info("[ARCHITECTURE] running architecture analysis on %d files", len(vectors))
         self._validate_vectors(vectors)
 
@@ -56,7 +107,7 @@ class ArchitectureAnalysisLayer:
             return LayerResult(vectors=vectors)
 
         try:
-            context = self._build_context(vectors)
+            context = self._build_context(vectors, previous)
         except Exception as exc:
             logger.warning("[ARCHITECTURE] failed to build dependency graph: %s", exc)
             for vector in vectors:
@@ -78,6 +129,9 @@ class ArchitectureAnalysisLayer:
                 vector.metadata = {
                     "sccs": context.sccs,
                     "runtime_sccs": context.runtime_sccs,
+                    "content_hash": context.content_hashes.get(relative_path),
+                    "type_only_dependencies": context.type_only_dependencies.get(relative_path, []),
+                    "betweenness_drift": context.betweenness_drift,
                 }
             except Exception as exc:
                 logger.warning("[ARCHITECTURE] failed for %s: %s", vector.relative_path, exc)
@@ -96,57 +150,216 @@ class ArchitectureAnalysisLayer:
 
     # -- Graph construction ------------------------------------------------
 
-    def _build_context(self, vectors: list[MetricsVector]) -> ArchitectureGraphContext:
-        if nx is None:
-            raise RuntimeError("networkx is not installed")
-
+    def _build_context(
+        self,
+        vectors: list[MetricsVector],
+        previous: DependencyGraphSnapshot | None = None,
+    ) -> ArchitectureGraphContext:
         module_to_relative_path = self._module_to_relative_path(vectors)
-        graph = nx.DiGraph()
-        runtime_graph = nx.DiGraph()
-        graph.add_nodes_from(
-            vector.relative_path for vector in vectors if vector.relative_path is not None
-        )
-        runtime_graph.add_nodes_from(
+        module_trie = ModulePrefixTrie(module_to_relative_path.items())
+        cache_hits, cache_misses = self.import_cache.hits, self.import_cache.misses
+        nodes = list(dict.fromkeys(
             vector.relative_path for vector in vectors if vector.relative_path is not None
-        )
+        ))
+        node_ids = {node: index for index, node in enumerate(nodes)}
+        edges: list[tuple[int, int]] = []
+        runtime_edges: list[tuple[int, int]] = []
+        content_hashes: dict[str, str | None] = {}
+        type_only_dependencies: dict[str, list[str]] = {}
+
+        # Imports resolve against the module set, so an unchanged file keeps
+        # its previous edges only while no file was added or deleted.
+        reuse_edges = previous is not None and set(previous.content_hashes) == set(nodes)
+        previous_dependencies = previous.dependencies_by_source() if reuse_edges else {}
+        reused_file_count = 0
 
         for vector in vectors:
             assert vector.absolute_path is not None and vector.relative_path is not None
-            dependencies, runtime_dependencies = self._dependencies_for_file(
-                vector.absolute_path,
-                vector.relative_path,
-                module_to_relative_path,
+            relative_path = vector.relative_path
+            content = self._read_source(vector.absolute_path)
+            digest = content_digest(content) if content is not None else None
+            content_hashes[relative_path] = digest
+            if reuse_edges and digest is not None and previous.content_hashes.get(relative_path) == digest:
+                dependencies, runtime_dependencies = previous_dependencies.get(relative_path, (set(), set()))
+                reused_file_count += 1
+            else:
+                dependencies, runtime_dependencies = self._dependencies_for_file(
+                    vector.absolute_path,
+                    content,
+                    digest,
+                    relative_path,
+                    module_trie,
+                )
+            source = node_ids[relative_path]
+            edges.extend((source, node_ids[dependency]) for dependency in dependencies)
+            runtime_edges.extend((source, node_ids[dependency]) for dependency in runtime_dependencies)
+            type_only_dependencies[relative_path] = sorted(dependencies - runtime_dependencies)
+
+        logger.info(
+            "[ARCHITECTURE] imports resolved file_count=%d reused_files=%d cache_hits=%d cache_misses=%d",
+            len(nodes),
+            reused_file_count,
+            self.import_cache.hits - cache_hits,
+            self.import_cache.misses - cache_misses,
+        )
+        graph = DependencyGraph(nodes, edges)
+        runtime_graph = DependencyGraph(nodes, runtime_edges)
+
+        runtime_delta = None
+        if previous is None:
+            components = graph.strongly_connected_components()
+            runtime_components = runtime_graph.strongly_connected_components()
+            transitive_counts = runtime_graph.ancestor_counts()
+            incremental: dict[str, object] = {"mode": "full"}
+        else:
+            delta = GraphDelta.between(previous.content_hashes, previous.edges, graph)
+            runtime_delta = GraphDelta.between(previous.content_hashes, previous.runtime_edges, runtime_graph)
+            components, region_size = update_components(graph, delta, previous.sccs)
+            runtime_components, runtime_region_size = update_components(
+                runtime_graph,
+                runtime_delta,
+                previous.runtime_sccs,
             )
-            for dependency in dependencies:
-                if dependency != vector.relative_path:
-                    graph.add_edge(vector.relative_path, dependency)
-            for dependency in runtime_dependencies:
-                if dependency != vector.relative_path:
-                    runtime_graph.add_edge(vector.relative_path, dependency)
-
-        betweenness = nx.betweenness_centrality(runtime_graph, normalized=True)
-        sccs, scc_size_by_path = self._scc_metadata(graph)
-        runtime_sccs, runtime_scc_size_by_path = self._scc_metadata(runtime_graph)
+            transitive_counts, recounted_count = update_ancestor_counts(
+                runtime_graph,
+                DependencyGraph.from_named_edges(list(previous.content_hashes), previous.runtime_edges),
+                runtime_delta,
+                previous.transitive_dependents,
+            )
+            incremental = {
+                "mode": "incremental",
+                "reused_file_count": reused_file_count,
+                "added_file_count": len(delta.added_nodes),
+                "deleted_file_count": len(delta.deleted_nodes),
+                "added_edge_count": len(delta.added_edges),
+                "removed_edge_count": len(delta.removed_edges),
+                "scc_region_size": region_size,
+                "runtime_scc_region_size": runtime_region_size,
+                "recounted_file_count": recounted_count,
+            }
+            logger.info("[ARCHITECTURE] graph patched from previous scan %s", incremental)
+
+        betweenness, betweenness_estimate, betweenness_drift = self._betweenness(
+            runtime_graph,
+            previous,
+            runtime_delta,
+        )
+        sccs, scc_size_by_path = self._scc_metadata(graph, components)
+        runtime_sccs, runtime_scc_size_by_path = self._scc_metadata(runtime_graph, runtime_components)
         return ArchitectureGraphContext(
             vectors=vectors,
             module_to_relative_path=module_to_relative_path,
             graph=graph,
             runtime_graph=runtime_graph,
             betweenness=betweenness,
+            betweenness_estimate=betweenness_estimate,
+            transitive_dependents=dict(zip(nodes, transitive_counts, strict=True)),
             sccs=sccs,
             scc_size_by_path=scc_size_by_path,
             runtime_sccs=runtime_sccs,
             runtime_scc_size_by_path=runtime_scc_size_by_path,
+            content_hashes=content_hashes,
+            type_only_dependencies=type_only_dependencies,
+            betweenness_drift=betweenness_drift,
+            incremental=incremental,
+        )
+
+    def _betweenness(
+        self,
+        graph: DependencyGraph,
+        previous: DependencyGraphSnapshot | None = None,
+        delta: GraphDelta | None = None,
+    ) -> tuple[dict[str, float], dict[str, object], float]:
+        """Exact Brandes on small graphs, seeded pivot sampling on large ones.
+
+        ``auto`` switches to sampling above ``betweenness_exact_max_nodes``;
+        sampled scores come with a Hoeffding error bound at
+        ``BETWEENNESS_ERROR_CONFIDENCE``.  With a previous scan on the same
+        files, its scores are kept while the edges changed since they were
+        computed stay within ``betweenness_refresh_delta`` of the edge count.
+        Returns the scores, the estimate metadata and that accumulated drift.
+        """
+        if previous is not None and delta is not None and not delta.nodes_changed:
+            drift = previous.betweenness_drift + delta.edge_change_count / max(graph.number_of_edges(), 1)
+            if drift <= self.betweenness_refresh_delta and all(node in previous.betweenness for node in graph.nodes):
+                logger.info(
+                    "[ARCHITECTURE] betweenness reused from previous scan edge_drift=%.4f refresh_delta=%.4f",
+                    drift,
+                    self.betweenness_refresh_delta,
+                )
+                return (
+                    {node: previous.betweenness[node] for node in graph.nodes},
+                    {
+                        "strategy": "reused",
+                        "pivot_count": 0,
+                        "edge_drift": round(drift, 6),
+                        "refresh_delta": self.betweenness_refresh_delta,
+                    },
+                    drift,
+                )
+
+        started = perf_counter()
+        node_count = graph.number_of_nodes()
+        strategy = self.betweenness_strategy
+        if strategy == "auto":
+            strategy = "exact" if node_count <= self.betweenness_exact_max_nodes else "sampled"
+        if strategy == "sampled" and self.betweenness_sample_size >= node_count:
+            strategy = "exact"
+
+        if strategy == "exact":
+            values = graph.betweenness_centrality(normalized=True, processes=self.betweenness_processes)
+            estimate: dict[str, object] = {
+                "strategy": "exact",
+                "pivot_count": node_count,
+                "error_bound": 0.0,
+            }
+        else:
+            pivots = sorted(random.Random(self.betweenness_seed).sample(range(node_count), self.betweenness_sample_size))
+            values = graph.betweenness_centrality(
+                normalized=True,
+                sources=pivots,
+                processes=self.betweenness_processes,
+            )
+            estimate = {
+                "strategy": "sampled",
+                "pivot_count": len(pivots),
+                "seed": self.betweenness_seed,
+                "error_bound": round(
+                    sampled_betweenness_error_bound(node_count, len(pivots), self.BETWEENNESS_ERROR_CONFIDENCE),
+                    6,
+                ),
+                "confidence": self.BETWEENNESS_ERROR_CONFIDENCE,
+            }
+
+        logger.info(
+            "[ARCHITECTURE] betweenness strategy=%s node_count=%d pivot_count=%d processes=%d elapsed_seconds=%.3f",
+            estimate["strategy"],
+            node_count,
+            estimate["pivot_count"],
+            self.betweenness_processes,
+            perf_counter() - started,
         )
+        return dict(zip(graph.nodes, values, strict=True)), estimate, 0.0
+
+    def _read_source(self, absolute_path: Path) -> bytes | None:
+        try:
+            return absolute_path.read_bytes()
+        except OSError as exc:
+            logger.warning("[ARCHITECTURE] failed to read %s: %s", absolute_path, exc)
+            return None
 
     def _dependencies_for_file(
         self,
         absolute_path: Path,
+        content: bytes | None,
+        digest: str | None,
         current_relative_path: str,
-        module_to_relative_path: dict[str, str],
+        module_trie: ModulePrefixTrie,
     ) -> tuple[set[str], set[str]]:
+        if content is None:
+            return set(), set()
         try:
-            tree = ast.parse(absolute_path.read_text(encoding="utf-8"))
+            imports = self.import_cache.imports_for(content, digest)
         except Exception as exc:
             logger.warning("[ARCHITECTURE] failed to parse %s: %s", absolute_path, exc)
             return set(), set()
@@ -154,71 +367,49 @@ class ArchitectureAnalysisLayer:
         current_module = self._module_for_relative_path(current_relative_path)
         dependencies: set[str] = set()
         runtime_dependencies: set[str] = set()
-        type_only_import_ids = self._type_checking_import_ids(tree)
-        for statement in ast.walk(tree):
-            statement_dependencies: set[str] = set()
-            if isinstance(statement, ast.Import):
-                for alias in statement.names:
-                    dependency = self._resolve_absolute_import(alias.name, module_to_relative_path)
-                    if dependency is not None:
-                        statement_dependencies.add(dependency)
-            elif isinstance(statement, ast.ImportFrom):
-                for module_name in self._candidate_import_from_modules(statement, current_module):
-                    dependency = self._resolve_absolute_import(module_name, module_to_relative_path)
-                    if dependency is not None:
-                        statement_dependencies.add(dependency)
-                        break
-
+        for statement in imports:
+            statement_dependencies = self._resolve_statement(statement, current_module, module_trie)
             dependencies.update(statement_dependencies)
-            if id(statement) not in type_only_import_ids:
+            if not statement.type_only:
                 runtime_dependencies.update(statement_dependencies)
 
         return dependencies, runtime_dependencies
 
-    def _type_checking_import_ids(self, tree: ast.AST) -> set[int]:
-        import_ids: set[int] = set()
-        for node in ast.walk(tree):
-            if not isinstance(node, ast.If) or not self._is_type_checking_guard(node.test):
-                continue
-            for statement in node.body:
-                import_ids.update(
-                    id(child)
-                    for child in ast.walk(statement)
-                    if isinstance(child, (ast.Import, ast.ImportFrom))
-                )
-        return import_ids
-
-    def _is_type_checking_guard(self, test: ast.AST) -> bool:
-        return any(
-            (
-                isinstance(node, ast.Name)
-                and node.id == "TYPE_CHECKING"
-            )
-            or (
-                isinstance(node, ast.Attribute)
-                and node.attr == "TYPE_CHECKING"
-                and isinstance(node.value, ast.Name)
-                and node.value.id == "typing"
-            )
-            for node in ast.walk(test)
-        )
-
-    def _candidate_import_from_modules(self, statement: ast.ImportFrom, current_module: str) -> list[str]:
+    def _resolve_statement(
+        self,
+        statement: ImportStatement,
+        current_module: str,
+        module_trie: ModulePrefixTrie,
+    ) -> set[str]:
+        if not statement.from_import:
+            return {
+                dependency
+                for dependency in map(module_trie.longest_prefix, statement.names)
+                if dependency is not None
+            }
+
+        for module_name in self._candidate_import_from_modules(statement, current_module):
+            dependency = module_trie.longest_prefix(module_name)
+            if dependency is not None:
+                return {dependency}
+        return set()
+
+    def _candidate_import_from_modules(self, statement: ImportStatement, current_module: str) -> list[str]:
         base_module = self._resolve_import_from_base(statement, current_module)
         candidates: list[str] = []
 
-        for alias in statement.names:
-            if alias.name == "*":
+        for name in statement.names:
+            if name == "*":
                 candidates.append(base_module)
             elif base_module:
-                candidates.append(f"{base_module}.{alias.name}")
+                candidates.append(f"{base_module}.{name}")
                 candidates.append(base_module)
             else:
-                candidates.append(alias.name)
+                candidates.append(name)
 
         return candidates
 
-    def _resolve_import_from_base(self, statement: ast.ImportFrom, current_module: str) -> str:
+    def _resolve_import_from_base(self, statement: ImportStatement, current_module: str) -> str:
         if statement.level == 0:
             return statement.module or ""
 
@@ -232,33 +423,19 @@ class ArchitectureAnalysisLayer:
             return f"{relative_base}.{statement.module}" if relative_base else statement.module
         return relative_base
 
-    def _resolve_absolute_import(
-        self,
-        module_name: str,
-        module_to_relative_path: dict[str, str],
-    ) -> str | None:
-        parts = [part for part in module_name.split(".") if part]
-        while parts:
-            candidate = ".".join(parts)
-            if candidate in module_to_relative_path:
-                return module_to_relative_path[candidate]
-            parts.pop()
-        return None
-
     # -- Metrics -----------------------------------------------------------
 
     def fan_in(self, context: ArchitectureGraphContext, node: str) -> int:
         logger.debug("[ARCHITECTURE] computing fan-in")
-        return int(context.runtime_graph.in_degree(node))
+        return int(context.runtime_graph.in_degrees[context.runtime_graph.index[node]])
 
     def fan_out(self, context: ArchitectureGraphContext, node: str) -> int:
         logger.debug("[ARCHITECTURE] computing fan-out")
-        return int(context.runtime_graph.out_degree(node))
+        return int(context.runtime_graph.out_degrees[context.runtime_graph.index[node]])
 
     def transitive_dependents_count(self, context: ArchitectureGraphContext, node: str) -> int:
         logger.debug("[ARCHITECTURE] computing transitive dependents")
-        reverse_graph = context.runtime_graph.reverse(copy=False)
-        return len(nx.descendants(reverse_graph, node))
+        return context.transitive_dependents[node]
 
     def betweenness_centrality(self, context: ArchitectureGraphContext, node: str) -> float:
         logger.debug("[ARCHITECTURE] computing betweenness centrality")
@@ -278,30 +455,33 @@ class ArchitectureAnalysisLayer:
 
     def instability_index(self, context: ArchitectureGraphContext, node: str) -> float:
         logger.debug("[ARCHITECTURE] computing instability index")
-        fan_in = context.runtime_graph.in_degree(node)
-        fan_out = context.runtime_graph.out_degree(node)
+        fan_in = self.fan_in(context, node)
+        fan_out = self.fan_out(context, node)
         dependency_total = fan_in + fan_out
         return round(fan_out / dependency_total, 3) if dependency_total else 0.0
 
-    def _scc_metadata(self, graph: Any) -> tuple[list[dict[str, list[str] | list[list[str]]]], dict[str, int]]:
+    def _scc_metadata(
+        self,
+        graph: DependencyGraph,
+        components: list[list[int]],
+    ) -> tuple[list[dict[str, list[str] | list[list[str]]]], dict[str, int]]:
         sccs: list[dict[str, list[str] | list[list[str]]]] = []
         scc_size_by_path: dict[str, int] = {}
 
-        for component in nx.strongly_connected_components(graph):
+        for component in components:
             if len(component) <= 1:
                 continue
 
-            nodes = sorted(component)
-            node_set = set(nodes)
+            nodes = sorted(graph.nodes[node] for node in component)
             edges = sorted(
-                [source, target]
-                for source, target in graph.edges()
-                if source in node_set and target in node_set
+                [graph.nodes[source], graph.nodes[target]]
+                for source, target in graph.component_edges(component)
             )
             sccs.append({"nodes": nodes, "edges": edges})
             for node in nodes:
                 scc_size_by_path[node] = len(nodes)
 
+        sccs.sort(key=lambda component: component["nodes"])
         return sccs, scc_size_by_path
 
     def _global_metadata_for_context(self, context: ArchitectureGraphContext) -> dict[str, object]:
@@ -342,6 +522,8 @@ class ArchitectureAnalysisLayer:
             ],
             "sccs": context.sccs,
             "runtime_sccs": context.runtime_sccs,
+            "betweenness_estimate": context.betweenness_estimate,
+            "incremental": context.incremental,
         }
 
     # -- Path and module helpers ------------------------------------------
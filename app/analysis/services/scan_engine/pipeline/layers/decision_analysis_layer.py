@@ -1,9 +1,26 @@
 import logging
 import math
-from collections.abc import Callable
+from collections.abc import Callable, Mapping, Sequence
 from dataclasses import dataclass, field
 from pathlib import Path
 
+import numpy as np
+
+from app.analysis.services.scan_engine.pipeline.decision_scoring import (
+    MetricColumns,
+    MetricSignalSpec,
+    NormalizationTables,
+    aggregate,
+    clamp,
+    component_contributions,
+    first_available,
+    fsum_rows,
+    percentile_rank,
+    percentile_rank_scalar,
+    round_scores,
+    saturate,
+    weighted_available,
+)
 from app.analysis.services.scan_engine.pipeline.metrics_vector import LayerResult, MetricValue, MetricsVector
 
 logger = logging.getLogger(__name__)
@@ -11,15 +28,29 @@ logger = logging.getLogger(__name__)
 
 @dataclass(slots=True)
 class DecisionAnalysisContext:
-    absolute_path: Path
+    # Both are None when rescoring stored metrics without a workspace.
+    absolute_path: Path | None
     relative_path: str
-    result: LayerResult
+    result: LayerResult | None
     metrics: dict[str, MetricValue]
     available_layers: set[str]
     error_count: int
     none_metric_count: int
     component_cache: dict[str, float | None] = field(default_factory=dict)
     component_coverage: dict[str, float] = field(default_factory=dict)
+    # Scan quantile tables in percentile mode; None scores with saturations.
+    normalization: NormalizationTables | None = None
+
+
+@dataclass(slots=True)
+class DecisionScores:
+    """Decision metrics, metadata and errors of one file, before they become a vector."""
+
+    metrics: dict[str, MetricValue] = field(default_factory=dict)
+    metadata: dict[str, object] = field(default_factory=dict)
+    errors: list[str] = field(default_factory=list)
+    # Scoring raised before metadata existed; the file keeps safe defaults.
+    failed: bool = False
 
 
 MetricHandler = Callable[[DecisionAnalysisContext], int | float | str | bool | None]
@@ -46,8 +77,111 @@ class DecisionAnalysisLayer:
         "duplication_analysis",
         "architecture_analysis",
     }
-
-    def __init__(self) -> None:
+    # Order in which the pipeline appends input vectors for a file.
+    INPUT_LAYER_ORDER = (
+        "static_analysis",
+        "history_analysis",
+        "duplication_analysis",
+        "architecture_analysis",
+    )
+    # Shared by the per-file handlers and the column kernels of run_batch.
+    COMPONENT_SIGNAL_SPECS = {
+        "complexity_score": {
+            "max_cyclomatic_complexity": MetricSignalSpec(15.0),
+            "max_cognitive_complexity": MetricSignalSpec(25.0),
+            "average_cyclomatic_complexity": MetricSignalSpec(8.0),
+            "average_cognitive_complexity": MetricSignalSpec(12.0),
+            "size": MetricSignalSpec(SIZE_SATURATION_LOC, "derived"),
+            "long_conditions_count": MetricSignalSpec(5.0, "density"),
+            "max_if_else_chain_length": MetricSignalSpec(5.0, "offset", 1.0),
+            "average_parameters_count": MetricSignalSpec(4.0, "offset", 3.0),
+            "count_of_fixme_comments": MetricSignalSpec(5.0, "density"),
+            "count_of_empty_except_blocks": MetricSignalSpec(3.0, "density"),
+            "testing_coverage_gap": MetricSignalSpec(1.0, "derived"),
+        },
+        "history_score": {
+            "churn_to_size_ratio": MetricSignalSpec(8.0),
+            "recent_change_count": MetricSignalSpec(12.0, "derived"),
+            "bug_fix_ratio": MetricSignalSpec(0.5, "derived"),
+            "cyclomatic_complexity_growth_rate": MetricSignalSpec(5.0, "positive"),
+            "bug_fix_commit_count": MetricSignalSpec(6.0),
+            "co_change_file_count": MetricSignalSpec(12.0),
+            "contributors_count": MetricSignalSpec(5.0, "offset", 1.0),
+            "recent_to_lifetime_change_ratio": MetricSignalSpec(1.0, "derived"),
+        },
+        "duplication_score": {
+            "duplicate_loc_ratio": MetricSignalSpec(1.0, "derived"),
+            "duplicate_blocks_count": MetricSignalSpec(4.0),
+            "semantic_duplicate_blocks_count": MetricSignalSpec(3.0),
+            "duplication_group_size": MetricSignalSpec(4.0, "offset", 1.0),
+            "duplicate_file_candidates_count": MetricSignalSpec(5.0),
+            "max_similarity_score": MetricSignalSpec(0.25, "offset", 0.75),
+        },
+        "architecture_score": {
+            "runtime_circular_dependency_size": MetricSignalSpec(CIRCULAR_DEPENDENCY_SATURATION, "offset", 1.0),
+            "circular_dependency_size": MetricSignalSpec(CIRCULAR_DEPENDENCY_SATURATION, "offset", 1.0),
+            "betweenness_centrality": MetricSignalSpec(BETWEENNESS_CENTRALITY_SATURATION),
+            "transitive_dependents_count": MetricSignalSpec(30.0),
+            "fan_out": MetricSignalSpec(15.0),
+            "fan_in": MetricSignalSpec(15.0),
+            "instability_index": MetricSignalSpec(1.0),
+        },
+    }
+    COMPONENT_NAMES = (
+        "complexity_score",
+        "history_score",
+        "duplication_score",
+        "architecture_score",
+    )
+    BATCH_INPUT_METRICS = (
+        "max_cyclomatic_complexity",
+        "max_cognitive_complexity",
+        "average_cyclomatic_complexity",
+        "average_cognitive_complexity",
+        "lines_of_code",
+        "source_lines_of_code",
+        "logical_lines_of_code",
+        "long_conditions_count",
+        "max_if_else_chain_length",
+        "average_parameters_count",
+        "count_of_fixme_comments",
+        "count_of_empty_except_blocks",
+        "testing_coverage",
+        "update_count",
+        "recent_update_count",
+        "churn_to_size_ratio",
+        "bug_fix_ratio",
+        "cyclomatic_complexity_growth_rate",
+        "bug_fix_commit_count",
+        "co_change_file_count",
+        "contributors_count",
+        "duplicate_loc_count",
+        "duplicate_blocks_count",
+        "semantic_duplicate_blocks_count",
+        "duplication_group_size",
+        "duplicate_file_candidates_count",
+        "max_similarity_score",
+        "runtime_circular_dependency_size",
+        "circular_dependency_size",
+        "betweenness_centrality",
+        "transitive_dependents_count",
+        "fan_out",
+        "fan_in",
+        "instability_index",
+    )
+
+    NORMALIZATION_MODES = ("fixed", "percentile")
+
+    def __init__(self, normalization_mode: str = "fixed", quantile_points: int = 101) -> None:
+        if normalization_mode not in self.NORMALIZATION_MODES:
+            raise ValueError(f"Unknown decision normalization mode: {normalization_mode}")
+        if quantile_points < 2:
+            raise ValueError("Quantile tables need at least two points")
+
+        # "fixed" scores metric signals against the saturation constants;
+        # "percentile" ranks them within the scan through quantile tables.
+        self.normalization_mode = normalization_mode
+        self.quantile_points = quantile_points
         self.component_weights: dict[str, float] = {
             "complexity_score": 0.30,
             "history_score": 0.25,
@@ -119,31 +253,77 @@ class DecisionAnalysisLayer:
 
         try:
             absolute_path, relative_path = self._paths_for(result)
-            vector = MetricsVector(
-                layer=self.LAYER_NAME,
-                absolute_path=absolute_path,
-                relative_path=relative_path,
-            )
             context = self._build_context(absolute_path, relative_path, result)
-            for metric_name, handler in self.metric_handlers.items():
-                try:
-                    vector.metrics[metric_name] = handler(context)
-                except Exception as exc:
-                    vector.errors.append(f"{metric_name} failed: {exc}")
-                    vector.metrics[metric_name] = None
-                    if metric_name in self.component_weights:
-                        context.component_cache[metric_name] = None
-                        context.component_coverage[metric_name] = 0.0
-
-            vector.metadata = self._metadata_for_context(context, vector.metrics)
+            vector = self._vector_for(context, self._score_context(context))
         except Exception as exc:
-            vector = MetricsVector(layer=self.LAYER_NAME)
-            logger.warning("[DECISION] failed to score file: %s", exc)
-            vector.errors.append(f"decision metrics failed: {exc}")
-            vector.metrics = self._safe_default_metrics()
+            vector = self._failed_vector(exc)
 
         return LayerResult.from_vector(vector)
 
+    def run_batch(self, results: list[LayerResult]) -> LayerResult:
+        """Score many files at once with array operations.
+
+        In fixed mode every file's vector equals what ``run`` returns for it:
+        sums are rounded like ``math.fsum`` and the rare file whose sum cannot
+        be rounded with certainty is rescored one by one.  A weight
+        configuration that ``run`` would reject falls back to scoring file by
+        file so the same per-metric errors are reported.
+
+        In percentile mode ``results`` must be the whole scan: its quantile
+        tables are built first and returned in the ``decision_normalization``
+        metadata.  ``run`` sees a single file and always uses saturations.
+        """
+        logger.info("[DECISION] running batch decision analysis on %d files", len(results))
+        vectors: list[MetricsVector | None] = [None] * len(results)
+        contexts: list[DecisionAnalysisContext] = []
+        positions: list[int] = []
+        for position, result in enumerate(results):
+            try:
+                absolute_path, relative_path = self._paths_for(result)
+                contexts.append(self._build_context(absolute_path, relative_path, result))
+                positions.append(position)
+            except Exception as exc:
+                vectors[position] = self._failed_vector(exc)
+
+        file_scores, normalization = self._score_contexts(contexts, build_tables=True)
+        for position, context, scores in zip(positions, contexts, file_scores, strict=True):
+            try:
+                vectors[position] = self._vector_for(context, scores)
+            except Exception as exc:
+                vectors[position] = self._failed_vector(exc)
+
+        metadata: dict[str, object] = {}
+        if normalization is not None:
+            metadata["decision_normalization"] = {
+                "mode": "percentile",
+                "quantile_points": self.quantile_points,
+                "tables": normalization.to_json(),
+            }
+        return LayerResult(vectors=vectors, metadata=metadata)
+
+    def rescore_stored(
+        self,
+        files: Sequence[tuple[str, Mapping[str, Mapping[str, MetricValue]], Mapping[str, Sequence[str]]]],
+        normalization: NormalizationTables | None = None,
+    ) -> list[DecisionScores]:
+        """Re-run scoring on persisted ``(relative_path, metrics, errors)`` rows.
+
+        ``metrics`` and ``errors`` are keyed by layer as stored on a scan
+        file; any previous decision output in them is ignored.  Files are
+        ranked against ``normalization`` when given, the tables stored with
+        their scan, and scored with the saturations otherwise.  Returns the
+        scores in input order.
+        """
+        logger.info("[DECISION] rescoring %d stored files", len(files))
+        scores, _ = self._score_contexts(
+            [
+                self._stored_context(relative_path, metrics_by_layer, errors_by_layer)
+                for relative_path, metrics_by_layer, errors_by_layer in files
+            ],
+            normalization,
+        )
+        return scores
+
     def summarize(self, decision_result: LayerResult) -> LayerResult:
         return LayerResult.from_vector(self._build_summary_vector(decision_result))
 
@@ -166,57 +346,18 @@ class DecisionAnalysisLayer:
             return context.component_cache[metric_name]
 
         logger.debug("[DECISION] computing complexity score")
-        physical_loc = self._physical_loc(context)
-        code_loc = self._code_loc(context)
-        scores = {
-            "max_cyclomatic_complexity": self._saturate_optional(
-                self._optional_number(context, "max_cyclomatic_complexity"),
-                15.0,
-            ),
-            "max_cognitive_complexity": self._saturate_optional(
-                self._optional_number(context, "max_cognitive_complexity"),
-                25.0,
-            ),
-            "average_cyclomatic_complexity": self._saturate_optional(
-                self._optional_number(context, "average_cyclomatic_complexity"),
-                8.0,
-            ),
-            "average_cognitive_complexity": self._saturate_optional(
-                self._optional_number(context, "average_cognitive_complexity"),
-                12.0,
-            ),
-            "size": self._saturate_optional(physical_loc, self.SIZE_SATURATION_LOC),
-            "long_conditions_count": self._density_score(
-                self._optional_number(context, "long_conditions_count"),
-                code_loc,
-                5.0,
-            ),
-            "max_if_else_chain_length": self._offset_saturation_score(
-                self._optional_number(context, "max_if_else_chain_length"),
-                offset=1.0,
-                saturation=5.0,
-            ),
-            "average_parameters_count": self._offset_saturation_score(
-                self._optional_number(context, "average_parameters_count"),
-                offset=3.0,
-                saturation=4.0,
-            ),
-            "count_of_fixme_comments": self._density_score(
-                self._optional_number(context, "count_of_fixme_comments"),
-                code_loc,
-                5.0,
-            ),
-            "count_of_empty_except_blocks": self._density_score(
-                self._optional_number(context, "count_of_empty_except_blocks"),
-                code_loc,
-                3.0,
-            ),
-            "testing_coverage_gap": self._coverage_gap(context),
-        }
+        signals = self._component_signals(
+            context,
+            metric_name,
+            {
+                "size": self._physical_loc(context),
+                "testing_coverage_gap": self._coverage_gap(context),
+            },
+        )
         score = self._component_score(
             context,
             metric_name,
-            scores,
+            signals,
             self.complexity_metric_weights,
         )
         context.component_cache[metric_name] = score
@@ -258,40 +399,19 @@ class DecisionAnalysisLayer:
             if bug_fix_ratio is not None and bug_fix_reliability is not None
             else None
         )
-        scores = {
-            "churn_to_size_ratio": self._saturate_optional(
-                self._optional_number(context, "churn_to_size_ratio"),
-                8.0,
-            ),
-            "recent_change_count": self._saturate_optional(recent_change_count, 12.0),
-            "bug_fix_ratio": self._saturate_optional(supported_bug_fix_ratio, 0.5),
-            "cyclomatic_complexity_growth_rate": self._positive_saturation_score(
-                self._optional_number(context, "cyclomatic_complexity_growth_rate"),
-                5.0,
-            ),
-            "bug_fix_commit_count": self._saturate_optional(
-                self._optional_number(context, "bug_fix_commit_count"),
-                6.0,
-            ),
-            "co_change_file_count": self._saturate_optional(
-                self._optional_number(context, "co_change_file_count"),
-                12.0,
-            ),
-            "contributors_count": self._offset_saturation_score(
-                self._optional_number(context, "contributors_count"),
-                offset=1.0,
-                saturation=5.0,
-            ),
-            "recent_to_lifetime_change_ratio": (
-                self._clamp(recent_change_ratio)
-                if recent_change_ratio is not None
-                else None
-            ),
-        }
+        signals = self._component_signals(
+            context,
+            metric_name,
+            {
+                "recent_change_count": recent_change_count,
+                "bug_fix_ratio": supported_bug_fix_ratio,
+                "recent_to_lifetime_change_ratio": recent_change_ratio,
+            },
+        )
         score = self._component_score(
             context,
             metric_name,
-            scores,
+            signals,
             self.history_metric_weights,
         )
         context.component_cache[metric_name] = score
@@ -314,40 +434,21 @@ class DecisionAnalysisLayer:
             duplicate_loc_count,
             self.DUPLICATION_MATERIALITY_LOC,
         )
-        max_similarity = self._optional_number(context, "max_similarity_score")
-        scores = {
-            "duplicate_loc_ratio": (
-                duplicate_loc_ratio * duplicate_materiality
-                if duplicate_loc_ratio is not None and duplicate_materiality is not None
-                else None
-            ),
-            "duplicate_blocks_count": self._saturate_optional(
-                self._optional_number(context, "duplicate_blocks_count"),
-                4.0,
-            ),
-            "semantic_duplicate_blocks_count": self._saturate_optional(
-                self._optional_number(context, "semantic_duplicate_blocks_count"),
-                3.0,
-            ),
-            "duplication_group_size": self._offset_saturation_score(
-                self._optional_number(context, "duplication_group_size"),
-                offset=1.0,
-                saturation=4.0,
-            ),
-            "duplicate_file_candidates_count": self._saturate_optional(
-                self._optional_number(context, "duplicate_file_candidates_count"),
-                5.0,
-            ),
-            "max_similarity_score": self._offset_saturation_score(
-                max_similarity,
-                offset=0.75,
-                saturation=0.25,
-            ),
-        }
+        signals = self._component_signals(
+            context,
+            metric_name,
+            {
+                "duplicate_loc_ratio": (
+                    duplicate_loc_ratio * duplicate_materiality
+                    if duplicate_loc_ratio is not None and duplicate_materiality is not None
+                    else None
+                ),
+            },
+        )
         score = self._component_score(
             context,
             metric_name,
-            scores,
+            signals,
             self.duplication_metric_weights,
         )
         context.component_cache[metric_name] = score
@@ -359,37 +460,11 @@ class DecisionAnalysisLayer:
             return context.component_cache[metric_name]
 
         logger.debug("[DECISION] computing architecture score")
-        fan_in = self._optional_number(context, "fan_in")
-        fan_out = self._optional_number(context, "fan_out")
-        scores = {
-            "runtime_circular_dependency_size": self._offset_saturation_score(
-                self._optional_number(context, "runtime_circular_dependency_size"),
-                offset=1.0,
-                saturation=self.CIRCULAR_DEPENDENCY_SATURATION,
-            ),
-            "circular_dependency_size": self._offset_saturation_score(
-                self._optional_number(context, "circular_dependency_size"),
-                offset=1.0,
-                saturation=self.CIRCULAR_DEPENDENCY_SATURATION,
-            ),
-            "betweenness_centrality": self._saturate_optional(
-                self._optional_number(context, "betweenness_centrality"),
-                self.BETWEENNESS_CENTRALITY_SATURATION,
-            ),
-            "transitive_dependents_count": self._saturate_optional(
-                self._optional_number(context, "transitive_dependents_count"),
-                30.0,
-            ),
-            "fan_out": self._saturate_optional(fan_out, 15.0),
-            "fan_in": self._saturate_optional(fan_in, 15.0),
-            "instability_index": self._clamp_optional(
-                self._optional_number(context, "instability_index")
-            ),
-        }
+        signals = self._component_signals(context, metric_name, {})
         score = self._component_score(
             context,
             metric_name,
-            scores,
+            signals,
             self.architecture_metric_weights,
         )
         context.component_cache[metric_name] = score
@@ -404,6 +479,290 @@ class DecisionAnalysisLayer:
         )
         return self._round_score(weighted_coverage)
 
+    # -- Batch scoring -----------------------------------------------------
+
+    def _metric_weights_for(self, component_name: str) -> dict[str, float]:
+        return {
+            "complexity_score": self.complexity_metric_weights,
+            "history_score": self.history_metric_weights,
+            "duplication_score": self.duplication_metric_weights,
+            "architecture_score": self.architecture_metric_weights,
+        }[component_name]
+
+    def _batch_component_signals(
+        self,
+        columns: MetricColumns,
+    ) -> dict[str, dict[str, tuple[np.ndarray, float]]]:
+        """Signal and saturation of every component metric, one column per metric.
+
+        Plain signals follow ``COMPONENT_SIGNAL_SPECS``; derived ones mirror
+        the per-file component handlers.  NaN stands for None.
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            physical_loc = np.fmax(
+                np.fmax(columns["lines_of_code"], columns["source_lines_of_code"]),
+                columns["logical_lines_of_code"],
+            )
+            code_loc = first_available(
+                columns["source_lines_of_code"],
+                columns["logical_lines_of_code"],
+                columns["lines_of_code"],
+            )
+
+            modification_count = np.maximum(0.0, columns["update_count"] - 1.0)
+            recent_change_count = np.minimum(np.maximum(0.0, columns["recent_update_count"]), modification_count)
+            recent_change_ratio = np.where(
+                modification_count == 0.0,
+                0.0,
+                recent_change_count / modification_count,
+            )
+            bug_fix_reliability = modification_count / (modification_count + 2.0)
+
+            duplicate_loc_count = columns["duplicate_loc_count"]
+            duplicate_loc_ratio = clamp(duplicate_loc_count / np.maximum(1.0, code_loc))
+            duplicate_materiality = saturate(duplicate_loc_count, self.DUPLICATION_MATERIALITY_LOC)
+
+            derived = {
+                "complexity_score": {
+                    "size": physical_loc,
+                    "testing_coverage_gap": 1.0 - clamp(columns["testing_coverage"] / 100.0),
+                },
+                "history_score": {
+                    "recent_change_count": recent_change_count,
+                    "bug_fix_ratio": columns["bug_fix_ratio"] * bug_fix_reliability,
+                    "recent_to_lifetime_change_ratio": recent_change_ratio,
+                },
+                "duplication_score": {
+                    "duplicate_loc_ratio": duplicate_loc_ratio * duplicate_materiality,
+                },
+                "architecture_score": {},
+            }
+            return {
+                component_name: {
+                    metric_name: (
+                        derived[component_name][metric_name]
+                        if spec.kind == "derived"
+                        else self._column_signal(spec, columns[metric_name], code_loc),
+                        spec.saturation,
+                    )
+                    for metric_name, spec in specs.items()
+                }
+                for component_name, specs in self.COMPONENT_SIGNAL_SPECS.items()
+            }
+
+    def _column_signal(self, spec: MetricSignalSpec, values: np.ndarray, code_loc: np.ndarray) -> np.ndarray:
+        if spec.kind == "offset":
+            return np.maximum(values - spec.offset, 0.0)
+        if spec.kind == "positive":
+            return np.maximum(values, 0.0)
+        if spec.kind == "density":
+            return np.maximum(values, 0.0) * self.COUNT_DENSITY_REFERENCE_LOC / np.maximum(code_loc, 1.0)
+        return values
+
+    def _batch_component_inputs(
+        self,
+        signals: dict[str, dict[str, tuple[np.ndarray, float]]],
+        normalization: NormalizationTables | None,
+    ) -> dict[str, dict[str, np.ndarray]]:
+        """Normalized metric scores of every component, one column per metric."""
+        inputs: dict[str, dict[str, np.ndarray]] = {}
+        for component_name, metrics in signals.items():
+            inputs[component_name] = {}
+            for metric_name, (signal, saturation) in metrics.items():
+                table = normalization.table_for(component_name, metric_name) if normalization is not None else None
+                inputs[component_name][metric_name] = (
+                    percentile_rank(signal, table) if table is not None else saturate(signal, saturation)
+                )
+        return inputs
+
+    def _score_contexts(
+        self,
+        contexts: list[DecisionAnalysisContext],
+        normalization: NormalizationTables | None = None,
+        *,
+        build_tables: bool = False,
+    ) -> tuple[list[DecisionScores], NormalizationTables | None]:
+        """Scores of ``contexts`` and the normalization tables they used.
+
+        With ``build_tables`` in percentile mode the tables are computed from
+        these contexts, which must then cover the whole scan.
+        """
+        columns = MetricColumns.pack(
+            self.BATCH_INPUT_METRICS,
+            [context.metrics for context in contexts],
+            self._finite_number,
+        )
+        signals = self._batch_component_signals(columns)
+        if normalization is None and build_tables and self.normalization_mode == "percentile" and contexts:
+            normalization = NormalizationTables.from_signals(
+                {
+                    component_name: {metric_name: signal for metric_name, (signal, _) in metrics.items()}
+                    for component_name, metrics in signals.items()
+                },
+                self.quantile_points,
+            )
+        for context in contexts:
+            context.normalization = normalization
+        component_inputs = self._batch_component_inputs(signals, normalization)
+        try:
+            for component_name, inputs in component_inputs.items():
+                self._validate_weight_configuration(inputs, self._metric_weights_for(component_name))
+            self._validate_weight_configuration(dict.fromkeys(self.COMPONENT_NAMES), self.component_weights)
+        except ValueError as exc:
+            logger.warning("[DECISION] invalid weight configuration, scoring file by file: %s", exc)
+            return [self._score_context_safely(context) for context in contexts], normalization
+
+        scores: list[DecisionScores] = []
+        rescored_count = 0
+        for context, batch_scores in zip(contexts, self._score_batch(contexts, component_inputs), strict=True):
+            if batch_scores is None:
+                batch_scores = self._score_context_safely(context)
+                rescored_count += 1
+            scores.append(batch_scores)
+        logger.info(
+            "[DECISION] batch scored %d files, %d rescored with exact sums",
+            len(contexts),
+            rescored_count,
+        )
+        return scores, normalization
+
+    def _score_context(self, context: DecisionAnalysisContext) -> DecisionScores:
+        scores = DecisionScores()
+        for metric_name, handler in self.metric_handlers.items():
+            try:
+                scores.metrics[metric_name] = handler(context)
+            except Exception as exc:
+                scores.errors.append(f"{metric_name} failed: {exc}")
+                scores.metrics[metric_name] = None
+                if metric_name in self.component_weights:
+                    context.component_cache[metric_name] = None
+                    context.component_coverage[metric_name] = 0.0
+
+        scores.metadata = self._metadata_for_context(context, scores.metrics)
+        return scores
+
+    def _score_context_safely(self, context: DecisionAnalysisContext) -> DecisionScores:
+        try:
+            return self._score_context(context)
+        except Exception as exc:
+            return self._failed_scores(exc)
+
+    def _failed_scores(self, exc: Exception) -> DecisionScores:
+        logger.warning("[DECISION] failed to score file: %s", exc)
+        return DecisionScores(
+            metrics=self._safe_default_metrics(),
+            errors=[f"decision metrics failed: {exc}"],
+            failed=True,
+        )
+
+    def _vector_for(self, context: DecisionAnalysisContext, scores: DecisionScores) -> MetricsVector:
+        if scores.failed:
+            vector = MetricsVector(layer=self.LAYER_NAME)
+        else:
+            vector = MetricsVector(
+                layer=self.LAYER_NAME,
+                absolute_path=context.absolute_path,
+                relative_path=context.relative_path,
+            )
+            vector.metadata = scores.metadata
+        vector.metrics = scores.metrics
+        vector.errors = scores.errors
+        return vector
+
+    def _failed_vector(self, exc: Exception) -> MetricsVector:
+        scores = self._failed_scores(exc)
+        vector = MetricsVector(layer=self.LAYER_NAME)
+        vector.metrics = scores.metrics
+        vector.errors = scores.errors
+        return vector
+
+    def _score_batch(
+        self,
+        contexts: list[DecisionAnalysisContext],
+        component_inputs: dict[str, dict[str, np.ndarray]],
+    ) -> list[DecisionScores | None]:
+        """Scores for ``contexts``, ``None`` where a sum is uncertain."""
+        file_count = len(contexts)
+        component_scores: dict[str, np.ndarray] = {}
+        component_coverage: dict[str, np.ndarray] = {}
+        ambiguous = np.zeros(file_count, dtype=bool)
+        for component_name, inputs in component_inputs.items():
+            weights = self._metric_weights_for(component_name)
+            score, coverage, uncertain = weighted_available(
+                np.column_stack([inputs[name] for name in weights]).reshape(file_count, len(weights)),
+                np.array(list(weights.values())),
+            )
+            component_scores[component_name] = np.where(
+                np.isnan(score) | (coverage < self.MIN_COMPONENT_METRIC_COVERAGE),
+                np.nan,
+                round_scores(score),
+            )
+            component_coverage[component_name] = coverage
+            ambiguous |= uncertain
+
+        def stacked(names: list[str] | tuple[str, ...]) -> np.ndarray:
+            return np.column_stack([component_scores[name] for name in names]).reshape(file_count, len(names))
+
+        aggregate_names = self.COMPONENT_NAMES
+        refactor_scores, refactor_uncertain = aggregate(
+            stacked(aggregate_names),
+            np.array([self.component_weights[name] for name in aggregate_names]),
+            np.array([self.component_dominance_multipliers[name] for name in aggregate_names]),
+            self.DOMINANT_SIGNAL_WEIGHT,
+        )
+        contribution_names = list(self.component_weights)
+        contributions, contributions_uncertain = component_contributions(
+            stacked(contribution_names),
+            np.array([self.component_weights[name] for name in contribution_names]),
+            np.array([self.component_dominance_multipliers[name] for name in contribution_names]),
+            self.DOMINANT_SIGNAL_WEIGHT,
+        )
+        confidence, confidence_uncertain = fsum_rows(
+            np.column_stack(
+                [weight * component_coverage[name] for name, weight in self.component_weights.items()]
+            ).reshape(file_count, len(self.component_weights))
+        )
+        ambiguous |= refactor_uncertain | contributions_uncertain | confidence_uncertain
+
+        refactor_rows = round_scores(refactor_scores).tolist()
+        confidence_rows = round_scores(confidence).tolist()
+        contribution_rows = contributions.tolist()
+        ambiguous_rows = ambiguous.tolist()
+
+        score_rows = {name: values.tolist() for name, values in component_scores.items()}
+        coverage_rows = {name: values.tolist() for name, values in component_coverage.items()}
+        scores: list[DecisionScores | None] = []
+        for position, context in enumerate(contexts):
+            if ambiguous_rows[position]:
+                scores.append(None)
+                continue
+
+            metrics: dict[str, MetricValue] = {
+                name: self._finite_number(score_rows[name][position])
+                for name in self.COMPONENT_NAMES
+            }
+            metrics["refactor_score"] = self._finite_number(refactor_rows[position])
+            metrics["score_confidence"] = confidence_rows[position]
+            context.component_coverage = {
+                name: coverage_rows[name][position]
+                for name in self.COMPONENT_NAMES
+            }
+            try:
+                metadata = self._metadata_for_context(
+                    context,
+                    metrics,
+                    {
+                        name: contribution
+                        for name, contribution in zip(contribution_names, contribution_rows[position], strict=True)
+                        if not math.isnan(contribution)
+                    },
+                )
+            except Exception as exc:
+                scores.append(self._failed_scores(exc))
+                continue
+            scores.append(DecisionScores(metrics=metrics, metadata=metadata))
+        return scores
+
     # -- Context and summary helpers --------------------------------------
 
     def _paths_for(self, result: LayerResult) -> tuple[Path, str]:
@@ -454,16 +813,46 @@ class DecisionAnalysisLayer:
             none_metric_count=none_metric_count,
         )
 
+    def _stored_context(
+        self,
+        relative_path: str,
+        metrics_by_layer: Mapping[str, Mapping[str, MetricValue]],
+        errors_by_layer: Mapping[str, Sequence[str]],
+    ) -> DecisionAnalysisContext:
+        # Stored JSON does not keep key order, so layers are merged in
+        # pipeline order like the vectors of a live scan.
+        layers = [layer for layer in self.INPUT_LAYER_ORDER if layer in metrics_by_layer]
+        layers.extend(sorted(set(metrics_by_layer) - set(self.INPUT_LAYER_ORDER) - {self.LAYER_NAME}))
+        metrics: dict[str, MetricValue] = {}
+        none_metric_count = 0
+        for layer in layers:
+            for metric_name, metric_value in (metrics_by_layer[layer] or {}).items():
+                metrics[metric_name] = metric_value
+                if metric_value is None:
+                    none_metric_count += 1
+
+        return DecisionAnalysisContext(
+            absolute_path=None,
+            relative_path=relative_path,
+            result=None,
+            metrics=metrics,
+            available_layers=set(layers),
+            error_count=sum(len(errors_by_layer.get(layer) or ()) for layer in layers),
+            none_metric_count=none_metric_count,
+        )
+
     def _metadata_for_context(
         self,
         context: DecisionAnalysisContext,
         computed_metrics: dict[str, MetricValue],
+        contributions: dict[str, float] | None = None,
     ) -> dict[str, object]:
         component_scores = {
             key: self._finite_number(computed_metrics.get(key))
             for key in self.component_weights
         }
-        contributions = self._component_contributions(component_scores)
+        if contributions is None:
+            contributions = self._component_contributions(component_scores)
         top_components = sorted(
             (
                 (component, score, contributions.get(component, 0.0))
@@ -476,6 +865,7 @@ class DecisionAnalysisLayer:
         refactor_score = self._finite_number(computed_metrics.get("refactor_score"))
         return {
             "scoring_model_version": self.SCORING_MODEL_VERSION,
+            "normalization_mode": "percentile" if context.normalization is not None else "fixed",
             "count_density_reference_loc": self.COUNT_DENSITY_REFERENCE_LOC,
             "normalization_references": {
                 "size_loc": self.SIZE_SATURATION_LOC,
@@ -575,13 +965,48 @@ class DecisionAnalysisLayer:
 
     # -- Numeric helpers ---------------------------------------------------
 
+    def _component_signals(
+        self,
+        context: DecisionAnalysisContext,
+        component_name: str,
+        derived: dict[str, float | None],
+    ) -> dict[str, tuple[float | None, float]]:
+        code_loc = self._code_loc(context)
+        return {
+            metric_name: (
+                derived[metric_name]
+                if spec.kind == "derived"
+                else self._metric_signal(spec, self._optional_number(context, metric_name), code_loc),
+                spec.saturation,
+            )
+            for metric_name, spec in self.COMPONENT_SIGNAL_SPECS[component_name].items()
+        }
+
+    def _metric_signal(
+        self,
+        spec: MetricSignalSpec,
+        value: float | None,
+        code_loc: float | None,
+    ) -> float | None:
+        if spec.kind == "offset":
+            return self._offset_signal(value, spec.offset)
+        if spec.kind == "positive":
+            return self._positive_signal(value)
+        if spec.kind == "density":
+            return self._density_signal(value, code_loc)
+        return value
+
     def _component_score(
         self,
         context: DecisionAnalysisContext,
         component_name: str,
-        scores: dict[str, float | None],
+        signals: dict[str, tuple[float | None, float]],
         weights: dict[str, float],
     ) -> float | None:
+        scores = {
+            name: self._normalized_score(context, component_name, name, signal, saturation)
+            for name, (signal, saturation) in signals.items()
+        }
         score, coverage = self._weighted_available_score(scores, weights)
         context.component_coverage[component_name] = coverage
         if score is None or coverage < self.MIN_COMPONENT_METRIC_COVERAGE:
@@ -757,56 +1182,53 @@ class DecisionAnalysisLayer:
         if not math.isclose(weight_total, 1.0, rel_tol=0.0, abs_tol=1e-9):
             raise ValueError(f"Weights must sum to 1.0; got {weight_total}")
 
-    def _count_per_reference_loc(self, count: float, loc: float) -> float:
-        return max(0.0, count) * self.COUNT_DENSITY_REFERENCE_LOC / max(1.0, loc)
-
-    def _density_score(
+    def _normalized_score(
         self,
-        count: float | None,
-        loc: float | None,
+        context: DecisionAnalysisContext,
+        component_name: str,
+        metric_name: str,
+        signal: float | None,
         saturation: float,
     ) -> float | None:
-        if count is None or loc is None:
+        if signal is None:
             return None
-        return self._saturate(self._count_per_reference_loc(count, loc), saturation)
+        table = (
+            context.normalization.table_for(component_name, metric_name)
+            if context.normalization is not None
+            else None
+        )
+        if table is not None:
+            return percentile_rank_scalar(signal, table)
+        return self._saturate(signal, saturation)
 
-    def _saturate_optional(
-        self,
-        value: float | None,
-        saturation: float,
-    ) -> float | None:
-        if value is None:
-            return None
-        return self._saturate(value, saturation)
+    def _count_per_reference_loc(self, count: float, loc: float) -> float:
+        return max(0.0, count) * self.COUNT_DENSITY_REFERENCE_LOC / max(1.0, loc)
 
-    def _positive_saturation_score(
-        self,
-        value: float | None,
-        saturation: float,
-    ) -> float | None:
-        if value is None:
+    def _density_signal(self, count: float | None, loc: float | None) -> float | None:
+        if count is None or loc is None:
             return None
-        return self._saturate(max(0.0, value), saturation)
+        return self._count_per_reference_loc(count, loc)
+
+    def _positive_signal(self, value: float | None) -> float | None:
+        return None if value is None else max(0.0, value)
 
-    def _offset_saturation_score(
+    def _offset_signal(self, value: float | None, offset: float) -> float | None:
+        return None if value is None else max(0.0, value - offset)
+
+    def _saturate_optional(
         self,
         value: float | None,
-        *,
-        offset: float,
         saturation: float,
     ) -> float | None:
         if value is None:
             return None
-        return self._saturate(max(0.0, value - offset), saturation)
+        return self._saturate(value, saturation)
 
     def _saturate(self, value: float, saturation: float) -> float:
         if saturation <= 0:
             return 0.0
         return self._clamp(value / saturation)
 
-    def _clamp_optional(self, value: float | None) -> float | None:
-        return None if value is None else self._clamp(value)
-
     def _clamp(self, value: float) -> float:
         return max(0.0, min(1.0, value))
 
@@ -3,62 +3,297 @@ import keyword
 import logging
 import math
 import tokenize
+from array import array
+from bisect import bisect_left, bisect_right
 from time import perf_counter
 from collections import defaultdict
-from collections.abc import Callable
+from collections.abc import Callable, Iterable, Iterator, Sequence
 from dataclasses import dataclass, field
 from difflib import SequenceMatcher
 from io import StringIO
 from pathlib import Path
 from textwrap import dedent
 
+import numpy as np
+
 from app.analysis.services.scan_engine.pipeline.code_embedding_service import (
     CodeEmbeddingProvider,
     CodeEmbeddingService,
+    encode_as_matrix,
 )
 from app.analysis.services.scan_engine.pipeline.metrics_vector import LayerResult, MetricsVector
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass(slots=True, frozen=True)
+@dataclass(slots=True, frozen=True, eq=False)
+class SourceFile:
+    """Source of one analyzed file, held once and shared by all of its blocks.
+
+    Lines are addressed through character offsets into ``text`` instead of
+    one string per line; ``code_line_counts[n]`` is the number of code lines
+    (non-blank, non-comment) among lines ``1..n``.
+    """
+
+    index: int
+    path: Path
+    text: str
+    line_starts: array
+    line_ends: array
+    code_line_counts: array
+
+    @classmethod
+    def from_text(cls, index: int, path: Path, text: str) -> "SourceFile":
+        line_starts = array("i")
+        line_ends = array("i")
+        code_line_counts = array("i", [0])
+        offset = 0
+        code_lines = 0
+        for line in text.splitlines(keepends=True):
+            content = line.splitlines()[0] if line else line
+            line_starts.append(offset)
+            line_ends.append(offset + len(content))
+            offset += len(line)
+            stripped = content.strip()
+            if stripped and not stripped.startswith("#"):
+                code_lines += 1
+            code_line_counts.append(code_lines)
+        return cls(
+            index=index,
+            path=path,
+            text=text,
+            line_starts=line_starts,
+            line_ends=line_ends,
+            code_line_counts=code_line_counts,
+        )
+
+    @property
+    def line_count(self) -> int:
+        return len(self.line_starts)
+
+    def lines_between(self, start_line: int, end_line: int) -> str:
+        return "\n".join(
+            self.text[self.line_starts[index] : self.line_ends[index]]
+            for index in range(start_line - 1, min(end_line, self.line_count))
+        )
+
+    def code_line_count(self, start_line: int, end_line: int) -> int:
+        end_line = min(end_line, self.line_count)
+        return self.code_line_counts[end_line] - self.code_line_counts[start_line - 1]
+
+    def code_line_numbers(self, start_line: int, end_line: int) -> tuple[int, ...]:
+        counts = self.code_line_counts
+        return tuple(
+            line_number
+            for line_number in range(start_line, min(end_line, self.line_count) + 1)
+            if counts[line_number] != counts[line_number - 1]
+        )
+
+
+@dataclass(slots=True, frozen=True, eq=False)
 class CodeBlock:
+    """A line range of a ``SourceFile``; text is materialized only on request."""
+
     id: str
-    file_path: Path
+    file: SourceFile
     kind: str
     start_line: int
     end_line: int
-    source: str
-    embedding_text: str
-    syntax_tokens: tuple[str, ...]
-    line_numbers: tuple[int, ...]
+    syntax_tokens: array
+    loc: int
 
     @property
-    def loc(self) -> int:
-        return len(self.line_numbers)
+    def file_path(self) -> Path:
+        return self.file.path
+
+    @property
+    def source(self) -> str:
+        return self.file.lines_between(self.start_line, self.end_line)
+
+    @property
+    def embedding_text(self) -> str:
+        return normalize_for_embedding(self.source)
+
+    @property
+    def line_numbers(self) -> tuple[int, ...]:
+        return self.file.code_line_numbers(self.start_line, self.end_line)
+
+
+def normalize_for_embedding(source: str) -> str:
+    return "\n".join(line.rstrip() for line in dedent(source).strip().splitlines())
 
 
 @dataclass(slots=True, frozen=True)
-class BlockMatch:
-    block_id: str
-    file_path: Path
-    start_line: int
-    end_line: int
-    similarity: float
+class _FileTokens:
+    """Normalized token ids of a whole file with the line each token starts on."""
+
+    token_ids: array
+    token_lines: array
+
+    def between(self, start_line: int, end_line: int) -> array:
+        start = bisect_left(self.token_lines, start_line)
+        end = bisect_right(self.token_lines, end_line)
+        return self.token_ids[start:end]
+
+
+@dataclass(slots=True, frozen=True)
+class CloneClass:
+    """Blocks linked, directly or transitively, by pairs at or above the link threshold."""
+
+    id: int
+    members: tuple[CodeBlock, ...]
+    file_paths: frozenset[Path]
+
+
+@dataclass(slots=True)
+class CloneClassTable:
+    """Direct block matches and the clone classes the strongest of them form.
+
+    Every finite pair is kept once and feeds its blocks' direct peer files
+    and best similarity. Only pairs at or above ``link_threshold`` join
+    classes, so chains of weaker matches cannot merge unrelated blocks.
+    """
+
+    classes: list[CloneClass] = field(default_factory=list)
+    membership: dict[str, tuple[int, int]] = field(default_factory=dict)
+    matched_pairs: list[tuple[CodeBlock, CodeBlock, float]] = field(default_factory=list)
+    best_similarities: dict[str, float] = field(default_factory=dict)
+    peer_files: dict[str, frozenset[Path]] = field(default_factory=dict)
+
+    @classmethod
+    def from_pairs(
+        cls,
+        blocks: list[CodeBlock],
+        pairs: Iterable[tuple[int, int, float]],
+        link_threshold: float | None = None,
+    ) -> "CloneClassTable":
+        """Group ``blocks`` with a disjoint-set over ``(left, right, similarity)`` index pairs.
+
+        Without ``link_threshold`` every pair links its blocks.
+        """
+        parent = list(range(len(blocks)))
+        size = [1] * len(blocks)
+
+        def find(index: int) -> int:
+            while parent[index] != index:
+                parent[index] = parent[parent[index]]
+                index = parent[index]
+            return index
+
+        table = cls()
+        peer_files: dict[str, set[Path]] = defaultdict(set)
+        matched_indexes: set[int] = set()
+        for left, right, similarity in pairs:
+            if not math.isfinite(similarity):
+                continue
+            similarity = round(float(similarity), 6)
+            left_block, right_block = blocks[left], blocks[right]
+            table.matched_pairs.append((left_block, right_block, similarity))
+            for block, peer in ((left_block, right_block), (right_block, left_block)):
+                table.best_similarities[block.id] = max(table.best_similarities.get(block.id, 0.0), similarity)
+                peer_files[block.id].add(peer.file_path)
+            matched_indexes.update((left, right))
+
+            if link_threshold is not None and similarity < link_threshold:
+                continue
+            left_root, right_root = find(left), find(right)
+            if left_root == right_root:
+                continue
+            if size[left_root] < size[right_root]:
+                left_root, right_root = right_root, left_root
+            parent[right_root] = left_root
+            size[left_root] += size[right_root]
+
+        members_by_root: dict[int, list[int]] = defaultdict(list)
+        for index in sorted(matched_indexes):
+            members_by_root[find(index)].append(index)
+
+        for member_indexes in members_by_root.values():
+            class_id = len(table.classes)
+            members = tuple(blocks[index] for index in member_indexes)
+            table.classes.append(
+                CloneClass(
+                    id=class_id,
+                    members=members,
+                    file_paths=frozenset(block.file_path for block in members),
+                )
+            )
+            for position, block in enumerate(members):
+                table.membership[block.id] = (class_id, position)
+        table.peer_files = {block_id: frozenset(files) for block_id, files in peer_files.items()}
+        return table
+
+    @property
+    def block_count(self) -> int:
+        return len(self.membership)
+
+    @property
+    def pair_count(self) -> int:
+        return len(self.matched_pairs)
+
+    def class_of(self, block: CodeBlock) -> CloneClass | None:
+        membership = self.membership.get(block.id)
+        return self.classes[membership[0]] if membership is not None else None
+
+    def best_similarity(self, block: CodeBlock) -> float | None:
+        return self.best_similarities.get(block.id)
+
+    def direct_peer_files(self, block: CodeBlock) -> frozenset[Path]:
+        return self.peer_files.get(block.id, frozenset())
+
+    def pairs(self) -> Iterator[tuple[CodeBlock, CodeBlock, float]]:
+        yield from self.matched_pairs
+
+
+@dataclass(slots=True, frozen=True)
+class BlockBudgetStats:
+    """How the block-budget policy treated one file's candidate blocks."""
+
+    candidate_count: int = 0
+    skipped_min_size_count: int = 0
+    skipped_budget_count: int = 0
+    min_block_lines: int = 0
+    generated: bool = False
+
+    @property
+    def skipped_count(self) -> int:
+        return self.skipped_min_size_count + self.skipped_budget_count
+
+    def as_metadata(self) -> dict[str, object]:
+        return {
+            "candidate_count": self.candidate_count,
+            "skipped_count": self.skipped_count,
+            "skipped_min_size_count": self.skipped_min_size_count,
+            "skipped_budget_count": self.skipped_budget_count,
+            "min_block_lines": self.min_block_lines,
+            "generated": self.generated,
+        }
 
 
 @dataclass(slots=True)
 class DuplicationAnalysisContext:
     vectors: list[MetricsVector]
     relative_path_by_absolute_path: dict[Path, str]
+    source_files: list[SourceFile] = field(default_factory=list)
     blocks: list[CodeBlock] = field(default_factory=list)
     blocks_by_path: dict[Path, list[CodeBlock]] = field(default_factory=dict)
+    block_budget_by_path: dict[Path, BlockBudgetStats] = field(default_factory=dict)
     read_errors: dict[Path, str] = field(default_factory=dict)
-    syntax_matches_by_block: dict[str, list[BlockMatch]] = field(default_factory=dict)
-    semantic_matches_by_block: dict[str, list[BlockMatch]] = field(default_factory=dict)
+    syntax_clone_classes: CloneClassTable = field(default_factory=CloneClassTable)
+    semantic_clone_classes: CloneClassTable = field(default_factory=CloneClassTable)
     semantic_error: str | None = None
 
 
+@dataclass(slots=True, frozen=True)
+class BlockEmbeddings:
+    """Block vectors computed by the latest ``DuplicationAnalysisLayer.run``."""
+
+    model_id: str
+    blocks: list[CodeBlock]
+    relative_paths: list[str]
+    matrix: np.ndarray
+
+
 MetricHandler = Callable[[DuplicationAnalysisContext, Path], int | float | None]
 
 
@@ -68,23 +303,53 @@ class DuplicationAnalysisLayer:
     LAYER_NAME = "duplication_analysis"
     DEFAULT_SYNTAX_SIMILARITY_THRESHOLD = 0.96
     DEFAULT_SEMANTIC_SIMILARITY_THRESHOLD = 0.86
+    # Matches below this still count as direct peers but do not join classes.
+    DEFAULT_CLONE_CLASS_SIMILARITY_THRESHOLD = 0.95
     DEFAULT_MIN_BLOCK_LINES = 3
     DEFAULT_MIN_BLOCK_TOKENS = 18
     MATCH_SAMPLE_LIMIT = 5
+    GENERATED_MARKER_SCAN_LINES = 10
+    # Only markers that tools emit; "do not edit" also heads hand-written files.
+    DEFAULT_GENERATED_CODE_MARKERS = (
+        "@generated",
+        "code generated by",
+    )
+    SIMILARITY_CHUNK_ROWS = 1024
 
     def __init__(
         self,
         embedding_service: CodeEmbeddingProvider | None = None,
         syntax_similarity_threshold: float = DEFAULT_SYNTAX_SIMILARITY_THRESHOLD,
         semantic_similarity_threshold: float = DEFAULT_SEMANTIC_SIMILARITY_THRESHOLD,
+        clone_class_similarity_threshold: float = DEFAULT_CLONE_CLASS_SIMILARITY_THRESHOLD,
         min_block_lines: int = DEFAULT_MIN_BLOCK_LINES,
         min_block_tokens: int = DEFAULT_MIN_BLOCK_TOKENS,
+        semantic_skip_syntax_similarity: float | None = None,
+        max_blocks_per_file: int | None = None,
+        block_scale_file_lines: int | None = None,
+        generated_code_markers: Sequence[str] | None = None,
     ) -> None:
+        if not 0.0 < clone_class_similarity_threshold <= 1.0:
+            raise ValueError("Clone class similarity threshold must be in (0, 1]")
+        if semantic_skip_syntax_similarity is not None and not 0.0 < semantic_skip_syntax_similarity <= 1.0:
+            raise ValueError("Semantic skip syntax similarity must be in (0, 1]")
+        if max_blocks_per_file is not None and max_blocks_per_file < 1:
+            raise ValueError("Maximum blocks per file must be at least 1")
+        if block_scale_file_lines is not None and block_scale_file_lines < 1:
+            raise ValueError("Block scale file lines must be at least 1")
+
         self.embedding_service = embedding_service or CodeEmbeddingService()
         self.syntax_similarity_threshold = syntax_similarity_threshold
         self.semantic_similarity_threshold = semantic_similarity_threshold
+        self.clone_class_similarity_threshold = clone_class_similarity_threshold
         self.min_block_lines = min_block_lines
         self.min_block_tokens = min_block_tokens
+        self.semantic_skip_syntax_similarity = semantic_skip_syntax_similarity
+        self.max_blocks_per_file = max_blocks_per_file
+        self.block_scale_file_lines = block_scale_file_lines
+        self.generated_code_markers = tuple(marker.lower() for marker in generated_code_markers or ())
+        self.last_block_embeddings: BlockEmbeddings | None = None
+        self._token_ids: dict[str, int] = {}
         self.metric_handlers: dict[str, MetricHandler] = {
             "duplicate_blocks_count": self.duplicate_blocks_count,
             "duplicate_loc_count": self.duplicate_loc_count,
@@ -96,6 +361,7 @@ class DuplicationAnalysisLayer:
 
     def run(self, vectors: list[MetricsVector]) -> LayerResult:
         started = perf_counter()
+        self.last_block_embeddings = None
         logger.info(
             "[DUPLICATION STARTED] file_count=%d model=%s syntax_threshold=%.3f semantic_threshold=%.3f min_lines=%d min_tokens=%d",
             len(vectors),
@@ -122,28 +388,32 @@ class DuplicationAnalysisLayer:
         context_started = perf_counter()
         context = self._build_context(vectors)
         logger.info(
-            "[DUPLICATION CONTEXT COMPLETED] file_count=%d block_count=%d read_error_count=%d elapsed_seconds=%.3f",
+            "[DUPLICATION CONTEXT COMPLETED] file_count=%d block_count=%d skipped_block_count=%d generated_file_count=%d read_error_count=%d elapsed_seconds=%.3f",
             len(vectors),
             len(context.blocks),
+            sum(stats.skipped_count for stats in context.block_budget_by_path.values()),
+            sum(stats.generated for stats in context.block_budget_by_path.values()),
             len(context.read_errors),
             perf_counter() - context_started,
         )
         syntax_started = perf_counter()
         self._find_syntax_duplicates(context)
         logger.info(
-            "[DUPLICATION SYNTAX COMPLETED] block_count=%d match_block_count=%d match_count=%d elapsed_seconds=%.3f",
+            "[DUPLICATION SYNTAX COMPLETED] block_count=%d match_block_count=%d match_count=%d clone_class_count=%d elapsed_seconds=%.3f",
             len(context.blocks),
-            len(context.syntax_matches_by_block),
-            sum(len(matches) for matches in context.syntax_matches_by_block.values()),
+            context.syntax_clone_classes.block_count,
+            context.syntax_clone_classes.pair_count,
+            len(context.syntax_clone_classes.classes),
             perf_counter() - syntax_started,
         )
         semantic_started = perf_counter()
         self._find_semantic_duplicates(context)
         logger.info(
-            "[DUPLICATION SEMANTIC COMPLETED] block_count=%d match_block_count=%d match_count=%d failed=%s elapsed_seconds=%.3f",
+            "[DUPLICATION SEMANTIC COMPLETED] block_count=%d match_block_count=%d match_count=%d clone_class_count=%d failed=%s elapsed_seconds=%.3f",
             len(context.blocks),
-            len(context.semantic_matches_by_block),
-            sum(len(matches) for matches in context.semantic_matches_by_block.values()),
+            context.semantic_clone_classes.block_count,
+            context.semantic_clone_classes.pair_count,
+            len(context.semantic_clone_classes.classes),
             bool(context.semantic_error),
             perf_counter() - semantic_started,
         )
@@ -183,8 +453,8 @@ class DuplicationAnalysisLayer:
             "[DUPLICATION COMPLETED] file_count=%d block_count=%d syntax_match_count=%d semantic_match_count=%d vector_error_count=%d elapsed_seconds=%.3f",
             len(vectors),
             len(context.blocks),
-            sum(len(matches) for matches in context.syntax_matches_by_block.values()),
-            sum(len(matches) for matches in context.semantic_matches_by_block.values()),
+            context.syntax_clone_classes.pair_count,
+            context.semantic_clone_classes.pair_count,
             sum(len(vector.errors) for vector in vectors),
             perf_counter() - started,
         )
@@ -206,8 +476,17 @@ class DuplicationAnalysisLayer:
         for path in relative_path_by_absolute_path:
             try:
                 source = path.read_text(encoding="utf-8")
-                blocks = self._extract_blocks(path, source)
+                if self._is_generated_source(source):
+                    blocks: list[CodeBlock] = []
+                    budget = BlockBudgetStats(generated=True)
+                else:
+                    blocks, budget = self._apply_block_budget(
+                        self._extract_blocks(path, source, file_index=len(context.source_files))
+                    )
+                if blocks:
+                    context.source_files.append(blocks[0].file)
                 context.blocks_by_path[path] = blocks
+                context.block_budget_by_path[path] = budget
                 context.blocks.extend(blocks)
             except Exception as exc:
                 logger.warning(
@@ -220,9 +499,12 @@ class DuplicationAnalysisLayer:
 
         return context
 
-    def _extract_blocks(self, path: Path, source: str) -> list[CodeBlock]:
+    def _extract_blocks(self, path: Path, source: str, file_index: int = 0) -> list[CodeBlock]:
         tree = ast.parse(source)
-        lines = source.splitlines()
+        source_file = SourceFile.from_text(file_index, path, source)
+        # Nested blocks overlap, so tokenize the file once and slice each
+        # block's tokens out by line range.
+        file_tokens = self._file_tokens(source)
         candidates: list[tuple[str, int, int]] = []
 
         for node in ast.walk(tree):
@@ -235,17 +517,53 @@ class DuplicationAnalysisLayer:
 
         blocks: list[CodeBlock] = []
         for index, (kind, start_line, end_line) in enumerate(sorted(set(candidates), key=lambda item: (item[1], item[2], item[0]))):
-            block = self._build_block(path, kind, index, start_line, end_line, lines)
+            block = self._build_block(source_file, kind, index, start_line, end_line, file_tokens)
             if block is not None:
                 blocks.append(block)
 
         if not blocks:
-            block = self._build_block(path, "module", 0, 1, len(lines), lines)
+            block = self._build_block(source_file, "module", 0, 1, source_file.line_count, file_tokens)
             if block is not None:
                 blocks.append(block)
 
         return blocks
 
+    def _is_generated_source(self, source: str) -> bool:
+        if not self.generated_code_markers:
+            return False
+        header = "\n".join(source.splitlines()[: self.GENERATED_MARKER_SCAN_LINES]).lower()
+        return any(marker in header for marker in self.generated_code_markers)
+
+    def _apply_block_budget(self, blocks: list[CodeBlock]) -> tuple[list[CodeBlock], BlockBudgetStats]:
+        """Scale the minimum block size with file length, then cap the block count.
+
+        The cap keeps the ``max_blocks_per_file`` largest blocks; ties go to
+        the earlier block.
+        """
+        min_block_lines = self.min_block_lines
+        if blocks and self.block_scale_file_lines is not None:
+            line_count = blocks[0].file.line_count
+            min_block_lines = max(
+                min_block_lines,
+                math.ceil(self.min_block_lines * line_count / self.block_scale_file_lines),
+            )
+
+        kept = [block for block in blocks if block.loc >= min_block_lines]
+        skipped_min_size_count = len(blocks) - len(kept)
+        skipped_budget_count = 0
+        if self.max_blocks_per_file is not None and len(kept) > self.max_blocks_per_file:
+            largest = sorted(kept, key=lambda block: (-block.loc, block.start_line))[: self.max_blocks_per_file]
+            kept_ids = {block.id for block in largest}
+            skipped_budget_count = len(kept) - len(largest)
+            kept = [block for block in kept if block.id in kept_ids]
+
+        return kept, BlockBudgetStats(
+            candidate_count=len(blocks),
+            skipped_min_size_count=skipped_min_size_count,
+            skipped_budget_count=skipped_budget_count,
+            min_block_lines=min_block_lines,
+        )
+
     def _add_node_candidate(self, candidates: list[tuple[str, int, int]], kind: str, node: ast.AST) -> None:
         start_line = getattr(node, "lineno", None)
         end_line = getattr(node, "end_lineno", None)
@@ -285,43 +603,46 @@ class DuplicationAnalysisLayer:
 
     def _build_block(
         self,
-        path: Path,
+        source_file: SourceFile,
         kind: str,
         index: int,
         start_line: int,
         end_line: int,
-        lines: list[str],
+        file_tokens: _FileTokens | None = None,
     ) -> CodeBlock | None:
-        if start_line < 1 or end_line < start_line or not lines:
+        if start_line < 1 or end_line < start_line or not source_file.line_count:
             return None
 
-        source = "\n".join(lines[start_line - 1 : end_line])
-        embedding_text = self._normalize_for_embedding(source)
-        syntax_tokens = self._syntax_tokens(source)
-        line_numbers = self._code_line_numbers(lines, start_line, end_line)
+        loc = source_file.code_line_count(start_line, end_line)
+        if loc < self.min_block_lines:
+            return None
 
-        if len(line_numbers) < self.min_block_lines or len(syntax_tokens) < self.min_block_tokens:
+        syntax_tokens = (
+            file_tokens.between(start_line, end_line)
+            if file_tokens is not None
+            else self._syntax_tokens(source_file.lines_between(start_line, end_line))
+        )
+        if len(syntax_tokens) < self.min_block_tokens:
             return None
 
         return CodeBlock(
-            id=f"{path.as_posix()}:{start_line}:{end_line}:{index}",
-            file_path=path,
+            id=f"{source_file.path.as_posix()}:{start_line}:{end_line}:{index}",
+            file=source_file,
             kind=kind,
             start_line=start_line,
             end_line=end_line,
-            source=source,
-            embedding_text=embedding_text,
             syntax_tokens=syntax_tokens,
-            line_numbers=line_numbers,
+            loc=loc,
         )
 
     # -- Duplicate detection ----------------------------------------------
 
     def _find_syntax_duplicates(self, context: DuplicationAnalysisContext) -> None:
-        matches_by_block: dict[str, list[BlockMatch]] = defaultdict(list)
+        pairs: list[tuple[int, int, float]] = []
 
         for index, left in enumerate(context.blocks):
-            for right in context.blocks[index + 1 :]:
+            for right_index in range(index + 1, len(context.blocks)):
+                right = context.blocks[right_index]
                 if left.file_path == right.file_path:
                     continue
 
@@ -329,64 +650,136 @@ class DuplicationAnalysisLayer:
                 if similarity < self.syntax_similarity_threshold:
                     continue
 
-                self._add_match(matches_by_block, left, right, similarity)
-                self._add_match(matches_by_block, right, left, similarity)
+                pairs.append((index, right_index, similarity))
 
-        context.syntax_matches_by_block = dict(matches_by_block)
+        context.syntax_clone_classes = CloneClassTable.from_pairs(
+            context.blocks,
+            pairs,
+            self.clone_class_similarity_threshold,
+        )
 
     def _find_semantic_duplicates(self, context: DuplicationAnalysisContext) -> None:
         if len(context.blocks) < 2:
             return
 
-        try:
-            embeddings = self.embedding_service.encode([block.embedding_text for block in context.blocks])
-            if len(embeddings) != len(context.blocks):
-                raise RuntimeError(
-                    f"embedding service returned {len(embeddings)} vectors for {len(context.blocks)} blocks"
-                )
-        except Exception as exc:
-            logger.warning("[DUPLICATION SEMANTIC FAILED] error=%s", str(exc))
-            context.semantic_error = str(exc)
-            context.semantic_matches_by_block = {}
-            return
+        skipped_ids = self._syntax_matched_block_ids(context)
+        embedded_indexes = [index for index, block in enumerate(context.blocks) if block.id not in skipped_ids]
+        embedded_blocks = [context.blocks[index] for index in embedded_indexes]
+        # Identical normalized sources embed to identical vectors, so each
+        # distinct text goes to the model once and is fanned back out by row.
+        unique_rows: dict[str, int] = {}
+        text_rows = np.array(
+            [unique_rows.setdefault(block.embedding_text, len(unique_rows)) for block in embedded_blocks],
+            dtype=np.intp,
+        )
+        logger.info(
+            "[DUPLICATION SEMANTIC INPUTS] block_count=%d embedded_block_count=%d unique_text_count=%d syntax_skipped_count=%d",
+            len(context.blocks),
+            len(embedded_blocks),
+            len(unique_rows),
+            len(skipped_ids),
+        )
 
-        matches_by_block: dict[str, list[BlockMatch]] = defaultdict(list)
-        for index, left in enumerate(context.blocks):
-            for right_index in range(index + 1, len(context.blocks)):
-                right = context.blocks[right_index]
-                if left.file_path == right.file_path:
-                    continue
+        pairs: list[tuple[int, int, float]] = []
+        if len(embedded_blocks) >= 2:
+            try:
+                unique_embeddings = encode_as_matrix(self.embedding_service, list(unique_rows))
+                if unique_embeddings.shape[0] != len(unique_rows):
+                    raise RuntimeError(
+                        f"embedding service returned {unique_embeddings.shape[0]} vectors for {len(unique_rows)} blocks"
+                    )
+            except Exception as exc:
+                logger.warning("[DUPLICATION SEMANTIC FAILED] error=%s", str(exc))
+                context.semantic_error = str(exc)
+                context.semantic_clone_classes = CloneClassTable()
+                return
+
+            embeddings = unique_embeddings[text_rows]
+            self.last_block_embeddings = BlockEmbeddings(
+                model_id=getattr(self.embedding_service, "model_id", self.embedding_service.__class__.__name__),
+                blocks=embedded_blocks,
+                relative_paths=[
+                    context.relative_path_by_absolute_path[block.file_path] for block in embedded_blocks
+                ],
+                matrix=embeddings,
+            )
+            pairs.extend(
+                (embedded_indexes[index], embedded_indexes[right_index], similarity)
+                for index, right_index, similarity in self._semantic_pairs(embedded_blocks, embeddings)
+            )
 
-                similarity = self._cosine_similarity(embeddings[index], embeddings[right_index])
-                if not math.isfinite(similarity):
-                    continue
-                if similarity < self.semantic_similarity_threshold:
-                    continue
+        pairs.extend(self._syntax_pairs_as_semantic(context))
+        context.semantic_clone_classes = CloneClassTable.from_pairs(
+            context.blocks,
+            pairs,
+            self.clone_class_similarity_threshold,
+        )
 
-                self._add_match(matches_by_block, left, right, similarity)
-                self._add_match(matches_by_block, right, left, similarity)
+    def _syntax_matched_block_ids(self, context: DuplicationAnalysisContext) -> set[str]:
+        """Blocks the optional skip policy leaves out of semantic embedding."""
+        if self.semantic_skip_syntax_similarity is None:
+            return set()
+        return {
+            block_id
+            for block_id, similarity in context.syntax_clone_classes.best_similarities.items()
+            if similarity >= self.semantic_skip_syntax_similarity
+        }
 
-        context.semantic_matches_by_block = dict(matches_by_block)
+    def _syntax_pairs_as_semantic(self, context: DuplicationAnalysisContext) -> list[tuple[int, int, float]]:
+        # A block that is a near-exact syntax clone is also a semantic
+        # duplicate of the same peers; reuse the syntax similarity as its score.
+        # Both ends of such a pair are skipped, so none of these was embedded.
+        if self.semantic_skip_syntax_similarity is None:
+            return []
 
-    def _add_match(
-        self,
-        matches_by_block: dict[str, list[BlockMatch]],
-        source: CodeBlock,
-        target: CodeBlock,
-        similarity: float,
-    ) -> None:
-        if not math.isfinite(similarity):
-            return
+        index_by_id = {block.id: index for index, block in enumerate(context.blocks)}
+        return [
+            (index_by_id[left.id], index_by_id[right.id], similarity)
+            for left, right, similarity in context.syntax_clone_classes.pairs()
+            if similarity >= self.semantic_skip_syntax_similarity
+        ]
 
-        matches_by_block[source.id].append(
-            BlockMatch(
-                block_id=target.id,
-                file_path=target.file_path,
-                start_line=target.start_line,
-                end_line=target.end_line,
-                similarity=round(float(similarity), 6),
-            )
+    def _semantic_pairs(
+        self,
+        blocks: list[CodeBlock],
+        embeddings: np.ndarray,
+    ) -> list[tuple[int, int, float]]:
+        """Cross-file block pairs whose cosine similarity meets the threshold.
+
+        Similarities are computed as row-normalized matrix products in chunks
+        of ``SIMILARITY_CHUNK_ROWS`` rows; zero vectors score 0.0 and
+        non-finite scores are dropped. Pairs come back in ``(left, right)``
+        row-major order with ``left < right``.
+        """
+        with np.errstate(invalid="ignore", divide="ignore", over="ignore"):
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            normalized = np.where(norms == 0.0, 0.0, embeddings / np.where(norms == 0.0, 1.0, norms))
+        normalized = normalized.astype(np.float32, copy=False)
+
+        path_ids: dict[Path, int] = {}
+        file_ids = np.array(
+            [path_ids.setdefault(block.file_path, len(path_ids)) for block in blocks],
+            dtype=np.int64,
         )
+        block_count = len(blocks)
+        columns = np.arange(block_count)
+        pairs: list[tuple[int, int, float]] = []
+
+        for start in range(0, block_count, self.SIMILARITY_CHUNK_ROWS):
+            end = min(start + self.SIMILARITY_CHUNK_ROWS, block_count)
+            with np.errstate(invalid="ignore", over="ignore"):
+                similarities = normalized[start:end] @ normalized.T
+            rows = np.arange(start, end)[:, None]
+            candidates = (
+                (columns[None, :] > rows)
+                & (file_ids[start:end, None] != file_ids[None, :])
+                & np.isfinite(similarities)
+                & (similarities >= self.semantic_similarity_threshold)
+            )
+            for row, column in zip(*np.nonzero(candidates)):
+                pairs.append((start + int(row), int(column), float(similarities[row, column])))
+
+        return pairs
 
     # -- Metrics -----------------------------------------------------------
 
@@ -406,7 +799,7 @@ class DuplicationAnalysisLayer:
         logger.debug("[DUPLICATION] computing syntax duplication group size")
         return self._max_group_size(
             self._syntax_duplicate_blocks(context, path),
-            context.syntax_matches_by_block,
+            context.syntax_clone_classes,
         )
 
     def semantic_duplicate_blocks_count(
@@ -429,17 +822,15 @@ class DuplicationAnalysisLayer:
             return None
         return self._max_similarity(
             self._semantic_duplicate_blocks(context, path),
-            context.semantic_matches_by_block,
+            context.semantic_clone_classes,
         )
 
     def duplicate_file_candidates_count(self, context: DuplicationAnalysisContext, path: Path) -> int:
         logger.debug("[DUPLICATION] computing duplicate candidate file count")
-        syntax_duplicate_blocks = self._syntax_duplicate_blocks(context, path)
-        semantic_duplicate_blocks = self._semantic_duplicate_blocks(context, path)
         peer_files = self._peer_files_for_blocks(
-            [*syntax_duplicate_blocks, *semantic_duplicate_blocks],
-            context.syntax_matches_by_block,
-            context.semantic_matches_by_block,
+            context.blocks_by_path.get(path, []),
+            context.syntax_clone_classes,
+            context.semantic_clone_classes,
         )
         return len(peer_files)
 
@@ -450,17 +841,20 @@ class DuplicationAnalysisLayer:
             "embedding_model": getattr(self.embedding_service, "model_id", self.embedding_service.__class__.__name__),
             "syntax_similarity_threshold": self.syntax_similarity_threshold,
             "semantic_similarity_threshold": self.semantic_similarity_threshold,
+            "clone_class_similarity_threshold": self.clone_class_similarity_threshold,
             "min_block_lines": self.min_block_lines,
             "min_block_tokens": self.min_block_tokens,
+            "semantic_skip_syntax_similarity": self.semantic_skip_syntax_similarity,
+            "block_budget": context.block_budget_by_path.get(path, BlockBudgetStats()).as_metadata(),
             "syntax_duplicate_blocks_sample": self._match_sample(
                 context,
                 blocks,
-                context.syntax_matches_by_block,
+                context.syntax_clone_classes,
             ),
             "semantic_duplicate_blocks_sample": self._match_sample(
                 context,
                 blocks,
-                context.semantic_matches_by_block,
+                context.semantic_clone_classes,
             ),
         }
         if context.semantic_error:
@@ -471,65 +865,46 @@ class DuplicationAnalysisLayer:
         return [
             block
             for block in context.blocks_by_path.get(path, [])
-            if context.syntax_matches_by_block.get(block.id)
+            if block.id in context.syntax_clone_classes.membership
         ]
 
     def _semantic_duplicate_blocks(self, context: DuplicationAnalysisContext, path: Path) -> list[CodeBlock]:
         return [
             block
             for block in context.blocks_by_path.get(path, [])
-            if context.semantic_matches_by_block.get(block.id)
+            if block.id in context.semantic_clone_classes.membership
         ]
 
     def _peer_files_for_blocks(
         self,
         blocks: list[CodeBlock],
-        *match_maps: dict[str, list[BlockMatch]],
+        *tables: CloneClassTable,
     ) -> set[Path]:
         peer_files: set[Path] = set()
         for block in blocks:
-            for match_map in match_maps:
-                peer_files.update(match.file_path for match in match_map.get(block.id, []))
+            for table in tables:
+                peer_files.update(table.direct_peer_files(block))
         return peer_files
 
-    def _max_group_size(
-        self,
-        blocks: list[CodeBlock],
-        matches_by_block: dict[str, list[BlockMatch]],
-    ) -> int:
-        group_sizes = [
-            1 + len({match.file_path for match in matches_by_block.get(block.id, [])})
-            for block in blocks
-        ]
+    def _max_group_size(self, blocks: list[CodeBlock], table: CloneClassTable) -> int:
+        """Largest number of files sharing a clone class with one of ``blocks``."""
+        group_sizes = [len(table.class_of(block).file_paths) for block in blocks]
         return max(group_sizes, default=0)
 
-    def _max_similarity(
-        self,
-        blocks: list[CodeBlock],
-        matches_by_block: dict[str, list[BlockMatch]],
-    ) -> float:
-        similarities = [
-            match.similarity
-            for block in blocks
-            for match in matches_by_block.get(block.id, [])
-            if math.isfinite(match.similarity)
-        ]
+    def _max_similarity(self, blocks: list[CodeBlock], table: CloneClassTable) -> float:
+        similarities = [table.best_similarity(block) for block in blocks]
         return round(max(similarities, default=0.0), 6)
 
     def _match_sample(
         self,
         context: DuplicationAnalysisContext,
         blocks: list[CodeBlock],
-        matches_by_block: dict[str, list[BlockMatch]],
+        table: CloneClassTable,
     ) -> list[dict[str, object]]:
         sample: list[dict[str, object]] = []
         for block in blocks:
-            matches = [
-                match
-                for match in matches_by_block.get(block.id, [])
-                if math.isfinite(match.similarity)
-            ]
-            if not matches:
+            clone_class = table.class_of(block)
+            if clone_class is None:
                 continue
 
             sample.append(
@@ -537,13 +912,13 @@ class DuplicationAnalysisLayer:
                     "kind": block.kind,
                     "start_line": block.start_line,
                     "end_line": block.end_line,
+                    "clone_class_id": clone_class.id,
+                    "clone_class_size": len(clone_class.members),
                     "matched_files": sorted(
-                        {
-                            context.relative_path_by_absolute_path[match.file_path]
-                            for match in matches
-                        }
+                        context.relative_path_by_absolute_path[file_path]
+                        for file_path in table.direct_peer_files(block)
                     )[: self.MATCH_SAMPLE_LIMIT],
-                    "max_similarity": round(max(match.similarity for match in matches), 6),
+                    "max_similarity": table.best_similarity(block),
                 }
             )
             if len(sample) >= self.MATCH_SAMPLE_LIMIT:
@@ -554,47 +929,68 @@ class DuplicationAnalysisLayer:
     # -- Normalization and similarity helpers -----------------------------
 
     def _normalize_for_embedding(self, source: str) -> str:
-        return "\n".join(line.rstrip() for line in dedent(source).strip().splitlines())
+        return normalize_for_embedding(source)
+
+    def _file_tokens(self, source: str) -> _FileTokens | None:
+        token_ids = array("i")
+        token_lines = array("i")
+        # Raw (type, text) pairs repeat heavily within a file; memoize their
+        # normalized id (-1 for skipped tokens) instead of re-normalizing.
+        ids_by_raw_token: dict[tuple[int, str], int] = {}
+        try:
+            for token_type, text, (line, _), _, _ in tokenize.generate_tokens(StringIO(source).readline):
+                raw_token = (token_type, text)
+                token_id = ids_by_raw_token.get(raw_token)
+                if token_id is None:
+                    normalized = self._normalized_token(token_type, text)
+                    token_id = ids_by_raw_token[raw_token] = -1 if normalized is None else self._token_id(normalized)
+                if token_id >= 0:
+                    token_ids.append(token_id)
+                    token_lines.append(line)
+        except tokenize.TokenError:
+            return None
+        return _FileTokens(token_ids=token_ids, token_lines=token_lines)
 
-    def _syntax_tokens(self, source: str) -> tuple[str, ...]:
-        tokens: list[str] = []
+    def _syntax_tokens(self, source: str) -> array:
+        token_ids = array("i")
         reader = StringIO(dedent(source)).readline
 
         try:
             for token in tokenize.generate_tokens(reader):
-                if token.type in {
-                    tokenize.COMMENT,
-                    tokenize.INDENT,
-                    tokenize.DEDENT,
-                    tokenize.NEWLINE,
-                    tokenize.NL,
-                    tokenize.ENDMARKER,
-                }:
-                    continue
-
-                if token.type == tokenize.NAME:
-                    tokens.append(token.string if keyword.iskeyword(token.string) else "NAME")
-                elif token.type == tokenize.STRING:
-                    tokens.append("STRING")
-                elif token.type == tokenize.NUMBER:
-                    tokens.append("NUMBER")
-                elif token.type == tokenize.OP:
-                    tokens.append(token.string)
-                else:
-                    tokens.append(tokenize.tok_name.get(token.type, token.string))
+                normalized = self._normalized_token(token.type, token.string)
+                if normalized is not None:
+                    token_ids.append(self._token_id(normalized))
         except tokenize.TokenError:
-            return tuple(dedent(source).split())
-
-        return tuple(tokens)
+            return array("i", (self._token_id(word) for word in dedent(source).split()))
+
+        return token_ids
+
+    def _normalized_token(self, token_type: int, text: str) -> str | None:
+        if token_type in {
+            tokenize.COMMENT,
+            tokenize.INDENT,
+            tokenize.DEDENT,
+            tokenize.NEWLINE,
+            tokenize.NL,
+            tokenize.ENDMARKER,
+        }:
+            return None
 
-    def _code_line_numbers(self, lines: list[str], start_line: int, end_line: int) -> tuple[int, ...]:
-        line_numbers: list[int] = []
-        for line_number in range(start_line, end_line + 1):
-            line = lines[line_number - 1]
-            stripped = line.strip()
-            if stripped and not stripped.startswith("#"):
-                line_numbers.append(line_number)
-        return tuple(line_numbers)
+        if token_type == tokenize.NAME:
+            return text if keyword.iskeyword(text) else "NAME"
+        if token_type == tokenize.STRING:
+            return "STRING"
+        if token_type == tokenize.NUMBER:
+            return "NUMBER"
+        if token_type == tokenize.OP:
+            return text
+        return tokenize.tok_name.get(token_type, text)
+
+    def _token_id(self, token: str) -> int:
+        token_id = self._token_ids.get(token)
+        if token_id is None:
+            token_id = self._token_ids[token] = len(self._token_ids)
+        return token_id
 
     def _syntax_similarity(self, left: CodeBlock, right: CodeBlock) -> float:
         if left.syntax_tokens == right.syntax_tokens:
@@ -617,23 +1013,6 @@ class DuplicationAnalysisLayer:
             autojunk=False,
         ).ratio()
 
-    def _cosine_similarity(self, left: list[float], right: list[float]) -> float:
-        if len(left) != len(right):
-            raise ValueError(f"Embedding dimensions differ: {len(left)} != {len(right)}")
-
-        dot = 0.0
-        left_norm = 0.0
-        right_norm = 0.0
-        for left_value, right_value in zip(left, right, strict=True):
-            dot += left_value * right_value
-            left_norm += left_value * left_value
-            right_norm += right_value * right_value
-
-        denominator = math.sqrt(left_norm) * math.sqrt(right_norm)
-        if denominator == 0.0:
-            return 0.0
-        return dot / denominator
-
     # -- Path helpers ------------------------------------------------------
 
     def _validate_vectors(self, vectors: list[MetricsVector]) -> None:
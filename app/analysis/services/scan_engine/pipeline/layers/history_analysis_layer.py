@@ -1,7 +1,8 @@
 import logging
-import os
+import re
 import subprocess
-from collections.abc import Callable
+import threading
+from collections.abc import Callable, Iterable
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
@@ -27,12 +28,57 @@ class HistoryAnalysisContext:
     relative_path: str
     commit_hashes: list[str] | None = None
     recent_commit_hashes: list[str] | None = None
-    commit_subjects: list[str] | None = None
     co_changed_files: set[str] = field(default_factory=set)
     co_change_commits_analyzed: int = 0
     co_change_bulk_commits_skipped: int = 0
 
 
+class BugFixSubjectClassifier:
+    """Classify commit subjects as bug fixes with one compiled regex pass.
+
+    Keywords must start at a word boundary, so ``fixes``/``bugfix`` match while
+    ``prefix`` or ``tissue`` do not.
+    """
+
+    def __init__(self, keywords: Iterable[str]) -> None:
+        normalized = sorted(
+            {keyword.strip().lower() for keyword in keywords if keyword.strip()},
+            key=lambda keyword: (-len(keyword), keyword),
+        )
+        if not normalized:
+            raise ValueError("bug_keywords must contain at least one keyword")
+
+        self.keywords = tuple(normalized)
+        alternation = "|".join(re.escape(keyword) for keyword in normalized)
+        self._pattern = re.compile(rf"\b(?:{alternation})", re.IGNORECASE)
+
+    def is_bug_fix(self, subject: str) -> bool:
+        return self._pattern.search(subject) is not None
+
+
+@dataclass(slots=True)
+class CommitHistoryIndex:
+    """Repository-wide commit table shared by every file of a scan.
+
+    Each commit is classified once; bug-fix commits are stored as set bits in
+    ``bug_fix_mask`` keyed by the commit's position in ``commit_positions``.
+    """
+
+    commit_positions: dict[str, int] = field(default_factory=dict)
+    bug_fix_mask: int = 0
+
+    def commit_mask(self, commit_hashes: Iterable[str]) -> int:
+        mask = 0
+        for commit_hash in commit_hashes:
+            position = self.commit_positions.get(commit_hash)
+            if position is not None:
+                mask |= 1 << position
+        return mask
+
+    def bug_fix_count(self, commit_hashes: Iterable[str]) -> int:
+        return (self.commit_mask(commit_hashes) & self.bug_fix_mask).bit_count()
+
+
 MetricHandler = Callable[[HistoryAnalysisContext], int | float | str | bool | None]
 
 
@@ -41,11 +87,19 @@ class HistoryAnalysisLayer:
 
     LAYER_NAME = "history_analysis"
     GIT_TIMEOUT_SECONDS = 10
+    # The commit index reads the whole repository log once per scan.
+    HISTORY_INDEX_TIMEOUT_SECONDS = 120
     MAX_COMMITS_FOR_CO_CHANGE = 100
     MAX_FILES_PER_CO_CHANGE_COMMIT = 25
     BUG_KEYWORDS = ("fix", "bug", "issue", "patch", "hotfix", "repair", "correct", "defect")
 
-    def __init__(self) -> None:
+    def __init__(self, bug_keywords: Iterable[str] | None = None) -> None:
+        self.bug_fix_classifier = BugFixSubjectClassifier(
+            self.BUG_KEYWORDS if bug_keywords is None else bug_keywords
+        )
+        # None records a failed build so files fall back to their own subjects.
+        self._history_indexes: dict[Path, CommitHistoryIndex | None] = {}
+        self._history_index_lock = threading.Lock()
         self.metric_handlers: dict[str, MetricHandler] = {
             "contributors_count": self.contributors_count,
             "update_count": self.update_count,
@@ -140,11 +194,16 @@ class HistoryAnalysisLayer:
 
     def bug_fix_commit_count(self, context: HistoryAnalysisContext) -> int:
         logger.debug("[HISTORY] computing bug-fix commit count")
-        return sum(
-            1
-            for subject in self._modification_commit_subjects(context)
-            if self._is_bug_fix_subject(subject)
-        )
+        commit_hashes = self._commit_hashes(context)
+        modification_commits = commit_hashes[:-1] if commit_hashes else []
+        index = self._history_index(context)
+        if index is None:
+            return sum(
+                1
+                for subject in self._modification_commit_subjects(context)
+                if self.bug_fix_classifier.is_bug_fix(subject)
+            )
+        return index.bug_fix_count(modification_commits)
 
     def bug_fix_ratio(self, context: HistoryAnalysisContext) -> float:
         logger.debug("[HISTORY] computing bug-fix ratio")
@@ -200,16 +259,53 @@ class HistoryAnalysisLayer:
             )
         return context.recent_commit_hashes
 
-    def _commit_subjects(self, context: HistoryAnalysisContext) -> list[str]:
-        if context.commit_subjects is None:
-            context.commit_subjects = self._git_lines(
-                context,
-                ["log", "--follow", "--format=%s", "--", context.relative_path],
-            )
-        return context.commit_subjects
+    def _history_index(self, context: HistoryAnalysisContext) -> CommitHistoryIndex | None:
+        # Files are analysed concurrently; the first one to need the index
+        # builds it and every other file of the same repository reuses it,
+        # including a failed build, which is not retried within the scan.
+        with self._history_index_lock:
+            if context.repo_root not in self._history_indexes:
+                try:
+                    index = self._build_history_index(context)
+                except RuntimeError as exc:
+                    logger.warning(
+                        "[HISTORY] commit index unavailable for %s, classifying per file: %s",
+                        context.repo_root,
+                        exc,
+                    )
+                    index = None
+                self._history_indexes[context.repo_root] = index
+            return self._history_indexes[context.repo_root]
+
+    def _build_history_index(self, context: HistoryAnalysisContext) -> CommitHistoryIndex:
+        index = CommitHistoryIndex()
+        output = self._run_git(
+            context.repo_root,
+            ["log", "--format=%H%x1f%s"],
+            timeout=self.HISTORY_INDEX_TIMEOUT_SECONDS,
+        )
+        for line in output.splitlines():
+            commit_hash, _, subject = line.partition("\x1f")
+            commit_hash = commit_hash.strip()
+            if not commit_hash or commit_hash in index.commit_positions:
+                continue
+            position = len(index.commit_positions)
+            index.commit_positions[commit_hash] = position
+            if self.bug_fix_classifier.is_bug_fix(subject):
+                index.bug_fix_mask |= 1 << position
+        logger.info(
+            "[HISTORY] indexed %d commits (%d bug fixes) for %s",
+            len(index.commit_positions),
+            index.bug_fix_mask.bit_count(),
+            context.repo_root,
+        )
+        return index
 
     def _modification_commit_subjects(self, context: HistoryAnalysisContext) -> list[str]:
-        subjects = self._commit_subjects(context)
+        subjects = self._git_lines(
+            context,
+            ["log", "--follow", "--format=%s", "--", context.relative_path],
+        )
         return subjects[:-1] if subjects else []
 
     def _oldest_file_source(self, context: HistoryAnalysisContext) -> str:
@@ -253,7 +349,7 @@ class HistoryAnalysisLayer:
     def _git_output(self, context: HistoryAnalysisContext, args: list[str]) -> str:
         return self._run_git(context.repo_root, args)
 
-    def _run_git(self, cwd: Path, args: list[str]) -> str:
+    def _run_git(self, cwd: Path, args: list[str], timeout: float | None = None) -> str:
         command = ["git", *args]
         try:
             result = subprocess.run(
@@ -262,7 +358,7 @@ class HistoryAnalysisLayer:
                 shell=False,
                 capture_output=True,
                 text=True,
-                timeout=self.GIT_TIMEOUT_SECONDS,
+                timeout=timeout or self.GIT_TIMEOUT_SECONDS,
                 check=False,
             )
         except FileNotFoundError as exc:
@@ -299,10 +395,6 @@ class HistoryAnalysisLayer:
     def _numstat_value(self, value: str) -> int:
         return int(value) if value.isdigit() else 0
 
-    def _is_bug_fix_subject(self, subject: str) -> bool:
-        normalized = subject.lower()
-        return any(keyword in normalized for keyword in self.BUG_KEYWORDS)
-
     def _safe_default_metrics(self) -> dict[str, int | float | None]:
         return {
             "contributors_count": None,
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import logging
+import warnings
+
+from app.analysis.services.scan_engine.pipeline.code_embedding_service import CodeEmbeddingService
+from app.analysis.services.scan_engine.pipeline.embedding_model_registry import LoadedEmbeddingModel
+
+logger = logging.getLogger(__name__)
+
+
+class QuantizedCodeEmbeddingService(CodeEmbeddingService):
+    """CPU embedding backend with dynamically int8-quantized Linear layers.
+
+    Weights of every ``torch.nn.Linear`` are stored as int8 and activations
+    are quantized on the fly, which is where almost all encoder FLOPs go.
+    Tokenization, pooling and normalization are inherited unchanged, so the
+    vectors stay comparable with the fp32 ``CodeEmbeddingService``.
+    """
+
+    BACKEND_NAME = "int8"
+
+    def __init__(self, *args: object, **kwargs: object) -> None:
+        super().__init__(*args, **kwargs)
+        if self.device not in (None, "cpu"):
+            raise ValueError("Quantized embedding backend only supports the cpu device")
+        self.device = "cpu"
+        self._requested_device = "cpu"
+
+    def _registry_key(self) -> tuple[object, ...]:
+        return (*super()._registry_key(), self.BACKEND_NAME)
+
+    def _load_model(self) -> LoadedEmbeddingModel:
+        loaded = super()._load_model()
+        torch = loaded.torch
+        from torch.ao.quantization import quantize_dynamic
+
+        self._select_quantized_engine(torch)
+        fp32_bytes = self._state_dict_bytes(loaded.model)
+        with warnings.catch_warnings():
+            # Eager-mode dynamic quantization is deprecated in favour of
+            # torchao, but it is still the only in-tree int8 CPU path.
+            warnings.simplefilter("ignore", category=DeprecationWarning)
+            warnings.simplefilter("ignore", category=UserWarning)
+            quantized = quantize_dynamic(loaded.model, {torch.nn.Linear}, dtype=torch.qint8)
+        quantized.eval()
+
+        loaded.model = quantized
+        loaded.memory_bytes = self._state_dict_bytes(quantized)
+        logger.info(
+            "[EMBEDDINGS QUANTIZED] model=%s backend=%s fp32_mb=%.1f int8_mb=%.1f engine=%s",
+            self.model_id,
+            self.BACKEND_NAME,
+            fp32_bytes / 1024 / 1024,
+            loaded.memory_bytes / 1024 / 1024,
+            torch.backends.quantized.engine,
+        )
+        return loaded
+
+    def _select_quantized_engine(self, torch: object) -> None:
+        engines = [engine for engine in torch.backends.quantized.supported_engines if engine != "none"]
+        if not engines:
+            raise RuntimeError("This torch build has no quantized CPU engine")
+        if torch.backends.quantized.engine not in engines:
+            torch.backends.quantized.engine = engines[0]
+
+    def _state_dict_bytes(self, model: object) -> int:
+        total = 0
+        for value in model.state_dict().values():
+            tensors = value if isinstance(value, (tuple, list)) else (value,)
+            for tensor in tensors:
+                if hasattr(tensor, "numel") and hasattr(tensor, "element_size"):
+                    total += int(tensor.numel()) * int(tensor.element_size())
+        return total
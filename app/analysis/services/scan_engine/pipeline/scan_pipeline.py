@@ -7,6 +7,11 @@ from pathlib import Path
 from typing import Protocol
 from uuid import UUID
 
+from app.analysis.services.scan_engine.pipeline.clone_index import (
+    CrossProjectCloneIndex,
+    IndexedBlock,
+)
+from app.analysis.services.scan_engine.pipeline.incremental_dependency_graph import DependencyGraphSnapshot
 from app.analysis.services.scan_engine.pipeline.metrics_vector import (
     LayerResult,
     MetricsVector,
@@ -41,6 +46,14 @@ class ScanAnalysisStorage(Protocol):
     ) -> object:
         ...
 
+    def load_dependency_snapshot(
+        self,
+        project_id: UUID,
+        *,
+        exclude_scan_id: UUID | None = None,
+    ) -> DependencyGraphSnapshot | None:
+        ...
+
 
 class ScanPipeline:
     def __init__(
@@ -52,6 +65,8 @@ class ScanPipeline:
             decision_layer: DecisionAnalysisLayer = None,
             visualization_storage: ScanVisualizationStorage | None = None,
             analysis_storage: ScanAnalysisStorage | None = None,
+            max_workers: int | None = None,
+            clone_index: CrossProjectCloneIndex | None = None,
         ):
         self.static_layer = static_layer
         self.history_layer = history_layer
@@ -60,6 +75,8 @@ class ScanPipeline:
         self.decision_layer = decision_layer
         self.visualization_storage = visualization_storage
         self.analysis_storage = analysis_storage
+        self.max_workers = max_workers
+        self.clone_index = clone_index
 
     def run(
         self,
@@ -67,6 +84,7 @@ class ScanPipeline:
         *,
         repo_root: str | Path,
         scan_id: UUID | None = None,
+        project_id: UUID | None = None,
     ) -> LayerResult:
         file_vectors = self._prepare_file_vectors(file_paths, repo_root)
         scan_result = LayerResult()
@@ -85,10 +103,12 @@ class ScanPipeline:
             [vector.for_layer(self.duplication_layer.LAYER_NAME) for vector in file_vectors]
         )
         self._record_visualization(scan_id, duplication_result)
+        self._stage_clone_index(scan_id, project_id)
         scan_result = self._merge_results([scan_result, duplication_result])
 
         architecture_result = self.architectural_layer.run(
-            [vector.for_layer(self.architectural_layer.LAYER_NAME) for vector in file_vectors]
+            [vector.for_layer(self.architectural_layer.LAYER_NAME) for vector in file_vectors],
+            previous=self._load_dependency_snapshot(scan_id, project_id),
         )
         self._record_visualization(scan_id, architecture_result)
         scan_result = self._merge_results([scan_result, architecture_result])
@@ -132,7 +152,7 @@ class ScanPipeline:
     def _run_per_file_stage(self, file_vectors: list[MetricsVector]) -> LayerResult:
         results: list[LayerResult] = []
         # Each file runs both layer 1 and layer 2 concurrently
-        with ThreadPoolExecutor() as executor:
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
             futures = {
                 executor.submit(self._run_file_layers, vector): vector
                 for vector in file_vectors
@@ -160,11 +180,9 @@ class ScanPipeline:
                 continue
             grouped[vector.relative_path].vectors.append(vector)
 
-        decision_results = [
-            self.decision_layer.run(file_result)
-            for _, file_result in sorted(grouped.items())
-        ]
-        decision_result = self._merge_results(decision_results)
+        decision_result = self.decision_layer.run_batch(
+            [file_result for _, file_result in sorted(grouped.items())]
+        )
         summary_result = self.decision_layer.summarize(decision_result)
         return self._merge_results([decision_result, summary_result])
 
@@ -211,6 +229,55 @@ class ScanPipeline:
                 exc_info=True,
             )
 
+    def _stage_clone_index(self, scan_id: UUID | None, project_id: UUID | None) -> None:
+        if scan_id is None or project_id is None or self.clone_index is None:
+            return
+
+        embeddings = getattr(self.duplication_layer, "last_block_embeddings", None)
+        if embeddings is None:
+            return
+
+        try:
+            self.clone_index.stage(
+                scan_id,
+                project_id,
+                embeddings.model_id,
+                [
+                    IndexedBlock(
+                        file_path=relative_path,
+                        kind=block.kind,
+                        start_line=block.start_line,
+                        end_line=block.end_line,
+                    )
+                    for block, relative_path in zip(embeddings.blocks, embeddings.relative_paths, strict=True)
+                ],
+                embeddings.matrix,
+            )
+        except Exception:
+            logger.warning(
+                "[PIPELINE] failed to stage clone index blocks for scan %s",
+                scan_id,
+                exc_info=True,
+            )
+
+    def _load_dependency_snapshot(
+        self,
+        scan_id: UUID | None,
+        project_id: UUID | None,
+    ) -> DependencyGraphSnapshot | None:
+        if project_id is None or self.analysis_storage is None:
+            return None
+
+        try:
+            return self.analysis_storage.load_dependency_snapshot(project_id, exclude_scan_id=scan_id)
+        except Exception:
+            logger.warning(
+                "[PIPELINE] failed to load previous dependency graph for project %s",
+                project_id,
+                exc_info=True,
+            )
+            return None
+
     def _store_analysis_results(
         self,
         scan_id: UUID | None,
@@ -70,6 +70,7 @@ class ScanEngineService:
                 file_paths,
                 repo_root=workspace.root_path,
                 scan_id=scan_id,
+                project_id=project.id,
             )
             logger.info(
                 "[SCAN ENGINE COMPLETED] scan_id=%s elapsed_seconds=%.3f",
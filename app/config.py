@@ -61,15 +61,61 @@ class Settings(BaseSettings):
     # Scan workspace
     SCAN_REPO_BASE_DIR: Path
 
+    # CPU budget (unset values are derived from the CPUs available to the worker)
+    SCAN_WORKER_PROCESSES_PER_HOST: int = 1
+    SCAN_PIPELINE_MAX_WORKERS: int | None = None
+    CODE_EMBEDDING_TORCH_THREADS: int | None = None
+    CODE_EMBEDDING_TORCH_INTEROP_THREADS: int | None = None
+
     # Code embeddings
     CODE_EMBEDDING_MODEL_ID: str = "jinaai/jina-embeddings-v2-base-code"
+    CODE_EMBEDDING_BACKEND: str = "torch"
     CODE_EMBEDDING_MODEL_PATH: Path | None = None
     CODE_EMBEDDING_LOCAL_FILES_ONLY: bool = False
     CODE_EMBEDDING_BATCH_SIZE: int = 8
+    CODE_EMBEDDING_TOKEN_BUDGET: int | None = None
     CODE_EMBEDDING_DEVICE: str | None = None
     CODE_EMBEDDING_MAX_LENGTH: int = 1024
+    CODE_EMBEDDING_CHUNK_LENGTH: int | None = 256
+    CODE_EMBEDDING_CHUNK_OVERLAP: int = 64
+    CODE_EMBEDDING_MAX_CHUNKS: int | None = 32
     CODE_EMBEDDING_TRUST_REMOTE_CODE: bool = True
+    CODE_EMBEDDING_PRELOAD: bool = False
+    CODE_EMBEDDING_PRELOAD_BEFORE_FORK: bool = False
+    CODE_EMBEDDING_IDLE_UNLOAD_SECONDS: float | None = 1800.0
+    CODE_EMBEDDING_MAX_RESIDENT_MB: int | None = None
+    CODE_EMBEDDING_SERVER_SOCKET: Path | None = None
+    CODE_EMBEDDING_SERVER_MAX_WAIT_MS: float = 10.0
+    CODE_EMBEDDING_SERVER_MAX_BATCH_TEXTS: int = 256
+    CODE_EMBEDDING_SERVER_TIMEOUT_SECONDS: float = 600.0
     SEMANTIC_DUPLICATION_SIMILARITY_THRESHOLD: float = 0.48
+    SEMANTIC_DUPLICATION_SKIP_SYNTAX_SIMILARITY: float | None = None
+    DUPLICATION_CLONE_CLASS_SIMILARITY_THRESHOLD: float = 0.95
+    # Block budget is opt-in; enabling it changes duplication metrics.
+    DUPLICATION_MAX_BLOCKS_PER_FILE: int | None = None
+    DUPLICATION_BLOCK_SCALE_FILE_LINES: int | None = None
+    DUPLICATION_EXCLUDE_GENERATED_FILES: bool = False
+    ARCHITECTURE_BETWEENNESS_STRATEGY: str = "auto"
+    ARCHITECTURE_BETWEENNESS_SAMPLE_SIZE: int = 256
+    ARCHITECTURE_BETWEENNESS_EXACT_MAX_NODES: int = 2000
+    ARCHITECTURE_BETWEENNESS_SEED: int = 0
+    ARCHITECTURE_BETWEENNESS_PROCESSES: int = 1
+    ARCHITECTURE_BETWEENNESS_REFRESH_DELTA: float = 0.02
+    ARCHITECTURE_IMPORT_CACHE_SIZE: int = 20000
+
+    # Decision scoring: "fixed" saturations or per-scan "percentile" ranks
+    DECISION_NORMALIZATION_MODE: str = "fixed"
+    DECISION_QUANTILE_POINTS: int = 101
+
+    # Rescoring stored scans (files streamed per server-side cursor batch)
+    SCAN_RESCORING_BATCH_SIZE: int = 2000
+
+    # Cross-project clone index (disabled unless a directory is configured)
+    CLONE_INDEX_DIR: Path | None = None
+    CLONE_INDEX_NLIST: int = 64
+    CLONE_INDEX_NPROBE: int = 8
+    CLONE_INDEX_SIMILARITY_THRESHOLD: float = 0.9
+    CLONE_INDEX_MATCH_LIMIT: int = 10
 
     # LLM provider
     GEMINI_API_KEY: str | None = None
@@ -98,6 +144,64 @@ class Settings(BaseSettings):
             path = BASE_DIR / path
         return path.resolve()
 
+    @field_validator("CODE_EMBEDDING_SERVER_SOCKET", "CLONE_INDEX_DIR", mode="before")
+    @classmethod
+    def parse_optional_backend_path(cls, v: Path | str | None) -> Path | None:
+        if v is None or v == "":
+            return None
+
+        path = Path(v)
+        if not path.is_absolute():
+            path = BASE_DIR / path
+        return path.resolve()
+
+    @field_validator(
+        "CODE_EMBEDDING_CHUNK_LENGTH",
+        "CODE_EMBEDDING_MAX_CHUNKS",
+        "DUPLICATION_MAX_BLOCKS_PER_FILE",
+        "DUPLICATION_BLOCK_SCALE_FILE_LINES",
+        "CODE_EMBEDDING_IDLE_UNLOAD_SECONDS",
+        mode="before",
+    )
+    @classmethod
+    def parse_optional_limit(cls, v: int | float | str | None) -> int | float | str | None:
+        if isinstance(v, str):
+            v = v.strip()
+            if v.lower() in {"", "none"}:
+                return None
+            try:
+                if float(v) == 0:
+                    return None
+            except ValueError:
+                return v
+            return v
+        if v is None or v == 0:
+            return None
+        return v
+
+    @field_validator("CODE_EMBEDDING_BACKEND")
+    @classmethod
+    def validate_code_embedding_backend(cls, v: str) -> str:
+        if v not in {"torch", "int8"}:
+            raise ValueError("CODE_EMBEDDING_BACKEND must be 'torch' or 'int8'")
+        return v
+
+    @field_validator("ARCHITECTURE_BETWEENNESS_STRATEGY")
+    @classmethod
+    def validate_architecture_betweenness_strategy(cls, v: str) -> str:
+        if v not in {"auto", "exact", "sampled"}:
+            raise ValueError("ARCHITECTURE_BETWEENNESS_STRATEGY must be 'auto', 'exact' or 'sampled'")
+        return v
+
+    @field_validator("DUPLICATION_CLONE_CLASS_SIMILARITY_THRESHOLD")
+    @classmethod
+    def validate_duplication_clone_class_similarity_threshold(cls, v: float) -> float:
+        if not 0.0 < v <= 1.0:
+            raise ValueError(
+                "DUPLICATION_CLONE_CLASS_SIMILARITY_THRESHOLD must be in (0, 1]"
+            )
+        return v
+
     @field_validator("SEMANTIC_DUPLICATION_SIMILARITY_THRESHOLD")
     @classmethod
     def validate_semantic_duplication_similarity_threshold(cls, v: float) -> float:
@@ -48,7 +48,10 @@ PRIORITY_BANDS = ("critical", "high", "medium", "low")
 RISKY_PRIORITY_BANDS = frozenset({"critical", "high", "medium"})
 PREVIOUS_TREND_SCAN_COUNT = 3
 SCAN_DASHBOARD_HISTORY_LIMIT = 20
+FILE_LIST_PAGE_SIZE = 500
+FILE_LIST_MAX_PAGE_SIZE = 2000
 TOP_REFACTOR_FILE_COUNT = 5
+SCAN_SUMMARY_TOP_FILE_COUNT = 10
 TOP_DIRECTORY_COUNT = 5
 
 ROLE_PERMISSIONS = {
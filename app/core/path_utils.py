@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import os
-from pathlib import Path, PureWindowsPath
+from pathlib import Path, PurePosixPath, PureWindowsPath
 
 
 def resolve_scan_repo_base_dir(
@@ -29,3 +29,16 @@ def resolve_scan_repo_base_dir(
         return path.resolve()
 
     return (base_dir / path).resolve()
+
+
+def parent_directory(relative_path: str) -> str:
+    """Parent directory of a POSIX relative path, empty for top-level files."""
+    parent = PurePosixPath(relative_path).parent.as_posix()
+    return "" if parent == "." else parent
+
+
+def directory_prefix(directory: str, depth: int | None) -> str:
+    """The first ``depth`` segments of ``directory``, or all of them for ``None``."""
+    if depth is None or not directory:
+        return directory
+    return "/".join(directory.split("/")[:depth])
@@ -5,6 +5,8 @@ from sqlalchemy.orm import Session
 
 from app.ai_explanations.ai_explanations_service import AiExplanationService
 from app.ai_explanations.dependencies import get_ai_explanation_service, get_llm_provider
+from app.analysis.dependencies import get_clone_index
+from app.config import settings
 from app.core.database import get_db
 from app.files.files_repository import FileRepository
 from app.files.files_service import FileService
@@ -19,4 +21,10 @@ def get_file_service(
     repository: FileRepository = Depends(get_file_repository),
     ai_explanation_service: AiExplanationService = Depends(get_ai_explanation_service),
 ) -> FileService:
-    return FileService(repository, ai_explanation_service=ai_explanation_service)
+    return FileService(
+        repository,
+        ai_explanation_service=ai_explanation_service,
+        clone_index=get_clone_index(),
+        clone_similarity_threshold=settings.CLONE_INDEX_SIMILARITY_THRESHOLD,
+        clone_match_limit=settings.CLONE_INDEX_MATCH_LIMIT,
+    )
@@ -2,10 +2,14 @@
 
 from __future__ import annotations
 
+import base64
+import binascii
+import json
 import uuid
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any
+from decimal import Decimal, InvalidOperation
+from typing import Any, Literal
 
 from pydantic import BaseModel, ConfigDict
 
@@ -17,6 +21,65 @@ class FileListRow:
     priority_band: str | None
 
 
+FileListSort = Literal["path", "score"]
+
+
+@dataclass(frozen=True)
+class FileListCursor:
+    """Keyset position after the last file of a page, opaque to clients."""
+
+    sort: FileListSort
+    file_path: str
+    file_id: uuid.UUID
+    refactor_score: Decimal | None = None
+
+    def encode(self) -> str:
+        payload = {
+            "sort": self.sort,
+            "file_path": self.file_path,
+            "file_id": str(self.file_id),
+            "refactor_score": str(self.refactor_score) if self.refactor_score is not None else None,
+        }
+        raw = json.dumps(payload, separators=(",", ":"), sort_keys=True).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    @classmethod
+    def decode(cls, token: str) -> "FileListCursor":
+        """Parse ``encode`` output, raising ``ValueError`` for anything else."""
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            payload = json.loads(raw)
+            score = payload["refactor_score"]
+            cursor = cls(
+                sort=payload["sort"],
+                file_path=str(payload["file_path"]),
+                file_id=uuid.UUID(payload["file_id"]),
+                refactor_score=Decimal(score) if score is not None else None,
+            )
+        except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError, InvalidOperation, KeyError, TypeError) as exc:
+            raise ValueError("Malformed file list cursor") from exc
+        if cursor.sort not in ("path", "score"):
+            raise ValueError("Malformed file list cursor")
+        return cursor
+
+
+@dataclass(frozen=True)
+class FileListFilters:
+    """Page request for a scan's files, resolved by the service."""
+
+    sort: FileListSort = "path"
+    limit: int = 500
+    cursor: FileListCursor | None = None
+    priority_band: str | None = None
+    path_prefix: str | None = None
+
+
+@dataclass(frozen=True)
+class FileListPage:
+    rows: list[FileListRow]
+    next_cursor: FileListCursor | None = None
+
+
 @dataclass(frozen=True)
 class PriorityDistributionRow:
     scan_id: uuid.UUID
@@ -43,6 +106,7 @@ class FileDetailRow:
     errors: dict[str, Any] = field(default_factory=dict)
     created_at: datetime | None = None
     scan_finished_at: datetime | None = None
+    project_id: uuid.UUID | None = None
 
 
 @dataclass(frozen=True)
@@ -77,6 +141,7 @@ class FileListItem(BaseModel):
 class FileListResponse(BaseModel):
     scan_id: uuid.UUID
     files: list[FileListItem]
+    next_cursor: str | None = None
 
 
 class PriorityBandCounts(BaseModel):
@@ -150,9 +215,23 @@ class DuplicateMatch(BaseModel):
     start_line: int | None = None
     end_line: int | None = None
     max_similarity: float | None = None
+    clone_class_id: int | None = None
+    clone_class_size: int | None = None
     matched_files: list[FileReference]
 
 
+class CrossProjectDuplicateMatch(BaseModel):
+    project_id: uuid.UUID
+    project_name: str
+    file_path: str
+    kind: str
+    start_line: int
+    end_line: int
+    source_start_line: int
+    source_end_line: int
+    similarity: float
+
+
 class FileSummaries(BaseModel):
     general: str | None = None
     architectural: str | None = None
@@ -177,4 +256,5 @@ class FileDetailsResponse(BaseModel):
     co_changed_files: list[FileRelationship]
     circular_dependencies: list[CircularDependency]
     duplicate_matches: list[DuplicateMatch]
+    cross_project_matches: list[CrossProjectDuplicateMatch] = []
     summaries: FileSummaries | None = None
@@ -4,8 +4,9 @@ import logging
 import time
 import uuid
 from collections import defaultdict
+from decimal import Decimal
 
-from sqlalchemy import func, or_, select
+from sqlalchemy import and_, func, or_, select
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session, aliased
 
@@ -15,6 +16,9 @@ from app.files.files_dtos import (
     CircularDependencyRow,
     DependencyEdgeRow,
     FileDetailRow,
+    FileListCursor,
+    FileListFilters,
+    FileListPage,
     FileListRow,
     FileRelationshipRow,
     FilesAnalyzedRow,
@@ -61,6 +65,16 @@ class FileRepository:
                 details={"project_id": str(project_id)},
             ) from exc
 
+    def project_names_for_user(self, user_id: uuid.UUID) -> dict[uuid.UUID, str]:
+        try:
+            statement = select(Project.id, Project.name).where(Project.user_id == user_id)
+            return {row[0]: row[1] for row in self._db.execute(statement).all()}
+        except SQLAlchemyError as exc:
+            raise DatabaseOperationException(
+                "Failed to list user projects",
+                details={"user_id": str(user_id)},
+            ) from exc
+
     def list_project_priority_distribution(
         self,
         *,
@@ -71,10 +85,9 @@ class FileRepository:
         try:
             latest_scans = (
                 select(Scan.id, Scan.finished_at)
-                .join(Project, Scan.project_id == Project.id)
                 .where(
-                    Project.id == project_id,
-                    Project.user_id == user_id,
+                    Scan.project_id == project_id,
+                    Scan.owner_id == user_id,
                     Scan.status == ScanStatus.SUCCEEDED,
                     Scan.finished_at.is_not(None),
                 )
@@ -128,10 +141,9 @@ class FileRepository:
         try:
             latest_scans = (
                 select(Scan.id, Scan.finished_at)
-                .join(Project, Scan.project_id == Project.id)
                 .where(
-                    Project.id == project_id,
-                    Project.user_id == user_id,
+                    Scan.project_id == project_id,
+                    Scan.owner_id == user_id,
                     Scan.status == ScanStatus.SUCCEEDED,
                     Scan.finished_at.is_not(None),
                 )
@@ -165,35 +177,78 @@ class FileRepository:
                 details={"project_id": str(project_id)},
             ) from exc
 
-    def list_by_scan(self, user_id: uuid.UUID, scan_id: uuid.UUID) -> list[FileListRow]:
-        self._ensure_scan_access(user_id, scan_id)
+    def list_by_scan(
+        self,
+        user_id: uuid.UUID,
+        scan_id: uuid.UUID,
+        filters: FileListFilters,
+    ) -> FileListPage:
+        """One keyset page of a scan's files, projected to list columns.
+
+        Pages are ordered by path, or by score (highest first, unscored
+        last) with path as tie-breaker; the file id breaks remaining ties.
+        Access is checked by the page query itself, and separately only
+        when the page comes back empty.
+        """
         try:
             statement = (
-                select(ScanFile.id, ScanFile.file_path, ScanFile.priority_band)
-                .where(ScanFile.scan_id == scan_id)
-                .order_by(ScanFile.file_path.asc())
+                select(ScanFile.id, ScanFile.file_path, ScanFile.priority_band, ScanFile.refactor_score)
+                .join(Scan, ScanFile.scan_id == Scan.id)
+                .where(ScanFile.scan_id == scan_id, *self._accessible_scan(user_id, scan_id))
+                .limit(filters.limit + 1)
+            )
+            if filters.priority_band is not None:
+                statement = statement.where(func.lower(ScanFile.priority_band) == filters.priority_band.lower())
+            if filters.path_prefix:
+                statement = statement.where(ScanFile.file_path.startswith(filters.path_prefix, autoescape=True))
+            if filters.sort == "score":
+                statement = statement.order_by(
+                    ScanFile.refactor_score.is_(None).asc(),
+                    ScanFile.refactor_score.desc(),
+                    ScanFile.file_path.asc(),
+                    ScanFile.id.asc(),
+                )
+            else:
+                statement = statement.order_by(ScanFile.file_path.asc(), ScanFile.id.asc())
+            if filters.cursor is not None:
+                statement = statement.where(self._after_cursor(filters.cursor))
+
+            rows = self._db.execute(statement).all()
+            if not rows:
+                self._ensure_scan_access(user_id, scan_id)
+            next_cursor = None
+            if len(rows) > filters.limit:
+                rows = rows[: filters.limit]
+                last = rows[-1]
+                next_cursor = FileListCursor(
+                    sort=filters.sort,
+                    file_path=last.file_path,
+                    file_id=last.id,
+                    refactor_score=Decimal(last.refactor_score) if last.refactor_score is not None else None,
+                )
+            return FileListPage(
+                rows=[FileListRow(id=row[0], file_path=row[1], priority_band=row[2]) for row in rows],
+                next_cursor=next_cursor,
             )
-            return [FileListRow(id=row[0], file_path=row[1], priority_band=row[2]) for row in self._db.execute(statement).all()]
         except SQLAlchemyError as exc:
             raise DatabaseOperationException("Failed to list scan files", details={"scan_id": str(scan_id)}) from exc
 
     def get_details(self, user_id: uuid.UUID, file_id: uuid.UUID) -> FileDetailRow:
         try:
             statement = (
-                select(ScanFile, Scan.finished_at)
+                select(ScanFile, Scan.finished_at, Scan.project_id)
                 .join(Scan, ScanFile.scan_id == Scan.id)
-                .join(Project, Scan.project_id == Project.id)
                 .where(
                     ScanFile.id == file_id,
-                    Project.user_id == user_id,
+                    Scan.owner_id == user_id,
                     Scan.status == ScanStatus.SUCCEEDED,
                 )
             )
             row = self._db.execute(statement).one_or_none()
             if row is None:
                 raise RecordNotFoundException("File not found", details={"file_id": str(file_id)})
-            file, scan_finished_at = row
-            return self._to_detail_row(file, scan_finished_at)
+            file, scan_finished_at, project_id = row
+            return self._to_detail_row(file, scan_finished_at, project_id)
         except RecordNotFoundException:
             raise
         except SQLAlchemyError as exc:
@@ -206,13 +261,15 @@ class FileRepository:
     ) -> tuple[list[FileListRow], list[DependencyEdgeRow]]:
         started_at = time.perf_counter()
         logger.debug("Loading dependency graph rows user_id=%s scan_id=%s", user_id, scan_id)
-        self._ensure_scan_access(user_id, scan_id)
         try:
             node_rows = self._db.execute(
                 select(ScanFile.id, ScanFile.file_path, ScanFile.priority_band)
-                .where(ScanFile.scan_id == scan_id)
+                .join(Scan, ScanFile.scan_id == Scan.id)
+                .where(ScanFile.scan_id == scan_id, *self._accessible_scan(user_id, scan_id))
                 .order_by(ScanFile.file_path.asc())
             ).all()
+            if not node_rows:
+                self._ensure_scan_access(user_id, scan_id)
 
             source_file = aliased(ScanFile)
             target_file = aliased(ScanFile)
@@ -253,7 +310,6 @@ class FileRepository:
     ) -> list[CircularDependencyRow]:
         started_at = time.perf_counter()
         logger.debug("Loading circular dependency rows user_id=%s scan_id=%s", user_id, scan_id)
-        self._ensure_scan_access(user_id, scan_id)
         try:
             rows = self._db.execute(
                 select(
@@ -265,9 +321,12 @@ class FileRepository:
                 )
                 .join(CircularDependencyMember, CircularDependencyMember.group_id == CircularDependencyGroup.id)
                 .join(ScanFile, ScanFile.id == CircularDependencyMember.file_id)
-                .where(CircularDependencyGroup.scan_id == scan_id)
+                .join(Scan, CircularDependencyGroup.scan_id == Scan.id)
+                .where(CircularDependencyGroup.scan_id == scan_id, *self._accessible_scan(user_id, scan_id))
                 .order_by(CircularDependencyGroup.id.asc(), ScanFile.file_path.asc())
             ).all()
+            if not rows:
+                self._ensure_scan_access(user_id, scan_id)
             groups = self._group_circular_dependency_rows(rows)
             logger.info(
                 "Loaded circular dependency rows user_id=%s scan_id=%s groups=%d members=%d duration_ms=%.2f",
@@ -367,14 +426,14 @@ class FileRepository:
         except SQLAlchemyError as exc:
             raise DatabaseOperationException("Failed to resolve related files", details={"scan_id": str(scan_id)}) from exc
 
+    def _accessible_scan(self, user_id: uuid.UUID, scan_id: uuid.UUID) -> tuple:
+        """Conditions on ``Scan`` matching the user's successful scan ``scan_id``."""
+        return Scan.id == scan_id, Scan.owner_id == user_id, Scan.status == ScanStatus.SUCCEEDED
+
     def _ensure_scan_access(self, user_id: uuid.UUID, scan_id: uuid.UUID) -> None:
         logger.debug("Validating successful scan access user_id=%s scan_id=%s", user_id, scan_id)
         try:
-            statement = (
-                select(Scan.id)
-                .join(Project, Scan.project_id == Project.id)
-                .where(Scan.id == scan_id, Project.user_id == user_id, Scan.status == ScanStatus.SUCCEEDED)
-            )
+            statement = select(Scan.id).where(*self._accessible_scan(user_id, scan_id))
             if self._db.execute(statement).scalar_one_or_none() is None:
                 logger.warning("Successful scan access denied user_id=%s scan_id=%s", user_id, scan_id)
                 raise RecordNotFoundException("Successful scan not found", details={"scan_id": str(scan_id)})
@@ -385,6 +444,21 @@ class FileRepository:
             logger.exception("Database error validating scan access user_id=%s scan_id=%s", user_id, scan_id)
             raise DatabaseOperationException("Failed to validate scan access", details={"scan_id": str(scan_id)}) from exc
 
+    def _after_cursor(self, cursor: FileListCursor):
+        after_path = or_(
+            ScanFile.file_path > cursor.file_path,
+            and_(ScanFile.file_path == cursor.file_path, ScanFile.id > cursor.file_id),
+        )
+        if cursor.sort == "path":
+            return after_path
+        if cursor.refactor_score is None:
+            return and_(ScanFile.refactor_score.is_(None), after_path)
+        return or_(
+            ScanFile.refactor_score < cursor.refactor_score,
+            and_(ScanFile.refactor_score == cursor.refactor_score, after_path),
+            ScanFile.refactor_score.is_(None),
+        )
+
     def _files_by_ids(self, file_ids: set[uuid.UUID]) -> dict[uuid.UUID, ScanFile]:
         if not file_ids:
             return {}
@@ -404,7 +478,7 @@ class FileRepository:
         ]
         return sorted(groups, key=lambda group: tuple(member.file_path for member in group.members))
 
-    def _to_detail_row(self, file: ScanFile, scan_finished_at) -> FileDetailRow:
+    def _to_detail_row(self, file: ScanFile, scan_finished_at, project_id: uuid.UUID | None = None) -> FileDetailRow:
         return FileDetailRow(
             id=file.id,
             scan_id=file.scan_id,
@@ -416,6 +490,7 @@ class FileRepository:
             errors=file.errors or {},
             created_at=file.created_at,
             scan_finished_at=scan_finished_at,
+            project_id=project_id,
         )
 
     def _to_relationship_row(self, file: ScanFile, relationship: str, direction: str | None = None) -> FileRelationshipRow:
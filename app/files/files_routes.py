@@ -3,6 +3,7 @@ from __future__ import annotations
 import logging
 import time
 import uuid
+from typing import Literal
 
 from fastapi import APIRouter, Depends, Query
 
@@ -10,7 +11,13 @@ from app.core.route_dependencies import get_current_payload
 from app.core.route_dependencies import require_permissions
 from app.dependencies import get_user_service
 from app.core.common_dtos import ResponseMeta
-from app.core.constants import INCLUDE_SUMMARY_QUERY_PARAM, PROJECT_ID_QUERY_PARAM, SCAN_ID_QUERY_PARAM
+from app.core.constants import (
+    FILE_LIST_MAX_PAGE_SIZE,
+    FILE_LIST_PAGE_SIZE,
+    INCLUDE_SUMMARY_QUERY_PARAM,
+    PROJECT_ID_QUERY_PARAM,
+    SCAN_ID_QUERY_PARAM,
+)
 from app.files.dependencies import get_file_service
 from app.files.files_service import FileService
 from app.auth.auth_dtos import TokenPayload
@@ -33,11 +40,24 @@ def _current_user_id(payload: TokenPayload, user_service: UserService) -> uuid.U
 @router.get("")
 def list_scan_files(
     scan_id: uuid.UUID = Query(..., alias=SCAN_ID_QUERY_PARAM),
+    sort: Literal["path", "score"] = "path",
+    limit: int = Query(default=FILE_LIST_PAGE_SIZE, ge=1, le=FILE_LIST_MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    priority_band: str | None = None,
+    path_prefix: str | None = None,
     payload: TokenPayload = Depends(get_current_payload),
     user_service: UserService = Depends(get_user_service),
     service: FileService = Depends(get_file_service),
 ):
-    response = service.list_scan_files(_current_user_id(payload, user_service), scan_id)
+    response = service.list_scan_files(
+        _current_user_id(payload, user_service),
+        scan_id,
+        sort=sort,
+        limit=limit,
+        cursor=cursor,
+        priority_band=priority_band,
+        path_prefix=path_prefix,
+    )
     return ApiResponse.success(data=response.model_dump(), meta=ResponseMeta(scan_id=scan_id))
 
 
@@ -9,22 +9,33 @@ from typing import Any
 
 from app.ai_explanations.ai_explanations_dtos import AiExplanationType
 from app.ai_explanations.ai_explanations_service import AiExplanationService
+from app.analysis.services.scan_engine.pipeline.clone_index import CrossProjectCloneIndex
 from app.core.constants import (
     ARCHITECTURAL_SUMMARY_PROMPT,
+    FILE_LIST_PAGE_SIZE,
     GENERAL_SUMMARY_PROMPT,
     LANGUAGE_BY_EXTENSION,
     SCAN_DASHBOARD_HISTORY_LIMIT,
 )
-from app.core.exceptions.domain_exceptions import EntityNotFoundError, ExternalDependencyError, PersistenceError
+from app.core.exceptions.domain_exceptions import (
+    EntityNotFoundError,
+    ExternalDependencyError,
+    PersistenceError,
+    ValidationError,
+)
 from app.core.exceptions.repository_exceptions import DatabaseOperationException, RecordNotFoundException
 from app.files.files_dtos import (
     CircularDependency,
+    CrossProjectDuplicateMatch,
     DependencyEdgeReference,
     DependencyGraphResponse,
     DuplicateMatch,
     FileDetailRow,
     FileDetailsResponse,
+    FileListCursor,
+    FileListFilters,
     FileListRow,
+    FileListSort,
     FileListItem,
     FileListResponse,
     FileReference,
@@ -51,23 +62,61 @@ class FileService:
         repository: FileRepository,
         summary_provider: LlmProvider | None = None,
         ai_explanation_service: AiExplanationService | None = None,
+        clone_index: CrossProjectCloneIndex | None = None,
+        clone_similarity_threshold: float = 0.9,
+        clone_match_limit: int = 10,
     ) -> None:
         self._repository = repository
         self._summary_provider = summary_provider
         self._ai_explanation_service = ai_explanation_service
+        self._clone_index = clone_index
+        self._clone_similarity_threshold = clone_similarity_threshold
+        self._clone_match_limit = clone_match_limit
 
-    def list_scan_files(self, user_id: uuid.UUID, scan_id: uuid.UUID) -> FileListResponse:
+    def list_scan_files(
+        self,
+        user_id: uuid.UUID,
+        scan_id: uuid.UUID,
+        *,
+        sort: FileListSort = "path",
+        limit: int = FILE_LIST_PAGE_SIZE,
+        cursor: str | None = None,
+        priority_band: str | None = None,
+        path_prefix: str | None = None,
+    ) -> FileListResponse:
+        filters = FileListFilters(
+            sort=sort,
+            limit=limit,
+            cursor=self._decode_cursor(cursor, sort),
+            priority_band=priority_band,
+            path_prefix=path_prefix,
+        )
         try:
-            files = self._repository.list_by_scan(user_id, scan_id)
+            page = self._repository.list_by_scan(user_id, scan_id, filters)
             return FileListResponse(
                 scan_id=scan_id,
-                files=[FileListItem.model_validate(file, from_attributes=True) for file in files],
+                files=[FileListItem.model_validate(file, from_attributes=True) for file in page.rows],
+                next_cursor=page.next_cursor.encode() if page.next_cursor is not None else None,
             )
         except RecordNotFoundException as exc:
             raise EntityNotFoundError("successful scan", scan_id) from exc
         except DatabaseOperationException as exc:
             raise PersistenceError("Unable to list scan files") from exc
 
+    def _decode_cursor(self, token: str | None, sort: FileListSort) -> FileListCursor | None:
+        if token is None:
+            return None
+        try:
+            cursor = FileListCursor.decode(token)
+        except ValueError as exc:
+            raise ValidationError("Invalid file list cursor", field_errors={"cursor": [str(exc)]}) from exc
+        if cursor.sort != sort:
+            raise ValidationError(
+                "Invalid file list cursor",
+                field_errors={"cursor": [f"Cursor was issued for sort '{cursor.sort}', not '{sort}'"]},
+            )
+        return cursor
+
     def get_file_details(
         self,
         user_id: uuid.UUID,
@@ -81,6 +130,7 @@ class FileService:
             co_changed_files = self._repository.list_co_changed_files(file.scan_id, file.id)
             circular_rows = self._repository.list_circular_dependencies(file.scan_id, file.id)
             duplicate_matches = self._duplicate_matches(file)
+            cross_project_matches = self._cross_project_matches(user_id, file)
             summaries = self._summaries(
                 file=file,
                 dependencies=dependencies,
@@ -110,6 +160,7 @@ class FileService:
                     for group in circular_rows
                 ],
                 duplicate_matches=duplicate_matches,
+                cross_project_matches=cross_project_matches,
                 summaries=summaries,
             )
         except RecordNotFoundException as exc:
@@ -318,6 +369,8 @@ class FileService:
                 start_line=item.get("start_line"),
                 end_line=item.get("end_line"),
                 max_similarity=item.get("max_similarity"),
+                clone_class_id=item.get("clone_class_id"),
+                clone_class_size=item.get("clone_class_size"),
                 matched_files=[
                     self._reference_schema(references[path])
                     for path in item.get("matched_files", [])
@@ -327,6 +380,48 @@ class FileService:
             for match_type, item in raw_matches
         ]
 
+    def _cross_project_matches(
+        self,
+        user_id: uuid.UUID,
+        file: FileDetailRow,
+    ) -> list[CrossProjectDuplicateMatch]:
+        if self._clone_index is None or file.project_id is None:
+            return []
+
+        project_names = self._repository.project_names_for_user(user_id)
+        try:
+            matches = self._clone_index.similar_blocks(
+                file.project_id,
+                file.file_path,
+                project_ids=project_names,
+                threshold=self._clone_similarity_threshold,
+                limit=self._clone_match_limit,
+            )
+        except (OSError, ValueError) as exc:
+            # The index is an optional enrichment; file details stay available.
+            logger.warning(
+                "Cross-project clone lookup failed file_id=%s project_id=%s reason=%s",
+                file.id,
+                file.project_id,
+                exc,
+            )
+            return []
+
+        return [
+            CrossProjectDuplicateMatch(
+                project_id=match.project_id,
+                project_name=project_names[match.project_id],
+                file_path=match.file_path,
+                kind=match.kind,
+                start_line=match.start_line,
+                end_line=match.end_line,
+                source_start_line=match.source_start_line,
+                source_end_line=match.source_end_line,
+                similarity=match.similarity,
+            )
+            for match in matches
+        ]
+
     def _summaries(
         self,
         *,
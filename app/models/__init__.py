@@ -10,6 +10,7 @@ from app.models.models import (
     Role,
     Scan,
     ScanFile,
+    ScanSummary,
     ScanVisualizationRecord,
     User,
     RefactorQueueItem,
@@ -22,6 +23,7 @@ __all__ = [
     "Project",
     "Scan",
     "ScanFile",
+    "ScanSummary",
     "ScanVisualizationRecord",
     "DependencyEdge",
     "CircularDependencyGroup",
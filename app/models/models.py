@@ -4,11 +4,12 @@
 
 import uuid
 
-from sqlalchemy import BigInteger, Boolean, CheckConstraint, ForeignKey, Integer, String, Table, Text, Column, Enum, DateTime, Index, JSON, Numeric, UniqueConstraint, func, text
+from sqlalchemy import BigInteger, Boolean, CheckConstraint, Float, ForeignKey, Integer, String, Table, Text, Column, Enum, DateTime, Index, JSON, Numeric, UniqueConstraint, func, select, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 
 from app.core.enums import UserRole, ScanStatus, RefactorQueueStatus
+from app.core.path_utils import parent_directory
 from app.models.base import Base, TimestampMixin, UUIDMixin
 from datetime import datetime
 
@@ -158,12 +159,30 @@ class RefactorQueueItem(UUIDMixin, TimestampMixin, Base):
         return f"<RefactorQueueItem project_id={self.project_id} file_path={self.file_path} status={self.status}>"
 
 
+json_payload_type = JSONB().with_variant(JSON(), "sqlite")
+
+
+def _project_owner_id(context) -> uuid.UUID | None:
+    project_id = context.get_current_parameters()["project_id"]
+    return context.connection.execute(
+        select(Project.user_id).where(Project.id == project_id)
+    ).scalar_one_or_none()
+
+
 class Scan(UUIDMixin, TimestampMixin, Base):
     __tablename__ = "scans"
 
     project_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False
     )
+    # Denormalized ``Project.user_id`` so ownership checks need no join;
+    # projects never change owner.
+    owner_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        default=_project_owner_id,
+    )
 
     started_at: Mapped[datetime | None] = mapped_column(
         DateTime(timezone=True),
@@ -185,21 +204,21 @@ class Scan(UUIDMixin, TimestampMixin, Base):
         server_default=text(f"'{ScanStatus.PENDING.value}'")
     )
     error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Percentile-mode quantile tables the decision layer scored this scan with.
+    decision_normalization: Mapped[dict | None] = mapped_column(json_payload_type, nullable=True)
     project: Mapped["Project"] = relationship("Project", back_populates="scans")
 
     __table_args__ = (
         Index("ix_scans_created_at", "created_at"),
         Index("ix_scans_status_finished_at", "status", "finished_at"),
         Index("ix_scans_project_id", "project_id"),
+        Index("ix_scans_owner_created_at", "owner_id", "created_at"),
     )
 
     def __repr__(self) -> str:
         return f"<Scan project_id={self.project_id} status={self.status}>"
 
 
-json_payload_type = JSONB().with_variant(JSON(), "sqlite")
-
-
 class ScanVisualizationRecord(UUIDMixin, TimestampMixin, Base):
     __tablename__ = "scan_visualization_records"
 
@@ -233,6 +252,12 @@ class ScanFile(UUIDMixin, Base):
         nullable=False,
     )
     file_path: Mapped[str] = mapped_column(Text, nullable=False)
+    # Parent directory of ``file_path`` ("" at the repository root), for SQL rollups.
+    directory: Mapped[str | None] = mapped_column(
+        Text,
+        nullable=True,
+        default=lambda context: parent_directory(context.get_current_parameters()["file_path"]),
+    )
     refactor_score: Mapped[float | None] = mapped_column(Numeric(6, 5), nullable=True)
     priority_band: Mapped[str | None] = mapped_column(Text, nullable=True)
     metrics: Mapped[dict] = mapped_column(json_payload_type, nullable=False, default=dict)
@@ -248,6 +273,7 @@ class ScanFile(UUIDMixin, Base):
         UniqueConstraint("scan_id", "file_path", name="uq_files_scan_file_path"),
         Index("idx_files_scan_score", "scan_id", "refactor_score"),
         Index("idx_files_scan_band", "scan_id", "priority_band"),
+        Index("idx_files_scan_directory", "scan_id", "directory"),
         Index("idx_files_metrics", "metrics", postgresql_using="gin"),
     )
 
@@ -255,6 +281,30 @@ class ScanFile(UUIDMixin, Base):
         return f"<ScanFile scan_id={self.scan_id} file_path={self.file_path}>"
 
 
+class ScanSummary(TimestampMixin, Base):
+    """Aggregates of a scan's files, written once when its results are stored."""
+
+    __tablename__ = "scan_summaries"
+
+    scan_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("scans.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    file_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    scored_file_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Lower-cased band -> file count; files without a band count as "unknown".
+    priority_band_counts: Mapped[dict] = mapped_column(json_payload_type, nullable=False, default=dict)
+    average_refactor_score: Mapped[float | None] = mapped_column(Float, nullable=True)
+    max_refactor_score: Mapped[float | None] = mapped_column(Numeric(6, 5), nullable=True)
+    duration_seconds: Mapped[float | None] = mapped_column(Float, nullable=True)
+    # Highest scored files first: {"id", "file_path", "refactor_score", "priority_band"}.
+    top_files: Mapped[list] = mapped_column(json_payload_type, nullable=False, default=list)
+
+    def __repr__(self) -> str:
+        return f"<ScanSummary scan_id={self.scan_id} file_count={self.file_count}>"
+
+
 class AiExplanation(UUIDMixin, TimestampMixin, Base):
     __tablename__ = "ai_explanations"
 
@@ -28,6 +28,14 @@ class OverviewFileRow:
     errors: dict[str, Any] = field(default_factory=dict)
 
 
+@dataclass(frozen=True)
+class OverviewDirectoryRollupRow:
+    directory: str
+    file_count: int
+    score_total: float
+    priority_counts: dict[str, int] = field(default_factory=dict)
+
+
 class RiskTrendPoint(BaseModel):
     scan_id: uuid.UUID
     finished_at: datetime | None
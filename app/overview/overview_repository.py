@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import uuid
+from datetime import datetime
 from typing import Sequence
 
 from sqlalchemy import case, func, or_, select
@@ -9,32 +10,34 @@ from sqlalchemy.orm import Session
 
 from app.core.enums import ScanStatus
 from app.core.exceptions.repository_exceptions import DatabaseOperationException, RecordNotFoundException
-from app.models import Project, Scan, ScanFile
-from app.overview.overview_dtos import OverviewFileRow, OverviewScanScoreRow
+from app.core.path_utils import directory_prefix
+from app.models import Scan, ScanFile, ScanSummary
+from app.overview.overview_dtos import OverviewDirectoryRollupRow, OverviewFileRow, OverviewScanScoreRow
 
 
 class OverviewRepository:
     def __init__(self, db: Session) -> None:
         self._db = db
 
-    def _scan_scope(self, user_id: uuid.UUID, scan_id: uuid.UUID) -> Scan:
+    def _accessible_scan(self, user_id: uuid.UUID, scan_id: uuid.UUID) -> tuple:
+        """Conditions on ``Scan`` matching the user's successful scan ``scan_id``."""
+        return Scan.id == scan_id, Scan.owner_id == user_id, Scan.status == ScanStatus.SUCCEEDED
+
+    def _scan_scope(self, user_id: uuid.UUID, scan_id: uuid.UUID) -> tuple[Scan, ScanSummary | None]:
+        """The user's successful scan and its summary, in one primary key lookup."""
         try:
             statement = (
-                select(Scan)
-                .join(Project, Scan.project_id == Project.id)
-                .where(
-                    Scan.id == scan_id,
-                    Project.user_id == user_id,
-                    Scan.status == ScanStatus.SUCCEEDED,
-                )
+                select(Scan, ScanSummary)
+                .outerjoin(ScanSummary, ScanSummary.scan_id == Scan.id)
+                .where(*self._accessible_scan(user_id, scan_id))
             )
-            scan = self._db.execute(statement).scalar_one_or_none()
-            if scan is None:
+            row = self._db.execute(statement).one_or_none()
+            if row is None:
                 raise RecordNotFoundException(
                     "Successful scan not found",
                     details={"scan_id": str(scan_id)},
                 )
-            return scan
+            return row[0], row[1]
         except RecordNotFoundException:
             raise
         except SQLAlchemyError as exc:
@@ -49,59 +52,58 @@ class OverviewRepository:
         scan_id: uuid.UUID,
         previous_count: int,
     ) -> list[OverviewScanScoreRow]:
-        target = self._scan_scope(user_id, scan_id)
+        """Average scores of the scan and up to ``previous_count`` earlier scans.
+
+        Averages come from ``scan_summaries``; scans stored before summaries
+        existed fall back to one grouped query over their files.
+        """
+        target, target_summary = self._scan_scope(user_id, scan_id)
         try:
-            target_score = self._average_score_statement(
-                user_id=user_id,
-                project_id=target.project_id,
-                scan_ids=[target.id],
-            )
-            if target.finished_at is None:
-                return [
-                    OverviewScanScoreRow(
-                        scan_id=target.id,
-                        finished_at=None,
-                        average_refactor_score=target_score,
+            scans: list[tuple[uuid.UUID, datetime | None, float | None, bool]] = [
+                (
+                    target.id,
+                    target.finished_at,
+                    target_summary.average_refactor_score if target_summary is not None else None,
+                    target_summary is not None,
+                )
+            ]
+            if target.finished_at is not None:
+                prior_statement = (
+                    select(Scan.id, Scan.finished_at, ScanSummary.average_refactor_score, ScanSummary.scan_id)
+                    .outerjoin(ScanSummary, ScanSummary.scan_id == Scan.id)
+                    .where(
+                        Scan.owner_id == user_id,
+                        Scan.project_id == target.project_id,
+                        Scan.status == ScanStatus.SUCCEEDED,
+                        Scan.finished_at.is_not(None),
+                        or_(
+                            Scan.finished_at < target.finished_at,
+                            (Scan.finished_at == target.finished_at) & (Scan.id < target.id),
+                        ),
                     )
-                ]
-            prior_statement = (
-                select(
-                    Scan.id,
-                    Scan.finished_at,
-                    func.coalesce(func.avg(ScanFile.refactor_score), 0.0),
+                    .order_by(Scan.finished_at.desc(), Scan.id.desc())
+                    .limit(previous_count)
                 )
-                .join(Project, Scan.project_id == Project.id)
-                .outerjoin(ScanFile, ScanFile.scan_id == Scan.id)
-                .where(
-                    Project.user_id == user_id,
-                    Scan.project_id == target.project_id,
-                    Scan.status == ScanStatus.SUCCEEDED,
-                    Scan.finished_at.is_not(None),
-                    or_(
-                        Scan.finished_at < target.finished_at,
-                        (Scan.finished_at == target.finished_at) & (Scan.id < target.id),
-                    ),
+                scans.extend(
+                    (row[0], row[1], row[2], row[3] is not None)
+                    for row in self._db.execute(prior_statement).all()
                 )
-                .group_by(Scan.id, Scan.finished_at)
-                .order_by(Scan.finished_at.desc(), Scan.id.desc())
-                .limit(previous_count)
+
+            fallback_scores = self._average_scores(
+                user_id=user_id,
+                project_id=target.project_id,
+                scan_ids=[scan[0] for scan in scans if not scan[3]],
             )
-            prior_rows = self._db.execute(prior_statement).all()
             rows = [
                 OverviewScanScoreRow(
-                    scan_id=target.id,
-                    finished_at=target.finished_at,
-                    average_refactor_score=target_score,
+                    scan_id=row_scan_id,
+                    finished_at=finished_at,
+                    average_refactor_score=(
+                        float(average or 0.0) if summarized else fallback_scores.get(row_scan_id, 0.0)
+                    ),
                 )
+                for row_scan_id, finished_at, average, summarized in scans
             ]
-            rows.extend(
-                OverviewScanScoreRow(
-                    scan_id=row[0],
-                    finished_at=row[1],
-                    average_refactor_score=float(row[2] or 0.0),
-                )
-                for row in prior_rows
-            )
             return sorted(
                 rows,
                 key=lambda row: (row.finished_at is not None, row.finished_at),
@@ -112,44 +114,46 @@ class OverviewRepository:
                 details={"scan_id": str(scan_id)},
             ) from exc
 
-    def _average_score_statement(
+    def _average_scores(
         self,
         *,
         user_id: uuid.UUID,
         project_id: uuid.UUID,
         scan_ids: Sequence[uuid.UUID],
-    ) -> float:
+    ) -> dict[uuid.UUID, float]:
+        if not scan_ids:
+            return {}
         statement = (
-            select(func.coalesce(func.avg(ScanFile.refactor_score), 0.0))
-            .select_from(ScanFile)
+            select(ScanFile.scan_id, func.coalesce(func.avg(ScanFile.refactor_score), 0.0))
             .join(Scan, ScanFile.scan_id == Scan.id)
-            .join(Project, Scan.project_id == Project.id)
             .where(
-                Project.user_id == user_id,
+                Scan.owner_id == user_id,
                 Scan.project_id == project_id,
                 Scan.id.in_(scan_ids),
             )
+            .group_by(ScanFile.scan_id)
         )
-        return float(self._db.execute(statement).scalar_one() or 0.0)
+        return {row[0]: float(row[1] or 0.0) for row in self._db.execute(statement).all()}
 
     def get_priority_band_counts(
         self,
         user_id: uuid.UUID,
         scan_id: uuid.UUID,
     ) -> dict[str, int]:
-        self._scan_scope(user_id, scan_id)
+        _, summary = self._scan_scope(user_id, scan_id)
+        if summary is not None:
+            return {band: int(count) for band, count in (summary.priority_band_counts or {}).items()}
         try:
             statement = (
                 select(ScanFile.priority_band, func.count(ScanFile.id))
-                .join(Scan, ScanFile.scan_id == Scan.id)
-                .join(Project, Scan.project_id == Project.id)
-                .where(Scan.id == scan_id, Project.user_id == user_id)
+                .where(ScanFile.scan_id == scan_id)
                 .group_by(ScanFile.priority_band)
             )
-            return {
-                (str(row[0]).lower() if row[0] is not None else "unknown"): int(row[1])
-                for row in self._db.execute(statement).all()
-            }
+            counts: dict[str, int] = {}
+            for band, count in self._db.execute(statement).all():
+                key = str(band).lower() if band is not None else "unknown"
+                counts[key] = counts.get(key, 0) + int(count)
+            return counts
         except SQLAlchemyError as exc:
             raise DatabaseOperationException(
                 "Failed to aggregate scan priority bands",
@@ -162,14 +166,25 @@ class OverviewRepository:
         scan_id: uuid.UUID,
         limit: int,
     ) -> list[OverviewFileRow]:
-        self._scan_scope(user_id, scan_id)
+        """Highest scored files, looked up by id from the scan summary when it
+        holds enough of them."""
+        _, summary = self._scan_scope(user_id, scan_id)
         try:
+            if summary is not None and (
+                limit <= len(summary.top_files) or len(summary.top_files) == summary.file_count
+            ):
+                file_ids = [uuid.UUID(entry["id"]) for entry in summary.top_files[:limit]]
+                files = {
+                    file.id: file
+                    for file in self._db.execute(select(ScanFile).where(ScanFile.id.in_(file_ids))).scalars()
+                }
+                if len(files) == len(file_ids):
+                    return [self._to_file_row(files[file_id]) for file_id in file_ids]
+
             null_order = case((ScanFile.refactor_score.is_(None), 1), else_=0)
             statement = (
                 select(ScanFile)
-                .join(Scan, ScanFile.scan_id == Scan.id)
-                .join(Project, Scan.project_id == Project.id)
-                .where(Scan.id == scan_id, Project.user_id == user_id)
+                .where(ScanFile.scan_id == scan_id)
                 .order_by(null_order.asc(), ScanFile.refactor_score.desc(), ScanFile.file_path.asc())
                 .limit(limit)
             )
@@ -180,24 +195,114 @@ class OverviewRepository:
                 details={"scan_id": str(scan_id)},
             ) from exc
 
-    def list_files_for_directory_risk(
+    def list_directory_rollups(
+        self,
+        user_id: uuid.UUID,
+        scan_id: uuid.UUID,
+        *,
+        depth: int | None = None,
+        priority_band: str | None = None,
+        path_prefix: str | None = None,
+    ) -> list[OverviewDirectoryRollupRow]:
+        """Band counts and score totals per directory, cut to ``depth`` segments.
+
+        Files are grouped by their stored directory in SQL; only those groups
+        are folded into ``depth`` prefixes, so the work is bounded by the
+        number of directories.  Unscored files count with a score of 0.
+        """
+        try:
+            band = func.lower(ScanFile.priority_band)
+            statement = (
+                select(
+                    ScanFile.directory,
+                    band,
+                    func.count(ScanFile.id),
+                    func.sum(func.coalesce(ScanFile.refactor_score, 0)),
+                )
+                .join(Scan, ScanFile.scan_id == Scan.id)
+                .where(ScanFile.scan_id == scan_id, *self._accessible_scan(user_id, scan_id))
+                .group_by(ScanFile.directory, band)
+            )
+            if priority_band is not None:
+                statement = statement.where(band == priority_band.lower())
+            if path_prefix:
+                statement = statement.where(ScanFile.file_path.startswith(path_prefix, autoescape=True))
+
+            rows = self._db.execute(statement).all()
+            if not rows:
+                self._scan_scope(user_id, scan_id)
+
+            rollups: dict[str, tuple[int, float, dict[str, int]]] = {}
+            for directory, band_name, count, score_total in rows:
+                key = directory_prefix(directory or "", depth)
+                file_count, total, counts = rollups.get(key, (0, 0.0, {}))
+                band_key = band_name or "unknown"
+                counts[band_key] = counts.get(band_key, 0) + int(count)
+                rollups[key] = (file_count + int(count), total + float(score_total or 0.0), counts)
+            return [
+                OverviewDirectoryRollupRow(
+                    directory=directory,
+                    file_count=file_count,
+                    score_total=score_total,
+                    priority_counts=counts,
+                )
+                for directory, (file_count, score_total, counts) in sorted(rollups.items())
+            ]
+        except SQLAlchemyError as exc:
+            raise DatabaseOperationException(
+                "Failed to aggregate directory risk",
+                details={"scan_id": str(scan_id)},
+            ) from exc
+
+    def list_directory_files(
         self,
         user_id: uuid.UUID,
         scan_id: uuid.UUID,
+        directories: Sequence[str],
+        *,
+        depth: int | None = None,
     ) -> list[OverviewFileRow]:
-        self._scan_scope(user_id, scan_id)
+        """Files in ``directories`` as returned by ``list_directory_rollups``,
+        with their decision metadata but without metrics or errors."""
+        if not directories:
+            self._scan_scope(user_id, scan_id)
+            return []
         try:
+            conditions = [ScanFile.directory.in_(directories)]
+            if depth is not None:
+                conditions.extend(
+                    ScanFile.directory.startswith(f"{directory}/", autoescape=True)
+                    for directory in directories
+                    if directory
+                )
             statement = (
-                select(ScanFile)
+                select(
+                    ScanFile.id,
+                    ScanFile.file_path,
+                    ScanFile.refactor_score,
+                    ScanFile.priority_band,
+                    ScanFile.metadata_json,
+                )
                 .join(Scan, ScanFile.scan_id == Scan.id)
-                .join(Project, Scan.project_id == Project.id)
-                .where(Scan.id == scan_id, Project.user_id == user_id)
+                .where(ScanFile.scan_id == scan_id, *self._accessible_scan(user_id, scan_id), or_(*conditions))
                 .order_by(ScanFile.file_path.asc())
             )
-            return [self._to_file_row(file) for file in self._db.execute(statement).scalars().all()]
+            rows = self._db.execute(statement).all()
+            if not rows:
+                self._scan_scope(user_id, scan_id)
+            return [
+                OverviewFileRow(
+                    id=row[0],
+                    file_path=row[1],
+                    refactor_score=float(row[2]) if row[2] is not None else None,
+                    priority_band=row[3],
+                    metadata=row[4] or {},
+                )
+                for row in rows
+            ]
         except SQLAlchemyError as exc:
             raise DatabaseOperationException(
-                "Failed to aggregate directory risk",
+                "Failed to load directory files",
                 details={"scan_id": str(scan_id)},
             ) from exc
 
@@ -69,11 +69,20 @@ def get_top_refactor_files(
 @router.get("/risk-by-directory")
 def get_risk_by_directory(
     scan_id: uuid.UUID = Query(..., alias=SCAN_ID_QUERY_PARAM),
+    depth: int | None = Query(default=None, ge=1),
+    priority_band: str | None = None,
+    path_prefix: str | None = None,
     payload: TokenPayload = Depends(get_current_payload),
     user_service: UserService = Depends(get_user_service),
     service: OverviewService = Depends(get_overview_service),
 ):
-    response = service.risk_by_directory(_user_id(payload, user_service), scan_id)
+    response = service.risk_by_directory(
+        _user_id(payload, user_service),
+        scan_id,
+        depth=depth,
+        priority_band=priority_band,
+        path_prefix=path_prefix,
+    )
     return ApiResponse.success(
         data=response.model_dump(),
         meta=ResponseMeta(scan_id=scan_id),
@@ -3,13 +3,13 @@ from __future__ import annotations
 import json
 import uuid
 from collections import Counter, defaultdict
-from pathlib import PurePosixPath
 from typing import Any
 
 from app.ai_explanations.ai_explanations_dtos import AiExplanationType
 from app.ai_explanations.ai_explanations_service import AiExplanationService
 from app.core.exceptions.domain_exceptions import EntityNotFoundError, ExternalDependencyError, PersistenceError
 from app.core.exceptions.repository_exceptions import DatabaseOperationException, RecordNotFoundException
+from app.core.path_utils import parent_directory
 from app.core.constants import (
     DIRECTORY_INSIGHT_PROMPT,
     PREVIOUS_TREND_SCAN_COUNT,
@@ -109,26 +109,34 @@ class OverviewService:
         except DatabaseOperationException as exc:
             raise PersistenceError("Unable to list top refactor files") from exc
 
-    def risk_by_directory(self, user_id: uuid.UUID, scan_id: uuid.UUID) -> RiskByDirectoryResponse:
+    def risk_by_directory(
+        self,
+        user_id: uuid.UUID,
+        scan_id: uuid.UUID,
+        *,
+        depth: int | None = None,
+        priority_band: str | None = None,
+        path_prefix: str | None = None,
+    ) -> RiskByDirectoryResponse:
         try:
-            files = self._repository.list_files_for_directory_risk(user_id, scan_id)
-            counts: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
-            for file in files:
-                directory = self._directory_for(file.file_path)
-                band = (file.priority_band or "unknown").lower()
-                counts[directory][band] += 1
-
+            rollups = self._repository.list_directory_rollups(
+                user_id,
+                scan_id,
+                depth=depth,
+                priority_band=priority_band,
+                path_prefix=path_prefix,
+            )
             directories = sorted(
                 (
                     RiskByDirectoryItem(
-                        directory=directory,
+                        directory=self._directory_label(rollup.directory),
                         risky_file_count=sum(
-                            value for band, value in band_counts.items()
+                            value for band, value in rollup.priority_counts.items()
                             if band in RISKY_PRIORITY_BANDS
                         ),
-                        priority_counts=dict(band_counts),
+                        priority_counts=rollup.priority_counts,
                     )
-                    for directory, band_counts in counts.items()
+                    for rollup in rollups
                 ),
                 key=lambda item: (-item.risky_file_count, item.directory),
             )[:TOP_DIRECTORY_COUNT]
@@ -140,8 +148,7 @@ class OverviewService:
 
     def directory_insight(self, user_id: uuid.UUID, scan_id: uuid.UUID) -> DirectoryInsightResponse:
         try:
-            files = self._repository.list_files_for_directory_risk(user_id, scan_id)
-            directories = self._directory_insight_context(files)
+            directories = self._directory_insight_context(user_id, scan_id)
             if not directories:
                 return DirectoryInsightResponse(
                     scan_id=scan_id,
@@ -176,15 +183,37 @@ class OverviewService:
         except DatabaseOperationException as exc:
             raise PersistenceError("Unable to build directory insight") from exc
 
-    def _directory_insight_context(self, files: list[Any]) -> list[dict[str, Any]]:
+    def _directory_insight_context(self, user_id: uuid.UUID, scan_id: uuid.UUID) -> list[dict[str, Any]]:
+        """Summaries of the riskiest directories; only their files are loaded."""
+        summaries = sorted(
+            (
+                {
+                    "path": rollup.directory,
+                    "critical_files": rollup.priority_counts.get("critical", 0),
+                    "high_files": rollup.priority_counts.get("high", 0),
+                    "average_score": round(self._percent_score(rollup.score_total / rollup.file_count), 2)
+                    if rollup.file_count
+                    else 0,
+                }
+                for rollup in self._repository.list_directory_rollups(user_id, scan_id)
+            ),
+            key=lambda item: (
+                -(item["critical_files"] + item["high_files"]),
+                -item["average_score"],
+                item["path"],
+            ),
+        )[:TOP_DIRECTORY_COUNT]
+
         grouped: dict[str, list[Any]] = defaultdict(list)
-        for file in files:
-            grouped[self._directory_for(file.file_path)].append(file)
+        for file in self._repository.list_directory_files(
+            user_id,
+            scan_id,
+            [summary["path"] for summary in summaries],
+        ):
+            grouped[parent_directory(file.file_path)].append(file)
 
-        summaries = []
-        for directory, directory_files in grouped.items():
-            scores = [self._percent_score(file.refactor_score) for file in directory_files]
-            priority_counts = Counter((file.priority_band or "unknown").lower() for file in directory_files)
+        for summary in summaries:
+            directory_files = grouped[summary["path"]]
             reasons = Counter(
                 reason
                 for file in directory_files
@@ -194,32 +223,17 @@ class OverviewService:
                 directory_files,
                 key=lambda file: (-self._percent_score(file.refactor_score), file.file_path),
             )[:3]
-            summaries.append(
+            summary["path"] = self._directory_label(summary["path"])
+            summary["top_risk_reasons"] = [reason for reason, _ in reasons.most_common(3)]
+            summary["top_files"] = [
                 {
-                    "path": directory,
-                    "critical_files": priority_counts.get("critical", 0),
-                    "high_files": priority_counts.get("high", 0),
-                    "average_score": round(sum(scores) / len(scores), 2) if scores else 0,
-                    "top_risk_reasons": [reason for reason, _ in reasons.most_common(3)],
-                    "top_files": [
-                        {
-                            "path": file.file_path,
-                            "priority": (file.priority_band or "unknown").lower(),
-                            "risk_score": self._percent_score(file.refactor_score),
-                        }
-                        for file in top_files
-                    ],
+                    "path": file.file_path,
+                    "priority": (file.priority_band or "unknown").lower(),
+                    "risk_score": self._percent_score(file.refactor_score),
                 }
-            )
-
-        return sorted(
-            summaries,
-            key=lambda item: (
-                -(item["critical_files"] + item["high_files"]),
-                -item["average_score"],
-                item["path"],
-            ),
-        )[:TOP_DIRECTORY_COUNT]
+                for file in top_files
+            ]
+        return summaries
 
     def _friendly_risk_reasons(self, file: Any) -> list[str]:
         decision_metadata = file.metadata.get("decision_analysis", {})
@@ -254,9 +268,8 @@ class OverviewService:
         except (TypeError, ValueError, json.JSONDecodeError) as exc:
             raise ExternalDependencyError("AI returned an invalid directory insight") from exc
 
-    def _directory_for(self, file_path: str) -> str:
-        parent = PurePosixPath(file_path).parent.as_posix()
-        return parent if parent != "." else "(root)"
+    def _directory_label(self, directory: str) -> str:
+        return directory or "(root)"
 
     def _architecture_metric(self, metrics: dict[str, Any], key: str) -> float:
         architecture = metrics.get("architecture_analysis", {})
@@ -8,7 +8,7 @@ from app.projects.projects_repository import ProjectRepository
 from app.projects.projects_service import ProjectService
 from app.scans.dependencies import get_scan_service
 from app.scans.scans_service import ScanService
-from app.analysis.dependencies import get_scan_workspace_service
+from app.analysis.dependencies import get_clone_index, get_scan_workspace_service
 from app.analysis.services.scan_engine.pipeline.scan_workspace import ScanWorkspaceService
 
 
@@ -21,4 +21,9 @@ def get_project_service(
     scan_service: ScanService = Depends(get_scan_service),
     workspace_service: ScanWorkspaceService = Depends(get_scan_workspace_service),
 ) -> ProjectService:
-    return ProjectService(project_repository, scan_service, workspace_service)
+    return ProjectService(
+        project_repository,
+        scan_service,
+        workspace_service,
+        clone_index=get_clone_index(),
+    )
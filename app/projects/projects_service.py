@@ -18,6 +18,7 @@ from app.core.exceptions.repository_exceptions import (
 )
 from app.projects.projects_repository import ProjectRepository
 from app.scans.scans_service import ScanService
+from app.analysis.services.scan_engine.pipeline.clone_index import CrossProjectCloneIndex
 from app.analysis.services.scan_engine.pipeline.scan_workspace import ScanWorkspaceService
 from app.projects.projects_dtos import (
     AdminProjectListFilters,
@@ -41,10 +42,12 @@ class ProjectService:
         repository: ProjectRepository,
         scan_service: ScanService,
         workspace_service: ScanWorkspaceService,
+        clone_index: CrossProjectCloneIndex | None = None,
     ) -> None:
         self._repo = repository
         self._scan_service = scan_service
         self._workspace_service = workspace_service
+        self._clone_index = clone_index
 
     def create_project(self, user_id: uuid.UUID, repo_data: ProjectCreate) -> ProjectResponse:
         try:
@@ -120,6 +123,7 @@ class ProjectService:
             self._abort_project_deletion(context)
             raise
 
+        self._remove_from_clone_index(project_id)
         elapsed = (datetime.now(timezone.utc) - started).total_seconds()
         logger.info(
             "[PROJECT DELETE COMPLETED] project_id=%s project_name=%s user_id=%s scan_count=%d active_scan_count=%d revoke_failures=%d elapsed_seconds=%.3f",
@@ -132,6 +136,14 @@ class ProjectService:
             elapsed,
         )
 
+    def _remove_from_clone_index(self, project_id: uuid.UUID) -> None:
+        if self._clone_index is None:
+            return
+        try:
+            self._clone_index.remove_project(project_id)
+        except OSError:
+            logger.exception("[PROJECT DELETE CLONE INDEX FAILED] project_id=%s", project_id)
+
     def _abort_project_deletion(self, context) -> None:
         self._repo.abort_prepared_deletion()
         if not context.active_scan_ids:
@@ -206,23 +206,18 @@ class ScanRepository:
 
     def list_scans(self, filters: ScanListFilters) -> ScanListResult:
         try:
-            conditions = [Project.user_id == filters.user_id]
+            conditions = [Scan.owner_id == filters.user_id]
             if filters.project_id is not None:
                 conditions.append(Scan.project_id == filters.project_id)
             if filters.status is not None:
                 conditions.append(Scan.status == filters.status)
 
-            count_stmt = (
-                select(func.count(Scan.id))
-                .join(Project, Scan.project_id == Project.id)
-                .where(*conditions)
-            )
+            count_stmt = select(func.count(Scan.id)).where(*conditions)
             total_count = self._db.execute(count_stmt).scalar_one()
 
             order_column = Scan.created_at.desc() if filters.sort_descending else Scan.created_at.asc()
             stmt = (
                 select(Scan)
-                .join(Project, Scan.project_id == Project.id)
                 .where(*conditions)
                 .order_by(order_column, Scan.id.desc())
                 .offset((filters.page - 1) * filters.limit)
@@ -273,8 +268,7 @@ class ScanRepository:
         try:
             statement = (
                 select(Scan.status, func.count(Scan.id))
-                .join(Project, Scan.project_id == Project.id)
-                .where(Project.id == project_id, Project.user_id == user_id)
+                .where(Scan.project_id == project_id, Scan.owner_id == user_id)
                 .group_by(Scan.status)
             )
             return {
@@ -306,11 +300,10 @@ class ScanRepository:
                     Scan.finished_at,
                     func.coalesce(func.avg(ScanFile.refactor_score), 0.0),
                 )
-                .join(Project, Scan.project_id == Project.id)
                 .outerjoin(ScanFile, ScanFile.scan_id == Scan.id)
                 .where(
-                    Project.id == project_id,
-                    Project.user_id == user_id,
+                    Scan.project_id == project_id,
+                    Scan.owner_id == user_id,
                     Scan.status == ScanStatus.SUCCEEDED,
                     Scan.finished_at.is_not(None),
                 )
@@ -344,10 +337,9 @@ class ScanRepository:
         try:
             statement = (
                 select(Scan.id, Scan.status, Scan.started_at, Scan.finished_at)
-                .join(Project, Scan.project_id == Project.id)
                 .where(
-                    Project.id == project_id,
-                    Project.user_id == user_id,
+                    Scan.project_id == project_id,
+                    Scan.owner_id == user_id,
                     Scan.status.in_(
                         [ScanStatus.SUCCEEDED, ScanStatus.FAILED, ScanStatus.CANCELLED]
                     ),
@@ -483,11 +475,9 @@ class ScanRepository:
             if project_id is not None:
                 conditions.append(Scan.project_id == project_id)
 
-            statement = select(day, func.count(Scan.id))
             if user_id is not None:
-                statement = statement.join(Project, Scan.project_id == Project.id)
-                conditions.append(Project.user_id == user_id)
-            statement = statement.where(*conditions).group_by(day).order_by(day.asc())
+                conditions.append(Scan.owner_id == user_id)
+            statement = select(day, func.count(Scan.id)).where(*conditions).group_by(day).order_by(day.asc())
             counts: dict[date, int] = {}
             for day_value, count in self._db.execute(statement).all():
                 if isinstance(day_value, datetime):
@@ -1,10 +1,18 @@
 from celery import Task, shared_task
 from celery.exceptions import Ignore
+from celery.signals import worker_init, worker_process_init
 from uuid import UUID
+import gc
 import logging
 
-from app.analysis.dependencies import provide_scan_engine_service
+from app.analysis.dependencies import (
+    get_clone_index,
+    preload_code_embedding_model,
+    provide_scan_engine_service,
+    provide_scan_rescoring_service,
+)
 from app.analysis.services.scan_engine.scan_engine_service import ScanEngineService
+from app.config import settings
 from app.core.enums import ScanStatus
 from app.core.exceptions.domain_exceptions import EntityNotFoundError
 from app.scans.dependencies import provide_scan_service
@@ -69,6 +77,65 @@ def run_project_scan(self, scan_id: str):
         run_scan_pipeline(scan_uuid, scan_engine_service=scan_engine_service)
 
 
+@shared_task(
+    bind=True,
+    max_retries=0,
+    ignore_result=True,
+    queue="default",
+)
+def rescore_stored_scans(self, project_id: str | None = None, scan_id: str | None = None):
+    """Re-score stored scan files with the current decision model, no re-analysis."""
+    logger.info(
+        "[RESCORING STARTED] project_id=%s scan_id=%s task_id=%s",
+        project_id,
+        scan_id,
+        self.request.id,
+    )
+    with provide_scan_rescoring_service() as rescoring_service:
+        if scan_id is not None:
+            rescoring_service.rescore_scan(UUID(scan_id))
+            return
+        summary = rescoring_service.rescore_scans(UUID(project_id) if project_id else None)
+    logger.info(
+        "[RESCORING FINISHED] scans=%d files=%d failed_scans=%d scoring_model_version=%d",
+        summary.scan_count,
+        summary.file_count,
+        len(summary.failed_scan_ids),
+        summary.scoring_model_version,
+    )
+
+
+# ── Worker lifecycle hooks ────────────────────────────────────────────────────
+
+@worker_init.connect
+def preload_embedding_model_before_fork(**_: object) -> None:
+    """Load the embedding model in the parent so prefork children share it."""
+    if not settings.CODE_EMBEDDING_PRELOAD_BEFORE_FORK:
+        return
+    try:
+        preload_code_embedding_model()
+    except Exception:
+        logger.exception("[EMBEDDINGS PRELOAD FAILED] phase=before_fork")
+        return
+    # Keep the collector from touching the inherited model objects, which
+    # would otherwise copy their pages into every child.
+    gc.freeze()
+    logger.info("[EMBEDDINGS PRELOADED] phase=before_fork")
+
+
+@worker_process_init.connect
+def preload_embedding_model_in_worker_process(**_: object) -> None:
+    """Warm the process-level model registry before the first scan arrives."""
+    if not (settings.CODE_EMBEDDING_PRELOAD or settings.CODE_EMBEDDING_PRELOAD_BEFORE_FORK):
+        return
+    try:
+        preload_code_embedding_model()
+    except Exception:
+        logger.exception("[EMBEDDINGS PRELOAD FAILED] phase=worker_process_init")
+        return
+    logger.info("[EMBEDDINGS PRELOADED] phase=worker_process_init")
+
+
 # ── Business logic handlers ───────────────────────────────────────────────────
 # These are plain functions — easy to unit-test without Celery infrastructure.
 
@@ -130,6 +197,7 @@ def on_scan_succeeded(task: ScanTask, scan_id: UUID | None) -> None:
             return
     if transitioned:
         logger.info("[SCAN STATUS UPDATED] scan_id=%s status=%s", scan_id, ScanStatus.SUCCEEDED.value)
+        publish_clone_index_scan(scan_id)
     else:
         logger.info("[SCAN STATUS SKIPPED] scan_id=%s status=%s", scan_id, ScanStatus.SUCCEEDED.value)
 
@@ -150,6 +218,7 @@ def on_scan_failed(
     if scan_id is None:
         logger.error("Cannot mark failed scan without a scan_id")
         return
+    discard_clone_index_scan(scan_id)
     try:
         with provide_scan_service() as scan_service:
             transitioned = scan_service.transition_scan_status(
@@ -203,6 +272,27 @@ def on_scan_attempt_failed(
         logger.exception("Failed to persist terminal scan status for scan_id=%s", scan_id)
 
 
+def publish_clone_index_scan(scan_id: UUID) -> None:
+    """Make a succeeded scan's staged blocks visible to cross-project queries."""
+    clone_index = get_clone_index()
+    if clone_index is None:
+        return
+    try:
+        clone_index.publish(scan_id)
+    except Exception:
+        logger.exception("[CLONE INDEX PUBLISH FAILED] scan_id=%s", scan_id)
+
+
+def discard_clone_index_scan(scan_id: UUID) -> None:
+    clone_index = get_clone_index()
+    if clone_index is None:
+        return
+    try:
+        clone_index.discard(scan_id)
+    except Exception:
+        logger.exception("[CLONE INDEX DISCARD FAILED] scan_id=%s", scan_id)
+
+
 def run_scan_pipeline(
     scan_id: UUID,
     *,
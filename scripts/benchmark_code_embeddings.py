@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from time import perf_counter
+
+import torch
+
+from app.analysis.services.scan_engine.pipeline.code_embedding_service import CodeEmbeddingService
+from app.analysis.services.scan_engine.pipeline.cpu_budget import default_cpu_budget
+from app.analysis.services.scan_engine.pipeline.layers.duplication_analysis_layer import (
+    DuplicationAnalysisLayer,
+)
+from app.analysis.services.scan_engine.pipeline.quantized_code_embedding_service import (
+    QuantizedCodeEmbeddingService,
+)
+from app.config import settings
+
+
+BACKENDS: dict[str, type[CodeEmbeddingService]] = {
+    "torch": CodeEmbeddingService,
+    "int8": QuantizedCodeEmbeddingService,
+}
+DEFAULT_SOURCE_DIR = Path(__file__).resolve().parents[1] / "app"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Measure code embedding throughput (blocks/second) per backend.",
+    )
+    parser.add_argument("--source-dir", default=str(DEFAULT_SOURCE_DIR))
+    parser.add_argument("--backends", default="torch,int8")
+    parser.add_argument("--limit", type=int, default=256, help="Maximum number of blocks to embed.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument(
+        "--threads",
+        default="",
+        help="Comma-separated torch intra-op thread counts to compare (default: the CPU budget's value).",
+    )
+    parser.add_argument(
+        "--chunk-lengths",
+        default=str(settings.CODE_EMBEDDING_CHUNK_LENGTH or 0),
+        help="Comma-separated sliding-window lengths to compare; 0 truncates at max length instead.",
+    )
+    parser.add_argument(
+        "--worker-processes",
+        type=int,
+        default=settings.SCAN_WORKER_PROCESSES_PER_HOST,
+        help="Worker processes sharing the host, used for the default CPU budget.",
+    )
+    return parser.parse_args()
+
+
+def collect_blocks(source_dir: Path, limit: int) -> list[str]:
+    layer = DuplicationAnalysisLayer(embedding_service=CodeEmbeddingService())
+    texts: list[str] = []
+    for path in sorted(source_dir.rglob("*.py")):
+        try:
+            blocks = layer._extract_blocks(path, path.read_text(encoding="utf-8"))
+        except (OSError, SyntaxError, UnicodeDecodeError):
+            continue
+        texts.extend(block.embedding_text for block in blocks)
+        if len(texts) >= limit:
+            break
+    return texts[:limit]
+
+
+def benchmark(service: CodeEmbeddingService, texts: list[str], repeat: int) -> float:
+    timings: list[float] = []
+    for _ in range(repeat):
+        started = perf_counter()
+        service.encode_matrix(texts)
+        timings.append(perf_counter() - started)
+    return min(timings)
+
+
+def main() -> int:
+    args = parse_args()
+    texts = collect_blocks(Path(args.source_dir), args.limit)
+    if not texts:
+        print(f"No code blocks found under {args.source_dir}")
+        return 1
+
+    budget = default_cpu_budget(worker_processes=args.worker_processes)
+    thread_counts = [int(value) for value in args.threads.split(",") if value.strip()] or [
+        budget.torch_intra_op_threads
+    ]
+    chunk_lengths = [int(value) for value in args.chunk_lengths.split(",") if value.strip()] or [0]
+
+    print(f"Model: {settings.CODE_EMBEDDING_MODEL_PATH or settings.CODE_EMBEDDING_MODEL_ID}")
+    print(f"Blocks: {len(texts)}  repeat: {args.repeat}  cpus: {budget.cpu_count}  default budget: {budget}")
+    print(f"{'backend':<8} {'threads':>7} {'chunk':>6} {'load_s':>8} {'encode_s':>9} {'blocks/s':>9}")
+    for backend in args.backends.split(","):
+        service_class = BACKENDS[backend.strip()]
+        service = service_class(
+            model_id=settings.CODE_EMBEDDING_MODEL_ID,
+            model_path=settings.CODE_EMBEDDING_MODEL_PATH,
+            batch_size=settings.CODE_EMBEDDING_BATCH_SIZE,
+            token_budget=settings.CODE_EMBEDDING_TOKEN_BUDGET,
+            device=args.device,
+            max_length=settings.CODE_EMBEDDING_MAX_LENGTH,
+            trust_remote_code=settings.CODE_EMBEDDING_TRUST_REMOTE_CODE,
+            local_files_only=settings.CODE_EMBEDDING_LOCAL_FILES_ONLY,
+            torch_threads=thread_counts[0],
+            chunk_overlap=settings.CODE_EMBEDDING_CHUNK_OVERLAP,
+            max_chunks=settings.CODE_EMBEDDING_MAX_CHUNKS,
+        )
+        load_started = perf_counter()
+        service.preload()
+        load_seconds = perf_counter() - load_started
+
+        for thread_count in thread_counts:
+            torch.set_num_threads(thread_count)
+            for chunk_length in chunk_lengths:
+                service.chunk_length = chunk_length or None
+                encode_seconds = benchmark(service, texts, args.repeat)
+                print(
+                    f"{backend:<8} {thread_count:>7} {chunk_length or '-':>6} {load_seconds:>8.2f} "
+                    f"{encode_seconds:>9.2f} {len(texts) / max(encode_seconds, 1e-9):>9.1f}"
+                )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
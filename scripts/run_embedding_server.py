@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+
+from app.analysis.dependencies import build_code_embedding_service
+from app.analysis.services.scan_engine.pipeline.embedding_inference_server import (
+    EmbeddingInferenceServer,
+)
+from app.config import settings
+from app.core.logger import configure_logging
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Serve the configured code embedding model to local scan workers over a Unix socket.",
+    )
+    parser.add_argument(
+        "--socket",
+        default=str(settings.CODE_EMBEDDING_SERVER_SOCKET) if settings.CODE_EMBEDDING_SERVER_SOCKET else None,
+        help="Unix socket path (defaults to CODE_EMBEDDING_SERVER_SOCKET).",
+    )
+    parser.add_argument("--max-wait-ms", type=float, default=settings.CODE_EMBEDDING_SERVER_MAX_WAIT_MS)
+    parser.add_argument("--max-batch-texts", type=int, default=settings.CODE_EMBEDDING_SERVER_MAX_BATCH_TEXTS)
+    parser.add_argument("--no-preload", action="store_true", help="Load the model on the first request.")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if not args.socket:
+        print("A socket path is required (--socket or CODE_EMBEDDING_SERVER_SOCKET).", file=sys.stderr)
+        return 2
+
+    configure_logging()
+    service = build_code_embedding_service()
+    if not args.no_preload:
+        service.preload()
+
+    server = EmbeddingInferenceServer(
+        service,
+        socket_path=args.socket,
+        max_wait_seconds=args.max_wait_ms / 1000,
+        max_batch_texts=args.max_batch_texts,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.getLogger(__name__).info("Embedding server interrupted")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
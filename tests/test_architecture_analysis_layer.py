@@ -105,6 +105,34 @@ def test_architecture_layer_ignores_external_imports(tmp_path: Path) -> None:
     assert vector.metadata["sccs"] == []
 
 
+
+def test_architecture_layer_samples_betweenness_above_exact_limit(tmp_path: Path) -> None:
+    _mark_repo_root(tmp_path)
+    paths = [
+        _write(tmp_path, f"src/pkg/m{index}.py", f"from pkg import m{index + 1}\n" if index < 5 else "")
+        for index in range(6)
+    ]
+    layer = ArchitectureAnalysisLayer(
+        betweenness_exact_max_nodes=4,
+        betweenness_sample_size=3,
+        betweenness_seed=7,
+    )
+
+    result = layer.run(_vectors(tmp_path, *paths))
+
+    estimate = result.metadata["betweenness_estimate"]
+    assert estimate["strategy"] == "sampled"
+    assert estimate["pivot_count"] == 3
+    assert estimate["seed"] == 7
+    assert 0.0 < estimate["error_bound"] <= 1.0
+    assert all(0.0 <= vector.metrics["betweenness_centrality"] for vector in result)
+    assert ArchitectureAnalysisLayer().run(_vectors(tmp_path, *paths)).metadata["betweenness_estimate"] == {
+        "strategy": "exact",
+        "pivot_count": 6,
+        "error_bound": 0.0,
+    }
+
+
 def _mark_repo_root(path: Path) -> None:
     (path / ".git").mkdir()
 
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+from app.analysis.services.scan_engine.pipeline.clone_index import (
+    CrossProjectCloneIndex,
+    IndexedBlock,
+)
+
+
+def _blocks(file_path: str, count: int) -> list[IndexedBlock]:
+    return [IndexedBlock(file_path, "function", index * 10 + 1, index * 10 + 8) for index in range(count)]
+
+
+def _publish(index: CrossProjectCloneIndex, project_id: uuid.UUID, blocks, vectors) -> uuid.UUID:
+    scan_id = uuid.uuid4()
+    index.stage(scan_id, project_id, "fake-model", blocks, np.asarray(vectors, dtype=np.float32))
+    assert index.publish(scan_id)
+    return scan_id
+
+
+def test_clone_index_finds_blocks_in_other_projects_only(tmp_path: Path) -> None:
+    index = CrossProjectCloneIndex(tmp_path)
+    left, right, hidden = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    _publish(index, left, _blocks("utils/strings.py", 2), [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]])
+    _publish(index, right, _blocks("common/text.py", 2), [[0.99, 0.1, 0.0], [0.0, 0.0, 1.0]])
+    _publish(index, hidden, _blocks("vendor/text.py", 1), [[1.0, 0.0, 0.0]])
+
+    matches = index.similar_blocks(left, "utils/strings.py", project_ids=[left, right], threshold=0.9)
+
+    assert [(match.project_id, match.file_path, match.start_line) for match in matches] == [
+        (right, "common/text.py", 1)
+    ]
+    assert matches[0].source_start_line == 1
+    assert matches[0].similarity > 0.99
+    assert index.similar_blocks(left, "missing.py") == []
+
+
+def test_clone_index_publish_replaces_previous_project_segment(tmp_path: Path) -> None:
+    index = CrossProjectCloneIndex(tmp_path)
+    source, peer = uuid.uuid4(), uuid.uuid4()
+    _publish(index, source, _blocks("a.py", 1), [[1.0, 0.0]])
+    _publish(index, peer, _blocks("b.py", 1), [[1.0, 0.0]])
+    assert len(index.similar_blocks(source, "a.py")) == 1
+
+    _publish(index, peer, _blocks("c.py", 1), [[0.0, 1.0]])
+    assert index.similar_blocks(source, "a.py") == []
+
+    assert index.remove_project(peer)
+    assert not (tmp_path / "projects" / str(peer)).exists()
+
+
+def test_clone_index_discards_staged_scans_that_do_not_succeed(tmp_path: Path) -> None:
+    index = CrossProjectCloneIndex(tmp_path)
+    scan_id = uuid.uuid4()
+    index.stage(scan_id, uuid.uuid4(), "fake-model", _blocks("a.py", 1), np.ones((1, 2), dtype=np.float32))
+
+    index.discard(scan_id)
+
+    assert not index.publish(scan_id)
+    assert not (tmp_path / "projects").exists()
+
+
+def test_clone_index_ivf_lists_match_flat_search(tmp_path: Path) -> None:
+    rng = np.random.default_rng(7)
+    centers = rng.normal(size=(4, 16)).astype(np.float32)
+    vectors = np.repeat(centers, 32, axis=0) + rng.normal(scale=0.05, size=(128, 16)).astype(np.float32)
+    index = CrossProjectCloneIndex(tmp_path, nlist=4, nprobe=2)
+    index.TRAIN_POINTS_PER_LIST = 8
+    source, peer = uuid.uuid4(), uuid.uuid4()
+
+    _publish(index, peer, _blocks("peer.py", 128), vectors)
+    _publish(index, source, _blocks("query.py", 1), vectors[:1] + 0.01)
+    assert (tmp_path / "centroids.npy").exists()
+    assert (tmp_path / "projects" / str(peer) / "list_offsets.npy").exists()
+
+    ivf = index.similar_blocks(source, "query.py", threshold=0.95, limit=200)
+    flat = CrossProjectCloneIndex(tmp_path, nlist=4, nprobe=4).similar_blocks(
+        source,
+        "query.py",
+        threshold=0.95,
+        limit=200,
+    )
+
+    assert len(ivf) == 32
+    assert {(match.start_line, match.similarity) for match in ivf} == {
+        (match.start_line, match.similarity) for match in flat
+    }
@@ -5,12 +5,14 @@ import math
 from pathlib import Path
 from types import SimpleNamespace
 
+import numpy as np
 import pytest
 import torch
 import torch.nn.functional as functional
 
 from app.analysis.services.scan_engine.pipeline.code_embedding_service import (
     CodeEmbeddingService,
+    encode_as_matrix,
 )
 
 
@@ -165,6 +167,131 @@ def test_code_embedding_service_restores_order_after_length_bucketing() -> None:
     assert [vector[0] for vector in vectors] == pytest.approx(expected_first_values)
 
 
+def test_code_embedding_service_tokenizes_once_and_batches_by_token_budget(caplog) -> None:
+    service = CodeEmbeddingService(
+        model_id="example/model",
+        pooling_mode="cls",
+        token_budget=12,
+    )
+    tokenizer = LengthTokenizer()
+    service._tokenizer = tokenizer
+    service._model = LengthEchoModel()
+    service._torch = torch
+    service._functional = functional
+    service.device = "cpu"
+
+    with caplog.at_level("INFO"):
+        vectors = service.encode(["aaaaaa", "b", "cc", "ddddd"])
+
+    completed = [
+        record.getMessage()
+        for record in caplog.records
+        if record.getMessage().startswith("[EMBEDDINGS BATCH COMPLETED]")
+    ]
+    assert tokenizer.calls == 1
+    assert len(vectors) == 4
+    assert len(completed) == 2
+    assert "padding_efficiency=0.750" in completed[0]
+
+
+def test_token_budget_batches_keep_padded_size_within_budget() -> None:
+    batches = CodeEmbeddingService._token_budget_batches([1, 2, 2, 5, 9, 40], 10)
+
+    assert batches == [(0, 3), (3, 4), (4, 5), (5, 6)]
+
+
+def test_encode_matrix_returns_float32_rows_in_caller_order() -> None:
+    service = CodeEmbeddingService(
+        model_id="example/model",
+        batch_size=2,
+        pooling_mode="cls",
+    )
+    service._tokenizer = LengthTokenizer()
+    service._model = LengthEchoModel()
+    service._torch = torch
+    service._functional = functional
+    service.device = "cpu"
+
+    matrix = service.encode_matrix(["longest", "x", "medium"])
+
+    assert matrix.dtype == np.float32
+    assert matrix.shape == (3, 2)
+    assert matrix[:, 0].tolist() == pytest.approx(
+        [length / math.sqrt(length * length + 1) for length in (7, 1, 6)]
+    )
+    assert service.encode(["longest", "x", "medium"]) == matrix.tolist()
+
+
+def test_window_spans_overlap_and_cover_every_token() -> None:
+    assert CodeEmbeddingService._window_spans(5, 8, 6) == [(0, 5)]
+    assert CodeEmbeddingService._window_spans(20, 8, 6) == [(0, 8), (6, 14), (12, 20)]
+    assert CodeEmbeddingService._window_spans(15, 8, 6) == [(0, 8), (6, 14), (12, 15)]
+    assert CodeEmbeddingService._window_spans(0, 8, 6) == [(0, 0)]
+
+
+def test_chunked_encoding_pools_windows_back_per_text(caplog) -> None:
+    service = CodeEmbeddingService(
+        model_id="example/model",
+        pooling_mode="mean",
+        chunk_length=4,
+        chunk_overlap=1,
+    )
+    service._tokenizer = WindowTokenizer()
+    service._model = TokenEchoModel()
+    service._torch = torch
+    service._functional = functional
+    service.device = "cpu"
+
+    with caplog.at_level("INFO"):
+        matrix = service.encode_matrix(["abc", "abcdefghij"])
+
+    chunked = [
+        record.getMessage()
+        for record in caplog.records
+        if record.getMessage().startswith("[EMBEDDINGS CHUNKED]")
+    ]
+    assert "window_count=4" in chunked[0]
+    assert matrix.shape == (2, 2)
+    assert np.linalg.norm(matrix, axis=1) == pytest.approx([1.0, 1.0])
+    # Every window of the long text is encoded, so its tail shifts the pooled
+    # vector away from the vector of its first window alone.
+    assert matrix[1, 0] > matrix[0, 0]
+
+
+def test_chunked_encoding_caps_windows_per_text() -> None:
+    service = CodeEmbeddingService(
+        model_id="example/model",
+        pooling_mode="mean",
+        chunk_length=4,
+        max_chunks=1,
+    )
+    service._tokenizer = WindowTokenizer()
+
+    features, owners, weights = service._tokenize_windows(["abcdefghij", "ab"])
+
+    assert [feature["input_ids"] for feature in features] == [[97, 98, 99, 100], [97, 98]]
+    assert owners.tolist() == [0, 1]
+    assert weights.tolist() == [4.0, 2.0]
+
+
+def test_chunk_overlap_must_be_shorter_than_chunk() -> None:
+    with pytest.raises(ValueError):
+        CodeEmbeddingService(chunk_length=4, chunk_overlap=4)
+
+
+def test_encode_as_matrix_converts_list_providers_once() -> None:
+    class ListProvider:
+        model_id = "fake-list"
+
+        def encode(self, texts):
+            return [[1.0, 0.0] for _ in texts]
+
+    matrix = encode_as_matrix(ListProvider(), ["a", "b"])
+
+    assert matrix.dtype == np.float32
+    assert matrix.shape == (2, 2)
+
+
 def test_legacy_model_compatibility_head_mask_fallback() -> None:
     service = CodeEmbeddingService(model_id="codesage/codesage-base-v2")
     pretrained_model = type("PreTrainedModel", (), {})
@@ -189,11 +316,27 @@ def test_legacy_jina_config_receives_encoder_defaults() -> None:
     assert model_config.chunk_size_feed_forward == 0
 
 
-class FakeTokenizer:
-    def __call__(self, batch, **_: object) -> dict[str, torch.Tensor]:
+class PaddingTokenizer:
+    pad_token_id = 0
+
+    def pad(self, features, **_: object) -> dict[str, torch.Tensor]:
+        length = max(len(feature["input_ids"]) for feature in features)
+        return {
+            key: torch.tensor(
+                [
+                    feature[key] + [self.pad_token_id] * (length - len(feature[key]))
+                    for feature in features
+                ]
+            )
+            for key in features[0]
+        }
+
+
+class FakeTokenizer(PaddingTokenizer):
+    def __call__(self, batch, **_: object) -> dict[str, list[list[int]]]:
         return {
-            "input_ids": torch.tensor([[101, 102, 0], [101, 103, 104]]),
-            "attention_mask": torch.tensor([[1, 1, 0], [1, 1, 1]]),
+            "input_ids": [[101, 102], [101, 103, 104]][: len(batch)],
+            "attention_mask": [[1, 1], [1, 1, 1]][: len(batch)],
         }
 
 
@@ -221,11 +364,15 @@ class NonFiniteModel:
         return SimpleNamespace(last_hidden_state=hidden)
 
 
-class LengthTokenizer:
-    def __call__(self, batch: list[str], **_: object) -> dict[str, torch.Tensor]:
+class LengthTokenizer(PaddingTokenizer):
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def __call__(self, batch: list[str], **_: object) -> dict[str, list[list[int]]]:
+        self.calls += 1
         return {
-            "input_ids": torch.tensor([[len(text)] for text in batch]),
-            "attention_mask": torch.ones(len(batch), 1, dtype=torch.long),
+            "input_ids": [[len(text)] * len(text) for text in batch],
+            "attention_mask": [[1] * len(text) for text in batch],
         }
 
 
@@ -234,3 +381,18 @@ class LengthEchoModel:
         lengths = encoded["input_ids"].float().unsqueeze(-1)
         ones = torch.ones_like(lengths)
         return SimpleNamespace(last_hidden_state=torch.cat((lengths, ones), dim=-1))
+
+
+class WindowTokenizer(PaddingTokenizer):
+    def __call__(self, batch: list[str], **_: object) -> dict[str, list[list[int]]]:
+        return {
+            "input_ids": [[ord(char) for char in text] for text in batch],
+            "attention_mask": [[1] * len(text) for text in batch],
+        }
+
+
+class TokenEchoModel:
+    def __call__(self, **encoded: torch.Tensor) -> SimpleNamespace:
+        token_ids = encoded["input_ids"].float().unsqueeze(-1) - 96
+        ones = torch.ones_like(token_ids)
+        return SimpleNamespace(last_hidden_state=torch.cat((token_ids, ones), dim=-1))
@@ -1,7 +1,9 @@
 import os
 import unittest
+import unittest.mock
 from pathlib import Path
 
+from app.config import Settings
 from app.core.path_utils import resolve_scan_repo_base_dir
 
 
@@ -40,3 +42,51 @@ class SettingsPathResolutionTests(unittest.TestCase):
                 base_dir=BASE_DIR,
                 running_on_windows=False,
             )
+
+
+class SettingsOptionalLimitTests(unittest.TestCase):
+    def test_chunking_limits_can_be_disabled(self) -> None:
+        for raw in ("", "none", "None", "0", 0):
+            settings = Settings(
+                CODE_EMBEDDING_CHUNK_LENGTH=raw,
+                CODE_EMBEDDING_MAX_CHUNKS=raw,
+            )
+
+            self.assertIsNone(settings.CODE_EMBEDDING_CHUNK_LENGTH)
+            self.assertIsNone(settings.CODE_EMBEDDING_MAX_CHUNKS)
+
+    def test_chunking_limits_parse_from_environment(self) -> None:
+        with unittest.mock.patch.dict(
+            os.environ,
+            {"CODE_EMBEDDING_CHUNK_LENGTH": "none", "CODE_EMBEDDING_MAX_CHUNKS": "8"},
+        ):
+            settings = Settings()
+
+        self.assertIsNone(settings.CODE_EMBEDDING_CHUNK_LENGTH)
+        self.assertEqual(settings.CODE_EMBEDDING_MAX_CHUNKS, 8)
+
+    def test_duplication_block_budget_is_opt_in(self) -> None:
+        settings = Settings()
+
+        self.assertIsNone(settings.DUPLICATION_MAX_BLOCKS_PER_FILE)
+        self.assertIsNone(settings.DUPLICATION_BLOCK_SCALE_FILE_LINES)
+        self.assertFalse(settings.DUPLICATION_EXCLUDE_GENERATED_FILES)
+
+    def test_duplication_block_limits_can_be_disabled(self) -> None:
+        with unittest.mock.patch.dict(
+            os.environ,
+            {"DUPLICATION_MAX_BLOCKS_PER_FILE": "0", "DUPLICATION_BLOCK_SCALE_FILE_LINES": "500"},
+        ):
+            settings = Settings()
+
+        self.assertIsNone(settings.DUPLICATION_MAX_BLOCKS_PER_FILE)
+        self.assertEqual(settings.DUPLICATION_BLOCK_SCALE_FILE_LINES, 500)
+
+    def test_idle_unload_can_be_disabled(self) -> None:
+        for raw in ("none", "0", "0.0", 0.0):
+            with unittest.mock.patch.dict(
+                os.environ, {"CODE_EMBEDDING_IDLE_UNLOAD_SECONDS": str(raw)}
+            ):
+                settings = Settings()
+
+            self.assertIsNone(settings.CODE_EMBEDDING_IDLE_UNLOAD_SECONDS)
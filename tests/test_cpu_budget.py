@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from app.analysis.services.scan_engine.pipeline.code_embedding_service import (
+    CodeEmbeddingService,
+)
+from app.analysis.services.scan_engine.pipeline.cpu_budget import (
+    available_cpu_count,
+    default_cpu_budget,
+)
+
+
+def test_default_budget_splits_cores_between_worker_processes() -> None:
+    budget = default_cpu_budget(cpu_count=16, worker_processes=4)
+
+    assert budget.torch_intra_op_threads == 4
+    assert budget.torch_inter_op_threads == 1
+    assert budget.pipeline_workers == 8
+
+
+def test_default_budget_halves_share_when_stages_overlap() -> None:
+    budget = default_cpu_budget(cpu_count=8, worker_processes=1, overlapping_stages=True)
+
+    assert budget.torch_intra_op_threads == 4
+    assert budget.pipeline_workers == 8
+
+
+def test_default_budget_never_drops_below_one_thread() -> None:
+    budget = default_cpu_budget(cpu_count=2, worker_processes=8, overlapping_stages=True)
+
+    assert budget.torch_intra_op_threads == 1
+    assert budget.pipeline_workers == 5
+
+    with pytest.raises(ValueError):
+        default_cpu_budget(cpu_count=2, worker_processes=0)
+
+
+def test_available_cpu_count_respects_cgroup_quota(tmp_path: Path) -> None:
+    cpu_max = tmp_path / "cpu.max"
+    cpu_max.write_text("150000 100000\n", encoding="utf-8")
+
+    assert available_cpu_count(cpu_max) <= 2
+
+    cpu_max.write_text("max 100000\n", encoding="utf-8")
+    assert available_cpu_count(cpu_max) >= 1
+
+
+def test_embedding_service_applies_thread_budget_once_at_load() -> None:
+    calls: list[tuple[str, int]] = []
+    fake_torch = SimpleNamespace(
+        get_num_threads=lambda: 8,
+        set_num_threads=lambda value: calls.append(("intra", value)),
+        get_num_interop_threads=lambda: 8,
+        set_num_interop_threads=lambda value: calls.append(("inter", value)),
+    )
+
+    service = CodeEmbeddingService(torch_threads=2, torch_interop_threads=1)
+    service._configure_torch_threads(fake_torch)
+
+    assert calls == [("intra", 2), ("inter", 1)]
+
+
+def test_cpu_budget_gives_torch_the_whole_share_with_default_settings(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    from app.analysis import dependencies
+
+    monkeypatch.setattr(dependencies.settings, "SCAN_WORKER_PROCESSES_PER_HOST", 1)
+    monkeypatch.setattr(dependencies.settings, "SCAN_PIPELINE_MAX_WORKERS", None)
+    monkeypatch.setattr(dependencies.settings, "CODE_EMBEDDING_SERVER_SOCKET", None)
+    monkeypatch.setattr(dependencies.settings, "CODE_EMBEDDING_TORCH_THREADS", None)
+    monkeypatch.setattr(dependencies.settings, "CODE_EMBEDDING_TORCH_INTEROP_THREADS", None)
+    monkeypatch.setattr(
+        dependencies,
+        "default_cpu_budget",
+        lambda **kwargs: default_cpu_budget(cpu_count=8, **kwargs),
+    )
+
+    budget = dependencies.get_cpu_budget()
+
+    assert budget.torch_intra_op_threads == 8
+    assert budget.pipeline_workers == 12
@@ -1,9 +1,16 @@
 from __future__ import annotations
 
+import random
 from pathlib import Path
 
+import numpy as np
 import pytest
 
+from app.analysis.services.scan_engine.pipeline.decision_scoring import (
+    NormalizationTables,
+    percentile_rank,
+    quantile_table,
+)
 from app.analysis.services.scan_engine.pipeline.layers.decision_analysis_layer import (
     DecisionAnalysisLayer,
 )
@@ -27,7 +34,9 @@ def _run_decision_file(
             for layer_name, metrics in metrics_by_layer.items()
         ]
     )
-    return layer.run(result)[0]
+    vector = layer.run(result)[0]
+    assert layer.run_batch([result])[0] == vector
+    return vector
 
 
 def test_decision_layer_scores_files_between_zero_and_one_and_ranks_pressure() -> None:
@@ -319,6 +328,16 @@ def test_architecture_score_omits_deterministic_dependency_total() -> None:
     assert sum(layer.architecture_metric_weights.values()) == pytest.approx(1.0)
 
 
+def test_signal_specs_cover_every_weighted_component_metric() -> None:
+    layer = DecisionAnalysisLayer()
+
+    for component_name, specs in layer.COMPONENT_SIGNAL_SPECS.items():
+        assert set(specs) == set(layer._metric_weights_for(component_name))
+        for metric_name, spec in specs.items():
+            if spec.kind != "derived":
+                assert metric_name in layer.BATCH_INPUT_METRICS
+
+
 def test_weighted_score_rejects_score_and_weight_key_drift() -> None:
     layer = DecisionAnalysisLayer()
 
@@ -579,3 +598,147 @@ def test_priority_threshold_constants_drive_bands_and_summary(
         "high": 0.5,
         "medium": 0.3,
     }
+
+
+def test_batch_scoring_matches_per_file_scoring() -> None:
+    layer = DecisionAnalysisLayer()
+    metric_names = {
+        "static_analysis": layer.BATCH_INPUT_METRICS[:13],
+        "history_analysis": layer.BATCH_INPUT_METRICS[13:21],
+        "duplication_analysis": layer.BATCH_INPUT_METRICS[21:27],
+        "architecture_analysis": layer.BATCH_INPUT_METRICS[27:],
+    }
+    rng = random.Random(7)
+
+    def metric_value() -> int | float | str | None:
+        roll = rng.random()
+        if roll < 0.1:
+            return None
+        if roll < 0.15:
+            return rng.choice([float("nan"), "n/a", True, -1])
+        if roll < 0.5:
+            return rng.randint(0, 40)
+        return round(rng.uniform(0.0, 30.0) if rng.random() < 0.5 else rng.random(), rng.choice([3, 6]))
+
+    results = [
+        LayerResult(
+            vectors=[
+                MetricsVector(
+                    layer=layer_name,
+                    absolute_path=Path(f"/workspace/src/file_{index}.py"),
+                    relative_path=f"src/file_{index}.py",
+                    metrics={name: metric_value() for name in names if rng.random() > 0.1},
+                )
+                for layer_name, names in metric_names.items()
+                if rng.random() > 0.1
+            ]
+        )
+        for index in range(400)
+    ]
+    results.append(LayerResult())
+
+    batch = layer.run_batch(results)
+
+    assert batch.vectors == [layer.run(result)[0] for result in results]
+    assert batch.vectors[-1].errors[0].startswith("decision metrics failed:")
+
+
+def test_rescoring_stored_metrics_matches_scan_scoring() -> None:
+    layer = DecisionAnalysisLayer()
+    rng = random.Random(11)
+    results = [
+        LayerResult(
+            vectors=[
+                MetricsVector(
+                    layer=layer_name,
+                    absolute_path=Path(f"/workspace/src/file_{index}.py"),
+                    relative_path=f"src/file_{index}.py",
+                    metrics={name: rng.choice([None, rng.randint(0, 40), rng.random()]) for name in names},
+                    errors=["failed"] if rng.random() < 0.2 else [],
+                )
+                for layer_name, names in (
+                    ("static_analysis", ("lines_of_code", "max_cyclomatic_complexity", "testing_coverage")),
+                    ("history_analysis", ("update_count", "bug_fix_ratio", "churn_to_size_ratio")),
+                    ("architecture_analysis", ("fan_in", "fan_out", "instability_index", "lines_of_code")),
+                )
+            ]
+        )
+        for index in range(50)
+    ]
+    stored = [
+        (
+            f"src/file_{index}.py",
+            # Stored layers come back in arbitrary key order.
+            {vector.layer: vector.metrics for vector in reversed(result.vectors)}
+            | {layer.LAYER_NAME: {"refactor_score": 1.0}},
+            {vector.layer: vector.errors for vector in result.vectors if vector.errors},
+        )
+        for index, result in enumerate(results)
+    ]
+
+    expected = layer.run_batch(results).vectors
+    rescored = layer.rescore_stored(stored)
+
+    assert [(scores.metrics, scores.metadata, scores.errors) for scores in rescored] == [
+        (vector.metrics, vector.metadata, vector.errors) for vector in expected
+    ]
+
+
+def test_percentile_rank_scores_share_of_quantiles_below() -> None:
+    table = quantile_table(np.array([0.0, 0.0, 0.0, 2.0, 4.0, np.nan]), 5)
+
+    assert table == (0.0, 0.0, 0.0, 2.0, 4.0)
+    assert percentile_rank(np.array([0.0, 1.0, 2.0, 4.0, 9.0, np.nan]), table)[:5].tolist() == [
+        0.0,
+        0.75,
+        0.75,
+        1.0,
+        1.0,
+    ]
+
+
+def test_percentile_normalization_is_reproducible_from_stored_tables() -> None:
+    layer = DecisionAnalysisLayer(normalization_mode="percentile", quantile_points=21)
+    rng = random.Random(5)
+    results = [
+        LayerResult(
+            vectors=[
+                MetricsVector(
+                    layer=layer_name,
+                    absolute_path=Path(f"/workspace/src/file_{index}.py"),
+                    relative_path=f"src/file_{index}.py",
+                    metrics={name: rng.choice([None, rng.randint(0, 60), rng.uniform(0.0, 2.0)]) for name in names},
+                )
+                for layer_name, names in (
+                    ("static_analysis", layer.BATCH_INPUT_METRICS[:13]),
+                    ("history_analysis", layer.BATCH_INPUT_METRICS[13:21]),
+                    ("architecture_analysis", layer.BATCH_INPUT_METRICS[27:]),
+                )
+            ]
+        )
+        for index in range(120)
+    ]
+
+    batch = layer.run_batch(results)
+    normalization = batch.metadata["decision_normalization"]
+    tables = NormalizationTables.from_json(normalization["tables"])
+
+    assert normalization["mode"] == "percentile"
+    assert len(tables.table_for("complexity_score", "max_cyclomatic_complexity")) == 21
+    assert tables.table_for("duplication_score", "duplicate_blocks_count") is None
+    assert {vector.metadata["normalization_mode"] for vector in batch.vectors} == {"percentile"}
+    for result, vector in zip(results, batch.vectors, strict=True):
+        context = layer._build_context(*layer._paths_for(result), result)
+        context.normalization = tables
+        scores = layer._score_context(context)
+        assert (scores.metrics, scores.metadata) == (vector.metrics, vector.metadata)
+
+    rescored = layer.rescore_stored(
+        [
+            (vector.relative_path, {item.layer: item.metrics for item in result.vectors}, {})
+            for result, vector in zip(results, batch.vectors, strict=True)
+        ],
+        tables,
+    )
+    assert [scores.metrics for scores in rescored] == [vector.metrics for vector in batch.vectors]
+    assert batch.vectors != DecisionAnalysisLayer().run_batch(results).vectors
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import math
+import random
+
+import pytest
+
+from app.analysis.services.scan_engine.pipeline.dependency_graph import (
+    DependencyGraph,
+    sampled_betweenness_error_bound,
+)
+from app.analysis.services.scan_engine.pipeline.layers.decision_analysis_layer import DecisionAnalysisLayer
+
+nx = pytest.importorskip("networkx")
+
+
+def _random_graph(seed: int, node_count: int, edge_count: int) -> tuple[DependencyGraph, object]:
+    rng = random.Random(seed)
+    nodes = [f"pkg/module_{index}.py" for index in range(node_count)]
+    edges = [(rng.randrange(node_count), rng.randrange(node_count)) for _ in range(edge_count)]
+
+    reference = nx.DiGraph()
+    reference.add_nodes_from(nodes)
+    reference.add_edges_from((nodes[source], nodes[target]) for source, target in edges if source != target)
+    return DependencyGraph(nodes, edges), reference
+
+
+@pytest.mark.parametrize(("seed", "node_count", "edge_count"), [(1, 1, 0), (2, 12, 30), (3, 60, 90), (4, 120, 400)])
+def test_dependency_graph_matches_networkx(seed: int, node_count: int, edge_count: int) -> None:
+    graph, reference = _random_graph(seed, node_count, edge_count)
+
+    assert graph.number_of_edges() == reference.number_of_edges()
+    assert sorted(graph.edges()) == sorted(reference.edges())
+    assert {
+        frozenset(graph.nodes[node] for node in component)
+        for component in graph.strongly_connected_components()
+    } == {frozenset(component) for component in nx.strongly_connected_components(reference)}
+
+    for node, index in graph.index.items():
+        assert graph.in_degrees[index] == reference.in_degree(node)
+        assert graph.out_degrees[index] == reference.out_degree(node)
+    assert graph.ancestor_counts() == [len(nx.ancestors(reference, node)) for node in graph.nodes]
+
+    expected = nx.betweenness_centrality(reference, normalized=True)
+    assert graph.betweenness_centrality(normalized=True) == pytest.approx([expected[node] for node in graph.nodes])
+
+
+def test_dependency_graph_components_come_sinks_first() -> None:
+    graph = DependencyGraph.from_named_edges(
+        ["a", "b", "c", "d"],
+        [("a", "b"), ("b", "a"), ("b", "c"), ("c", "d"), ("a", "a")],
+    )
+
+    components = [sorted(graph.nodes[node] for node in component) for component in graph.strongly_connected_components()]
+
+    assert components == [["d"], ["c"], ["a", "b"]]
+    assert graph.ancestor_counts() == [1, 1, 2, 3]
+    assert sorted(graph.component_edges(graph.strongly_connected_components()[2])) == [(0, 1), (1, 0)]
+
+
+def test_sampled_betweenness_preserves_ranking_and_saturated_scores() -> None:
+    rng = random.Random(1)
+    node_count = 500
+    edges = [(node, int(node * rng.random() ** 2)) for node in range(1, node_count) for _ in range(3)]
+    edges += [(rng.randrange(node), node) for node in range(1, node_count) if rng.random() < 0.05]
+    graph = DependencyGraph([f"pkg/module_{index}.py" for index in range(node_count)], edges)
+    pivots = sorted(random.Random(0).sample(range(node_count), 128))
+
+    exact = graph.betweenness_centrality()
+    sampled = graph.betweenness_centrality(sources=pivots)
+
+    assert _spearman(exact, sampled) >= 0.8
+    top_exact = set(sorted(range(node_count), key=lambda node: -exact[node])[:20])
+    top_sampled = set(sorted(range(node_count), key=lambda node: -sampled[node])[:20])
+    assert len(top_exact & top_sampled) >= 15
+
+    saturation = DecisionAnalysisLayer.BETWEENNESS_CENTRALITY_SATURATION
+    saturated_errors = [
+        abs(min(1.0, left / saturation) - min(1.0, right / saturation))
+        for left, right in zip(exact, sampled, strict=True)
+    ]
+    assert max(saturated_errors) <= 0.15
+    assert sum(saturated_errors) / node_count <= 0.01
+    assert max(abs(left - right) for left, right in zip(exact, sampled, strict=True)) <= (
+        sampled_betweenness_error_bound(node_count, len(pivots))
+    )
+
+
+def test_parallel_betweenness_matches_serial() -> None:
+    graph, _ = _random_graph(5, 80, 240)
+
+    assert graph.betweenness_centrality(processes=2) == pytest.approx(graph.betweenness_centrality())
+
+
+def _spearman(left: list[float], right: list[float]) -> float:
+    left_ranks, right_ranks = _ranks(left), _ranks(right)
+    count = len(left)
+    left_mean = sum(left_ranks) / count
+    right_mean = sum(right_ranks) / count
+    covariance = sum((a - left_mean) * (b - right_mean) for a, b in zip(left_ranks, right_ranks, strict=True))
+    left_spread = math.sqrt(sum((a - left_mean) ** 2 for a in left_ranks))
+    right_spread = math.sqrt(sum((b - right_mean) ** 2 for b in right_ranks))
+    return covariance / (left_spread * right_spread)
+
+
+def _ranks(values: list[float]) -> list[float]:
+    order = sorted(range(len(values)), key=values.__getitem__)
+    ranks = [0.0] * len(values)
+    start = 0
+    while start < len(order):
+        end = start
+        while end + 1 < len(order) and values[order[end + 1]] == values[order[start]]:
+            end += 1
+        for position in range(start, end + 1):
+            ranks[order[position]] = (start + end) / 2
+        start = end + 1
+    return ranks
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import math
+from array import array
 from collections.abc import Sequence
 from pathlib import Path
 
 from app.analysis.services.scan_engine.pipeline.layers.duplication_analysis_layer import (
+    CloneClassTable,
     DuplicationAnalysisLayer,
 )
 from app.analysis.services.scan_engine.pipeline.metrics_vector import MetricsVector
@@ -40,6 +42,31 @@ class NonFiniteEmbeddingService:
         return [[math.nan, 1.0] for _ in texts]
 
 
+class RecordingEmbeddingService:
+    model_id = "fake-recording"
+
+    def __init__(self) -> None:
+        self.texts: list[str] = []
+
+    def encode(self, texts: Sequence[str]) -> list[list[float]]:
+        self.texts.extend(texts)
+        return [[1.0, 0.0] if "total" in text else [0.0, 1.0] for text in texts]
+
+
+class ChainEmbeddingService:
+    """alpha ~ beta and beta ~ gamma at 0.866, but alpha ~ gamma only at 0.5."""
+
+    model_id = "fake-chain"
+
+    def encode(self, texts: Sequence[str]) -> list[list[float]]:
+        angles = {"alpha": 0.0, "beta": math.pi / 6, "gamma": math.pi / 3}
+        vectors: list[list[float]] = []
+        for text in texts:
+            angle = next((value for name, value in angles.items() if name in text), math.pi)
+            vectors.append([math.cos(angle), math.sin(angle), 0.0 if angle != math.pi else 1.0])
+        return vectors
+
+
 class FailingEmbeddingService:
     model_id = "fake-failure"
 
@@ -230,6 +257,251 @@ def clean_labels(labels):
     )
 
 
+def test_block_tokens_are_sliced_from_one_file_token_stream(tmp_path: Path) -> None:
+    source = """
+def outer(values):
+    # nested helper
+    def inner(value):
+        scaled = value * 2
+        return scaled + 1
+    return [inner(value) for value in values]
+""".strip()
+    layer = DuplicationAnalysisLayer(
+        embedding_service=IndexedEmbeddingService(),
+        min_block_lines=1,
+        min_block_tokens=1,
+    )
+
+    blocks = layer._extract_blocks(tmp_path / "nested.py", source)
+    by_kind_and_start = {(block.kind, block.start_line): block for block in blocks}
+    inner = by_kind_and_start[("function", 3)]
+
+    assert isinstance(inner.syntax_tokens, array)
+    assert inner.syntax_tokens.typecode == "i"
+    assert inner.syntax_tokens == layer._syntax_tokens(inner.source)
+    assert by_kind_and_start[("function", 1)].syntax_tokens == layer._syntax_tokens(source)
+
+
+
+def test_blocks_share_one_source_file_and_materialize_text_lazily(tmp_path: Path) -> None:
+    source = "def outer(values):\r\n    # nested helper\r\n    def inner(value):\r\n\r\n        return value * 2\r\n    return [inner(value) for value in values]\r\n"
+    layer = DuplicationAnalysisLayer(
+        embedding_service=IndexedEmbeddingService(),
+        min_block_lines=1,
+        min_block_tokens=1,
+    )
+
+    blocks = layer._extract_blocks(tmp_path / "nested.py", source, file_index=3)
+    by_start = {block.start_line: block for block in blocks}
+    outer, inner = by_start[1], by_start[3]
+    lines = source.splitlines()
+
+    assert outer.file is inner.file
+    assert inner.file.index == 3
+    assert inner.file_path == tmp_path / "nested.py"
+    assert inner.source == "\n".join(lines[2:5])
+    assert inner.embedding_text == "def inner(value):\n\n    return value * 2"
+    assert outer.line_numbers == (1, 3, 5, 6)
+    assert (outer.loc, inner.loc) == (4, 2)
+
+
+COPIED_TOTAL = """
+def invoice_total(invoice):
+    subtotal = invoice.subtotal
+    tax = invoice.tax
+    return subtotal + tax
+"""
+
+
+def test_duplication_layer_embeds_identical_blocks_once(tmp_path: Path) -> None:
+    _mark_repo_root(tmp_path)
+    left = _write(tmp_path, "src/pkg/left.py", COPIED_TOTAL)
+    right = _write(tmp_path, "src/pkg/right.py", COPIED_TOTAL)
+    service = RecordingEmbeddingService()
+
+    result = DuplicationAnalysisLayer(embedding_service=service).run(_vectors(tmp_path, left, right))
+    by_path = {vector.absolute_path: vector for vector in result}
+
+    assert len(service.texts) == 1
+    assert by_path[left].metrics["semantic_duplicate_blocks_count"] == 1
+    assert by_path[right].metrics["max_similarity_score"] == 1.0
+
+
+def test_duplication_layer_can_skip_embedding_syntax_clones(tmp_path: Path) -> None:
+    _mark_repo_root(tmp_path)
+    left = _write(tmp_path, "src/pkg/left.py", COPIED_TOTAL)
+    right = _write(tmp_path, "src/pkg/right.py", COPIED_TOTAL.replace("invoice", "order"))
+    summed = _write(
+        tmp_path,
+        "src/pkg/summed.py",
+        """
+def running_sum(values):
+    acc = 0
+    for value in values:
+        acc += value
+    return acc
+""",
+    )
+    counted = _write(
+        tmp_path,
+        "src/pkg/counted.py",
+        """
+def count_positive(values):
+    count = 0
+    for value in values:
+        if value > 0:
+            count += 1
+    return count
+""",
+    )
+    service = RecordingEmbeddingService()
+    paths = (left, right, summed, counted)
+
+    skipping = DuplicationAnalysisLayer(
+        embedding_service=service,
+        semantic_skip_syntax_similarity=1.0,
+    ).run(_vectors(tmp_path, *paths))
+    baseline = DuplicationAnalysisLayer(
+        embedding_service=RecordingEmbeddingService(),
+    ).run(_vectors(tmp_path, *paths))
+
+    assert len(service.texts) == 2
+    assert not any("invoice" in text or "order" in text for text in service.texts)
+    for skipped_vector, baseline_vector in zip(skipping, baseline, strict=True):
+        for metric in ("semantic_duplicate_blocks_count", "duplicate_file_candidates_count"):
+            assert skipped_vector.metrics[metric] == baseline_vector.metrics[metric]
+
+
+
+def test_clone_classes_store_each_pair_once_and_group_transitively(tmp_path: Path) -> None:
+    layer = DuplicationAnalysisLayer(
+        embedding_service=IndexedEmbeddingService(),
+        min_block_lines=1,
+        min_block_tokens=1,
+    )
+    blocks = [
+        layer._extract_blocks(tmp_path / f"{name}.py", f"def {name}():\n    return 1\n", file_index=index)[0]
+        for index, name in enumerate(("a", "b", "c", "d"))
+    ]
+
+    table = CloneClassTable.from_pairs(blocks, [(0, 1, 0.97), (1, 2, 0.99), (0, 3, math.nan)])
+
+    assert table.pair_count == 2
+    assert len(table.classes) == 1
+    clone_class = table.class_of(blocks[0])
+    assert clone_class is table.class_of(blocks[2])
+    assert clone_class.members == tuple(blocks[:3])
+    assert clone_class.file_paths == {block.file_path for block in blocks[:3]}
+    assert [table.best_similarity(block) for block in blocks[:3]] == [0.97, 0.99, 0.99]
+    assert table.class_of(blocks[3]) is None
+    assert table.direct_peer_files(blocks[0]) == {blocks[1].file_path}
+
+    linked = CloneClassTable.from_pairs(blocks, [(0, 1, 0.97), (1, 2, 0.9)], link_threshold=0.95)
+
+    assert linked.pair_count == 2
+    assert linked.class_of(blocks[0]).members == tuple(blocks[:2])
+    assert linked.class_of(blocks[2]).members == (blocks[2],)
+    assert linked.direct_peer_files(blocks[1]) == {blocks[0].file_path, blocks[2].file_path}
+
+
+def test_duplication_layer_counts_direct_peers_not_transitive_class_members(tmp_path: Path) -> None:
+    _mark_repo_root(tmp_path)
+    paths = [
+        _write(
+            tmp_path,
+            f"src/pkg/{name}.py",
+            f"""
+def {name}_handler(request):
+    {body}
+""",
+        )
+        for name, body in (
+            ("alpha", "payload = request.json()\n    payload['seen'] = True\n    return payload"),
+            ("beta", "headers = dict(request.headers)\n    return {'headers': headers, 'ok': True}"),
+            ("gamma", "for key in request.args:\n        print(key, request.args[key])\n    return None"),
+        )
+    ]
+
+    layer = DuplicationAnalysisLayer(
+        embedding_service=ChainEmbeddingService(),
+        semantic_similarity_threshold=0.86,
+        min_block_lines=2,
+        min_block_tokens=1,
+    )
+    vectors = layer.run(_vectors(tmp_path, *paths))
+    by_path = {vector.absolute_path: vector for vector in vectors}
+    alpha = by_path[paths[0]]
+
+    # alpha matches beta directly; gamma is only reachable through beta.
+    assert alpha.metrics["semantic_duplicate_blocks_count"] == 1
+    assert alpha.metrics["max_similarity_score"] == 0.866025
+    assert alpha.metrics["duplicate_file_candidates_count"] == 1
+    assert by_path[paths[1]].metrics["duplicate_file_candidates_count"] == 2
+    assert alpha.metadata["semantic_duplicate_blocks_sample"] == [
+        {
+            "kind": "function",
+            "start_line": 1,
+            "end_line": 4,
+            "clone_class_id": 0,
+            "clone_class_size": 1,
+            "matched_files": ["src/pkg/beta.py"],
+            "max_similarity": 0.866025,
+        }
+    ]
+
+    chained = DuplicationAnalysisLayer(
+        embedding_service=ChainEmbeddingService(),
+        semantic_similarity_threshold=0.86,
+        clone_class_similarity_threshold=0.86,
+        min_block_lines=2,
+        min_block_tokens=1,
+    )
+    alpha = {vector.absolute_path: vector for vector in chained.run(_vectors(tmp_path, *paths))}[paths[0]]
+
+    assert alpha.metrics["duplicate_file_candidates_count"] == 1
+    assert alpha.metadata["semantic_duplicate_blocks_sample"][0]["clone_class_size"] == 3
+    assert alpha.metadata["semantic_duplicate_blocks_sample"][0]["matched_files"] == ["src/pkg/beta.py"]
+
+
+def test_block_budget_caps_blocks_and_skips_generated_files(tmp_path: Path) -> None:
+    _mark_repo_root(tmp_path)
+    functions = "\n\n".join(
+        f"def helper_{index}(value):\n"
+        + "".join(f"    value = value + {step}\n" for step in range(index + 2))
+        + "    return value"
+        for index in range(4)
+    )
+    handwritten = _write(tmp_path, "src/pkg/helpers.py", functions)
+    generated = _write(tmp_path, "src/pkg/helpers_pb2.py", "# Code generated by protoc. DO NOT EDIT.\n" + functions)
+    curated = _write(tmp_path, "src/pkg/curated.py", "# Do not edit without updating the docs.\n" + functions)
+
+    layer = DuplicationAnalysisLayer(
+        embedding_service=IndexedEmbeddingService(),
+        min_block_lines=2,
+        min_block_tokens=1,
+        max_blocks_per_file=2,
+        block_scale_file_lines=10,
+        generated_code_markers=DuplicationAnalysisLayer.DEFAULT_GENERATED_CODE_MARKERS,
+    )
+    vectors = layer.run(_vectors(tmp_path, handwritten, generated, curated))
+    by_path = {vector.absolute_path: vector for vector in vectors}
+
+    # 25 file lines at 2 block lines per 10 file lines raise the minimum to 5.
+    assert by_path[handwritten].metadata["block_budget"] == {
+        "candidate_count": 4,
+        "skipped_count": 2,
+        "skipped_min_size_count": 1,
+        "skipped_budget_count": 1,
+        "min_block_lines": 5,
+        "generated": False,
+    }
+    assert by_path[handwritten].metadata["blocks_analyzed_count"] == 2
+    assert by_path[generated].metadata["block_budget"]["generated"] is True
+    assert by_path[generated].metadata["blocks_analyzed_count"] == 0
+    assert by_path[generated].metrics["duplicate_blocks_count"] == 0
+    assert by_path[curated].metadata["block_budget"]["generated"] is False
+
+
 def _mark_repo_root(path: Path) -> None:
     (path / ".git").mkdir()
 
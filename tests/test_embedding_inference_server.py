@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import threading
+from collections.abc import Sequence
+from pathlib import Path
+
+import pytest
+
+from app.analysis.services.scan_engine.pipeline.embedding_inference_server import (
+    DynamicEmbeddingBatcher,
+    EmbeddingInferenceClient,
+    EmbeddingInferenceServer,
+)
+
+
+class RecordingEmbeddingService:
+    model_id = "fake-recording"
+
+    def __init__(self) -> None:
+        self.calls: list[list[str]] = []
+        self._lock = threading.Lock()
+
+    def encode(self, texts: Sequence[str]) -> list[list[float]]:
+        with self._lock:
+            self.calls.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+class FailingEmbeddingService:
+    model_id = "fake-failure"
+
+    def encode(self, texts: Sequence[str]) -> list[list[float]]:
+        raise RuntimeError("model crashed")
+
+
+@pytest.fixture()
+def socket_path(tmp_path: Path) -> Path:
+    return tmp_path / "embed.sock"
+
+
+def test_client_encodes_through_server_in_caller_order(socket_path: Path) -> None:
+    provider = RecordingEmbeddingService()
+    server = EmbeddingInferenceServer(provider, socket_path, max_wait_seconds=0.0)
+    server.serve_in_background()
+    try:
+        client = EmbeddingInferenceClient(socket_path)
+
+        vectors = client.encode(["x" * 200, "ab", "abcd"])
+
+        assert client.model_id == "fake-recording"
+        assert vectors == [[200.0, 1.0], [2.0, 1.0], [4.0, 1.0]]
+    finally:
+        server.stop()
+
+
+def test_batcher_merges_concurrent_requests_and_buckets_by_length() -> None:
+    provider = RecordingEmbeddingService()
+    batcher = DynamicEmbeddingBatcher(provider, max_wait_seconds=0.2)
+    batcher.start()
+    results: dict[int, list[list[float]]] = {}
+
+    def _request(index: int, texts: list[str]) -> None:
+        results[index] = batcher.encode(texts)
+
+    threads = [
+        threading.Thread(target=_request, args=(0, ["short", "y" * 300])),
+        threading.Thread(target=_request, args=(1, ["tiny"])),
+    ]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        batcher.stop()
+
+    assert results[0] == [[5.0, 1.0], [300.0, 1.0]]
+    assert results[1] == [[4.0, 1.0]]
+    assert sorted(provider.calls) == sorted([["short", "tiny"], ["y" * 300]])
+
+
+def test_client_surfaces_server_side_failures(socket_path: Path) -> None:
+    server = EmbeddingInferenceServer(FailingEmbeddingService(), socket_path, max_wait_seconds=0.0)
+    server.serve_in_background()
+    try:
+        with pytest.raises(RuntimeError, match="model crashed"):
+            EmbeddingInferenceClient(socket_path).encode(["alpha"])
+    finally:
+        server.stop()
+
+
+def test_client_reports_unavailable_server(socket_path: Path) -> None:
+    client = EmbeddingInferenceClient(socket_path)
+
+    assert client.model_id == EmbeddingInferenceClient.FALLBACK_MODEL_ID
+    with pytest.raises(RuntimeError, match="unavailable"):
+        client.encode(["alpha"])
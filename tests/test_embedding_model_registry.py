@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import torch
+import torch.nn.functional as functional
+
+from app.analysis.services.scan_engine.pipeline.code_embedding_service import (
+    CodeEmbeddingService,
+)
+from app.analysis.services.scan_engine.pipeline.embedding_model_registry import (
+    EmbeddingModelRegistry,
+    LoadedEmbeddingModel,
+    model_memory_bytes,
+)
+
+
+def test_registry_loads_model_once_for_services_sharing_a_key(monkeypatch) -> None:
+    registry = EmbeddingModelRegistry()
+    load_calls: list[str] = []
+
+    def _load_model(service: CodeEmbeddingService) -> LoadedEmbeddingModel:
+        load_calls.append(service.model_id)
+        return _loaded_model()
+
+    monkeypatch.setattr(CodeEmbeddingService, "_load_model", _load_model)
+
+    first = CodeEmbeddingService(model_id="example/model", model_registry=registry)
+    second = CodeEmbeddingService(model_id="example/model", model_registry=registry)
+
+    assert len(first.encode(["alpha", "beta"])) == 2
+    assert len(second.encode(["gamma"])) == 1
+    assert load_calls == ["example/model"]
+    assert second._model is None
+    assert registry.stats()["resident_models"] == 1
+
+
+def test_registry_unloads_idle_models_but_keeps_checked_out_ones() -> None:
+    registry = EmbeddingModelRegistry(idle_unload_seconds=10)
+
+    with registry.checkout("busy", _loaded_model) as busy:
+        registry.get_or_load("idle", _loaded_model)
+        unloaded = registry.unload_idle(now=busy.last_used_at + 60)
+
+        assert unloaded == 1
+        assert "busy" in registry
+        assert "idle" not in registry
+
+
+def test_registry_evicts_least_recently_used_models_over_memory_budget() -> None:
+    model_bytes = model_memory_bytes(torch.nn.Linear(4, 4))
+    registry = EmbeddingModelRegistry(max_resident_bytes=model_bytes)
+
+    registry.get_or_load("first", _loaded_model)
+    registry.get_or_load("second", _loaded_model)
+
+    assert "first" not in registry
+    assert "second" in registry
+    assert registry.resident_bytes() == model_bytes
+
+
+def _loaded_model() -> LoadedEmbeddingModel:
+    return LoadedEmbeddingModel(
+        tokenizer=_Tokenizer(),
+        model=_Model(),
+        torch=torch,
+        functional=functional,
+        device="cpu",
+        pooling_mode="mean",
+    )
+
+
+class _Tokenizer:
+    def __call__(self, batch: list[str], **_: object) -> dict[str, list[list[int]]]:
+        return {
+            "input_ids": [[1, 1] for _ in batch],
+            "attention_mask": [[1, 1] for _ in batch],
+        }
+
+    def pad(self, features: list[dict[str, list[int]]], **_: object) -> dict[str, torch.Tensor]:
+        return {key: torch.tensor([feature[key] for feature in features]) for key in features[0]}
+
+
+class _Model(torch.nn.Linear):
+    def __init__(self) -> None:
+        super().__init__(4, 4)
+
+    def __call__(self, **encoded: torch.Tensor) -> tuple[torch.Tensor]:
+        batch_size, seq_length = encoded["input_ids"].shape
+        return (torch.ones(batch_size, seq_length, 4),)
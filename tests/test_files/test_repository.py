@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 import uuid
+from decimal import Decimal
 
 import pytest
 
 from app.core.enums import ScanStatus, UserRole
 from app.core.exceptions.repository_exceptions import RecordNotFoundException
+from app.files.files_dtos import FileListCursor, FileListFilters
 from app.files.files_repository import FileRepository
 from app.models import (
     CircularDependencyGroup,
@@ -85,3 +87,58 @@ def test_repository_rejects_inaccessible_unsuccessful_and_missing_scans(db_sessi
         repository.list_scan_dependency_graph(user.id, uuid.uuid4())
 
     assert user.id is not None
+
+
+def test_repository_checks_denormalized_scan_owner_in_file_queries(db_session):
+    user, scan = _successful_scan(db_session)
+    db_session.add(ScanFile(scan_id=scan.id, file_path='src/a.py', priority_band='high'))
+    db_session.commit()
+    other_user, _ = _successful_scan(db_session)
+
+    repository = FileRepository(db_session)
+
+    assert scan.owner_id == user.id
+    assert [row.file_path for row in repository.list_by_scan(user.id, scan.id, FileListFilters()).rows] == ['src/a.py']
+    with pytest.raises(RecordNotFoundException):
+        repository.list_by_scan(other_user.id, scan.id, FileListFilters())
+    with pytest.raises(RecordNotFoundException):
+        repository.list_scan_dependency_graph(other_user.id, scan.id)
+
+
+@pytest.mark.parametrize('sort', ['path', 'score'])
+def test_repository_pages_scan_files_by_keyset_cursor(db_session, sort):
+    user, scan = _successful_scan(db_session)
+    scores = [None, Decimal('0.5'), Decimal('0.5'), Decimal('0.9'), None, Decimal('0.1'), Decimal('0.5')]
+    db_session.add_all(
+        ScanFile(
+            scan_id=scan.id,
+            file_path=f'src/file_{index}.py',
+            refactor_score=score,
+            priority_band='high' if index % 2 else 'LOW',
+        )
+        for index, score in enumerate(scores)
+    )
+    db_session.commit()
+    repository = FileRepository(db_session)
+
+    paths = []
+    cursor = None
+    while True:
+        page = repository.list_by_scan(user.id, scan.id, FileListFilters(sort=sort, limit=3, cursor=cursor))
+        paths.extend(row.file_path for row in page.rows)
+        if page.next_cursor is None:
+            break
+        cursor = FileListCursor.decode(page.next_cursor.encode())
+
+    if sort == 'path':
+        assert paths == [f'src/file_{index}.py' for index in range(7)]
+    else:
+        assert paths == [f'src/file_{index}.py' for index in (3, 1, 2, 6, 5, 0, 4)]
+
+    filtered = repository.list_by_scan(
+        user.id,
+        scan.id,
+        FileListFilters(sort=sort, limit=10, priority_band='low', path_prefix='src/file_'),
+    )
+    assert {row.file_path for row in filtered.rows} == {'src/file_0.py', 'src/file_2.py', 'src/file_4.py', 'src/file_6.py'}
+    assert filtered.next_cursor is None
@@ -1,12 +1,22 @@
 from __future__ import annotations
 
 import uuid
+from dataclasses import replace
 from datetime import datetime, timezone
+from decimal import Decimal
 
+import numpy as np
+import pytest
+
+from app.analysis.services.scan_engine.pipeline.clone_index import CrossProjectCloneIndex, IndexedBlock
+
+from app.core.exceptions.domain_exceptions import ValidationError
 from app.files.files_dtos import (
     CircularDependencyRow,
     DependencyEdgeRow,
     FileDetailRow,
+    FileListCursor,
+    FileListPage,
     FileListRow,
     FileRelationshipRow,
 )
@@ -40,8 +50,12 @@ class FakeFileRepository:
             direction='outgoing',
         )
 
-    def list_by_scan(self, user_id, scan_id):
-        return [FileListRow(self.file.id, self.file.file_path, self.file.priority_band)]
+    def list_by_scan(self, user_id, scan_id, filters):
+        self.list_filters = filters
+        return FileListPage(
+            rows=[FileListRow(self.file.id, self.file.file_path, self.file.priority_band)],
+            next_cursor=FileListCursor(filters.sort, self.file.file_path, self.file.id, Decimal('0.78')),
+        )
 
     def get_details(self, user_id, file_id):
         return self.file
@@ -103,6 +117,20 @@ def test_file_service_returns_minimal_scan_file_list():
     }
 
 
+def test_file_service_round_trips_list_cursor_and_rejects_mismatched_sort():
+    repository = FakeFileRepository()
+    service = FileService(repository, FakeSummaryProvider())
+
+    first = service.list_scan_files(uuid.uuid4(), repository.scan_id, sort='score', limit=1)
+    service.list_scan_files(uuid.uuid4(), repository.scan_id, sort='score', limit=1, cursor=first.next_cursor)
+
+    assert repository.list_filters.cursor == FileListCursor('score', 'src/core/service.py', repository.file.id, Decimal('0.78'))
+    with pytest.raises(ValidationError):
+        service.list_scan_files(uuid.uuid4(), repository.scan_id, sort='path', cursor=first.next_cursor)
+    with pytest.raises(ValidationError):
+        service.list_scan_files(uuid.uuid4(), repository.scan_id, cursor='not-a-cursor')
+
+
 def test_file_details_only_generate_summaries_when_requested():
     repository = FakeFileRepository()
     provider = FakeSummaryProvider()
@@ -141,3 +169,33 @@ def test_file_service_returns_scan_dependency_graph_and_circular_groups():
         'src/core/dependency.py',
         'src/core/service.py',
     ]
+
+
+def test_file_details_include_cross_project_clones_from_visible_projects(tmp_path):
+    repository = FakeFileRepository()
+    own_project, other_project = uuid.uuid4(), uuid.uuid4()
+    repository.file = replace(repository.file, project_id=own_project)
+    repository.project_names_for_user = lambda user_id: {own_project: 'api', other_project: 'worker'}
+
+    index = CrossProjectCloneIndex(tmp_path)
+    for project_id, file_path in ((own_project, 'src/core/service.py'), (other_project, 'lib/service.py'), (uuid.uuid4(), 'private.py')):
+        scan_id = uuid.uuid4()
+        index.stage(scan_id, project_id, 'fake-model', [IndexedBlock(file_path, 'function', 3, 12)], np.ones((1, 4), dtype=np.float32))
+        index.publish(scan_id)
+
+    service = FileService(repository, FakeSummaryProvider(), clone_index=index)
+    details = service.get_file_details(uuid.uuid4(), repository.file.id)
+
+    assert [match.model_dump() for match in details.cross_project_matches] == [
+        {
+            'project_id': other_project,
+            'project_name': 'worker',
+            'file_path': 'lib/service.py',
+            'kind': 'function',
+            'start_line': 3,
+            'end_line': 12,
+            'source_start_line': 3,
+            'source_end_line': 12,
+            'similarity': 1.0,
+        }
+    ]
@@ -8,7 +8,10 @@ from pathlib import Path
 
 import pytest
 
-from app.analysis.services.scan_engine.pipeline.layers.history_analysis_layer import HistoryAnalysisLayer
+from app.analysis.services.scan_engine.pipeline.layers.history_analysis_layer import (
+    BugFixSubjectClassifier,
+    HistoryAnalysisLayer,
+)
 from app.analysis.services.scan_engine.pipeline.metrics_vector import MetricsVector
 
 
@@ -137,6 +140,91 @@ def test_history_layer_computes_cyclomatic_complexity_growth(tmp_path: Path) ->
     assert vector.metrics["cyclomatic_complexity_growth_rate"] == 1.0
 
 
+def test_bug_fix_classifier_matches_keywords_at_word_boundaries() -> None:
+    classifier = BugFixSubjectClassifier(HistoryAnalysisLayer.BUG_KEYWORDS)
+
+    assert classifier.is_bug_fix("Fixes crash on empty input")
+    assert classifier.is_bug_fix("bugfix: handle None")
+    assert classifier.is_bug_fix("HOTFIX release")
+    assert not classifier.is_bug_fix("add prefix option")
+    assert not classifier.is_bug_fix("tissue sample parser")
+
+
+def test_bug_fix_classifier_rejects_empty_keyword_set() -> None:
+    with pytest.raises(ValueError):
+        BugFixSubjectClassifier(["", "  "])
+
+
+def test_history_layer_classifies_each_commit_once_across_files(tmp_path: Path) -> None:
+    repo = _init_repo(tmp_path)
+    first = repo / "first.py"
+    second = repo / "second.py"
+    first.write_text("A = 1\n", encoding="utf-8")
+    second.write_text("B = 1\n", encoding="utf-8")
+    _commit(repo, "add modules")
+
+    first.write_text("A = 2\n", encoding="utf-8")
+    second.write_text("B = 2\n", encoding="utf-8")
+    _commit(repo, "resolve defect in both modules")
+
+    first.write_text("A = 3\n", encoding="utf-8")
+    _commit(repo, "refactor first")
+
+    layer = HistoryAnalysisLayer(bug_keywords=["defect"])
+    classified: list[str] = []
+    original = layer.bug_fix_classifier.is_bug_fix
+
+    def _tracking_is_bug_fix(subject: str) -> bool:
+        classified.append(subject)
+        return original(subject)
+
+    layer.bug_fix_classifier.is_bug_fix = _tracking_is_bug_fix  # type: ignore[method-assign]
+
+    first_vector = layer.run(_vector(repo, first))
+    second_vector = layer.run(_vector(repo, second))
+
+    assert first_vector.metrics["bug_fix_commit_count"] == 1
+    assert first_vector.metrics["bug_fix_ratio"] == 0.5
+    assert second_vector.metrics["bug_fix_commit_count"] == 1
+    assert sorted(classified) == ["add modules", "refactor first", "resolve defect in both modules"]
+
+
+def test_history_layer_falls_back_to_per_file_subjects_when_index_times_out(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    repo = _init_repo(tmp_path)
+    first = repo / "first.py"
+    second = repo / "second.py"
+    first.write_text("A = 1\n", encoding="utf-8")
+    second.write_text("B = 1\n", encoding="utf-8")
+    _commit(repo, "add modules")
+
+    first.write_text("A = 2\n", encoding="utf-8")
+    second.write_text("B = 2\n", encoding="utf-8")
+    _commit(repo, "fix both modules")
+
+    layer = HistoryAnalysisLayer()
+    index_timeouts: list[float | None] = []
+    original = layer._run_git
+
+    def _timing_out_index(cwd: Path, args: list[str], timeout: float | None = None) -> str:
+        if args == ["log", "--format=%H%x1f%s"]:
+            index_timeouts.append(timeout)
+            raise RuntimeError("Git command timed out: git log --format=%H%x1f%s")
+        return original(cwd, args, timeout)
+
+    monkeypatch.setattr(layer, "_run_git", _timing_out_index)
+
+    first_vector = layer.run(_vector(repo, first))
+    second_vector = layer.run(_vector(repo, second))
+
+    assert index_timeouts == [HistoryAnalysisLayer.HISTORY_INDEX_TIMEOUT_SECONDS]
+    assert first_vector.metrics["bug_fix_commit_count"] == 1
+    assert first_vector.metrics["bug_fix_ratio"] == 1.0
+    assert second_vector.metrics["bug_fix_commit_count"] == 1
+
+
 def test_history_layer_returns_safe_defaults_for_non_git_file(tmp_path: Path) -> None:
     target = tmp_path / "target.py"
     target.write_text("print('not tracked')\n", encoding="utf-8")
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import ast
+
+from app.analysis.services.scan_engine.pipeline.import_index import (
+    ImportCache,
+    ModulePrefixTrie,
+    extract_imports,
+)
+
+
+def test_extract_imports_walks_nested_statement_lists_only() -> None:
+    source = """
+import os, pkg.util
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pkg import models
+    if True:
+        import pkg.types
+else:
+    import pkg.runtime
+
+class Service:
+    def handle(self):
+        try:
+            from . import helpers
+        except ImportError:
+            from .. import fallback
+        finally:
+            import pkg.cleanup
+"""
+
+    imports = extract_imports(ast.parse(source))
+
+    by_names = {(statement.module, statement.names): statement for statement in imports}
+    assert len(imports) == 8
+    assert by_names[(None, ("os", "pkg.util"))].type_only is False
+    assert by_names[("pkg", ("models",))].type_only is True
+    assert by_names[(None, ("pkg.types",))].type_only is True
+    assert by_names[(None, ("pkg.runtime",))].type_only is False
+    assert by_names[(None, ("helpers",))].level == 1
+    assert by_names[(None, ("fallback",))].level == 2
+    assert (None, ("pkg.cleanup",)) in by_names
+
+
+def test_module_prefix_trie_resolves_longest_known_prefix() -> None:
+    trie = ModulePrefixTrie([("pkg", "src/pkg/__init__.py"), ("pkg.util", "src/pkg/util.py")])
+
+    assert trie.longest_prefix("pkg.util.strings.join") == "src/pkg/util.py"
+    assert trie.longest_prefix("pkg.models") == "src/pkg/__init__.py"
+    assert trie.longest_prefix("pkg..util") == "src/pkg/util.py"
+    assert trie.longest_prefix("other.pkg") is None
+
+
+def test_import_cache_reuses_entries_by_content_and_evicts_oldest() -> None:
+    cache = ImportCache(max_entries=2)
+
+    first = cache.imports_for(b"import a\n")
+    assert cache.imports_for(b"import a\n") is first
+    cache.imports_for(b"import b\n")
+    cache.imports_for(b"import c\n")
+
+    assert (cache.hits, cache.misses, len(cache)) == (1, 3, 2)
+    assert cache.imports_for(b"import a\n") is not first
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import random
+from pathlib import Path
+
+import pytest
+
+from app.analysis.services.scan_engine.pipeline.dependency_graph import DependencyGraph
+from app.analysis.services.scan_engine.pipeline.incremental_dependency_graph import (
+    DependencyGraphSnapshot,
+    GraphDelta,
+    update_ancestor_counts,
+    update_components,
+)
+from app.analysis.services.scan_engine.pipeline.layers.architecture_analysis_layer import ArchitectureAnalysisLayer
+from app.analysis.services.scan_engine.pipeline.metrics_vector import LayerResult, MetricsVector
+
+
+def _random_edges(rng: random.Random, nodes: list[str], edge_count: int) -> set[tuple[str, str]]:
+    return {
+        (source, target)
+        for source, target in (tuple(rng.sample(nodes, 2)) for _ in range(edge_count))
+    }
+
+
+def _named_components(graph: DependencyGraph, components: list[list[int]]) -> set[frozenset[str]]:
+    return {
+        frozenset(graph.nodes[node] for node in component)
+        for component in components
+        if len(component) > 1
+    }
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_incremental_update_matches_full_recompute(seed: int) -> None:
+    rng = random.Random(seed)
+    previous_nodes = [f"n{index}" for index in range(60)]
+    previous_edges = _random_edges(rng, previous_nodes, 90)
+    previous_graph = DependencyGraph.from_named_edges(previous_nodes, previous_edges)
+    previous_components = [
+        [previous_graph.nodes[node] for node in component]
+        for component in previous_graph.strongly_connected_components()
+        if len(component) > 1
+    ]
+    previous_counts = dict(zip(previous_nodes, previous_graph.ancestor_counts(), strict=True))
+
+    deleted = set(rng.sample(previous_nodes, 3))
+    nodes = [node for node in previous_nodes if node not in deleted] + ["added0", "added1"]
+    edges = {
+        (source, target)
+        for source, target in previous_edges
+        if source not in deleted and target not in deleted and rng.random() > 0.05
+    }
+    edges |= _random_edges(rng, nodes, 8)
+    graph = DependencyGraph.from_named_edges(nodes, edges)
+
+    delta = GraphDelta.between(previous_nodes, previous_edges, graph)
+    components, _ = update_components(graph, delta, previous_components)
+    counts, _ = update_ancestor_counts(graph, previous_graph, delta, previous_counts)
+
+    assert _named_components(graph, components) == _named_components(graph, graph.strongly_connected_components())
+    assert counts == graph.ancestor_counts()
+
+
+def test_incremental_update_leaves_unrelated_components_alone() -> None:
+    nodes = ["a", "b", "c", "d", "e"]
+    previous_edges = {("a", "b"), ("b", "a"), ("c", "d"), ("d", "c")}
+    previous_graph = DependencyGraph.from_named_edges(nodes, previous_edges)
+    graph = DependencyGraph.from_named_edges(nodes, previous_edges | {("e", "c")})
+
+    delta = GraphDelta.between(nodes, previous_edges, graph)
+    components, region_size = update_components(graph, delta, [["a", "b"], ["c", "d"]])
+    counts, recounted = update_ancestor_counts(
+        graph,
+        previous_graph,
+        delta,
+        dict(zip(nodes, previous_graph.ancestor_counts(), strict=True)),
+    )
+
+    assert _named_components(graph, components) == {frozenset({"a", "b"}), frozenset({"c", "d"})}
+    assert region_size == 0
+    assert recounted == 2
+    assert counts == [1, 1, 2, 2, 0]
+
+
+def test_architecture_layer_patches_previous_scan(tmp_path: Path) -> None:
+    (tmp_path / ".git").mkdir()
+    paths = [
+        _write(tmp_path, "src/pkg/a.py", "from pkg import b\n"),
+        _write(tmp_path, "src/pkg/b.py", "from pkg import c\n"),
+        _write(tmp_path, "src/pkg/c.py", "VALUE = 1\n"),
+        _write(tmp_path, "src/pkg/d.py", "from pkg import a\n"),
+    ]
+    layer = ArchitectureAnalysisLayer()
+    previous = _snapshot(layer.run(_vectors(tmp_path, *paths)))
+
+    _write(tmp_path, "src/pkg/c.py", "from pkg import a\n")
+    patched = layer.run(_vectors(tmp_path, *paths), previous=previous)
+    rebuilt = layer.run(_vectors(tmp_path, *paths))
+
+    assert patched.metadata["incremental"]["mode"] == "incremental"
+    assert patched.metadata["incremental"]["reused_file_count"] == 3
+    assert patched.metadata["incremental"]["added_edge_count"] == 1
+    assert patched.metadata["sccs"] == rebuilt.metadata["sccs"]
+    assert [vector.metrics for vector in patched.vectors] == [vector.metrics for vector in rebuilt.vectors]
+
+
+def test_architecture_layer_reuses_betweenness_below_refresh_delta(tmp_path: Path) -> None:
+    (tmp_path / ".git").mkdir()
+    paths = [
+        _write(tmp_path, "src/pkg/a.py", "from pkg import b\n"),
+        _write(tmp_path, "src/pkg/b.py", "from pkg import c\n"),
+        _write(tmp_path, "src/pkg/c.py", "VALUE = 1\n"),
+    ]
+    previous = _snapshot(ArchitectureAnalysisLayer().run(_vectors(tmp_path, *paths)))
+
+    _write(tmp_path, "src/pkg/a.py", "from pkg import b\nfrom pkg import c\n")
+    patient = ArchitectureAnalysisLayer(betweenness_refresh_delta=0.5).run(
+        _vectors(tmp_path, *paths),
+        previous=previous,
+    )
+    strict = ArchitectureAnalysisLayer(betweenness_refresh_delta=0.2).run(
+        _vectors(tmp_path, *paths),
+        previous=previous,
+    )
+
+    assert patient.metadata["betweenness_estimate"] == {
+        "strategy": "reused",
+        "pivot_count": 0,
+        "edge_drift": pytest.approx(1 / 3),
+        "refresh_delta": 0.5,
+    }
+    assert patient.vectors[0].metadata["betweenness_drift"] == pytest.approx(1 / 3)
+    assert strict.metadata["betweenness_estimate"]["strategy"] == "exact"
+    assert strict.vectors[0].metadata["betweenness_drift"] == 0.0
+
+
+def _snapshot(result: LayerResult) -> DependencyGraphSnapshot:
+    def components(groups: list[dict]) -> tuple[tuple[str, ...], ...]:
+        return tuple(tuple(group["nodes"]) for group in groups)
+
+    return DependencyGraphSnapshot(
+        content_hashes={vector.relative_path: vector.metadata["content_hash"] for vector in result.vectors},
+        edges=frozenset(tuple(edge) for edge in result.metadata["dependency_edges"]),
+        type_only_edges=frozenset(tuple(edge) for edge in result.metadata["type_only_dependency_edges"]),
+        sccs=components(result.metadata["sccs"]),
+        runtime_sccs=components(result.metadata["runtime_sccs"]),
+        transitive_dependents={
+            vector.relative_path: vector.metrics["transitive_dependents_count"] for vector in result.vectors
+        },
+        betweenness={vector.relative_path: vector.metrics["betweenness_centrality"] for vector in result.vectors},
+        betweenness_drift=result.vectors[0].metadata["betweenness_drift"],
+    )
+
+
+def _write(root: Path, relative_path: str, source: str) -> Path:
+    path = root / relative_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(source, encoding="utf-8")
+    return path
+
+
+def _vectors(root: Path, *paths: Path) -> list[MetricsVector]:
+    return [
+        MetricsVector(
+            layer=ArchitectureAnalysisLayer.LAYER_NAME,
+            absolute_path=path,
+            relative_path=path.relative_to(root).as_posix(),
+        )
+        for path in paths
+    ]
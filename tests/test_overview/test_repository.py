@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+from app.core.enums import ScanStatus, UserRole
+from app.models import Project, Role, Scan, ScanFile, ScanSummary, User
+from app.overview.overview_repository import OverviewRepository
+
+
+def _project(db_session) -> Project:
+    user = User(
+        email=f"{uuid.uuid4()}@example.com",
+        username="overview-owner",
+        password="hashed",
+        role=Role(name=UserRole.CLIENT),
+    )
+    project = Project(name="Overview", repo_owner="owner", repo_name="repo", branch="main", user=user)
+    db_session.add(project)
+    db_session.flush()
+    return project
+
+
+def _scan(db_session, project: Project, finished_at: datetime, scores: dict[str, float]) -> Scan:
+    scan = Scan(project=project, status=ScanStatus.SUCCEEDED, finished_at=finished_at)
+    db_session.add(scan)
+    db_session.flush()
+    db_session.add_all(
+        ScanFile(scan_id=scan.id, file_path=file_path, refactor_score=Decimal(str(score)), priority_band="high")
+        for file_path, score in scores.items()
+    )
+    db_session.flush()
+    return scan
+
+
+def _files(db_session, scan: Scan) -> list[ScanFile]:
+    return db_session.scalars(select(ScanFile).where(ScanFile.scan_id == scan.id).order_by(ScanFile.file_path)).all()
+
+
+def test_overview_reads_aggregates_from_scan_summary(db_session) -> None:
+    project = _project(db_session)
+    scan = _scan(db_session, project, datetime.now(timezone.utc), {"src/a.py": 0.2, "src/b.py": 0.9})
+    db_session.add(
+        ScanSummary(
+            scan_id=scan.id,
+            file_count=2,
+            scored_file_count=2,
+            priority_band_counts={"critical": 1, "low": 1},
+            average_refactor_score=0.75,
+            top_files=[
+                {"id": str(file.id), "file_path": file.file_path, "refactor_score": None, "priority_band": None}
+                for file in _files(db_session, scan)
+            ],
+        )
+    )
+    db_session.flush()
+    repository = OverviewRepository(db_session)
+
+    assert repository.get_priority_band_counts(project.user_id, scan.id) == {"critical": 1, "low": 1}
+    [row] = repository.list_risk_trend_scans(project.user_id, scan.id, previous_count=3)
+    assert row.average_refactor_score == 0.75
+    assert [file.file_path for file in repository.list_top_files(project.user_id, scan.id, 5)] == [
+        "src/a.py",
+        "src/b.py",
+    ]
+
+
+def test_overview_falls_back_to_files_for_scans_without_summary(db_session) -> None:
+    project = _project(db_session)
+    finished_at = datetime.now(timezone.utc)
+    previous = _scan(db_session, project, finished_at - timedelta(days=1), {"src/a.py": 0.2, "src/b.py": 0.4})
+    scan = _scan(db_session, project, finished_at, {"src/a.py": 0.5, "src/b.py": 0.9})
+    db_session.add(ScanSummary(scan_id=scan.id, file_count=2, scored_file_count=2, average_refactor_score=0.7))
+    db_session.flush()
+    db_session.expire_all()
+    repository = OverviewRepository(db_session)
+
+    rows = repository.list_risk_trend_scans(project.user_id, scan.id, previous_count=3)
+
+    assert [row.scan_id for row in rows] == [previous.id, scan.id]
+    assert [row.average_refactor_score for row in rows] == pytest.approx([0.3, 0.7])
+    assert repository.get_priority_band_counts(project.user_id, previous.id) == {"high": 2}
+    assert [file.file_path for file in repository.list_top_files(project.user_id, previous.id, 1)] == ["src/b.py"]
+
+
+def test_overview_rolls_up_directories_in_sql(db_session) -> None:
+    project = _project(db_session)
+    scan = _scan(
+        db_session,
+        project,
+        datetime.now(timezone.utc),
+        {"src/a.py": 0.2, "src/a_b/c.py": 0.4, "src/a_b/d/e.py": 0.6, "setup.py": 0.1},
+    )
+    db_session.add(ScanFile(scan_id=scan.id, file_path="src/low.py", priority_band="LOW"))
+    db_session.flush()
+    repository = OverviewRepository(db_session)
+
+    rollups = {row.directory: row for row in repository.list_directory_rollups(project.user_id, scan.id)}
+    assert set(rollups) == {"", "src", "src/a_b", "src/a_b/d"}
+    assert rollups["src"].priority_counts == {"high": 1, "low": 1}
+    assert rollups["src"].score_total == pytest.approx(0.2)
+
+    [top] = repository.list_directory_rollups(project.user_id, scan.id, depth=1, path_prefix="src/a_")
+    assert (top.directory, top.file_count, top.priority_counts) == ("src", 2, {"high": 2})
+    assert top.score_total == pytest.approx(1.0)
+    assert [
+        row.directory
+        for row in repository.list_directory_rollups(project.user_id, scan.id, depth=2, priority_band="high")
+    ] == ["", "src", "src/a_b"]
+
+    files = repository.list_directory_files(project.user_id, scan.id, ["src/a_b"], depth=1)
+    assert [file.file_path for file in files] == ["src/a_b/c.py", "src/a_b/d/e.py"]
+    assert [file.file_path for file in repository.list_directory_files(project.user_id, scan.id, [""])] == [
+        "setup.py"
+    ]
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import json
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from app.core.enums import ScanStatus, UserRole
+from app.models import Project, Role, Scan, ScanFile, User
+from app.overview.overview_repository import OverviewRepository
+from app.overview.overview_service import OverviewService
+
+
+class FakeSummaryProvider:
+    def __init__(self) -> None:
+        self.prompts: list[str] = []
+
+    def generate(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        return json.dumps(
+            {
+                "title": "Focus",
+                "summary": "Summary",
+                "explanation": "Explanation",
+                "recommendation": "Recommendation",
+                "priority_directories": [],
+            }
+        )
+
+
+def _decision_metadata(component: str) -> dict:
+    return {"decision_analysis": {"top_contributing_components": [{"component": component}]}}
+
+
+def test_directory_views_aggregate_stored_directories(db_session) -> None:
+    user = User(
+        email=f"{uuid.uuid4()}@example.com",
+        username="directory-owner",
+        password="hashed",
+        role=Role(name=UserRole.CLIENT),
+    )
+    scan = Scan(
+        project=Project(name="Directories", repo_owner="owner", repo_name="repo", branch="main", user=user),
+        status=ScanStatus.SUCCEEDED,
+        finished_at=datetime.now(timezone.utc),
+    )
+    db_session.add(scan)
+    db_session.flush()
+    files = [
+        ("src/api/routes.py", "0.9", "critical", "history_score"),
+        ("src/api/models.py", "0.6", "high", "complexity_score"),
+        ("src/core/db.py", "0.5", "high", "history_score"),
+        ("README.py", "0.1", "low", "duplication_score"),
+    ]
+    db_session.add_all(
+        ScanFile(
+            scan_id=scan.id,
+            file_path=file_path,
+            refactor_score=Decimal(score),
+            priority_band=band,
+            metadata_json=_decision_metadata(component),
+        )
+        for file_path, score, band, component in files
+    )
+    db_session.flush()
+    provider = FakeSummaryProvider()
+    service = OverviewService(OverviewRepository(db_session), provider)
+
+    rolled_up = service.risk_by_directory(user.id, scan.id, depth=1)
+    assert [(item.directory, item.risky_file_count) for item in rolled_up.directories] == [("src", 3), ("(root)", 0)]
+
+    service.directory_insight(user.id, scan.id)
+
+    [prompt] = provider.prompts
+    context = json.loads(prompt[prompt.index('{"directories"'):prompt.rindex("}") + 1])
+    api, core, root = context["directories"]
+    assert (api["path"], api["critical_files"], api["high_files"], api["average_score"]) == ("src/api", 1, 1, 75.0)
+    assert sorted(api["top_risk_reasons"]) == ["frequent changes", "maintenance complexity"]
+    assert [file["path"] for file in api["top_files"]] == ["src/api/routes.py", "src/api/models.py"]
+    assert (core["path"], root["path"]) == ("src/core", "(root)")
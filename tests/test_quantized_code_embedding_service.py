@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import re
+from pathlib import Path
+
+import pytest
+import torch
+
+from app.analysis.services.scan_engine.pipeline.code_embedding_service import (
+    CodeEmbeddingService,
+)
+from app.analysis.services.scan_engine.pipeline.layers.duplication_analysis_layer import (
+    DuplicationAnalysisLayer,
+)
+from app.analysis.services.scan_engine.pipeline.metrics_vector import MetricsVector
+from app.analysis.services.scan_engine.pipeline.quantized_code_embedding_service import (
+    QuantizedCodeEmbeddingService,
+)
+
+transformers = pytest.importorskip("transformers")
+tokenizers = pytest.importorskip("tokenizers")
+
+
+CORPUS = {
+    "src/pkg/names.py": """
+def normalize_names(names):
+    result = []
+    for name in names:
+        result.append(name.strip().lower())
+    return result
+""",
+    "src/pkg/labels.py": """
+def clean_labels(labels):
+    output = []
+    for label in labels:
+        output.append(label.strip().lower())
+    return output
+""",
+    "src/pkg/totals.py": """
+def total_positive(values):
+    total = 0
+    for value in values:
+        if value > 0:
+            total += value
+    return total
+""",
+    "src/pkg/render.py": """
+def render_title(title):
+    cleaned = title.strip()
+    heading = cleaned.title()
+    return f"#{heading}"
+""",
+    "src/pkg/invoice.py": """
+def load_invoice_total(invoice):
+    subtotal = invoice.subtotal
+    tax = invoice.tax
+    return subtotal + tax
+""",
+}
+
+
+def test_int8_backend_matches_fp32_vectors(tmp_path: Path) -> None:
+    model_path = _tiny_model(tmp_path / "model")
+    texts = [source.strip() for source in CORPUS.values()]
+
+    fp32 = _service(CodeEmbeddingService, model_path).encode(texts)
+    int8 = _service(QuantizedCodeEmbeddingService, model_path).encode(texts)
+
+    similarities = torch.nn.functional.cosine_similarity(
+        torch.tensor(fp32),
+        torch.tensor(int8),
+    )
+    assert bool((similarities >= 0.99).all()), similarities
+
+
+def test_int8_backend_finds_identical_semantic_duplicates(tmp_path: Path) -> None:
+    model_path = _tiny_model(tmp_path / "model")
+    repo = tmp_path / "repo"
+    paths = [_write(repo, relative_path, source) for relative_path, source in CORPUS.items()]
+
+    fp32_service = _service(CodeEmbeddingService, model_path)
+    threshold = _widest_gap_threshold(fp32_service.encode([source.strip() for source in CORPUS.values()]))
+
+    def _semantic_samples(service: CodeEmbeddingService) -> dict[str, object]:
+        layer = DuplicationAnalysisLayer(
+            embedding_service=service,
+            semantic_similarity_threshold=threshold,
+        )
+        result = layer.run(_vectors(repo, paths))
+        return {
+            vector.relative_path: [
+                (sample["start_line"], sample["matched_files"])
+                for sample in vector.metadata["semantic_duplicate_blocks_sample"]
+            ]
+            for vector in result
+        }
+
+    fp32_matches = _semantic_samples(fp32_service)
+    int8_matches = _semantic_samples(_service(QuantizedCodeEmbeddingService, model_path))
+
+    assert fp32_matches == int8_matches
+    assert any(fp32_matches.values())
+
+
+def test_int8_backend_rejects_accelerator_devices() -> None:
+    with pytest.raises(ValueError, match="cpu"):
+        QuantizedCodeEmbeddingService(device="cuda")
+
+
+def _service(service_class: type[CodeEmbeddingService], model_path: Path) -> CodeEmbeddingService:
+    return service_class(
+        model_id="tiny/bert",
+        model_path=model_path,
+        device="cpu",
+        max_length=64,
+        trust_remote_code=False,
+        local_files_only=True,
+        pooling_mode="mean",
+    )
+
+
+def _tiny_model(model_path: Path) -> Path:
+    words = sorted({word for source in CORPUS.values() for word in re.findall(r"\w+|[^\w\s]", source)})
+    vocabulary = {token: index for index, token in enumerate(["[PAD]", "[UNK]", "[CLS]", "[SEP]", *words])}
+
+    tokenizer_model = tokenizers.Tokenizer(tokenizers.models.WordLevel(vocabulary, unk_token="[UNK]"))
+    tokenizer_model.pre_tokenizer = tokenizers.pre_tokenizers.Whitespace()
+    tokenizer = transformers.PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer_model,
+        pad_token="[PAD]",
+        unk_token="[UNK]",
+        cls_token="[CLS]",
+        sep_token="[SEP]",
+    )
+
+    torch.manual_seed(7)
+    model = transformers.BertModel(
+        transformers.BertConfig(
+            vocab_size=len(vocabulary),
+            hidden_size=64,
+            num_hidden_layers=2,
+            num_attention_heads=4,
+            intermediate_size=128,
+            max_position_embeddings=128,
+        )
+    )
+    model.save_pretrained(model_path)
+    tokenizer.save_pretrained(model_path)
+    return model_path
+
+
+def _widest_gap_threshold(embeddings: list[list[float]]) -> float:
+    matrix = torch.tensor(embeddings)
+    similarities = sorted(
+        float(value)
+        for row, column in zip(*torch.triu_indices(len(embeddings), len(embeddings), offset=1))
+        for value in [torch.dot(matrix[row], matrix[column])]
+    )
+    gaps = [(right - left, (left + right) / 2) for left, right in zip(similarities, similarities[1:])]
+    return max(gaps)[1]
+
+
+def _write(root: Path, relative_path: str, source: str) -> Path:
+    path = root / relative_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(source.strip() + "\n", encoding="utf-8")
+    return path
+
+
+def _vectors(root: Path, paths: list[Path]) -> list[MetricsVector]:
+    return [
+        MetricsVector(
+            layer=DuplicationAnalysisLayer.LAYER_NAME,
+            absolute_path=path,
+            relative_path=path.relative_to(root).as_posix(),
+        )
+        for path in paths
+    ]
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import uuid
+from decimal import Decimal
+from pathlib import Path
+
+from sqlalchemy import select
+
+from app.analysis.scan_rescoring_service import ScanRescoringService
+from app.analysis.scan_result_repository import ScanResultRepository
+from app.analysis.services.scan_engine.pipeline.layers.decision_analysis_layer import DecisionAnalysisLayer
+from app.analysis.services.scan_engine.pipeline.metrics_vector import LayerResult, MetricsVector
+from app.core.enums import ScanStatus, UserRole
+from app.models import Project, Role, Scan, ScanFile, User
+
+
+def _file_result(relative_path: str, complexity: int, update_count: int) -> LayerResult:
+    absolute_path = Path("/workspace") / relative_path
+    return LayerResult(
+        vectors=[
+            MetricsVector(
+                layer="static_analysis",
+                absolute_path=absolute_path,
+                relative_path=relative_path,
+                metrics={
+                    "lines_of_code": 40 * complexity,
+                    "max_cyclomatic_complexity": complexity,
+                    "max_cognitive_complexity": 2 * complexity,
+                },
+            ),
+            MetricsVector(
+                layer="history_analysis",
+                absolute_path=absolute_path,
+                relative_path=relative_path,
+                metrics={
+                    "update_count": update_count,
+                    "recent_update_count": update_count // 2,
+                    "churn_to_size_ratio": 0.3,
+                    "bug_fix_ratio": 0.4,
+                    "contributors_count": 3,
+                },
+                errors=["blame failed"] if complexity > 10 else [],
+            ),
+        ]
+    )
+
+
+def test_rescoring_replaces_stored_decision_results(db_session) -> None:
+    user = User(
+        email=f"{uuid.uuid4()}@example.com",
+        username="rescoring-owner",
+        password="hashed",
+        role=Role(name=UserRole.CLIENT),
+    )
+    project = Project(name="Rescoring", repo_owner="owner", repo_name="repo", branch="main", user=user)
+    scan = Scan(project=project, status=ScanStatus.SUCCEEDED)
+    running = Scan(project=project, status=ScanStatus.RUNNING)
+    db_session.add_all([scan, running])
+    db_session.flush()
+
+    file_results = [
+        _file_result(f"src/file_{index}.py", complexity=3 * index, update_count=index)
+        for index in range(7)
+    ]
+    previous_model = DecisionAnalysisLayer()
+    previous_model.SCORING_MODEL_VERSION = 3
+    previous_model.component_weights = {
+        "complexity_score": 0.10,
+        "history_score": 0.60,
+        "duplication_score": 0.10,
+        "architecture_score": 0.20,
+    }
+    stored = LayerResult(
+        vectors=[vector for result in file_results for vector in result.vectors]
+        + previous_model.run_batch(file_results).vectors
+    )
+    repository = ScanResultRepository(db_session)
+    stale_scores = {record.file_path: record.refactor_score for record in repository.store_results(scan.id, [], stored)}
+
+    summary = ScanRescoringService(repository, DecisionAnalysisLayer(), batch_size=3).rescore_scans(project.id)
+
+    assert (summary.scan_count, summary.file_count, summary.failed_scan_ids) == (1, 7, [])
+    assert summary.scoring_model_version == DecisionAnalysisLayer.SCORING_MODEL_VERSION
+    expected = {vector.relative_path: vector for vector in DecisionAnalysisLayer().run_batch(file_results).vectors}
+    expected_static = {result.vectors[0].relative_path: result.vectors[0].metrics for result in file_results}
+    records = db_session.scalars(select(ScanFile).where(ScanFile.scan_id == scan.id)).all()
+    assert len(records) == 7
+    for record in records:
+        db_session.refresh(record)
+        vector = expected[record.file_path]
+        assert record.metrics["decision_analysis"] == vector.metrics
+        assert record.metrics["static_analysis"] == expected_static[record.file_path]
+        assert record.metadata_json["decision_analysis"] == vector.metadata
+        assert record.metadata_json["decision_analysis"]["scoring_model_version"] == 4
+        assert record.priority_band == vector.metadata["priority_band"]
+        assert record.refactor_score == Decimal(str(round(vector.metrics["refactor_score"], 5)))
+    assert any(record.refactor_score != stale_scores[record.file_path] for record in records)
+
+
+def test_percentile_rescoring_reuses_tables_stored_with_the_scan(db_session) -> None:
+    user = User(
+        email=f"{uuid.uuid4()}@example.com",
+        username="percentile-owner",
+        password="hashed",
+        role=Role(name=UserRole.CLIENT),
+    )
+    scan = Scan(
+        project=Project(name="Percentile", repo_owner="owner", repo_name="repo", branch="main", user=user),
+        status=ScanStatus.SUCCEEDED,
+    )
+    db_session.add(scan)
+    db_session.flush()
+
+    file_results = [
+        _file_result(f"src/file_{index}.py", complexity=index, update_count=2 * index)
+        for index in range(9)
+    ]
+    layer = DecisionAnalysisLayer(normalization_mode="percentile", quantile_points=11)
+    decision_result = layer.run_batch(file_results)
+    repository = ScanResultRepository(db_session)
+    repository.store_results(
+        scan.id,
+        [],
+        LayerResult(
+            vectors=[vector for result in file_results for vector in result.vectors] + decision_result.vectors,
+            metadata=decision_result.metadata,
+        ),
+    )
+
+    tables = repository.load_decision_normalization(scan.id)
+    assert tables is not None
+    assert tables.to_json() == decision_result.metadata["decision_normalization"]["tables"]
+
+    ScanRescoringService(repository, layer, batch_size=2).rescore_scan(scan.id)
+
+    expected = {vector.relative_path: vector.metrics for vector in decision_result.vectors}
+    for record in db_session.scalars(select(ScanFile).where(ScanFile.scan_id == scan.id)).all():
+        db_session.refresh(record)
+        assert record.metrics["decision_analysis"] == expected[record.file_path]
+        assert record.metadata_json["decision_analysis"]["normalization_mode"] == "percentile"
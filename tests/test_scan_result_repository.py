@@ -1,13 +1,27 @@
 from __future__ import annotations
 
 import uuid
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
+import pytest
 from sqlalchemy import select
 
 from app.analysis.scan_result_repository import ScanResultRepository
+from app.analysis.services.scan_engine.pipeline.layers.architecture_analysis_layer import ArchitectureAnalysisLayer
 from app.analysis.services.scan_engine.pipeline.metrics_vector import LayerResult, MetricsVector
-from app.models import CircularDependencyGroup, CircularDependencyMember, CoChangeEdge, DependencyEdge
+from app.core.enums import ScanStatus, UserRole
+from app.models import (
+    CircularDependencyGroup,
+    CircularDependencyMember,
+    CoChangeEdge,
+    DependencyEdge,
+    Project,
+    Role,
+    Scan,
+    ScanSummary,
+    User,
+)
 
 
 def test_repository_groups_by_relative_path_and_stores_relationships_directly(db_session) -> None:
@@ -68,3 +82,98 @@ def test_repository_groups_by_relative_path_and_stores_relationships_directly(db
     [group] = db_session.scalars(select(CircularDependencyGroup)).all()
     assert group.size == 2
     assert len(db_session.scalars(select(CircularDependencyMember)).all()) == 2
+
+
+def test_repository_loads_latest_successful_dependency_snapshot(db_session, tmp_path: Path) -> None:
+    sources = {
+        "src/pkg/a.py": "from typing import TYPE_CHECKING\nfrom pkg import b\nif TYPE_CHECKING:\n    from pkg import c\n",
+        "src/pkg/b.py": "from pkg import a\n",
+        "src/pkg/c.py": "VALUE = 1\n",
+    }
+    vectors = []
+    for relative_path, source in sources.items():
+        path = tmp_path / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(source, encoding="utf-8")
+        vectors.append(
+            MetricsVector(
+                layer=ArchitectureAnalysisLayer.LAYER_NAME,
+                absolute_path=path,
+                relative_path=relative_path,
+            )
+        )
+    result = ArchitectureAnalysisLayer().run(vectors)
+
+    user = User(
+        email=f"{uuid.uuid4()}@example.com",
+        username="snapshot-owner",
+        password="hashed",
+        role=Role(name=UserRole.CLIENT),
+    )
+    project = Project(name="Snapshot", repo_owner="owner", repo_name="repo", branch="main", user=user)
+    scan = Scan(project=project, status=ScanStatus.SUCCEEDED)
+    running = Scan(project=project, status=ScanStatus.RUNNING)
+    db_session.add_all([scan, running])
+    db_session.flush()
+    repository = ScanResultRepository(db_session)
+    repository.store_results(scan.id, list(sources), result)
+
+    snapshot = repository.load_dependency_snapshot(project.id, exclude_scan_id=running.id)
+
+    assert snapshot is not None
+    assert snapshot.edges == {
+        ("src/pkg/a.py", "src/pkg/b.py"),
+        ("src/pkg/a.py", "src/pkg/c.py"),
+        ("src/pkg/b.py", "src/pkg/a.py"),
+    }
+    assert snapshot.type_only_edges == {("src/pkg/a.py", "src/pkg/c.py")}
+    assert snapshot.sccs == (("src/pkg/a.py", "src/pkg/b.py"),)
+    assert snapshot.transitive_dependents == {"src/pkg/a.py": 1, "src/pkg/b.py": 1, "src/pkg/c.py": 0}
+    assert set(snapshot.content_hashes) == set(sources)
+    assert repository.load_dependency_snapshot(project.id, exclude_scan_id=scan.id) is None
+
+
+def test_repository_writes_scan_summary_with_results(db_session) -> None:
+    user = User(
+        email=f"{uuid.uuid4()}@example.com",
+        username="summary-owner",
+        password="hashed",
+        role=Role(name=UserRole.CLIENT),
+    )
+    started_at = datetime.now(timezone.utc) - timedelta(seconds=30)
+    scan = Scan(
+        project=Project(name="Summary", repo_owner="owner", repo_name="repo", branch="main", user=user),
+        status=ScanStatus.RUNNING,
+        started_at=started_at,
+    )
+    db_session.add(scan)
+    db_session.flush()
+    scores = {"src/a.py": (0.8, "CRITICAL"), "src/b.py": (0.4, "medium"), "src/c.py": (0.6, "high")}
+    result = LayerResult(
+        vectors=[
+            MetricsVector(
+                layer="decision_analysis",
+                absolute_path=Path("/workspace") / relative_path,
+                relative_path=relative_path,
+                metrics={"refactor_score": score},
+                metadata={"priority_band": band},
+            )
+            for relative_path, (score, band) in scores.items()
+        ]
+    )
+
+    ScanResultRepository(db_session).store_results(scan.id, [*scores, "src/unscored.py"], result)
+
+    summary = db_session.get(ScanSummary, scan.id)
+    assert summary is not None
+    assert (summary.file_count, summary.scored_file_count) == (4, 3)
+    assert summary.priority_band_counts == {"critical": 1, "high": 1, "medium": 1, "unknown": 1}
+    assert summary.average_refactor_score == pytest.approx(0.6)
+    assert float(summary.max_refactor_score) == pytest.approx(0.8)
+    assert summary.duration_seconds == pytest.approx(30, abs=5)
+    assert [entry["file_path"] for entry in summary.top_files] == [
+        "src/a.py",
+        "src/c.py",
+        "src/b.py",
+        "src/unscored.py",
+    ]